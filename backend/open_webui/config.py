@@ -3,6 +3,7 @@ import logging
 import os
 import shutil
 import base64
+import time
 import redis
 
 from datetime import datetime
@@ -17,6 +18,7 @@ from authlib.integrations.starlette_client import OAuth
 
 
 from open_webui.env import (
+    CONFIG_SYNC_INTERVAL,
     DATA_DIR,
     DATABASE_URL,
     ENV,
@@ -222,11 +224,21 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Config values are read from memory. With Redis, a worker that changes a
+    value also bumps a shared version, and the other workers reload all values
+    in one round trip once they see a new version, checking it at most every
+    CONFIG_SYNC_INTERVAL seconds.
+    """
+
     _redis: Union[redis.Redis, redis.cluster.RedisCluster] = None
     _redis_key_prefix: str
 
     _state: dict[str, PersistentConfig]
 
+    _version: int = -1
+    _synced_at: float = 0.0
+
     def __init__(
         self,
         redis_url: Optional[str] = None,
@@ -258,27 +270,56 @@ class AppConfig:
             if self._redis:
                 redis_key = f"{self._redis_key_prefix}:config:{key}"
                 self._redis.set(redis_key, json.dumps(self._state[key].value))
+                self._redis.incr(f"{self._redis_key_prefix}:config:version")
+
+    def _sync(self):
+        now = time.monotonic()
+        if self._version >= 0 and now - self._synced_at < CONFIG_SYNC_INTERVAL:
+            return
+        super().__setattr__("_synced_at", now)
+
+        try:
+            version = int(
+                self._redis.get(f"{self._redis_key_prefix}:config:version") or 0
+            )
+            if version == self._version:
+                return
+
+            keys = list(self._state)
+            # Not a transaction, the keys may live on different cluster slots
+            pipe = self._redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(f"{self._redis_key_prefix}:config:{key}")
+            redis_values = pipe.execute()
+        except Exception as e:
+            log.warning(f"Error reading config from Redis: {e}")
+            return
+
+        for key, redis_value in zip(keys, redis_values):
+            if redis_value is None:
+                continue
+
+            try:
+                decoded_value = json.loads(redis_value)
+
+                # Update the in-memory value if different
+                if self._state[key].value != decoded_value:
+                    self._state[key].value = decoded_value
+                    log.info(f"Updated {key} from Redis: {decoded_value}")
+
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+
+        # Values written after the version was read are picked up next time
+        super().__setattr__("_version", version)
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
+        # If Redis is available, pick up values changed by other workers
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:config:{key}"
-            redis_value = self._redis.get(redis_key)
-
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
-
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
-
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+            self._sync()
 
         return self._state[key].value
 
@@ -933,6 +974,12 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Local copies of files kept by the s3, gcs and azure providers, in MB, the least
+# recently used copies are removed past this size (0 for no limit)
+STORAGE_LOCAL_CACHE_MAX_SIZE = max(
+    int(os.environ.get("STORAGE_LOCAL_CACHE_MAX_SIZE", "10240")), 0
+)
+
 ####################################
 # File Upload DIR
 ####################################
@@ -2128,6 +2175,12 @@ Ensure that the tools are effectively utilized to achieve the highest-quality an
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Persistent per-collection BM25 indexes used by hybrid search. Indexes only see
+# the writes made through the nodes sharing this directory, so nodes that share a
+# vector DB must share it too, e.g. on a shared volume.
+BM25_INDEX_DIR = os.environ.get("BM25_INDEX_DIR", f"{DATA_DIR}/vector_db/bm25")
+BM25_INDEX_CACHE_SIZE = int(os.environ.get("BM25_INDEX_CACHE_SIZE", "32"))
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -2727,6 +2780,54 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Embeddings are cached by engine, model, API base URL, prefix and text hash. The
+# memory tier keeps up to EMBEDDING_CACHE_MAX_SIZE MB of float32 vectors (0
+# disables the cache), EMBEDDING_CACHE_BACKEND adds a shared "redis" or persistent
+# "disk" tier. The disk tier drops entries older than EMBEDDING_CACHE_DISK_MAX_AGE
+# seconds, and the oldest ones past EMBEDDING_CACHE_DISK_MAX_SIZE MB (0 for no limit)
+EMBEDDING_CACHE_MAX_SIZE = max(int(os.environ.get("EMBEDDING_CACHE_MAX_SIZE", "64")), 0)
+EMBEDDING_CACHE_BACKEND = os.environ.get("EMBEDDING_CACHE_BACKEND", "").lower()
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", f"{CACHE_DIR}/embeddings")
+EMBEDDING_CACHE_DISK_MAX_SIZE = max(
+    int(os.environ.get("EMBEDDING_CACHE_DISK_MAX_SIZE", "1024")), 0
+)
+EMBEDDING_CACHE_DISK_MAX_AGE = max(
+    int(os.environ.get("EMBEDDING_CACHE_DISK_MAX_AGE", "2592000")), 0
+)
+EMBEDDING_CACHE_REDIS_TTL = int(os.environ.get("EMBEDDING_CACHE_REDIS_TTL", "604800"))
+
+# Number of files a knowledge base reindex processes at the same time
+KNOWLEDGE_REINDEX_CONCURRENCY = max(
+    int(os.environ.get("KNOWLEDGE_REINDEX_CONCURRENCY", "4")), 1
+)
+
+# Batches of files are ingested in stages with their own number of workers, the
+# loaders, the text splitters and the embedding requests, each request embedding up
+# to INGESTION_EMBEDDING_BATCH_SIZE chunks taken across files
+INGESTION_LOAD_CONCURRENCY = max(
+    int(os.environ.get("INGESTION_LOAD_CONCURRENCY", str(os.cpu_count() or 4))), 1
+)
+INGESTION_SPLIT_CONCURRENCY = max(
+    int(os.environ.get("INGESTION_SPLIT_CONCURRENCY", "2")), 1
+)
+INGESTION_EMBEDDING_BATCH_SIZE = max(
+    int(os.environ.get("INGESTION_EMBEDDING_BATCH_SIZE", "128")), 1
+)
+INGESTION_EMBEDDING_CONCURRENCY = max(
+    int(os.environ.get("INGESTION_EMBEDDING_CONCURRENCY", "4")), 1
+)
+
+# Collection queries of a retrieval run concurrently up to this limit, a single
+# collection query is given up after RAG_RETRIEVAL_TIMEOUT seconds (0 disables)
+RAG_RETRIEVAL_CONCURRENCY = max(
+    int(os.environ.get("RAG_RETRIEVAL_CONCURRENCY", "8")), 1
+)
+RAG_RETRIEVAL_TIMEOUT = float(os.environ.get("RAG_RETRIEVAL_TIMEOUT", "60") or 0)
+
+RAG_RERANKING_BATCH_SIZE = max(int(os.environ.get("RAG_RERANKING_BATCH_SIZE", "32")), 1)
+# Number of (model, query, chunk) reranking scores kept in memory, 0 disables
+RERANKING_SCORE_CACHE_SIZE = int(os.environ.get("RERANKING_SCORE_CACHE_SIZE", "10000"))
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -2979,6 +3080,16 @@ WEB_SEARCH_TRUST_ENV = PersistentConfig(
     os.getenv("WEB_SEARCH_TRUST_ENV", "False").lower() == "true",
 )
 
+# Search engine responses are cached by engine and query for WEB_SEARCH_CACHE_TTL
+# seconds, fetched pages by URL for WEB_PAGE_CACHE_TTL seconds and then revalidated
+# with their ETag or Last-Modified date until WEB_PAGE_CACHE_MAX_AGE. Each cache
+# keeps up to its size of entries in memory (0 disables it), shared through Redis
+WEB_SEARCH_CACHE_SIZE = max(int(os.environ.get("WEB_SEARCH_CACHE_SIZE", "1000")), 0)
+WEB_SEARCH_CACHE_TTL = max(int(os.environ.get("WEB_SEARCH_CACHE_TTL", "3600")), 1)
+WEB_PAGE_CACHE_SIZE = max(int(os.environ.get("WEB_PAGE_CACHE_SIZE", "500")), 0)
+WEB_PAGE_CACHE_TTL = max(int(os.environ.get("WEB_PAGE_CACHE_TTL", "3600")), 1)
+WEB_PAGE_CACHE_MAX_AGE = max(int(os.environ.get("WEB_PAGE_CACHE_MAX_AGE", "604800")), 1)
+
 
 OLLAMA_CLOUD_WEB_SEARCH_API_KEY = PersistentConfig(
     "OLLAMA_CLOUD_WEB_SEARCH_API_KEY",
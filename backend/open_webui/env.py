@@ -353,6 +353,11 @@ DATABASE_ENABLE_SQLITE_WAL = (
     os.environ.get("DATABASE_ENABLE_SQLITE_WAL", "False").lower() == "true"
 )
 
+# Use an asyncio driver (aiosqlite, asyncpg) for the async variants of the models
+DATABASE_ENABLE_ASYNC = (
+    os.environ.get("DATABASE_ENABLE_ASYNC", "True").lower() == "true"
+)
+
 DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = os.environ.get(
     "DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL", None
 )
@@ -364,6 +369,24 @@ if DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL is not None:
     except Exception:
         DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = 0.0
 
+# Seconds an authenticated user stays cached between requests, 0 disables the cache.
+# Each worker keeps users for at most a second, so changes made through another
+# worker apply quickly; Redis shares the cache between workers for the full TTL.
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "10")
+try:
+    USER_CACHE_TTL = int(USER_CACHE_TTL)
+except ValueError:
+    USER_CACHE_TTL = 10
+
+# Seconds the groups of a user stay cached for access control checks, 0 disables
+# the cache. Any change to groups or memberships invalidates it immediately in the
+# worker that made it, and in the others within a second.
+GROUP_MEMBERSHIP_CACHE_TTL = os.environ.get("GROUP_MEMBERSHIP_CACHE_TTL", "10")
+try:
+    GROUP_MEMBERSHIP_CACHE_TTL = int(GROUP_MEMBERSHIP_CACHE_TTL)
+except ValueError:
+    GROUP_MEMBERSHIP_CACHE_TTL = 10
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
@@ -395,6 +418,21 @@ try:
 except ValueError:
     REDIS_SENTINEL_MAX_RETRY_COUNT = 2
 
+# Seconds between checks for config changes made by other workers through Redis,
+# 0 checks on every read
+CONFIG_SYNC_INTERVAL = os.environ.get("CONFIG_SYNC_INTERVAL", "1")
+try:
+    CONFIG_SYNC_INTERVAL = max(float(CONFIG_SYNC_INTERVAL), 0.0)
+except ValueError:
+    CONFIG_SYNC_INTERVAL = 1.0
+
+# Seconds between checks for functions and tools saved by other workers
+PLUGIN_REGISTRY_SYNC_INTERVAL = os.environ.get("PLUGIN_REGISTRY_SYNC_INTERVAL", "1")
+try:
+    PLUGIN_REGISTRY_SYNC_INTERVAL = max(float(PLUGIN_REGISTRY_SYNC_INTERVAL), 0.0)
+except ValueError:
+    PLUGIN_REGISTRY_SYNC_INTERVAL = 1.0
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -555,6 +593,22 @@ else:
     except Exception:
         MODELS_CACHE_TTL = 1
 
+# Model lists of each connection are refreshed in the background this often
+MODELS_REGISTRY_REFRESH_INTERVAL = os.environ.get(
+    "MODELS_REGISTRY_REFRESH_INTERVAL", "60"
+)
+try:
+    MODELS_REGISTRY_REFRESH_INTERVAL = int(MODELS_REGISTRY_REFRESH_INTERVAL)
+except ValueError:
+    MODELS_REGISTRY_REFRESH_INTERVAL = 60
+
+# How long a request waits for a connection whose models were never loaded
+MODELS_REGISTRY_TIMEOUT = os.environ.get("MODELS_REGISTRY_TIMEOUT", "3")
+try:
+    MODELS_REGISTRY_TIMEOUT = float(MODELS_REGISTRY_TIMEOUT)
+except ValueError:
+    MODELS_REGISTRY_TIMEOUT = 3.0
+
 
 ####################################
 # CHAT
@@ -579,6 +633,19 @@ else:
     except Exception:
         CHAT_RESPONSE_STREAM_DELTA_CHUNK_SIZE = 1
 
+# Longest time in seconds between two streamed updates of a response, updates are
+# spaced closer to it as sending them gets slower
+CHAT_RESPONSE_STREAM_MAX_DELTA_INTERVAL = os.environ.get(
+    "CHAT_RESPONSE_STREAM_MAX_DELTA_INTERVAL", "0.5"
+)
+
+try:
+    CHAT_RESPONSE_STREAM_MAX_DELTA_INTERVAL = float(
+        CHAT_RESPONSE_STREAM_MAX_DELTA_INTERVAL
+    )
+except Exception:
+    CHAT_RESPONSE_STREAM_MAX_DELTA_INTERVAL = 0.5
+
 
 CHAT_RESPONSE_MAX_TOOL_CALL_RETRIES = os.environ.get(
     "CHAT_RESPONSE_MAX_TOOL_CALL_RETRIES", "30"
@@ -662,6 +729,48 @@ try:
 except ValueError:
     WEBSOCKET_SERVER_PING_INTERVAL = 25
 
+WEBSOCKET_EVENT_BUFFER_FLUSH_INTERVAL = os.environ.get(
+    "WEBSOCKET_EVENT_BUFFER_FLUSH_INTERVAL", "1"
+)
+try:
+    WEBSOCKET_EVENT_BUFFER_FLUSH_INTERVAL = float(WEBSOCKET_EVENT_BUFFER_FLUSH_INTERVAL)
+except ValueError:
+    WEBSOCKET_EVENT_BUFFER_FLUSH_INTERVAL = 1.0
+
+WEBSOCKET_EVENT_BUFFER_MAX_EVENTS = os.environ.get(
+    "WEBSOCKET_EVENT_BUFFER_MAX_EVENTS", "50"
+)
+try:
+    WEBSOCKET_EVENT_BUFFER_MAX_EVENTS = int(WEBSOCKET_EVENT_BUFFER_MAX_EVENTS)
+except ValueError:
+    WEBSOCKET_EVENT_BUFFER_MAX_EVENTS = 50
+
+YDOC_COMPACTION_MAX_UPDATES = os.environ.get("YDOC_COMPACTION_MAX_UPDATES", "500")
+try:
+    YDOC_COMPACTION_MAX_UPDATES = int(YDOC_COMPACTION_MAX_UPDATES)
+except ValueError:
+    YDOC_COMPACTION_MAX_UPDATES = 500
+
+YDOC_COMPACTION_MAX_BYTES = os.environ.get("YDOC_COMPACTION_MAX_BYTES", "262144")
+try:
+    YDOC_COMPACTION_MAX_BYTES = int(YDOC_COMPACTION_MAX_BYTES)
+except ValueError:
+    YDOC_COMPACTION_MAX_BYTES = 262144
+
+YDOC_COMPACTION_MAX_AGE = os.environ.get("YDOC_COMPACTION_MAX_AGE", "300")
+try:
+    YDOC_COMPACTION_MAX_AGE = int(YDOC_COMPACTION_MAX_AGE)
+except ValueError:
+    YDOC_COMPACTION_MAX_AGE = 300
+
+WEBSOCKET_SESSION_POOL_CACHE_TTL = os.environ.get(
+    "WEBSOCKET_SESSION_POOL_CACHE_TTL", "1"
+)
+try:
+    WEBSOCKET_SESSION_POOL_CACHE_TTL = float(WEBSOCKET_SESSION_POOL_CACHE_TTL)
+except ValueError:
+    WEBSOCKET_SESSION_POOL_CACHE_TTL = 1.0
+
 
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
@@ -711,6 +820,83 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Upstream sessions are shared per origin, so this caps the concurrent requests,
+# including open chat streams, from one worker to one upstream. Requests over the
+# limit wait for a free connection. 0 means no limit.
+AIOHTTP_CLIENT_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "0")
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = int(AIOHTTP_CLIENT_POOL_LIMIT)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_LIMIT = 0
+
+# 0 means no limit besides AIOHTTP_CLIENT_POOL_LIMIT
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "0"
+)
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = 0
+
+AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT", "30"
+)
+try:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = 30.0
+
+# MCP sessions are kept open between chat requests and closed after being unused
+# for this many seconds
+MCP_SESSION_IDLE_TIMEOUT = os.environ.get("MCP_SESSION_IDLE_TIMEOUT", "300")
+try:
+    MCP_SESSION_IDLE_TIMEOUT = float(MCP_SESSION_IDLE_TIMEOUT)
+except ValueError:
+    MCP_SESSION_IDLE_TIMEOUT = 300.0
+
+# Seconds after which a pooled MCP session is pinged before being reused
+MCP_SESSION_HEALTH_CHECK_INTERVAL = os.environ.get(
+    "MCP_SESSION_HEALTH_CHECK_INTERVAL", "60"
+)
+try:
+    MCP_SESSION_HEALTH_CHECK_INTERVAL = float(MCP_SESSION_HEALTH_CHECK_INTERVAL)
+except ValueError:
+    MCP_SESSION_HEALTH_CHECK_INTERVAL = 60.0
+
+# Requests in flight to a single MCP server
+MCP_SESSION_MAX_CONCURRENCY = os.environ.get("MCP_SESSION_MAX_CONCURRENCY", "8")
+try:
+    MCP_SESSION_MAX_CONCURRENCY = max(int(MCP_SESSION_MAX_CONCURRENCY), 1)
+except ValueError:
+    MCP_SESSION_MAX_CONCURRENCY = 8
+
+
+####################################
+# DOCUMENT LOADERS
+####################################
+
+# Documents parsed locally (PDF, Office, HTML...) are parsed in separate processes,
+# at most this many at a time, 0 parses them in the server process instead
+DOCUMENT_LOADER_PROCESSES = os.environ.get("DOCUMENT_LOADER_PROCESSES", "2")
+try:
+    DOCUMENT_LOADER_PROCESSES = int(DOCUMENT_LOADER_PROCESSES)
+except ValueError:
+    DOCUMENT_LOADER_PROCESSES = 2
+
+# Address space in MB a loader process may use, 0 for no limit
+DOCUMENT_LOADER_MEMORY_LIMIT = os.environ.get("DOCUMENT_LOADER_MEMORY_LIMIT", "4096")
+try:
+    DOCUMENT_LOADER_MEMORY_LIMIT = int(DOCUMENT_LOADER_MEMORY_LIMIT)
+except ValueError:
+    DOCUMENT_LOADER_MEMORY_LIMIT = 4096
+
+# Seconds a loader process may take to parse a document, 0 for no limit
+DOCUMENT_LOADER_TIMEOUT = os.environ.get("DOCUMENT_LOADER_TIMEOUT", "300")
+try:
+    DOCUMENT_LOADER_TIMEOUT = float(DOCUMENT_LOADER_TIMEOUT)
+except ValueError:
+    DOCUMENT_LOADER_TIMEOUT = 300.0
+
 
 ####################################
 # SENTENCE TRANSFORMERS
@@ -876,6 +1062,26 @@ OTEL_LOGS_OTLP_SPAN_EXPORTER = os.environ.get(
 PIP_OPTIONS = os.getenv("PIP_OPTIONS", "").split()
 PIP_PACKAGE_INDEX_OPTIONS = os.getenv("PIP_PACKAGE_INDEX_OPTIONS", "").split()
 
+####################################
+# FILTER FUNCTIONS
+####################################
+
+# Seconds a filter hook may run before the request fails, 0 to wait indefinitely.
+# Sync inlet and outlet hooks that time out keep running in their thread until
+# they return
+FILTER_FUNCTION_TIMEOUT = os.environ.get("FILTER_FUNCTION_TIMEOUT", "120")
+try:
+    FILTER_FUNCTION_TIMEOUT = max(float(FILTER_FUNCTION_TIMEOUT), 0.0)
+except ValueError:
+    FILTER_FUNCTION_TIMEOUT = 120.0
+
+# Threads running the inlet and outlet hooks that are not coroutines
+FILTER_FUNCTION_THREADS = os.environ.get("FILTER_FUNCTION_THREADS", "8")
+try:
+    FILTER_FUNCTION_THREADS = max(int(FILTER_FUNCTION_THREADS), 1)
+except ValueError:
+    FILTER_FUNCTION_THREADS = 8
+
 
 ####################################
 # PROGRESSIVE WEB APP OPTIONS
@@ -1,7 +1,9 @@
 import os
 import json
+import asyncio
 import logging
-from contextlib import contextmanager
+import shlex
+from contextlib import asynccontextmanager, contextmanager
 from typing import Any, Optional
 
 from open_webui.internal.wrappers import register_connection
@@ -15,11 +17,14 @@ from open_webui.env import (
     DATABASE_POOL_SIZE,
     DATABASE_POOL_TIMEOUT,
     DATABASE_ENABLE_SQLITE_WAL,
+    DATABASE_ENABLE_ASYNC,
 )
 from peewee_migrate import Router
 from sqlalchemy import Dialect, create_engine, MetaData, event, types
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.orm import Session as SyncSession, scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
 from sqlalchemy.sql.type_api import _T
 from typing_extensions import Self
@@ -162,3 +167,242 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+####################
+# Async database access
+####################
+
+
+# libpq parameters of PostgreSQL URLs that are translated for asyncpg
+ASYNCPG_SSL_PARAMS = {"sslmode", "sslrootcert", "sslcert", "sslkey", "sslpassword"}
+ASYNCPG_PARAMS = ASYNCPG_SSL_PARAMS | {
+    "application_name",
+    "connect_timeout",
+    "options",
+    "target_session_attrs",
+}
+
+
+def get_asyncpg_ssl(query: dict):
+    sslmode = query.get("sslmode", "prefer")
+    if sslmode == "disable" or not (ASYNCPG_SSL_PARAMS - {"sslmode"}) & query.keys():
+        return sslmode if "sslmode" in query else None
+
+    # asyncpg only reads certificate files from the environment for its SSL
+    # modes, so they are loaded into a context instead
+    import ssl
+
+    context = ssl.create_default_context(cafile=query.get("sslrootcert"))
+    if sslmode != "verify-full":
+        context.check_hostname = False
+    if sslmode not in ("verify-ca", "verify-full") and "sslrootcert" not in query:
+        context.verify_mode = ssl.CERT_NONE
+    if "sslcert" in query:
+        context.load_cert_chain(
+            query["sslcert"], query.get("sslkey"), password=query.get("sslpassword")
+        )
+    return context
+
+
+def get_asyncpg_server_settings(query: dict) -> dict:
+    server_settings = {}
+    if "options" in query:
+        # libpq options are command-line switches, e.g. "-c search_path=app"
+        args = shlex.split(query["options"])
+        while args:
+            arg = args.pop(0)
+            if arg == "-c" and args:
+                arg = args.pop(0)
+            elif arg.startswith("-c"):
+                arg = arg[2:]
+            elif arg.startswith("--"):
+                arg = arg[2:]
+            else:
+                raise ValueError(f"Unsupported option {arg!r}")
+
+            name, sep, value = arg.partition("=")
+            if not sep:
+                raise ValueError(f"Option {arg!r} has no value")
+            server_settings[name.replace("-", "_")] = value
+
+    if "application_name" in query:
+        server_settings["application_name"] = query["application_name"]
+    return server_settings
+
+
+def get_async_database_args(database_url: str) -> Optional[tuple[str, dict]]:
+    """
+    Map a database URL to the URL and connect arguments of the asyncio driver
+    of its backend. Returns None if the backend has no supported asyncio
+    driver, or if the URL has parameters the driver cannot take.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite" and url.drivername == "sqlite":
+        return (
+            url.set(drivername="sqlite+aiosqlite").render_as_string(
+                hide_password=False
+            ),
+            {"check_same_thread": False},
+        )
+    elif backend == "postgresql":
+        # asyncpg does not take libpq's parameters, unknown ones would only
+        # fail at the first query
+        query = dict(url.query)
+        unsupported = [
+            key
+            for key, value in query.items()
+            if key not in ASYNCPG_PARAMS or not isinstance(value, str)
+        ]
+        if unsupported:
+            log.warning(
+                f"Database URL parameters {', '.join(unsupported)} are not supported by asyncpg"
+            )
+            return None
+
+        connect_args = {}
+        try:
+            ssl = get_asyncpg_ssl(query)
+            if ssl is not None:
+                connect_args["ssl"] = ssl
+
+            server_settings = get_asyncpg_server_settings(query)
+            if server_settings:
+                connect_args["server_settings"] = server_settings
+
+            if "connect_timeout" in query:
+                connect_args["timeout"] = float(query["connect_timeout"])
+        except (OSError, ValueError) as e:
+            log.warning(f"Database URL parameters are not supported by asyncpg: {e}")
+            return None
+
+        if "target_session_attrs" in query:
+            connect_args["target_session_attrs"] = query["target_session_attrs"]
+
+        return (
+            url.set(drivername="postgresql+asyncpg", query={}).render_as_string(
+                hide_password=False
+            ),
+            connect_args,
+        )
+
+    return None
+
+
+def create_async_database_engine():
+    if not DATABASE_ENABLE_ASYNC:
+        return None
+
+    async_database_args = get_async_database_args(SQLALCHEMY_DATABASE_URL)
+    if async_database_args is None:
+        log.info("No asyncio driver for the database, async queries use threads")
+        return None
+
+    async_database_url, connect_args = async_database_args
+    try:
+        if async_database_url.startswith("sqlite"):
+            async_engine = create_async_engine(
+                async_database_url, connect_args=connect_args
+            )
+            event.listen(async_engine.sync_engine, "connect", on_connect)
+        elif isinstance(DATABASE_POOL_SIZE, int) and DATABASE_POOL_SIZE > 0:
+            async_engine = create_async_engine(
+                async_database_url,
+                connect_args=connect_args,
+                pool_size=DATABASE_POOL_SIZE,
+                max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+                pool_timeout=DATABASE_POOL_TIMEOUT,
+                pool_recycle=DATABASE_POOL_RECYCLE,
+                pool_pre_ping=True,
+            )
+        elif isinstance(DATABASE_POOL_SIZE, int):
+            async_engine = create_async_engine(
+                async_database_url,
+                connect_args=connect_args,
+                pool_pre_ping=True,
+                poolclass=NullPool,
+            )
+        else:
+            async_engine = create_async_engine(
+                async_database_url, connect_args=connect_args, pool_pre_ping=True
+            )
+    except ImportError as e:
+        log.warning(f"Asyncio database driver is not installed, using threads: {e}")
+        return None
+
+    return async_engine
+
+
+async_engine = create_async_database_engine()
+
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+
+
+class ThreadedAsyncSession:
+    """
+    Stand-in for AsyncSession on databases without an asyncio driver, every
+    call runs on a regular session in a worker thread.
+    """
+
+    def __init__(self, session: SyncSession):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def get(self, *args, **kwargs):
+        return await asyncio.to_thread(self.sync_session.get, *args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        return await asyncio.to_thread(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await asyncio.to_thread(self.sync_session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await asyncio.to_thread(
+            lambda: self.sync_session.execute(*args, **kwargs).scalars().all()
+        )
+
+    async def delete(self, instance):
+        await asyncio.to_thread(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await asyncio.to_thread(self.sync_session.flush)
+
+    async def commit(self):
+        await asyncio.to_thread(self.sync_session.commit)
+
+    async def rollback(self):
+        await asyncio.to_thread(self.sync_session.rollback)
+
+    async def refresh(self, instance):
+        await asyncio.to_thread(self.sync_session.refresh, instance)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await asyncio.to_thread(self.sync_session.close)
+
+
+@asynccontextmanager
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        db = ThreadedAsyncSession(SessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+    else:
+        async with AsyncSessionLocal() as db:
+            yield db
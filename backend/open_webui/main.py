@@ -63,6 +63,8 @@ from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
     periodic_usage_pool_cleanup,
+    periodic_message_event_recovery,
+    MESSAGE_EVENT_BUFFER,
     get_event_emitter,
     get_models_in_use,
     get_active_user_ids,
@@ -494,6 +496,7 @@ from open_webui.utils.auth import (
     decode_token,
     get_admin_user,
     get_verified_user,
+    periodic_user_last_active_flush,
 )
 from open_webui.utils.plugin import install_tool_and_function_dependencies
 from open_webui.utils.oauth import (
@@ -506,6 +509,9 @@ from open_webui.utils.oauth import (
 )
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 from open_webui.utils.redis import get_redis_connection
+from open_webui.utils.http_client import HTTP_CLIENT_POOL
+from open_webui.utils.mcp.pool import MCP_SESSION_POOL
+from open_webui.utils.model_registry import MODEL_REGISTRY
 
 from open_webui.tasks import (
     redis_task_command_listener,
@@ -596,7 +602,14 @@ async def lifespan(app: FastAPI):
         limiter = anyio.to_thread.current_default_thread_limiter()
         limiter.total_tokens = THREAD_POOL_SIZE
 
+    HTTP_CLIENT_POOL.start()
+
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_message_event_recovery())
+    asyncio.create_task(periodic_user_last_active_flush())
+
+    if MODEL_REGISTRY.enabled:
+        asyncio.create_task(MODEL_REGISTRY.run(lambda: app.state.redis))
 
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         await get_all_models(
@@ -621,6 +634,13 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    # Write the message events and last active timestamps that are still buffered
+    await MESSAGE_EVENT_BUFFER.flush_all()
+    Users.flush_user_last_active()
+
+    await HTTP_CLIENT_POOL.close()
+    await MCP_SESSION_POOL.close()
+
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
@@ -815,10 +835,8 @@ app.state.EXTERNAL_PWA_MANIFEST_URL = EXTERNAL_PWA_MANIFEST_URL
 app.state.USER_COUNT = None
 
 app.state.TOOLS = {}
-app.state.TOOL_CONTENTS = {}
 
 app.state.FUNCTIONS = {}
-app.state.FUNCTION_CONTENTS = {}
 
 ########################################
 #
@@ -1483,6 +1501,12 @@ async def get_base_models(request: Request, user=Depends(get_admin_user)):
     return {"data": models}
 
 
+@app.get("/api/models/status")
+async def get_models_status(user=Depends(get_admin_user)):
+    """Status of the model list of each connection, degraded ones serve stale data."""
+    return {"connections": MODEL_REGISTRY.get_status()}
+
+
 ##################################
 # Embeddings
 ##################################
@@ -1682,14 +1706,6 @@ async def chat_completion(
 
                 except:
                     pass
-        finally:
-            try:
-                if mcp_clients := metadata.get("mcp_clients"):
-                    for client in reversed(mcp_clients.values()):
-                        await client.disconnect()
-            except Exception as e:
-                log.debug(f"Error cleaning up: {e}")
-                pass
 
     if (
         metadata.get("session_id")
@@ -2016,7 +2032,10 @@ async def get_current_usage(user=Depends(get_verified_user)):
     This is an experimental endpoint and subject to change.
     """
     try:
-        return {"model_ids": get_models_in_use(), "user_ids": get_active_user_ids()}
+        return {
+            "model_ids": await get_models_in_use(),
+            "user_ids": await get_active_user_ids(),
+        }
     except Exception as e:
         log.error(f"Error getting usage statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
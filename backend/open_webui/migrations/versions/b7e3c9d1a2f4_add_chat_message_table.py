@@ -0,0 +1,181 @@
+"""add_chat_message_table
+
+Revision ID: b7e3c9d1a2f4
+Revises: add_verified_column
+Create Date: 2026-10-17 09:12:41.518203
+
+"""
+
+import json
+import time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e3c9d1a2f4"
+down_revision: Union[str, None] = "add_verified_column"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+chat_table = sa.Table(
+    "chat",
+    sa.MetaData(),
+    sa.Column("id", sa.String()),
+    sa.Column("chat", sa.JSON()),
+)
+
+chat_message_table = sa.Table(
+    "chat_message",
+    sa.MetaData(),
+    sa.Column("id", sa.Text()),
+    sa.Column("chat_id", sa.Text()),
+    sa.Column("parent_id", sa.Text()),
+    sa.Column("data", sa.JSON()),
+    sa.Column("created_at", sa.BigInteger()),
+    sa.Column("updated_at", sa.BigInteger()),
+)
+
+
+def clean_null_bytes(obj):
+    if isinstance(obj, str):
+        return obj.replace("\x00", "")
+    elif isinstance(obj, dict):
+        return {k: clean_null_bytes(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [clean_null_bytes(v) for v in obj]
+    return obj
+
+
+def iterate_chats(connection):
+    # Page through the chat table by id so large histories are never loaded at once
+    last_id = None
+    while True:
+        query = sa.select(chat_table.c.id, chat_table.c.chat).order_by(chat_table.c.id)
+        if last_id is not None:
+            query = query.where(chat_table.c.id > last_id)
+
+        rows = connection.execute(query.limit(BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+
+        for chat_id, chat in rows:
+            if isinstance(chat, str):
+                try:
+                    chat = json.loads(chat)
+                except Exception:
+                    continue  # skip invalid JSON
+            yield chat_id, chat
+
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    # 1. Create new table
+    op.create_table(
+        "chat_message",
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("parent_id", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id", name="pk_chat_message_chat_id_id"),
+    )
+    op.create_index(
+        "chat_message_chat_id_parent_id_idx",
+        "chat_message",
+        ["chat_id", "parent_id"],
+    )
+
+    connection = op.get_bind()
+    now = int(time.time())
+
+    # 2. Move history.messages of every chat into chat_message rows, the chat
+    # document keeps everything else (the flat `messages` list is derived)
+    for chat_id, chat in iterate_chats(connection):
+        if not isinstance(chat, dict):
+            continue
+
+        history = chat.get("history")
+        if not isinstance(history, dict) or not isinstance(
+            history.get("messages"), dict
+        ):
+            continue
+
+        rows = [
+            {
+                "id": message_id,
+                "chat_id": chat_id,
+                "parent_id": message.get("parentId"),
+                "data": clean_null_bytes(message),
+                "created_at": (
+                    message.get("timestamp")
+                    if isinstance(message.get("timestamp"), int)
+                    else now
+                ),
+                "updated_at": now,
+            }
+            for message_id, message in history["messages"].items()
+            if isinstance(message, dict)
+        ]
+
+        if rows:
+            connection.execute(chat_message_table.insert(), rows)
+
+        chat_doc = {key: value for key, value in chat.items() if key != "messages"}
+        chat_doc["history"] = {
+            key: value for key, value in history.items() if key != "messages"
+        }
+
+        connection.execute(
+            chat_table.update()
+            .where(chat_table.c.id == chat_id)
+            .values(chat=clean_null_bytes(chat_doc))
+        )
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    # Rebuild history.messages and the flat messages list of every split chat
+    for chat_id, chat in iterate_chats(connection):
+        if not isinstance(chat, dict):
+            continue
+
+        history = chat.get("history")
+        if not isinstance(history, dict) or "messages" in history:
+            continue
+
+        rows = connection.execute(
+            sa.select(chat_message_table.c.id, chat_message_table.c.data)
+            .where(chat_message_table.c.chat_id == chat_id)
+            .order_by(chat_message_table.c.created_at)
+        ).fetchall()
+        messages_map = {message_id: data for message_id, data in rows}
+
+        message_list = []
+        message = messages_map.get(history.get("currentId"))
+        while message and len(message_list) < len(messages_map):
+            message_list.insert(0, message)
+            message = messages_map.get(message.get("parentId"))
+
+        connection.execute(
+            chat_table.update()
+            .where(chat_table.c.id == chat_id)
+            .values(
+                chat={
+                    **chat,
+                    "history": {**history, "messages": messages_map},
+                    "messages": message_list,
+                }
+            )
+        )
+
+    op.drop_index("chat_message_chat_id_parent_id_idx", table_name="chat_message")
+    op.drop_table("chat_message")
@@ -0,0 +1,197 @@
+"""add_chat_message_search_index
+
+Revision ID: d4a8f2c6e913
+Revises: b7e3c9d1a2f4
+Create Date: 2026-10-17 14:03:27.904512
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a8f2c6e913"
+down_revision: Union[str, None] = "b7e3c9d1a2f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+log = logging.getLogger(__name__)
+
+
+def sqlite_content(row: str) -> str:
+    # CASE is evaluated lazily, so malformed JSON never reaches json_extract
+    return (
+        f"CASE WHEN json_valid({row}.data) THEN "
+        f"CASE WHEN json_type({row}.data, '$.content') = 'text' "
+        f"THEN json_extract({row}.data, '$.content') END END"
+    )
+
+
+def upgrade_sqlite(connection):
+    try:
+        op.execute(
+            "CREATE VIRTUAL TABLE chat_message_fts USING fts5("
+            "content, content='chat_message_search', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+    except Exception as e:
+        # Chat search keeps using LIKE queries when FTS5 is not available
+        log.warning(f"SQLite FTS5 is not available, skipping chat search index: {e}")
+        return
+
+    # The FTS index is an external content table over chat_message_search, its
+    # INTEGER PRIMARY KEY keeps the rowids stable across VACUUM
+    op.execute(
+        """
+        CREATE TABLE chat_message_search (
+            id INTEGER PRIMARY KEY,
+            chat_id TEXT NOT NULL,
+            message_id TEXT NOT NULL,
+            content TEXT
+        )
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX chat_message_search_chat_id_message_id_idx "
+        "ON chat_message_search (chat_id, message_id)"
+    )
+
+    op.execute(
+        """
+        CREATE TRIGGER chat_message_search_ai AFTER INSERT ON chat_message_search
+        BEGIN
+            INSERT INTO chat_message_fts (rowid, content)
+            VALUES (new.id, new.content);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER chat_message_search_ad AFTER DELETE ON chat_message_search
+        BEGIN
+            INSERT INTO chat_message_fts (chat_message_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+        """
+    )
+
+    op.execute(
+        f"""
+        CREATE TRIGGER chat_message_search_chat_message_ai
+        AFTER INSERT ON chat_message
+        WHEN ({sqlite_content("new")}) IS NOT NULL
+        BEGIN
+            INSERT INTO chat_message_search (chat_id, message_id, content)
+            VALUES (new.chat_id, new.id, {sqlite_content("new")});
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER chat_message_search_chat_message_au
+        AFTER UPDATE OF data ON chat_message
+        WHEN ({sqlite_content("old")}) IS NOT ({sqlite_content("new")})
+        BEGIN
+            DELETE FROM chat_message_search
+            WHERE chat_id = old.chat_id AND message_id = old.id;
+            INSERT INTO chat_message_search (chat_id, message_id, content)
+            SELECT new.chat_id, new.id, {sqlite_content("new")}
+            WHERE ({sqlite_content("new")}) IS NOT NULL;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER chat_message_search_chat_message_ad
+        AFTER DELETE ON chat_message
+        BEGIN
+            DELETE FROM chat_message_search
+            WHERE chat_id = old.chat_id AND message_id = old.id;
+        END
+        """
+    )
+
+    # Index the existing messages
+    op.execute(
+        f"""
+        INSERT INTO chat_message_search (chat_id, message_id, content)
+        SELECT chat_message.chat_id, chat_message.id, {sqlite_content("chat_message")}
+        FROM chat_message
+        WHERE ({sqlite_content("chat_message")}) IS NOT NULL
+        """
+    )
+
+
+def upgrade_postgresql(connection):
+    op.execute("ALTER TABLE chat_message ADD COLUMN search_vector tsvector")
+
+    # A trigger rather than a generated column, messages with content that
+    # cannot be converted (e.g. \u0000 escapes) are left out of the index
+    # instead of failing the write
+    op.execute(
+        """
+        CREATE FUNCTION chat_message_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            BEGIN
+                IF json_typeof(NEW.data->'content') = 'string' THEN
+                    NEW.search_vector := to_tsvector('simple', NEW.data->>'content');
+                ELSE
+                    NEW.search_vector := NULL;
+                END IF;
+            EXCEPTION WHEN others THEN
+                NEW.search_vector := NULL;
+            END;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER chat_message_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF data ON chat_message
+        FOR EACH ROW EXECUTE PROCEDURE chat_message_search_vector_update()
+        """
+    )
+
+    # Index the existing messages before building the GIN index
+    op.execute("UPDATE chat_message SET data = data")
+    op.execute(
+        "CREATE INDEX chat_message_search_vector_idx "
+        "ON chat_message USING GIN (search_vector)"
+    )
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    if connection.dialect.name == "sqlite":
+        upgrade_sqlite(connection)
+    elif connection.dialect.name == "postgresql":
+        upgrade_postgresql(connection)
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    if connection.dialect.name == "sqlite":
+        for trigger in [
+            "chat_message_search_chat_message_ai",
+            "chat_message_search_chat_message_au",
+            "chat_message_search_chat_message_ad",
+            "chat_message_search_ai",
+            "chat_message_search_ad",
+        ]:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS chat_message_fts")
+        op.execute("DROP TABLE IF EXISTS chat_message_search")
+    elif connection.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS chat_message_search_vector_idx")
+        op.execute(
+            "DROP TRIGGER IF EXISTS chat_message_search_vector_trigger ON chat_message"
+        )
+        op.execute("DROP FUNCTION IF EXISTS chat_message_search_vector_update()")
+        op.execute("ALTER TABLE chat_message DROP COLUMN IF EXISTS search_vector")
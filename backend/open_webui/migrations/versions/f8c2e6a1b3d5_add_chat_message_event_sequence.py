@@ -0,0 +1,30 @@
+"""Add event_sequence column to chat_message
+
+Revision ID: f8c2e6a1b3d5
+Revises: d4a8f2c6e913
+Create Date: 2026-10-17 21:36:08.271943
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f8c2e6a1b3d5"
+down_revision: Union[str, None] = "d4a8f2c6e913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Sequence of the last buffered socket event written to the message
+    op.add_column(
+        "chat_message",
+        sa.Column("event_sequence", sa.BigInteger(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chat_message", "event_sequence")
@@ -3,8 +3,8 @@ import time
 import uuid
 from typing import Optional
 
-from open_webui.internal.db import Base, get_db
-from open_webui.utils.access_control import has_access
+from open_webui.internal.db import Base, get_async_db, get_db
+from open_webui.utils.access_control import get_access_context_async, has_access
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
@@ -109,6 +109,23 @@ class ChannelTable:
             or has_access(user_id, permission, channel.access_control)
         ]
 
+    async def get_channels_by_user_id_async(
+        self, user_id: str, permission: str = "read"
+    ) -> list[ChannelModel]:
+        async with get_async_db() as db:
+            channels = [
+                ChannelModel.model_validate(channel)
+                for channel in await db.scalars(select(Channel))
+            ]
+
+        access_context = await get_access_context_async(user_id)
+        return [
+            channel
+            for channel in channels
+            if channel.user_id == user_id
+            or access_context.has_access(permission, channel.access_control)
+        ]
+
     def get_channel_by_id(self, id: str) -> Optional[ChannelModel]:
         with get_db() as db:
             channel = db.query(Channel).filter(Channel.id == id).first()
@@ -0,0 +1,325 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_async_db, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Text, JSON, PrimaryKeyConstraint, Index
+from sqlalchemy import select, literal
+from sqlalchemy.orm import aliased
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Upper bound on the parent chain walked for a single message, guards against
+# cyclic parentId links in corrupted histories
+MAX_MESSAGE_CHAIN_DEPTH = 10000
+
+
+####################
+# ChatMessage DB Schema
+####################
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    id = Column(Text)
+    chat_id = Column(Text)
+
+    parent_id = Column(Text, nullable=True)
+    data = Column(JSON)
+
+    # Sequence of the last buffered socket event written to the message, so
+    # that events replayed from a journal are not applied twice
+    event_sequence = Column(BigInteger, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (
+        # Message ids are generated by the client and are only unique per chat
+        # (shared and imported chats keep the ids of the original messages)
+        PrimaryKeyConstraint("chat_id", "id", name="pk_chat_message_chat_id_id"),
+        # WHERE chat_id = ... AND parent_id = ...
+        Index("chat_message_chat_id_parent_id_idx", "chat_id", "parent_id"),
+    )
+
+
+class ChatMessageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    chat_id: str
+
+    parent_id: Optional[str] = None
+    data: dict
+
+    event_sequence: Optional[int] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+def _get_created_at(message: dict, default: int) -> int:
+    # Keep the original ordering of messages by their client timestamp
+    timestamp = message.get("timestamp")
+    return timestamp if isinstance(timestamp, int) else default
+
+
+def _merge_message(
+    item: Optional[ChatMessage],
+    chat_id: str,
+    id: str,
+    message: dict,
+    event_sequence: Optional[int] = None,
+) -> ChatMessage:
+    now = int(time.time())
+    if item is None:
+        return ChatMessage(
+            id=id,
+            chat_id=chat_id,
+            parent_id=message.get("parentId"),
+            data=message,
+            event_sequence=event_sequence,
+            created_at=_get_created_at(message, now),
+            updated_at=now,
+        )
+
+    item.data = {**(item.data or {}), **message}
+    item.parent_id = item.data.get("parentId")
+    if event_sequence is not None:
+        item.event_sequence = event_sequence
+    item.updated_at = now
+    return item
+
+
+def _get_message_chain_query(chat_id: str, id: str):
+    chain = (
+        select(
+            ChatMessage.id,
+            ChatMessage.parent_id,
+            ChatMessage.data,
+            literal(0).label("depth"),
+        )
+        .where(ChatMessage.chat_id == chat_id, ChatMessage.id == id)
+        .cte("message_chain", recursive=True)
+    )
+
+    parent = aliased(ChatMessage)
+    chain = chain.union_all(
+        select(
+            parent.id,
+            parent.parent_id,
+            parent.data,
+            (chain.c.depth + 1).label("depth"),
+        ).where(
+            parent.chat_id == chat_id,
+            parent.id == chain.c.parent_id,
+            chain.c.depth < MAX_MESSAGE_CHAIN_DEPTH,
+        )
+    )
+
+    return select(chain.c.data).order_by(chain.c.depth.desc())
+
+
+class ChatMessageTable:
+    def get_messages_map_by_chat_id(self, chat_id: str) -> dict:
+        return self.get_messages_maps_by_chat_ids([chat_id]).get(chat_id, {})
+
+    def get_messages_maps_by_chat_ids(self, chat_ids: list[str]) -> dict[str, dict]:
+        if not chat_ids:
+            return {}
+
+        with get_db() as db:
+            messages = (
+                db.query(ChatMessage)
+                .filter(ChatMessage.chat_id.in_(chat_ids))
+                .order_by(ChatMessage.created_at.asc())
+                .all()
+            )
+
+            messages_maps = {}
+            for message in messages:
+                messages_maps.setdefault(message.chat_id, {})[message.id] = message.data
+            return messages_maps
+
+    async def get_messages_maps_by_chat_ids_async(
+        self, chat_ids: list[str]
+    ) -> dict[str, dict]:
+        if not chat_ids:
+            return {}
+
+        async with get_async_db() as db:
+            messages = await db.scalars(
+                select(ChatMessage)
+                .where(ChatMessage.chat_id.in_(chat_ids))
+                .order_by(ChatMessage.created_at.asc())
+            )
+
+            messages_maps = {}
+            for message in messages:
+                messages_maps.setdefault(message.chat_id, {})[message.id] = message.data
+            return messages_maps
+
+    def get_message_by_chat_id_and_id(self, chat_id: str, id: str) -> Optional[dict]:
+        with get_db() as db:
+            message = db.get(ChatMessage, (chat_id, id))
+            return message.data if message else None
+
+    async def get_message_by_chat_id_and_id_async(
+        self, chat_id: str, id: str
+    ) -> Optional[dict]:
+        async with get_async_db() as db:
+            message = await db.get(ChatMessage, (chat_id, id))
+            return message.data if message else None
+
+    async def get_message_model_by_chat_id_and_id_async(
+        self, chat_id: str, id: str
+    ) -> Optional[ChatMessageModel]:
+        async with get_async_db() as db:
+            message = await db.get(ChatMessage, (chat_id, id))
+            return ChatMessageModel.model_validate(message) if message else None
+
+    def get_children_ids_by_chat_id_and_id(self, chat_id: str, id: str) -> list[str]:
+        with get_db() as db:
+            return [
+                row.id
+                for row in db.query(ChatMessage.id)
+                .filter_by(chat_id=chat_id, parent_id=id)
+                .order_by(ChatMessage.created_at.asc())
+                .all()
+            ]
+
+    def get_message_list_by_chat_id_and_id(self, chat_id: str, id: str) -> list[dict]:
+        """
+        Walks the parent links of a message with a recursive query and returns
+        the messages from the root to the given message, without loading the
+        other branches of the chat.
+        """
+        with get_db() as db:
+            rows = db.execute(_get_message_chain_query(chat_id, id)).all()
+            return [row.data for row in rows]
+
+    async def get_message_list_by_chat_id_and_id_async(
+        self, chat_id: str, id: str
+    ) -> list[dict]:
+        async with get_async_db() as db:
+            result = await db.execute(_get_message_chain_query(chat_id, id))
+            return [row.data for row in result.all()]
+
+    def upsert_message_in_session(
+        self,
+        db,
+        chat_id: str,
+        id: str,
+        message: dict,
+        event_sequence: Optional[int] = None,
+    ) -> ChatMessage:
+        """
+        Merge the given fields into a single message row of the session `db`,
+        for the caller to commit along with its own changes.
+        """
+        item = db.get(ChatMessage, (chat_id, id))
+        item = _merge_message(item, chat_id, id, message, event_sequence)
+        db.add(item)
+        return item
+
+    def upsert_message(
+        self, chat_id: str, id: str, message: dict
+    ) -> Optional[ChatMessageModel]:
+        """Merge the given fields into a single message row."""
+        try:
+            with get_db() as db:
+                item = self.upsert_message_in_session(db, chat_id, id, message)
+                db.commit()
+                db.refresh(item)
+                return ChatMessageModel.model_validate(item)
+        except Exception as e:
+            log.exception(f"Error upserting message {id} of chat {chat_id}: {e}")
+            return None
+
+    async def upsert_message_async(
+        self, chat_id: str, id: str, message: dict
+    ) -> Optional[ChatMessageModel]:
+        try:
+            async with get_async_db() as db:
+                item = await db.run_sync(
+                    self.upsert_message_in_session, chat_id, id, message
+                )
+                await db.commit()
+                return ChatMessageModel.model_validate(item)
+        except Exception as e:
+            log.exception(f"Error upserting message {id} of chat {chat_id}: {e}")
+            return None
+
+    def get_messages_map_in_session(self, db, chat_id: str) -> dict:
+        """Read the messages of a chat in the session `db`, with uncommitted rows."""
+        messages = (
+            db.query(ChatMessage)
+            .filter_by(chat_id=chat_id)
+            .order_by(ChatMessage.created_at.asc())
+            .all()
+        )
+        return {message.id: message.data for message in messages}
+
+    def sync_messages_in_session(self, db, chat_id: str, messages_map: dict):
+        """
+        Replace the messages of a chat with the given messages map in the
+        session `db`, for the caller to commit along with its own changes. Only
+        rows that were added, changed or removed are written.
+        """
+        now = int(time.time())
+        existing = {
+            item.id: item
+            for item in db.query(ChatMessage).filter_by(chat_id=chat_id).all()
+        }
+
+        for id, message in messages_map.items():
+            if not isinstance(message, dict):
+                continue
+
+            item = existing.pop(id, None)
+            if item is None:
+                db.add(
+                    ChatMessage(
+                        id=id,
+                        chat_id=chat_id,
+                        parent_id=message.get("parentId"),
+                        data=message,
+                        created_at=_get_created_at(message, now),
+                        updated_at=now,
+                    )
+                )
+            elif item.data != message:
+                item.data = message
+                item.parent_id = message.get("parentId")
+                item.updated_at = now
+
+        if existing:
+            db.query(ChatMessage).filter(
+                ChatMessage.chat_id == chat_id,
+                ChatMessage.id.in_(list(existing.keys())),
+            ).delete(synchronize_session=False)
+
+        # Later lookups in the session, e.g. db.get, see the rows
+        db.flush()
+
+    def delete_messages_by_chat_ids(self, chat_ids: list[str]) -> bool:
+        if not chat_ids:
+            return True
+
+        try:
+            with get_db() as db:
+                db.query(ChatMessage).filter(ChatMessage.chat_id.in_(chat_ids)).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+                return True
+        except Exception:
+            return False
+
+
+ChatMessages = ChatMessageTable()
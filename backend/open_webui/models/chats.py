@@ -1,17 +1,20 @@
 import logging
 import json
+import re
 import time
 import uuid
 from typing import Optional
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_async_db, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.models.folders import Folders
+from open_webui.models.chat_messages import ChatMessages
+from open_webui.utils.misc import get_message_list
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
-from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy import BigInteger, Boolean, Column, Float, String, Text, JSON, Index
+from sqlalchemy import or_, func, select, and_, text, literal
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
 
@@ -126,7 +129,13 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+class ChatSearchResponse(ChatTitleIdResponse):
+    snippet: Optional[str] = None  # best matching message, terms in <mark>
+
+
 class ChatTable:
+    _search_index: Optional[bool] = None
+
     def _clean_null_bytes(self, obj):
         """
         Recursively remove actual null bytes (\x00) and unicode escape \\u0000
@@ -164,6 +173,103 @@ class ChatTable:
 
         return changed
 
+    def _split_chat_messages(self, chat: dict) -> tuple[dict, Optional[dict]]:
+        """
+        Split the message history out of a chat document.
+
+        Messages are stored one row per message in the chat_message table, the
+        chat document keeps everything else, including history.currentId. The
+        flat `messages` list is derived from the history and dropped as well.
+        Returns the chat document and the messages map (None if the chat has no
+        message history to split).
+        """
+        history = chat.get("history")
+        if not isinstance(history, dict) or not isinstance(
+            history.get("messages"), dict
+        ):
+            return chat, None
+
+        chat_doc = {key: value for key, value in chat.items() if key != "messages"}
+        chat_doc["history"] = {
+            key: value for key, value in history.items() if key != "messages"
+        }
+        return chat_doc, history["messages"]
+
+    def _is_split_chat(self, chat: Optional[dict]) -> bool:
+        history = (chat or {}).get("history")
+        return isinstance(history, dict) and "messages" not in history
+
+    def _merge_chat_messages(self, chat: dict, messages_map: dict) -> dict:
+        history = chat.get("history", {})
+        return {
+            **chat,
+            "history": {**history, "messages": messages_map},
+            "messages": get_message_list(messages_map, history.get("currentId")),
+        }
+
+    def _to_chat_models(self, chat_items) -> list[ChatModel]:
+        chats = [ChatModel.model_validate(chat_item) for chat_item in chat_items]
+
+        # Load the messages of all split chats in one query
+        messages_maps = ChatMessages.get_messages_maps_by_chat_ids(
+            [chat.id for chat in chats if self._is_split_chat(chat.chat)]
+        )
+        for chat in chats:
+            if self._is_split_chat(chat.chat):
+                chat.chat = self._merge_chat_messages(
+                    chat.chat, messages_maps.get(chat.id, {})
+                )
+        return chats
+
+    def _to_chat_model(self, chat_item) -> ChatModel:
+        return self._to_chat_models([chat_item])[0]
+
+    async def _to_chat_model_async(self, chat_item) -> ChatModel:
+        chat = ChatModel.model_validate(chat_item)
+        if self._is_split_chat(chat.chat):
+            messages_maps = await ChatMessages.get_messages_maps_by_chat_ids_async(
+                [chat.id]
+            )
+            chat.chat = self._merge_chat_messages(
+                chat.chat, messages_maps.get(chat.id, {})
+            )
+        return chat
+
+    def merge_message_into_chat(
+        self, chat: ChatModel, message_id: str, message: dict
+    ) -> ChatModel:
+        """
+        Applies a message returned by upsert_message_to_chat_by_id_and_message_id
+        to a chat loaded before the upsert, without reading the chat again.
+        """
+        history = chat.chat.get("history", {})
+        messages_map = {**history.get("messages", {}), message_id: message}
+        chat_doc = {**chat.chat, "history": {**history, "currentId": message_id}}
+        return chat.model_copy(
+            update={
+                "chat": self._merge_chat_messages(chat_doc, messages_map),
+                "updated_at": int(time.time()),
+            }
+        )
+
+    def _ensure_split_chat(self, db, chat_item) -> bool:
+        """
+        Move the message history of a chat that is still stored as a single
+        document into the chat_message table, leaving the message rows and the
+        chat document for the caller to commit together. Returns True if the
+        chat is split.
+        """
+        if self._is_split_chat(chat_item.chat):
+            return True
+
+        chat_doc, messages_map = self._split_chat_messages(chat_item.chat or {})
+        if messages_map is None:
+            return False
+
+        ChatMessages.sync_messages_in_session(db, chat_item.id, messages_map)
+        chat_item.chat = chat_doc
+        return True
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -183,11 +289,16 @@ class ChatTable:
                 }
             )
 
-            chat_item = Chat(**chat.model_dump())
+            chat_doc, messages_map = self._split_chat_messages(chat.chat)
+            chat_item = Chat(**{**chat.model_dump(), "chat": chat_doc})
             db.add(chat_item)
+            # The message rows are committed with the chat row
+            if messages_map is not None:
+                ChatMessages.sync_messages_in_session(db, id, messages_map)
+
             db.commit()
             db.refresh(chat_item)
-            return ChatModel.model_validate(chat_item) if chat_item else None
+            return chat if chat_item else None
 
     def _chat_import_form_to_chat_model(
         self, user_id: str, form_data: ChatImportForm
@@ -222,41 +333,78 @@ class ChatTable:
 
             for form_data in chat_import_forms:
                 chat = self._chat_import_form_to_chat_model(user_id, form_data)
-                chats.append(Chat(**chat.model_dump()))
 
-            db.add_all(chats)
+                chat_doc, messages_map = self._split_chat_messages(chat.chat)
+                db.add(Chat(**{**chat.model_dump(), "chat": chat_doc}))
+                if messages_map is not None:
+                    ChatMessages.sync_messages_in_session(db, chat.id, messages_map)
+
+                chats.append(chat)
+
             db.commit()
-            return [ChatModel.model_validate(chat) for chat in chats]
+            return chats
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
-                chat_item.chat = self._clean_null_bytes(chat)
-                chat_item.title = (
-                    self._clean_null_bytes(chat["title"])
-                    if "title" in chat
-                    else "New Chat"
-                )
+
+                chat = self._clean_null_bytes(chat)
+                chat_doc, messages_map = self._split_chat_messages(chat)
+                if messages_map is not None:
+                    # Only the messages that changed are written, in the same
+                    # transaction as the chat document
+                    ChatMessages.sync_messages_in_session(db, id, messages_map)
+
+                chat_item.chat = chat_doc
+                chat_item.title = chat["title"] if "title" in chat else "New Chat"
 
                 chat_item.updated_at = int(time.time())
 
                 db.commit()
                 db.refresh(chat_item)
 
-                return ChatModel.model_validate(chat_item)
+                return self._to_chat_model(chat_item)
         except Exception:
             return None
 
     def update_chat_title_by_id(self, id: str, title: str) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+        try:
+            with get_db() as db:
+                chat_item = db.get(Chat, id)
+                if chat_item is None:
+                    return None
+
+                title = self._clean_null_bytes(title)
+                chat_item.chat = {**chat_item.chat, "title": title}
+                chat_item.title = title
+                chat_item.updated_at = int(time.time())
+
+                db.commit()
+                db.refresh(chat_item)
+
+                return self._to_chat_model(chat_item)
+        except Exception:
             return None
 
-        chat = chat.chat
-        chat["title"] = title
+    async def update_chat_title_by_id_async(
+        self, id: str, title: str
+    ) -> Optional[ChatModel]:
+        try:
+            async with get_async_db() as db:
+                chat_item = await db.get(Chat, id)
+                if chat_item is None:
+                    return None
 
-        return self.update_chat_by_id(id, chat)
+                title = self._clean_null_bytes(title)
+                chat_item.chat = {**chat_item.chat, "title": title}
+                chat_item.title = title
+                chat_item.updated_at = int(time.time())
+
+                await db.commit()
+                return await self._to_chat_model_async(chat_item)
+        except Exception:
+            return None
 
     def update_chat_tags_by_id(
         self, id: str, tags: list[str], user
@@ -285,7 +433,20 @@ class ChatTable:
 
         return chat.chat.get("title", "New Chat")
 
+    async def get_chat_title_by_id_async(self, id: str) -> Optional[str]:
+        async with get_async_db() as db:
+            chat_item = await db.get(Chat, id)
+            if chat_item is None:
+                return None
+
+            return (chat_item.chat or {}).get("title", "New Chat")
+
     def get_messages_map_by_chat_id(self, id: str) -> Optional[dict]:
+        messages_map = ChatMessages.get_messages_map_by_chat_id(id)
+        if messages_map:
+            return messages_map
+
+        # Fall back to chats that have no messages yet or were not split
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
@@ -295,76 +456,239 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
+        message = ChatMessages.get_message_by_chat_id_and_id(id, message_id)
+        if message is not None:
+            return message
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
 
         return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
-    def upsert_message_to_chat_by_id_and_message_id(
-        self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
+    async def get_message_by_id_and_message_id_async(
+        self, id: str, message_id: str
+    ) -> Optional[dict]:
+        message = await ChatMessages.get_message_by_chat_id_and_id_async(id, message_id)
+        if message is not None:
+            return message
+
+        chat = await self.get_chat_by_id_async(id)
         if chat is None:
             return None
 
-        # Sanitize message content for null characters before upserting
-        if isinstance(message.get("content"), str):
-            message["content"] = message["content"].replace("\x00", "")
+        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
-        chat = chat.chat
-        history = chat.get("history", {})
+    def get_message_list_by_id_and_message_id(
+        self, id: str, message_id: str
+    ) -> list[dict]:
+        """
+        Returns the messages from the root of the chat to the given message.
+        """
+        message_list = ChatMessages.get_message_list_by_chat_id_and_id(id, message_id)
+        if message_list:
+            return message_list
+
+        return get_message_list(self.get_messages_map_by_chat_id(id), message_id)
+
+    async def get_message_list_by_id_and_message_id_async(
+        self, id: str, message_id: str
+    ) -> list[dict]:
+        message_list = await ChatMessages.get_message_list_by_chat_id_and_id_async(
+            id, message_id
+        )
+        if message_list:
+            return message_list
+
+        chat = await self.get_chat_by_id_async(id)
+        if chat is None:
+            return []
+
+        return get_message_list(
+            chat.chat.get("history", {}).get("messages", {}) or {}, message_id
+        )
 
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
+    def _upsert_current_message(
+        self,
+        db,
+        id: str,
+        message_id: str,
+        message: dict,
+        event_sequence: Optional[int] = None,
+    ) -> Optional[dict]:
+        """
+        Merges `message` into its row and makes it the current message of the
+        chat, leaving both rows for the caller to commit together. Returns the
+        merged message.
+        """
+        chat_item = db.get(Chat, id)
+        if chat_item is None:
+            return None
+
+        if not self._ensure_split_chat(db, chat_item):
+            # Chat without a message history yet, start one
+            history = (chat_item.chat or {}).get("history")
+            chat_item.chat = {
+                **(chat_item.chat or {}),
+                "history": {
+                    key: value
+                    for key, value in (
+                        history if isinstance(history, dict) else {}
+                    ).items()
+                    if key != "messages"
+                },
             }
-        else:
-            history["messages"][message_id] = message
 
-        history["currentId"] = message_id
+        history = chat_item.chat.get("history", {})
+        if history.get("currentId") != message_id:
+            chat_item.chat = {
+                **chat_item.chat,
+                "history": {**history, "currentId": message_id},
+            }
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        chat_item.updated_at = int(time.time())
+        return ChatMessages.upsert_message_in_session(
+            db, id, message_id, message, event_sequence
+        ).data
 
-    def add_message_status_to_chat_by_id_and_message_id(
-        self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+    def upsert_message_to_chat_by_id_and_message_id(
+        self, id: str, message_id: str, message: dict
+    ) -> Optional[dict]:
+        """
+        Merges the given fields into a message and makes it the current message
+        of the chat. Only the message row and the chat document are written and
+        only the merged message is returned, so the cost does not depend on the
+        length of the chat.
+        """
+        # Sanitize message content for null characters before upserting
+        message = self._clean_null_bytes(message)
+
+        try:
+            with get_db() as db:
+                message = self._upsert_current_message(db, id, message_id, message)
+                if message is None:
+                    return None
+
+                db.commit()
+                return message
+        except Exception as e:
+            log.exception(f"Error updating chat {id}: {e}")
             return None
 
-        chat = chat.chat
-        history = chat.get("history", {})
+    async def upsert_message_to_chat_by_id_and_message_id_async(
+        self,
+        id: str,
+        message_id: str,
+        message: dict,
+        event_sequence: Optional[int] = None,
+    ) -> Optional[dict]:
+        """
+        Async variant of upsert_message_to_chat_by_id_and_message_id.
+        `event_sequence` records the last buffered socket event applied.
+        """
+        message = self._clean_null_bytes(message)
 
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
+        try:
+            async with get_async_db() as db:
+                message = await db.run_sync(
+                    self._upsert_current_message,
+                    id,
+                    message_id,
+                    message,
+                    event_sequence,
+                )
+                if message is None:
+                    return None
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+                await db.commit()
+                return message
+        except Exception as e:
+            log.exception(f"Error updating chat {id}: {e}")
+            return None
+
+    def _get_split_message(self, id: str, message_id: str) -> Optional[dict]:
+        message = ChatMessages.get_message_by_chat_id_and_id(id, message_id)
+        if message is not None:
+            return message
+
+        # The chat may still store its history as a single document
+        with get_db() as db:
+            chat_item = db.get(Chat, id)
+            if chat_item is None or not self._ensure_split_chat(db, chat_item):
+                return None
+            db.commit()
+
+        return ChatMessages.get_message_by_chat_id_and_id(id, message_id)
+
+    def add_message_status_to_chat_by_id_and_message_id(
+        self, id: str, message_id: str, status: dict
+    ) -> Optional[dict]:
+        """Appends `status` to the status history of a message, returning the message."""
+        try:
+            message = self._get_split_message(id, message_id)
+            if message is None:
+                return None
+
+            with get_db() as db:
+                chat_item = db.get(Chat, id)
+                if chat_item is None:
+                    return None
+
+                message = ChatMessages.upsert_message_in_session(
+                    db,
+                    id,
+                    message_id,
+                    {
+                        "statusHistory": message.get("statusHistory", [])
+                        + [self._clean_null_bytes(status)]
+                    },
+                ).data
+                chat_item.updated_at = int(time.time())
+                db.commit()
+                return message
+        except Exception as e:
+            log.exception(f"Error updating chat {id}: {e}")
+            return None
 
     def add_message_files_by_id_and_message_id(
         self, id: str, message_id: str, files: list[dict]
     ) -> list[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        message = self._get_split_message(id, message_id)
+        if message is None:
+            return []
 
-        chat = chat.chat
-        history = chat.get("history", {})
+        message_files = message.get("files", []) + files
+        ChatMessages.upsert_message(id, message_id, {"files": message_files})
+        return message_files
+
+    async def _get_split_message_async(
+        self, id: str, message_id: str
+    ) -> Optional[dict]:
+        message = await ChatMessages.get_message_by_chat_id_and_id_async(id, message_id)
+        if message is not None:
+            return message
+
+        async with get_async_db() as db:
+            chat_item = await db.get(Chat, id)
+            if chat_item is None or not await db.run_sync(
+                lambda session: self._ensure_split_chat(session, chat_item)
+            ):
+                return None
+            await db.commit()
 
-        message_files = []
+        return await ChatMessages.get_message_by_chat_id_and_id_async(id, message_id)
 
-        if message_id in history.get("messages", {}):
-            message_files = history["messages"][message_id].get("files", [])
-            message_files = message_files + files
-            history["messages"][message_id]["files"] = message_files
+    async def add_message_files_by_id_and_message_id_async(
+        self, id: str, message_id: str, files: list[dict]
+    ) -> list[dict]:
+        message = await self._get_split_message_async(id, message_id)
+        if message is None:
+            return []
 
-        chat["history"] = history
-        self.update_chat_by_id(id, chat)
+        message_files = message.get("files", []) + files
+        await ChatMessages.upsert_message_async(
+            id, message_id, {"files": message_files}
+        )
         return message_files
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
@@ -375,6 +699,7 @@ class ChatTable:
             if chat.share_id:
                 return self.get_chat_by_id_and_user_id(chat.share_id, "shared")
             # Create a new chat with the same data, but with a new ID
+            self._ensure_split_chat(db, chat)
             shared_chat = ChatModel(
                 **{
                     "id": str(uuid.uuid4()),
@@ -388,6 +713,13 @@ class ChatTable:
                     "updated_at": int(time.time()),
                 }
             )
+            if self._is_split_chat(chat.chat):
+                ChatMessages.sync_messages_in_session(
+                    db,
+                    shared_chat.id,
+                    ChatMessages.get_messages_map_in_session(db, chat_id),
+                )
+
             shared_result = Chat(**shared_chat.model_dump())
             db.add(shared_result)
             db.commit()
@@ -400,7 +732,11 @@ class ChatTable:
                 .update({"share_id": shared_chat.id})
             )
             db.commit()
-            return shared_chat if (shared_result and result) else None
+            return (
+                self._to_chat_model(shared_result)
+                if (shared_result and result)
+                else None
+            )
 
     def update_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         try:
@@ -413,6 +749,13 @@ class ChatTable:
                 if shared_chat is None:
                     return self.insert_shared_chat_by_chat_id(chat_id)
 
+                if self._ensure_split_chat(db, chat):
+                    ChatMessages.sync_messages_in_session(
+                        db,
+                        shared_chat.id,
+                        ChatMessages.get_messages_map_in_session(db, chat_id),
+                    )
+
                 shared_chat.title = chat.title
                 shared_chat.chat = chat.chat
                 shared_chat.meta = chat.meta
@@ -422,14 +765,20 @@ class ChatTable:
                 db.commit()
                 db.refresh(shared_chat)
 
-                return ChatModel.model_validate(shared_chat)
+                return self._to_chat_model(shared_chat)
         except Exception:
             return None
 
+    def _delete_chat_messages(self, query) -> bool:
+        chat_ids = [chat.id for chat in query.with_entities(Chat.id).all()]
+        return ChatMessages.delete_messages_by_chat_ids(chat_ids)
+
     def delete_shared_chat_by_chat_id(self, chat_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(user_id=f"shared-{chat_id}").delete()
+                query = db.query(Chat).filter_by(user_id=f"shared-{chat_id}")
+                self._delete_chat_messages(query)
+                query.delete()
                 db.commit()
 
                 return True
@@ -454,7 +803,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -466,7 +815,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -479,7 +828,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -530,7 +879,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chat_list_by_user_id(
         self,
@@ -569,7 +918,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -627,7 +976,7 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
@@ -640,7 +989,21 @@ class ChatTable:
                     db.commit()
                     db.refresh(chat_item)
 
-                return ChatModel.model_validate(chat_item)
+                return self._to_chat_model(chat_item)
+        except Exception:
+            return None
+
+    async def get_chat_by_id_async(self, id: str) -> Optional[ChatModel]:
+        try:
+            async with get_async_db() as db:
+                chat_item = await db.get(Chat, id)
+                if chat_item is None:
+                    return None
+
+                if self._sanitize_chat_row(chat_item):
+                    await db.commit()
+
+                return await self._to_chat_model_async(chat_item)
         except Exception:
             return None
 
@@ -662,7 +1025,19 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
+        except Exception:
+            return None
+
+    async def get_chat_by_id_and_user_id_async(
+        self, id: str, user_id: str
+    ) -> Optional[ChatModel]:
+        try:
+            async with get_async_db() as db:
+                chat_item = await db.scalar(
+                    select(Chat).where(Chat.id == id, Chat.user_id == user_id)
+                )
+                return await self._to_chat_model_async(chat_item)
         except Exception:
             return None
 
@@ -673,7 +1048,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -682,7 +1057,7 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -691,7 +1066,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -700,7 +1075,110 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
+
+    def _has_search_index(self, db) -> bool:
+        # Created by a migration, which skips it when SQLite lacks FTS5
+        if self._search_index is None:
+            try:
+                if db.bind.dialect.name == "sqlite":
+                    self._search_index = (
+                        db.execute(
+                            text(
+                                "SELECT 1 FROM sqlite_master "
+                                "WHERE type = 'table' AND name = 'chat_message_fts'"
+                            )
+                        ).first()
+                        is not None
+                    )
+                elif db.bind.dialect.name == "postgresql":
+                    self._search_index = (
+                        db.execute(
+                            text(
+                                "SELECT 1 FROM information_schema.columns "
+                                "WHERE table_name = 'chat_message' "
+                                "AND column_name = 'search_vector'"
+                            )
+                        ).first()
+                        is not None
+                    )
+                else:
+                    self._search_index = False
+            except Exception as e:
+                log.warning(f"Error checking for the chat search index: {e}")
+                self._search_index = False
+        return self._search_index
+
+    def _get_search_matches(
+        self, dialect_name: str, user_id: str, search_terms: list[str]
+    ):
+        """
+        Subquery of the chats of a user with a message matching all search terms
+        (as prefixes), with the rank (lower is better) and a snippet of the best
+        matching message of each chat.
+        """
+        if dialect_name == "sqlite":
+            search_query = " ".join(f'"{term}"*' for term in search_terms)
+            # FTS5 auxiliary functions only work directly on the FTS table, so the
+            # matches are ranked first and grouped by chat afterwards
+            sql = """
+            SELECT chat_id, rank, snippet FROM (
+                SELECT
+                    chat_message_search.chat_id AS chat_id,
+                    fts_match.rank AS rank,
+                    fts_match.snippet AS snippet,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY chat_message_search.chat_id
+                        ORDER BY fts_match.rank
+                    ) AS row_number
+                FROM (
+                    SELECT
+                        rowid AS id,
+                        rank,
+                        snippet(chat_message_fts, 0, '<mark>', '</mark>', '…', 24)
+                            AS snippet
+                    FROM chat_message_fts
+                    WHERE chat_message_fts MATCH :search_query
+                ) AS fts_match
+                JOIN chat_message_search ON chat_message_search.id = fts_match.id
+                WHERE chat_message_search.chat_id IN (
+                    SELECT id FROM chat WHERE user_id = :search_user_id
+                )
+            ) WHERE row_number = 1
+            """
+        else:
+            search_query = " & ".join(f"{term}:*" for term in search_terms)
+            sql = """
+            SELECT
+                chat_id,
+                rank,
+                ts_headline(
+                    'simple',
+                    content,
+                    search_query,
+                    'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8'
+                ) AS snippet
+            FROM (
+                SELECT DISTINCT ON (chat_message.chat_id)
+                    chat_message.chat_id AS chat_id,
+                    -ts_rank(chat_message.search_vector, q.search_query) AS rank,
+                    chat_message.data->>'content' AS content,
+                    q.search_query AS search_query
+                FROM chat_message, to_tsquery('simple', :search_query) AS q(search_query)
+                WHERE chat_message.search_vector @@ q.search_query
+                AND chat_message.chat_id IN (
+                    SELECT id FROM chat WHERE user_id = :search_user_id
+                )
+                ORDER BY chat_message.chat_id, rank
+            ) AS best_match
+            """
+
+        return (
+            text(sql)
+            .bindparams(search_query=search_query, search_user_id=user_id)
+            .columns(chat_id=Text, rank=Float, snippet=Text)
+            .subquery("matches")
+        )
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -709,16 +1187,21 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> list[ChatSearchResponse]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Filters chats based on a search query, allowing pagination using skip and limit.
+        Message contents are matched through the full-text search index when the
+        database has one, and with LIKE queries otherwise.
         """
         search_text = search_text.replace("\u0000", "").lower().strip()
 
         if not search_text:
-            return self.get_chat_list_by_user_id(
-                user_id, include_archived, filter={}, skip=skip, limit=limit
-            )
+            return [
+                ChatSearchResponse(**chat.model_dump())
+                for chat in self.get_chat_list_by_user_id(
+                    user_id, include_archived, filter={}, skip=skip, limit=limit
+                )
+            ]
 
         search_text_words = search_text.split(" ")
 
@@ -771,9 +1254,24 @@ class ChatTable:
         ]
 
         search_text = " ".join(search_text_words)
+        search_terms = re.findall(r"\w+", search_text)
 
         with get_db() as db:
-            query = db.query(Chat).filter(Chat.user_id == user_id)
+            dialect_name = db.bind.dialect.name
+
+            matches = None
+            if search_terms and self._has_search_index(db):
+                matches = self._get_search_matches(dialect_name, user_id, search_terms)
+
+            query = db.query(
+                Chat.id,
+                Chat.title,
+                Chat.updated_at,
+                Chat.created_at,
+                (matches.c.snippet if matches is not None else literal(None)).label(
+                    "snippet"
+                ),
+            ).filter(Chat.user_id == user_id)
 
             if is_archived is not None:
                 query = query.filter(Chat.archived == is_archived)
@@ -792,25 +1290,44 @@ class ChatTable:
             if folder_ids:
                 query = query.filter(Chat.folder_id.in_(folder_ids))
 
-            query = query.order_by(Chat.updated_at.desc())
+            if matches is not None:
+                # Title matches first, then the best ranked message of each chat
+                title_match = Chat.title.ilike(f"%{search_text}%")
+                query = (
+                    query.outerjoin(matches, matches.c.chat_id == Chat.id)
+                    .filter(or_(title_match, matches.c.chat_id.isnot(None)))
+                    .order_by(
+                        title_match.desc(),
+                        matches.c.rank.asc().nulls_last(),
+                        Chat.updated_at.desc(),
+                    )
+                )
+            else:
+                query = query.order_by(Chat.updated_at.desc())
 
             # Check if the database dialect is either 'sqlite' or 'postgresql'
-            dialect_name = db.bind.dialect.name
             if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                sqlite_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_each(Chat.chat, '$.messages') AS message "
-                    "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
-                )
-                sqlite_content_clause = text(sqlite_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
+                if matches is None:
+                    # SQLite case: using JSON1 extension for JSON searching
+                    sqlite_content_sql = (
+                        "(EXISTS ("
+                        "    SELECT 1 "
+                        "    FROM chat_message "
+                        "    WHERE chat_message.chat_id = Chat.id "
+                        "    AND LOWER(chat_message.data->>'content') LIKE '%' || :content_key || '%'"
+                        ") OR EXISTS ("
+                        "    SELECT 1 "
+                        "    FROM json_each(Chat.chat, '$.messages') AS message "
+                        "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
+                        "))"
+                    )
+                    sqlite_content_clause = text(sqlite_content_sql)
+                    query = query.filter(
+                        or_(
+                            Chat.title.ilike(bindparam("title_key")),
+                            sqlite_content_clause,
+                        ).params(title_key=f"%{search_text}%", content_key=search_text)
+                    )
 
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
@@ -843,32 +1360,41 @@ class ChatTable:
                     )
 
             elif dialect_name == "postgresql":
-                # PostgreSQL doesn't allow null bytes in text. We filter those out by checking
-                # the JSON representation for \u0000 before attempting text extraction
-
-                # Safety filter: JSON field must not contain \u0000
-                query = query.filter(text("Chat.chat::text NOT LIKE '%\\\\u0000%'"))
-
                 # Safety filter: title must not contain actual null bytes
                 query = query.filter(text("Chat.title::text NOT LIKE '%\\x00%'"))
 
-                postgres_content_sql = """
-                EXISTS (
-                    SELECT 1
-                    FROM json_array_elements(Chat.chat->'messages') AS message
-                    WHERE json_typeof(message->'content') = 'string'
-                    AND LOWER(message->>'content') LIKE '%' || :content_key || '%'
-                )
-                """
-
-                postgres_content_clause = text(postgres_content_sql)
+                if matches is None:
+                    # PostgreSQL doesn't allow null bytes in text. We filter those out by checking
+                    # the JSON representation for \u0000 before attempting text extraction
+
+                    # Safety filter: JSON field must not contain \u0000
+                    query = query.filter(text("Chat.chat::text NOT LIKE '%\\\\u0000%'"))
+
+                    postgres_content_sql = """
+                    (EXISTS (
+                        SELECT 1
+                        FROM chat_message
+                        WHERE chat_message.chat_id = Chat.id
+                        AND json_typeof(chat_message.data->'content') = 'string'
+                        AND LOWER(chat_message.data->>'content') LIKE '%' || :content_key || '%'
+                    ) OR EXISTS (
+                        SELECT 1
+                        FROM json_array_elements(Chat.chat->'messages') AS message
+                        WHERE json_typeof(message->'content') = 'string'
+                        AND LOWER(message->>'content') LIKE '%' || :content_key || '%'
+                    ))
+                    """
+
+                    postgres_content_clause = text(postgres_content_sql)
 
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")),
-                        postgres_content_clause,
+                    query = query.filter(
+                        or_(
+                            Chat.title.ilike(bindparam("title_key")),
+                            postgres_content_clause,
+                        )
+                    ).params(
+                        title_key=f"%{search_text}%", content_key=search_text.lower()
                     )
-                ).params(title_key=f"%{search_text}%", content_key=search_text.lower())
 
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
@@ -905,12 +1431,20 @@ class ChatTable:
                 )
 
             # Perform pagination at the SQL level
-            all_chats = query.offset(skip).limit(limit).all()
+            rows = query.offset(skip).limit(limit).all()
 
-            log.info(f"The number of chats: {len(all_chats)}")
+            log.info(f"The number of chats: {len(rows)}")
 
-            # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [
+                ChatSearchResponse(
+                    id=row.id,
+                    title=row.title,
+                    updated_at=row.updated_at,
+                    created_at=row.created_at,
+                    snippet=row.snippet,
+                )
+                for row in rows
+            ]
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str, skip: int = 0, limit: int = 60
@@ -928,7 +1462,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -943,7 +1477,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -956,7 +1490,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -995,7 +1529,7 @@ class ChatTable:
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -1016,7 +1550,7 @@ class ChatTable:
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -1102,6 +1636,7 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                ChatMessages.delete_messages_by_chat_ids([id])
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -1112,7 +1647,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                query = db.query(Chat).filter_by(id=id, user_id=user_id)
+                self._delete_chat_messages(query)
+                query.delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1124,7 +1661,9 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
-                db.query(Chat).filter_by(user_id=user_id).delete()
+                query = db.query(Chat).filter_by(user_id=user_id)
+                self._delete_chat_messages(query)
+                query.delete()
                 db.commit()
 
                 return True
@@ -1136,7 +1675,9 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
+                query = db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id)
+                self._delete_chat_messages(query)
+                query.delete()
                 db.commit()
 
                 return True
@@ -1163,7 +1704,9 @@ class ChatTable:
                 chats_by_user = db.query(Chat).filter_by(user_id=user_id).all()
                 shared_chat_ids = [f"shared-{chat.id}" for chat in chats_by_user]
 
-                db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids)).delete()
+                query = db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids))
+                self._delete_chat_messages(query)
+                query.delete()
                 db.commit()
 
                 return True
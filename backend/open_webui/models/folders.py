@@ -6,9 +6,9 @@ import re
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, Text, JSON, Boolean, func
+from sqlalchemy import BigInteger, Column, Text, JSON, Boolean, func, select
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_async_db, get_db
 from open_webui.env import SRC_LOG_LEVELS
 
 
@@ -126,6 +126,22 @@ class FolderTable:
         except Exception:
             return None
 
+    async def get_folder_by_id_and_user_id_async(
+        self, id: str, user_id: str
+    ) -> Optional[FolderModel]:
+        try:
+            async with get_async_db() as db:
+                folder = await db.scalar(
+                    select(Folder).where(Folder.id == id, Folder.user_id == user_id)
+                )
+
+                if not folder:
+                    return None
+
+                return FolderModel.model_validate(folder)
+        except Exception:
+            return None
+
     def get_children_folders_by_id_and_user_id(
         self, id: str, user_id: str
     ) -> Optional[list[FolderModel]]:
@@ -2,9 +2,10 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import Base, JSONField, get_async_db, get_db
 from open_webui.models.users import Users, UserModel
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.plugin_registry import FUNCTION_REGISTRY
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, Index
 
@@ -123,6 +124,7 @@ class FunctionsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                FUNCTION_REGISTRY.invalidate(function.id)
                 if result:
                     return FunctionModel.model_validate(result)
                 else:
@@ -170,6 +172,7 @@ class FunctionsTable:
                         db.delete(func)
 
                 db.commit()
+                FUNCTION_REGISTRY.invalidate()
 
                 return [
                     FunctionModel.model_validate(func)
@@ -187,6 +190,14 @@ class FunctionsTable:
         except Exception:
             return None
 
+    async def get_function_by_id_async(self, id: str) -> Optional[FunctionModel]:
+        try:
+            async with get_async_db() as db:
+                function = await db.get(Function, id)
+                return FunctionModel.model_validate(function)
+        except Exception:
+            return None
+
     def get_functions(
         self, active_only=False, include_valves=False
     ) -> list[FunctionModel | FunctionWithValvesModel]:
@@ -283,6 +294,7 @@ class FunctionsTable:
                 function.updated_at = int(time.time())
                 db.commit()
                 db.refresh(function)
+                FUNCTION_REGISTRY.touch()
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -363,6 +375,10 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                if "content" in updated:
+                    FUNCTION_REGISTRY.invalidate(id)
+                else:
+                    FUNCTION_REGISTRY.touch()
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -377,6 +393,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                FUNCTION_REGISTRY.touch()
                 return True
             except Exception:
                 return None
@@ -386,6 +403,7 @@ class FunctionsTable:
             try:
                 db.query(Function).filter_by(id=id).delete()
                 db.commit()
+                FUNCTION_REGISTRY.invalidate(id)
 
                 return True
             except Exception:
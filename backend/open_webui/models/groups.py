@@ -1,17 +1,28 @@
 import json
 import logging
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.internal.db import Base, get_async_db, get_db
+from open_webui.env import (
+    GROUP_MEMBERSHIP_CACHE_TTL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
 
 from open_webui.models.files import FileMetadataResponse
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func, ForeignKey
+from sqlalchemy import BigInteger, Column, String, Text, JSON, func, ForeignKey, select
 
 
 log = logging.getLogger(__name__)
@@ -112,6 +123,209 @@ class GroupUpdateForm(GroupForm):
     pass
 
 
+class GroupMembershipCache:
+    """
+    Short-lived cache of the groups of each user, used to evaluate access control
+    without querying group memberships for every check.
+
+    Entries are tagged with a generation that every change to groups or
+    memberships bumps, so one change invalidates all entries at once, including
+    entries loaded concurrently with it. Groups are kept in a bounded
+    in-process LRU and, when Redis is configured, in Redis as well so that
+    invalidations reach every worker. Local entries only live for `local_ttl`
+    seconds, which bounds how long a worker misses an invalidation made by
+    another one, with or without Redis.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        redis=None,
+        async_redis=None,
+        redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:groups:members",
+        size: int = 10000,
+        local_ttl: int = 1,
+    ):
+        self._ttl = ttl
+        self._redis = redis
+        self._async_redis = async_redis
+        self._redis_key_prefix = redis_key_prefix
+        self._generation_key = f"{redis_key_prefix}:generation"
+        self._generation = 0
+        self._size = size
+        self._local_ttl = min(ttl, local_ttl)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_key(self, user_id: str) -> str:
+        return f"{self._redis_key_prefix}:{user_id}"
+
+    def _get_local(self, user_id: str) -> Optional[list[GroupModel]]:
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.time() or entry[1] != self._generation:
+                del self._local[user_id]
+                return None
+            self._local.move_to_end(user_id)
+            return list(entry[2])
+
+    def _set_local(self, user_id: str, groups: list[GroupModel], generation: int):
+        with self._lock:
+            # Loaded before an invalidation of this worker
+            if generation != self._generation:
+                return
+
+            self._local[user_id] = (
+                time.time() + self._local_ttl,
+                generation,
+                list(groups),
+            )
+            self._local.move_to_end(user_id)
+            while len(self._local) > self._size:
+                self._local.popitem(last=False)
+
+    def _read_entry(
+        self, generation: Optional[str], value: Optional[str]
+    ) -> tuple[Optional[list[GroupModel]], int]:
+        generation = int(generation or 0)
+        entry = json.loads(value) if value else None
+        if entry is None or entry["generation"] != generation:
+            return None, generation
+        return [
+            GroupModel.model_validate(group) for group in entry["groups"]
+        ], generation
+
+    def _dump_entry(self, groups: list[GroupModel], generation: int) -> str:
+        return json.dumps(
+            {
+                "generation": generation,
+                "groups": [group.model_dump() for group in groups],
+            }
+        )
+
+    def get_groups(
+        self, user_id: str
+    ) -> tuple[Optional[list[GroupModel]], tuple[int, int]]:
+        """
+        Returns the cached groups of the user, or None, and the current
+        generations to store freshly loaded groups with.
+        """
+        generation = self._generation
+        if self._ttl <= 0:
+            return None, (generation, 0)
+
+        groups = self._get_local(user_id)
+        if groups is not None or not self._redis:
+            return groups, (generation, 0)
+
+        try:
+            # A pipeline rather than MGET, the keys may live on different
+            # cluster nodes
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.get(self._generation_key)
+            pipe.get(self._get_key(user_id))
+            groups, redis_generation = self._read_entry(*pipe.execute())
+        except Exception as e:
+            log.debug(f"Error reading groups of user {user_id} from cache: {e}")
+            return None, (generation, 0)
+
+        if groups is not None:
+            self._set_local(user_id, groups, generation)
+        return groups, (generation, redis_generation)
+
+    async def get_groups_async(
+        self, user_id: str
+    ) -> tuple[Optional[list[GroupModel]], tuple[int, int]]:
+        generation = self._generation
+        if self._ttl <= 0:
+            return None, (generation, 0)
+
+        groups = self._get_local(user_id)
+        if groups is not None or not self._async_redis:
+            return groups, (generation, 0)
+
+        try:
+            async with self._async_redis.pipeline(transaction=False) as pipe:
+                pipe.get(self._generation_key)
+                pipe.get(self._get_key(user_id))
+                groups, redis_generation = self._read_entry(*await pipe.execute())
+        except Exception as e:
+            log.debug(f"Error reading groups of user {user_id} from cache: {e}")
+            return None, (generation, 0)
+
+        if groups is not None:
+            self._set_local(user_id, groups, generation)
+        return groups, (generation, redis_generation)
+
+    def set_groups(
+        self, user_id: str, groups: list[GroupModel], generation: tuple[int, int]
+    ):
+        if self._ttl <= 0:
+            return
+
+        self._set_local(user_id, groups, generation[0])
+        try:
+            if self._redis:
+                self._redis.set(
+                    self._get_key(user_id),
+                    self._dump_entry(groups, generation[1]),
+                    ex=self._ttl,
+                )
+        except Exception as e:
+            log.debug(f"Error caching groups of user {user_id}: {e}")
+
+    async def set_groups_async(
+        self, user_id: str, groups: list[GroupModel], generation: tuple[int, int]
+    ):
+        if self._ttl <= 0:
+            return
+
+        self._set_local(user_id, groups, generation[0])
+        try:
+            if self._async_redis:
+                await self._async_redis.set(
+                    self._get_key(user_id),
+                    self._dump_entry(groups, generation[1]),
+                    ex=self._ttl,
+                )
+        except Exception as e:
+            log.debug(f"Error caching groups of user {user_id}: {e}")
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._local.clear()
+
+        try:
+            if self._redis:
+                self._redis.incr(self._generation_key)
+        except Exception as e:
+            log.warning(f"Error invalidating group membership cache: {e}")
+
+
+def get_group_membership_cache_redis(async_mode: bool):
+    if REDIS_URL and GROUP_MEMBERSHIP_CACHE_TTL > 0:
+        return get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            async_mode=async_mode,
+            decode_responses=True,
+        )
+    return None
+
+
+GROUP_MEMBERSHIP_CACHE = GroupMembershipCache(
+    ttl=GROUP_MEMBERSHIP_CACHE_TTL,
+    redis=get_group_membership_cache_redis(async_mode=False),
+    async_redis=get_group_membership_cache_redis(async_mode=True),
+)
+
+
 class GroupTable:
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
@@ -158,6 +372,36 @@ class GroupTable:
                 .all()
             ]
 
+    async def get_groups_by_member_id_async(self, user_id: str) -> list[GroupModel]:
+        async with get_async_db() as db:
+            groups = await db.scalars(
+                select(Group)
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .where(GroupMember.user_id == user_id)
+                .order_by(Group.updated_at.desc())
+            )
+            return [GroupModel.model_validate(group) for group in groups]
+
+    def get_groups_by_member_id_cached(self, user_id: str) -> list[GroupModel]:
+        """
+        Resolve the groups of a user for access control, served from
+        GROUP_MEMBERSHIP_CACHE until groups or memberships change.
+        """
+        groups, generation = GROUP_MEMBERSHIP_CACHE.get_groups(user_id)
+        if groups is None:
+            groups = self.get_groups_by_member_id(user_id)
+            GROUP_MEMBERSHIP_CACHE.set_groups(user_id, groups, generation)
+        return groups
+
+    async def get_groups_by_member_id_cached_async(
+        self, user_id: str
+    ) -> list[GroupModel]:
+        groups, generation = await GROUP_MEMBERSHIP_CACHE.get_groups_async(user_id)
+        if groups is None:
+            groups = await self.get_groups_by_member_id_async(user_id)
+            await GROUP_MEMBERSHIP_CACHE.set_groups_async(user_id, groups, generation)
+        return groups
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -214,6 +458,7 @@ class GroupTable:
 
             db.add_all(new_members)
             db.commit()
+            GROUP_MEMBERSHIP_CACHE.invalidate()
 
     def get_group_member_count_by_id(self, id: str) -> int:
         with get_db() as db:
@@ -236,6 +481,7 @@ class GroupTable:
                     }
                 )
                 db.commit()
+                GROUP_MEMBERSHIP_CACHE.invalidate()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -246,6 +492,7 @@ class GroupTable:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
                 db.commit()
+                GROUP_MEMBERSHIP_CACHE.invalidate()
                 return True
         except Exception:
             return False
@@ -255,6 +502,7 @@ class GroupTable:
             try:
                 db.query(Group).delete()
                 db.commit()
+                GROUP_MEMBERSHIP_CACHE.invalidate()
 
                 return True
             except Exception:
@@ -282,6 +530,8 @@ class GroupTable:
                     )
 
                 db.commit()
+                if groups:
+                    GROUP_MEMBERSHIP_CACHE.invalidate()
                 return True
 
             except Exception:
@@ -373,6 +623,9 @@ class GroupTable:
                     )
 
                 db.commit()
+                # Runs on every trusted header login, most of which change nothing
+                if groups_to_add or groups_to_remove:
+                    GROUP_MEMBERSHIP_CACHE.invalidate()
                 return True
 
             except Exception as e:
@@ -411,6 +664,7 @@ class GroupTable:
                 group.updated_at = now
                 db.commit()
                 db.refresh(group)
+                GROUP_MEMBERSHIP_CACHE.invalidate()
 
                 return GroupModel.model_validate(group)
 
@@ -441,6 +695,7 @@ class GroupTable:
 
                 db.commit()
                 db.refresh(group)
+                GROUP_MEMBERSHIP_CACHE.invalidate()
                 return GroupModel.model_validate(group)
 
         except Exception as e:
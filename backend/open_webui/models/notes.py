@@ -4,9 +4,8 @@ import uuid
 from typing import Optional
 from functools import lru_cache
 
-from open_webui.internal.db import Base, get_db
-from open_webui.models.groups import Groups
-from open_webui.utils.access_control import has_access
+from open_webui.internal.db import Base, get_async_db, get_db
+from open_webui.utils.access_control import get_access_context
 from open_webui.models.users import Users, UserResponse
 
 
@@ -136,8 +135,7 @@ class NoteTable:
         limit: Optional[int] = None,
     ) -> list[NoteModel]:
         with get_db() as db:
-            user_groups = Groups.get_groups_by_member_id(user_id)
-            user_group_ids = {group.id for group in user_groups}
+            access_context = get_access_context(user_id)
 
             # Order newest-first. We stream to keep memory usage low.
             query = (
@@ -160,8 +158,8 @@ class NoteTable:
                     # We might want to change this behavior later
                     permitted = permission == "read"
                 else:
-                    permitted = has_access(
-                        user_id, permission, note.access_control, user_group_ids
+                    permitted = access_context.has_access(
+                        permission, note.access_control
                     )
 
                 if not permitted:
@@ -183,6 +181,11 @@ class NoteTable:
             note = db.query(Note).filter(Note.id == id).first()
             return NoteModel.model_validate(note) if note else None
 
+    async def get_note_by_id_async(self, id: str) -> Optional[NoteModel]:
+        async with get_async_db() as db:
+            note = await db.get(Note, id)
+            return NoteModel.model_validate(note) if note else None
+
     def update_note_by_id(
         self, id: str, form_data: NoteUpdateForm
     ) -> Optional[NoteModel]:
@@ -208,6 +211,31 @@ class NoteTable:
             db.commit()
             return NoteModel.model_validate(note) if note else None
 
+    async def update_note_by_id_async(
+        self, id: str, form_data: NoteUpdateForm
+    ) -> Optional[NoteModel]:
+        async with get_async_db() as db:
+            note = await db.get(Note, id)
+            if not note:
+                return None
+
+            form_data = form_data.model_dump(exclude_unset=True)
+
+            if "title" in form_data:
+                note.title = form_data["title"]
+            if "data" in form_data:
+                note.data = {**note.data, **form_data["data"]}
+            if "meta" in form_data:
+                note.meta = {**note.meta, **form_data["meta"]}
+
+            if "access_control" in form_data:
+                note.access_control = form_data["access_control"]
+
+            note.updated_at = int(time.time_ns())
+
+            await db.commit()
+            return NoteModel.model_validate(note)
+
     def delete_note_by_id(self, id: str):
         with get_db() as db:
             db.query(Note).filter(Note.id == id).delete()
@@ -2,13 +2,12 @@ import time
 from typing import Optional
 
 from open_webui.internal.db import Base, get_db
-from open_webui.models.groups import Groups
 from open_webui.models.users import Users, UserResponse
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, JSON
 
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_access_context
 
 ####################
 # Prompts DB Schema
@@ -129,13 +128,13 @@ class PromptsTable:
         self, user_id: str, permission: str = "write"
     ) -> list[PromptUserResponse]:
         prompts = self.get_prompts()
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
+        access_context = get_access_context(user_id)
 
         return [
             prompt
             for prompt in prompts
             if prompt.user_id == user_id
-            or has_access(user_id, permission, prompt.access_control, user_group_ids)
+            or access_context.has_access(permission, prompt.access_control)
         ]
 
     def update_prompt_by_command(
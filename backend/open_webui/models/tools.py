@@ -4,13 +4,13 @@ from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.models.users import Users, UserResponse
-from open_webui.models.groups import Groups
 
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, JSON
 
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_access_context
+from open_webui.utils.plugin_registry import TOOL_REGISTRY
 
 
 log = logging.getLogger(__name__)
@@ -130,6 +130,7 @@ class ToolsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                TOOL_REGISTRY.invalidate(tool.id)
                 if result:
                     return ToolModel.model_validate(result)
                 else:
@@ -172,13 +173,13 @@ class ToolsTable:
         self, user_id: str, permission: str = "write"
     ) -> list[ToolUserModel]:
         tools = self.get_tools()
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
+        access_context = get_access_context(user_id)
 
         return [
             tool
             for tool in tools
             if tool.user_id == user_id
-            or has_access(user_id, permission, tool.access_control, user_group_ids)
+            or access_context.has_access(permission, tool.access_control)
         ]
 
     def get_tool_valves_by_id(self, id: str) -> Optional[dict]:
@@ -253,6 +254,8 @@ class ToolsTable:
                     {**updated, "updated_at": int(time.time())}
                 )
                 db.commit()
+                if "content" in updated:
+                    TOOL_REGISTRY.invalidate(id)
 
                 tool = db.query(Tool).get(id)
                 db.refresh(tool)
@@ -265,6 +268,7 @@ class ToolsTable:
             with get_db() as db:
                 db.query(Tool).filter_by(id=id).delete()
                 db.commit()
+                TOOL_REGISTRY.invalidate(id)
 
                 return True
         except Exception:
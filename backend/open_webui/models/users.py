@@ -1,21 +1,38 @@
+import hashlib
+import hmac
+import json
+import logging
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import Base, JSONField, get_async_db, get_db
 
 
-from open_webui.env import DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL
+from open_webui.env import (
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+    USER_CACHE_TTL,
+)
 from open_webui.models.chats import Chats
 from open_webui.models.groups import Groups, GroupMember
-from open_webui.utils.misc import throttle
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
 
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, Date, exists, select, Boolean
-from sqlalchemy import or_, case
+from sqlalchemy import or_, case, update
 
 import datetime
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
 ####################
 # User DB Schema
 ####################
@@ -167,7 +184,187 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+####################
+# User Cache
+####################
+
+
+class UserCache:
+    """
+    Short-lived cache of the users resolved while authenticating requests, by
+    id and by API key. Users are kept in a bounded in-process LRU and, when
+    Redis is configured, in Redis as well so that workers share loaded users
+    and invalidations. Local entries only live for `local_ttl` seconds, which
+    bounds how long a worker serves a user invalidated by another one, with or
+    without Redis.
+
+    API keys are never cached, entries only hold their sha256 hash.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        redis=None,
+        async_redis=None,
+        redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:users:cache",
+        size: int = 10000,
+        local_ttl: int = 1,
+    ):
+        self._ttl = ttl
+        # The sync client only serves invalidations from the sync Users methods
+        self._redis = redis
+        self._async_redis = async_redis
+        self._redis_key_prefix = redis_key_prefix
+        self._size = size
+        self._local_ttl = min(ttl, local_ttl)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_key(self, kind: str, value: str) -> str:
+        return f"{self._redis_key_prefix}:{kind}:{value}"
+
+    def _get_api_key_hash(self, api_key: str) -> str:
+        return hashlib.sha256(api_key.encode()).hexdigest()
+
+    def _get_local(self, key: str):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry[1]
+
+    def _set_local(self, key: str, value):
+        with self._lock:
+            self._local[key] = (time.time() + self._local_ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self._size:
+                self._local.popitem(last=False)
+
+    async def _get(self, key: str, load):
+        value = self._get_local(key)
+        if value is None and self._async_redis:
+            value = await self._async_redis.get(key)
+            if value is not None:
+                value = load(value)
+                self._set_local(key, value)
+        return value
+
+    async def _get_user_entry(self, id: str) -> Optional[tuple[UserModel, str]]:
+        def load(value: str) -> tuple[UserModel, str]:
+            entry = json.loads(value)
+            return UserModel.model_validate(entry["user"]), entry["api_key_hash"]
+
+        return await self._get(self._get_key("id", id), load)
+
+    async def get_user_by_id(self, id: str) -> Optional[UserModel]:
+        if self._ttl <= 0:
+            return None
+
+        try:
+            entry = await self._get_user_entry(id)
+            return entry[0].model_copy() if entry else None
+        except Exception as e:
+            log.debug(f"Error reading user {id} from cache: {e}")
+            return None
+
+    async def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        if self._ttl <= 0:
+            return None
+
+        api_key_hash = self._get_api_key_hash(api_key)
+        try:
+            id = await self._get(self._get_key("api_key", api_key_hash), str)
+            entry = await self._get_user_entry(id) if id else None
+        except Exception as e:
+            log.debug(f"Error reading API key from cache: {e}")
+            return None
+
+        # The user entry is dropped when the API key changes
+        if entry is None or not hmac.compare_digest(entry[1] or "", api_key_hash):
+            return None
+        return entry[0].model_copy()
+
+    async def set_user(self, user: UserModel):
+        if self._ttl <= 0:
+            return
+
+        api_key_hash = self._get_api_key_hash(user.api_key) if user.api_key else None
+        user = user.model_copy(update={"api_key": None})
+
+        entries = {self._get_key("id", user.id): (user, api_key_hash)}
+        if api_key_hash:
+            entries[self._get_key("api_key", api_key_hash)] = user.id
+
+        for key, value in entries.items():
+            self._set_local(key, value)
+
+        if self._async_redis:
+            try:
+                async with self._async_redis.pipeline(transaction=False) as pipe:
+                    pipe.set(
+                        self._get_key("id", user.id),
+                        json.dumps(
+                            {
+                                "user": user.model_dump(mode="json"),
+                                "api_key_hash": api_key_hash,
+                            }
+                        ),
+                        ex=self._ttl,
+                    )
+                    if api_key_hash:
+                        pipe.set(
+                            self._get_key("api_key", api_key_hash),
+                            user.id,
+                            ex=self._ttl,
+                        )
+                    await pipe.execute()
+            except Exception as e:
+                log.debug(f"Error caching user {user.id}: {e}")
+
+    def delete_user(self, id: str):
+        # API key entries point at the user entry and are checked against it
+        key = self._get_key("id", id)
+        with self._lock:
+            self._local.pop(key, None)
+
+        try:
+            if self._redis:
+                self._redis.delete(key)
+        except Exception as e:
+            log.warning(f"Error removing user {id} from cache: {e}")
+
+
+def get_user_cache_redis(async_mode: bool):
+    if REDIS_URL and USER_CACHE_TTL > 0:
+        return get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            async_mode=async_mode,
+            decode_responses=True,
+        )
+    return None
+
+
+USER_CACHE = UserCache(
+    ttl=USER_CACHE_TTL,
+    redis=get_user_cache_redis(async_mode=False),
+    async_redis=get_user_cache_redis(async_mode=True),
+)
+
+
 class UsersTable:
+    def __init__(self):
+        # Last active timestamps waiting to be written by flush_user_last_active
+        self._last_active = {}
+        self._last_active_lock = threading.Lock()
+
     def insert_new_user(
         self,
         id: str,
@@ -209,6 +406,14 @@ class UsersTable:
         except Exception:
             return None
 
+    async def get_user_by_id_async(self, id: str) -> Optional[UserModel]:
+        try:
+            async with get_async_db() as db:
+                user = await db.get(User, id)
+                return UserModel.model_validate(user)
+        except Exception:
+            return None
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -217,6 +422,35 @@ class UsersTable:
         except Exception:
             return None
 
+    async def get_user_by_id_cached(self, id: str) -> Optional[UserModel]:
+        """
+        Resolve a user for request authentication, served from USER_CACHE for
+        up to USER_CACHE_TTL seconds after it was last loaded. Users served
+        from the cache have no api_key.
+        """
+        user = await USER_CACHE.get_user_by_id(id)
+        if user is None:
+            user = await self.get_user_by_id_async(id)
+            if user is not None:
+                await USER_CACHE.set_user(user)
+        return user
+
+    async def get_user_by_api_key_async(self, api_key: str) -> Optional[UserModel]:
+        try:
+            async with get_async_db() as db:
+                user = await db.scalar(select(User).filter_by(api_key=api_key))
+                return UserModel.model_validate(user)
+        except Exception:
+            return None
+
+    async def get_user_by_api_key_cached(self, api_key: str) -> Optional[UserModel]:
+        user = await USER_CACHE.get_user_by_api_key(api_key)
+        if user is None:
+            user = await self.get_user_by_api_key_async(api_key)
+            if user is not None:
+                await USER_CACHE.set_user(user)
+        return user
+
     def get_user_by_email(self, email: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -411,6 +645,22 @@ class UsersTable:
         except Exception:
             return None
 
+    async def get_user_webhook_url_by_id_async(self, id: str) -> Optional[str]:
+        try:
+            async with get_async_db() as db:
+                user = await db.get(User, id)
+
+                if user.settings is None:
+                    return None
+                else:
+                    return (
+                        user.settings.get("ui", {})
+                        .get("notifications", {})
+                        .get("webhook_url", None)
+                    )
+        except Exception:
+            return None
+
     def get_num_users_active_today(self) -> Optional[int]:
         with get_db() as db:
             current_timestamp = int(datetime.datetime.now().timestamp())
@@ -425,6 +675,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                USER_CACHE.delete_user(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -439,13 +690,13 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                USER_CACHE.delete_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
             return None
 
-    @throttle(DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL)
     def update_user_last_active_by_id(self, id: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -459,6 +710,40 @@ class UsersTable:
         except Exception:
             return None
 
+    def record_user_last_active_by_id(self, id: str):
+        """
+        Record that a user is active. Timestamps are kept in memory and written
+        in one statement by flush_user_last_active.
+        """
+        with self._last_active_lock:
+            self._last_active[id] = int(time.time())
+
+    def flush_user_last_active(self) -> int:
+        with self._last_active_lock:
+            last_active, self._last_active = self._last_active, {}
+
+        if not last_active:
+            return 0
+
+        try:
+            with get_db() as db:
+                db.execute(
+                    update(User),
+                    [
+                        {"id": id, "last_active_at": last_active_at}
+                        for id, last_active_at in last_active.items()
+                    ],
+                )
+                db.commit()
+            return len(last_active)
+        except Exception as e:
+            log.exception(f"Error updating last active of users: {e}")
+
+            # Keep the timestamps for the next flush, newer ones win
+            with self._last_active_lock:
+                self._last_active = {**last_active, **self._last_active}
+            return 0
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -466,6 +751,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                USER_CACHE.delete_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -477,6 +763,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                USER_CACHE.delete_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -497,6 +784,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                USER_CACHE.delete_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -515,6 +803,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    USER_CACHE.delete_user(id)
 
                 return True
             else:
@@ -527,6 +816,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                USER_CACHE.delete_user(id)
                 return True if result == 1 else False
         except Exception:
             return False
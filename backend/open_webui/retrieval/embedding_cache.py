@@ -0,0 +1,348 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from open_webui.config import (
+    EMBEDDING_CACHE_MAX_SIZE,
+    EMBEDDING_CACHE_BACKEND,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_DISK_MAX_AGE,
+    EMBEDDING_CACHE_DISK_MAX_SIZE,
+    EMBEDDING_CACHE_REDIS_TTL,
+)
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Embeddings are kept as float32, the precision of most vector databases, at a
+# fraction of the memory of a list of floats
+def encode_embedding(embedding: list[float]) -> bytes:
+    return array("f", embedding).tobytes()
+
+
+def decode_embedding(value: bytes) -> list[float]:
+    embedding = array("f")
+    embedding.frombytes(value)
+    return embedding.tolist()
+
+
+class DiskEmbeddingStore:
+    """
+    Persistent tier backed by a single SQLite file. Every `prune_interval`
+    writes, entries older than `max_age` seconds are dropped, then the oldest
+    entries while the embeddings take more than `max_size` bytes (0 for no
+    limit on either).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int = 0,
+        max_age: int = 0,
+        prune_interval: int = 1000,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self._max_size = max_size
+        self._max_age = max_age
+        self._prune_interval = prune_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(directory, "embeddings.db"), check_same_thread=False
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embedding "
+            "(key TEXT PRIMARY KEY, value BLOB, created_at INTEGER)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embedding_created_at ON embedding (created_at)"
+        )
+        self._connection.commit()
+        self._prune()
+
+    def _get_many(self, keys: list[str]) -> dict[str, bytes]:
+        min_created_at = int(time.time()) - self._max_age if self._max_age else 0
+        rows = []
+        with self._lock:
+            # Batched to stay below the number of variables SQLite accepts
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(
+                    self._connection.execute(
+                        "SELECT key, value FROM embedding "
+                        f"WHERE key IN ({placeholders}) AND created_at >= ?",
+                        [*batch, min_created_at],
+                    ).fetchall()
+                )
+        return dict(rows)
+
+    def _set_many(self, items: dict[str, bytes]):
+        now = int(time.time())
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embedding (key, value, created_at) "
+                "VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()],
+            )
+            self._connection.commit()
+            self._writes += len(items)
+
+        if self._writes >= self._prune_interval:
+            self._prune()
+
+    def _prune(self):
+        with self._lock:
+            self._writes = 0
+            if self._max_age:
+                self._connection.execute(
+                    "DELETE FROM embedding WHERE created_at < ?",
+                    (int(time.time()) - self._max_age,),
+                )
+
+            if self._max_size:
+                size, count = self._connection.execute(
+                    "SELECT COALESCE(SUM(LENGTH(value)), 0), COUNT(*) FROM embedding"
+                ).fetchone()
+                if size > self._max_size:
+                    # Down to 90% of the limit so that the next writes do not
+                    # prune again, assuming entries of the average size
+                    excess = size - self._max_size * 0.9
+                    self._connection.execute(
+                        "DELETE FROM embedding WHERE key IN "
+                        "(SELECT key FROM embedding ORDER BY created_at LIMIT ?)",
+                        (math.ceil(excess / (size / count)),),
+                    )
+            self._connection.commit()
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def set_many(self, items: dict[str, bytes]):
+        await asyncio.to_thread(self._set_many, items)
+
+
+class RedisEmbeddingStore:
+    """Shared tier, entries expire after `ttl` seconds."""
+
+    def __init__(self, redis, ttl: int, redis_key_prefix: str):
+        self._redis = redis
+        self._ttl = ttl
+        self._redis_key_prefix = redis_key_prefix
+
+    def _get_redis_key(self, key: str) -> str:
+        return f"{self._redis_key_prefix}:{key}"
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        values = await self._redis.mget([self._get_redis_key(key) for key in keys])
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, items: dict[str, bytes]):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self._get_redis_key(key), value, ex=self._ttl or None)
+            await pipe.execute()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache, keyed by engine, model, API base URL,
+    prefix and the sha256 of the text. Lookups go through an in-memory LRU of
+    encoded embeddings bounded to `max_size` bytes first and an optional shared
+    or persistent store second.
+    """
+
+    def __init__(self, max_size: int, store=None):
+        self.max_size = max_size
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_key(
+        self,
+        engine: str,
+        model: str,
+        url: Optional[str],
+        prefix: Optional[str],
+        text: str,
+    ) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+        return hashlib.sha256(
+            "\x00".join(
+                [engine, model, (url or "").rstrip("/"), prefix or "", text_hash]
+            ).encode()
+        ).hexdigest()
+
+    def _set_local(self, key: str, value: bytes):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    async def get_many(self, keys: list[str]) -> list[Optional[list[float]]]:
+        values = []
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                values.append(value)
+
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing and self.store is not None:
+            try:
+                stored = await self.store.get_many(list(set(missing)))
+            except Exception as e:
+                log.warning(f"Error reading embeddings from the cache store: {e}")
+                stored = {}
+
+            for i, key in enumerate(keys):
+                if values[i] is None and key in stored:
+                    values[i] = stored[key]
+                    self._set_local(key, values[i])
+
+        embeddings = [
+            decode_embedding(value) if value is not None else None for value in values
+        ]
+
+        hits = sum(1 for embedding in embeddings if embedding is not None)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return embeddings
+
+    async def set_many(self, items: dict[str, list[float]]):
+        items = {key: encode_embedding(value) for key, value in items.items()}
+        for key, value in items.items():
+            self._set_local(key, value)
+
+        if self.store is not None and items:
+            try:
+                await self.store.set_many(items)
+            except Exception as e:
+                log.warning(f"Error writing embeddings to the cache store: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def with_embedding_cache(
+    embedding_function: Callable[..., Awaitable],
+    engine: str,
+    model: str,
+    url: Optional[str] = None,
+    cache: Optional[EmbeddingCache] = None,
+) -> Callable[..., Awaitable]:
+    """
+    Wrap an async embedding function so cached texts are not embedded again,
+    only the misses of a batch are sent to the embedding backend.
+    """
+    cache = cache or EMBEDDING_CACHE
+    if not cache.enabled:
+        return embedding_function
+
+    async def cached_embedding_function(query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        keys = [cache.get_key(engine, model, url, prefix, text) for text in texts]
+        embeddings = await cache.get_many(keys)
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings if isinstance(query, list) else embeddings[0]
+
+        if isinstance(query, list):
+            result = await embedding_function(
+                [texts[i] for i in missing], prefix=prefix, user=user
+            )
+        else:
+            result = await embedding_function(query, prefix=prefix, user=user)
+            result = [result] if result is not None else None
+
+        if not isinstance(result, list) or len(result) != len(missing):
+            # The backend failed for part of the batch, leave error handling to
+            # the caller as if there was no cache
+            log.warning("Embedding backend returned an incomplete result")
+            if len(missing) == len(texts):
+                return result if isinstance(query, list) else None
+            return await embedding_function(query, prefix=prefix, user=user)
+
+        for i, embedding in zip(missing, result):
+            embeddings[i] = embedding
+        await cache.set_many({keys[i]: embeddings[i] for i in missing})
+
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return cached_embedding_function
+
+
+def get_embedding_cache_store():
+    if EMBEDDING_CACHE_BACKEND == "disk":
+        return DiskEmbeddingStore(
+            EMBEDDING_CACHE_DIR,
+            max_size=EMBEDDING_CACHE_DISK_MAX_SIZE * 1024 * 1024,
+            max_age=EMBEDDING_CACHE_DISK_MAX_AGE,
+        )
+    elif EMBEDDING_CACHE_BACKEND == "redis" and REDIS_URL:
+        return RedisEmbeddingStore(
+            get_redis_connection(
+                redis_url=REDIS_URL,
+                redis_sentinels=get_sentinels_from_env(
+                    REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                ),
+                redis_cluster=REDIS_CLUSTER,
+                async_mode=True,
+                decode_responses=False,
+            ),
+            ttl=EMBEDDING_CACHE_REDIS_TTL,
+            redis_key_prefix=f"{REDIS_KEY_PREFIX}:embeddings",
+        )
+    return None
+
+
+EMBEDDING_CACHE = EmbeddingCache(
+    max_size=EMBEDDING_CACHE_MAX_SIZE * 1024 * 1024,
+    store=get_embedding_cache_store() if EMBEDDING_CACHE_MAX_SIZE > 0 else None,
+)
@@ -0,0 +1,277 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain_core.documents import Document
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class IngestionJob:
+    def __init__(self, file: Any):
+        self.file = file
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.content: Optional[str] = None
+        self.total_chunks: Optional[int] = None
+        self.inserted_chunks = 0
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def to_dict(self) -> dict:
+        return {
+            "file_id": self.file.id,
+            "status": self.status,
+            "error": self.error,
+            "total_chunks": self.total_chunks,
+            "inserted_chunks": self.inserted_chunks,
+        }
+
+
+class IngestionPipeline:
+    """
+    Ingests a batch of files into the vector database in stages that run
+    concurrently: files are loaded, split into chunks, embedded and inserted,
+    each stage with its own workers and a bounded queue in front of it so a
+    slow stage holds back the ones before it instead of piling up chunks.
+
+    Chunks of different files are embedded together in batches of up to
+    `embedding_batch_size` chunks, with `embedding_concurrency` batches in flight,
+    and every embedded batch is inserted with a single upsert. `on_progress` is
+    called with the job of a file whenever its status changes.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[Any], list[Document]],
+        split: Callable[[Any, list[Document]], list[Document]],
+        embed: Callable[[list[str]], Awaitable[list[list[float]]]],
+        insert: Callable[[list[tuple[Any, Document, list[float]]]], None],
+        on_progress: Optional[Callable[[IngestionJob], Awaitable[None]]] = None,
+        load_concurrency: int = 4,
+        split_concurrency: int = 2,
+        embedding_batch_size: int = 128,
+        embedding_concurrency: int = 4,
+        queue_size: int = 64,
+    ):
+        self.load = load
+        self.split = split
+        self.embed = embed
+        self.insert = insert
+        self.on_progress = on_progress
+
+        self.load_concurrency = max(load_concurrency, 1)
+        self.split_concurrency = max(split_concurrency, 1)
+        self.embedding_batch_size = max(embedding_batch_size, 1)
+        self.embedding_concurrency = max(embedding_concurrency, 1)
+        self.queue_size = max(queue_size, 1)
+
+    async def _set_status(
+        self, job: IngestionJob, status: str, error: Optional[str] = None
+    ):
+        if job.failed:
+            return
+
+        job.status = status
+        job.error = error
+        if self.on_progress:
+            try:
+                await self.on_progress(job)
+            except Exception as e:
+                log.debug(f"Error reporting progress of file {job.file.id}: {e}")
+
+    async def _run_workers(
+        self,
+        count: int,
+        worker: Callable[[asyncio.Queue, asyncio.Queue], Awaitable[None]],
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        outbox_consumers: int,
+    ):
+        await asyncio.gather(*[worker(inbox, outbox) for _ in range(count)])
+
+        # One end marker for each worker of the next stage
+        for _ in range(outbox_consumers):
+            await outbox.put(None)
+
+    async def run(self, files: list[Any]) -> list[IngestionJob]:
+        loop = asyncio.get_running_loop()
+        jobs = [IngestionJob(file) for file in files]
+
+        load_queue: asyncio.Queue = asyncio.Queue()
+        split_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        chunk_queue: asyncio.Queue = asyncio.Queue(
+            self.queue_size * self.embedding_batch_size
+        )
+        insert_queue: asyncio.Queue = asyncio.Queue(self.embedding_concurrency)
+
+        for job in jobs:
+            load_queue.put_nowait(job)
+        for _ in range(self.load_concurrency):
+            load_queue.put_nowait(None)
+
+        async def load_worker(inbox: asyncio.Queue, outbox: asyncio.Queue):
+            while (job := await inbox.get()) is not None:
+                await self._set_status(job, "loading")
+                try:
+                    docs = await loop.run_in_executor(executor, self.load, job.file)
+                    job.content = " ".join(doc.page_content for doc in docs)
+                except Exception as e:
+                    log.warning(f"Error loading file {job.file.id}: {e}")
+                    await self._set_status(job, "failed", str(e))
+                    continue
+                await outbox.put((job, docs))
+
+        async def split_worker(inbox: asyncio.Queue, outbox: asyncio.Queue):
+            while (item := await inbox.get()) is not None:
+                job, docs = item
+                await self._set_status(job, "splitting")
+                try:
+                    chunks = await loop.run_in_executor(
+                        executor, self.split, job.file, docs
+                    )
+                except Exception as e:
+                    log.warning(f"Error splitting file {job.file.id}: {e}")
+                    await self._set_status(job, "failed", str(e))
+                    continue
+
+                job.total_chunks = len(chunks)
+                if not chunks:
+                    await self._set_status(job, "completed")
+                    continue
+
+                await self._set_status(job, "embedding")
+                for chunk in chunks:
+                    await outbox.put((job, chunk))
+
+        async def embed_batch(batch: list[tuple[IngestionJob, Document]]):
+            batch = [(job, chunk) for job, chunk in batch if not job.failed]
+            if not batch:
+                return
+
+            try:
+                vectors = await self.embed([chunk.page_content for _, chunk in batch])
+                if len(vectors) != len(batch):
+                    raise ValueError(
+                        f"Got {len(vectors)} embeddings for {len(batch)} chunks"
+                    )
+            except Exception as e:
+                log.warning(f"Error embedding {len(batch)} chunks: {e}")
+                for job in {job for job, _ in batch}:
+                    await self._set_status(job, "failed", str(e))
+                return
+
+            await insert_queue.put(
+                [(job, chunk, vector) for (job, chunk), vector in zip(batch, vectors)]
+            )
+
+        async def embed_worker():
+            semaphore = asyncio.Semaphore(self.embedding_concurrency)
+            tasks = set()
+
+            async def dispatch(batch):
+                await semaphore.acquire()
+
+                async def run_batch():
+                    try:
+                        await embed_batch(batch)
+                    finally:
+                        semaphore.release()
+
+                task = asyncio.create_task(run_batch())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            batch = []
+            try:
+                while True:
+                    try:
+                        # Send a partial batch rather than wait when splitting
+                        # falls behind
+                        item = await asyncio.wait_for(
+                            chunk_queue.get(), None if not batch else 0.05
+                        )
+                    except asyncio.TimeoutError:
+                        await dispatch(batch)
+                        batch = []
+                        continue
+
+                    if item is None:
+                        break
+
+                    batch.append(item)
+                    if len(batch) >= self.embedding_batch_size:
+                        await dispatch(batch)
+                        batch = []
+
+                if batch:
+                    await dispatch(batch)
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            await insert_queue.put(None)
+
+        async def insert_worker():
+            while (items := await insert_queue.get()) is not None:
+                items = [item for item in items if not item[0].failed]
+                if not items:
+                    continue
+
+                try:
+                    await loop.run_in_executor(executor, self.insert, items)
+                except Exception as e:
+                    log.warning(f"Error inserting {len(items)} chunks: {e}")
+                    for job in {job for job, _, _ in items}:
+                        await self._set_status(job, "failed", str(e))
+                    continue
+
+                for job in {job for job, _, _ in items}:
+                    job.inserted_chunks += sum(1 for item in items if item[0] is job)
+                    if job.inserted_chunks >= job.total_chunks:
+                        await self._set_status(job, "completed")
+
+        executor = ThreadPoolExecutor(
+            max_workers=self.load_concurrency + self.split_concurrency + 1,
+            thread_name_prefix="ingestion",
+        )
+        tasks = [
+            asyncio.create_task(
+                self._run_workers(
+                    self.load_concurrency,
+                    load_worker,
+                    load_queue,
+                    split_queue,
+                    self.split_concurrency,
+                )
+            ),
+            asyncio.create_task(
+                self._run_workers(
+                    self.split_concurrency,
+                    split_worker,
+                    split_queue,
+                    chunk_queue,
+                    1,
+                )
+            ),
+            asyncio.create_task(embed_worker()),
+            asyncio.create_task(insert_worker()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # A stage that failed would leave the others waiting on its queue
+            for task in tasks:
+                task.cancel()
+            # Loads and splits still queued when a stage failed or the run was
+            # cancelled are dropped instead of waited for
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return jobs
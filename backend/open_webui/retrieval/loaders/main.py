@@ -3,6 +3,7 @@ import logging
 import ftfy
 import sys
 import json
+from typing import Iterator
 
 from azure.identity import DefaultAzureCredential
 from langchain_community.document_loaders import (
@@ -28,6 +29,10 @@ from open_webui.retrieval.loaders.external_document import ExternalDocumentLoade
 from open_webui.retrieval.loaders.mistral import MistralLoader
 from open_webui.retrieval.loaders.datalab_marker import DatalabMarkerLoader
 from open_webui.retrieval.loaders.mineru import MinerULoader
+from open_webui.retrieval.loaders.process_pool import (
+    LOADER_PROCESS_POOL,
+    ProcessPoolLoader,
+)
 
 
 from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
@@ -90,6 +95,49 @@ known_source_ext = [
 ]
 
 
+def get_local_loader(
+    file_ext: str, file_content_type: str, file_path: str, pdf_extract_images=None
+):
+    if file_ext == "pdf":
+        loader = PyPDFLoader(file_path, extract_images=pdf_extract_images)
+    elif file_ext == "csv":
+        loader = CSVLoader(file_path, autodetect_encoding=True)
+    elif file_ext == "rst":
+        loader = UnstructuredRSTLoader(file_path, mode="elements")
+    elif file_ext == "xml":
+        loader = UnstructuredXMLLoader(file_path)
+    elif file_ext in ["htm", "html"]:
+        loader = BSHTMLLoader(file_path, open_encoding="unicode_escape")
+    elif file_ext == "md":
+        loader = TextLoader(file_path, autodetect_encoding=True)
+    elif file_content_type == "application/epub+zip":
+        loader = UnstructuredEPubLoader(file_path)
+    elif (
+        file_content_type
+        == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        or file_ext == "docx"
+    ):
+        loader = Docx2txtLoader(file_path)
+    elif file_content_type in [
+        "application/vnd.ms-excel",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ] or file_ext in ["xls", "xlsx"]:
+        loader = UnstructuredExcelLoader(file_path)
+    elif file_content_type in [
+        "application/vnd.ms-powerpoint",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ] or file_ext in ["ppt", "pptx"]:
+        loader = UnstructuredPowerPointLoader(file_path)
+    elif file_ext == "msg":
+        loader = OutlookMessageLoader(file_path)
+    elif file_ext == "odt":
+        loader = UnstructuredODTLoader(file_path)
+    else:
+        loader = TextLoader(file_path, autodetect_encoding=True)
+
+    return loader
+
+
 class TikaLoader:
     def __init__(self, url, file_path, mime_type=None, extract_images=None):
         self.url = url
@@ -193,15 +241,22 @@ class Loader:
     def load(
         self, filename: str, file_content_type: str, file_path: str
     ) -> list[Document]:
+        return list(self.lazy_load(filename, file_content_type, file_path))
+
+    def lazy_load(
+        self, filename: str, file_content_type: str, file_path: str
+    ) -> Iterator[Document]:
+        """Yields the pages of the document as they are loaded."""
         loader = self._get_loader(filename, file_content_type, file_path)
-        docs = loader.load()
+        if isinstance(loader, ProcessPoolLoader):
+            # Already fixed in the loader process
+            yield from loader.lazy_load()
+            return
 
-        return [
-            Document(
+        for doc in loader.load():
+            yield Document(
                 page_content=ftfy.fix_text(doc.page_content), metadata=doc.metadata
             )
-            for doc in docs
-        ]
 
     def _is_text_file(self, file_ext: str, file_content_type: str) -> bool:
         return file_ext in known_source_ext or (
@@ -351,45 +406,14 @@ class Loader:
                 file_path=file_path,
             )
         else:
-            if file_ext == "pdf":
-                loader = PyPDFLoader(
-                    file_path, extract_images=self.kwargs.get("PDF_EXTRACT_IMAGES")
-                )
-            elif file_ext == "csv":
-                loader = CSVLoader(file_path, autodetect_encoding=True)
-            elif file_ext == "rst":
-                loader = UnstructuredRSTLoader(file_path, mode="elements")
-            elif file_ext == "xml":
-                loader = UnstructuredXMLLoader(file_path)
-            elif file_ext in ["htm", "html"]:
-                loader = BSHTMLLoader(file_path, open_encoding="unicode_escape")
-            elif file_ext == "md":
-                loader = TextLoader(file_path, autodetect_encoding=True)
-            elif file_content_type == "application/epub+zip":
-                loader = UnstructuredEPubLoader(file_path)
-            elif (
-                file_content_type
-                == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                or file_ext == "docx"
-            ):
-                loader = Docx2txtLoader(file_path)
-            elif file_content_type in [
-                "application/vnd.ms-excel",
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            ] or file_ext in ["xls", "xlsx"]:
-                loader = UnstructuredExcelLoader(file_path)
-            elif file_content_type in [
-                "application/vnd.ms-powerpoint",
-                "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            ] or file_ext in ["ppt", "pptx"]:
-                loader = UnstructuredPowerPointLoader(file_path)
-            elif file_ext == "msg":
-                loader = OutlookMessageLoader(file_path)
-            elif file_ext == "odt":
-                loader = UnstructuredODTLoader(file_path)
-            elif self._is_text_file(file_ext, file_content_type):
-                loader = TextLoader(file_path, autodetect_encoding=True)
-            else:
-                loader = TextLoader(file_path, autodetect_encoding=True)
+            args = (
+                file_ext,
+                file_content_type,
+                file_path,
+                self.kwargs.get("PDF_EXTRACT_IMAGES"),
+            )
+            loader = get_local_loader(*args)
+            if LOADER_PROCESS_POOL.enabled and not isinstance(loader, TextLoader):
+                loader = LOADER_PROCESS_POOL.get_loader(*args)
 
         return loader
@@ -0,0 +1,164 @@
+import logging
+import multiprocessing
+import threading
+import time
+from typing import Iterator, Optional
+
+import ftfy
+from langchain_core.documents import Document
+
+from open_webui.env import (
+    DOCUMENT_LOADER_MEMORY_LIMIT,
+    DOCUMENT_LOADER_PROCESSES,
+    DOCUMENT_LOADER_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def _set_memory_limit(memory_limit: int):
+    try:
+        import resource
+
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        log.warning(f"Could not limit the memory of the document loader: {e}")
+
+
+def _load_in_process(conn, memory_limit: int, args: tuple):
+    try:
+        if memory_limit:
+            _set_memory_limit(memory_limit)
+
+        from open_webui.retrieval.loaders.main import get_local_loader
+
+        loader = get_local_loader(*args)
+        try:
+            docs = loader.lazy_load()
+        except NotImplementedError:
+            docs = iter(loader.load())
+
+        for doc in docs:
+            conn.send(
+                Document(
+                    page_content=ftfy.fix_text(doc.page_content),
+                    metadata=doc.metadata,
+                )
+            )
+        conn.send(None)
+    except BaseException as e:
+        conn.send(f"{type(e).__name__}: {e}")
+    finally:
+        conn.close()
+
+
+class ProcessPoolLoader:
+    def __init__(self, pool: "LoaderProcessPool", args: tuple):
+        self.pool = pool
+        self.args = args
+
+    def lazy_load(self) -> Iterator[Document]:
+        return self.pool.lazy_load(self.args)
+
+    def load(self) -> list[Document]:
+        return list(self.lazy_load())
+
+
+class LoaderProcessPool:
+    """
+    Runs the loaders that parse documents locally in separate processes, at
+    most `processes` at a time, so parsing does not hold the GIL of the server
+    and a document that crashes the parser only takes down its own process.
+
+    Each process may use `memory_limit` MB of address space and `timeout`
+    seconds, it is killed past its time. Pages are sent back one by one as they
+    are parsed.
+    """
+
+    def __init__(
+        self,
+        processes: int = 2,
+        memory_limit: int = 4096,
+        timeout: float = 300,
+    ):
+        self.processes = processes
+        self.memory_limit = memory_limit
+        self.timeout = timeout
+
+        self._semaphore = threading.BoundedSemaphore(max(processes, 1))
+        self._context = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0
+
+    def _get_context(self):
+        with self._lock:
+            if self._context is None:
+                # Forking the server process would copy its threads and locks
+                if "forkserver" in multiprocessing.get_all_start_methods():
+                    self._context = multiprocessing.get_context("forkserver")
+                    self._context.set_forkserver_preload(
+                        ["open_webui.retrieval.loaders.main"]
+                    )
+                else:
+                    self._context = multiprocessing.get_context("spawn")
+            return self._context
+
+    def get_loader(self, *args) -> ProcessPoolLoader:
+        """Returns a loader that runs `get_local_loader(*args)` in the pool."""
+        return ProcessPoolLoader(self, args)
+
+    def lazy_load(self, args: tuple) -> Iterator[Document]:
+        with self._semaphore:
+            context = self._get_context()
+            conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_load_in_process,
+                args=(child_conn, self.memory_limit, args),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+
+            deadline = time.monotonic() + self.timeout if self.timeout else None
+            try:
+                while True:
+                    timeout: Optional[float] = None
+                    if deadline is not None:
+                        timeout = max(deadline - time.monotonic(), 0)
+                    if not conn.poll(timeout):
+                        raise TimeoutError(
+                            f"Document loader timed out after {self.timeout} seconds"
+                        )
+
+                    try:
+                        message = conn.recv()
+                    except EOFError:
+                        process.join(1)
+                        raise RuntimeError(
+                            "Document loader exited unexpectedly "
+                            f"(exit code {process.exitcode})"
+                        )
+
+                    if message is None:
+                        break
+                    if isinstance(message, str):
+                        raise RuntimeError(f"Error loading document: {message}")
+                    yield message
+            finally:
+                conn.close()
+                if process.is_alive():
+                    process.kill()
+                process.join()
+
+
+LOADER_PROCESS_POOL = LoaderProcessPool(
+    processes=DOCUMENT_LOADER_PROCESSES,
+    memory_limit=DOCUMENT_LOADER_MEMORY_LIMIT,
+    timeout=DOCUMENT_LOADER_TIMEOUT,
+)
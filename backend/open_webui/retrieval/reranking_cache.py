@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from open_webui.config import RAG_RERANKING_BATCH_SIZE, RERANKING_SCORE_CACHE_SIZE
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def get_text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+
+
+class RerankingScoreCache:
+    """
+    Bounded in-memory LRU of reranking scores keyed by reranking model, query
+    hash and chunk hash, so chunks retrieved again on later turns are not
+    scored again.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str, str], float] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def get_many(self, keys: list[tuple[str, str, str]]) -> list[Optional[float]]:
+        scores = []
+        with self._lock:
+            for key in keys:
+                score = self._entries.get(key)
+                if score is not None:
+                    self._entries.move_to_end(key)
+                scores.append(score)
+
+        hits = sum(1 for score in scores if score is not None)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return scores
+
+    def set_many(self, items: dict[tuple[str, str, str], float]):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            for key, score in items.items():
+                self._entries[key] = score
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def with_reranking_score_cache(
+    predict: Callable,
+    engine: str,
+    model: str,
+    batch_size: int = RAG_RERANKING_BATCH_SIZE,
+    cache: Optional[RerankingScoreCache] = None,
+) -> Callable:
+    """
+    Build a reranking function scoring documents against a query. Duplicate
+    chunks are scored once, cached scores are reused and the remaining
+    (query, chunk) pairs are sent to `predict` in batches of `batch_size`.
+    """
+    cache = cache or RERANKING_SCORE_CACHE
+    model_key = f"{engine}:{model}"
+
+    def reranking_function(query: str, documents, user=None) -> Optional[list]:
+        query_hash = get_text_hash(query)
+        keys = [
+            (model_key, query_hash, get_text_hash(doc.page_content))
+            for doc in documents
+        ]
+
+        scores = dict(zip(keys, cache.get_many(keys)))
+        texts = {}
+        for key, doc in zip(keys, documents):
+            if scores[key] is None:
+                texts[key] = doc.page_content
+
+        missing = list(texts.keys())
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i : i + batch_size]
+            batch_scores = predict([(query, texts[key]) for key in batch], user=user)
+            if batch_scores is None:
+                return None
+
+            batch_scores = (
+                batch_scores.tolist()
+                if not isinstance(batch_scores, list)
+                else batch_scores
+            )
+            items = {key: float(score) for key, score in zip(batch, batch_scores)}
+            cache.set_many(items)
+            scores.update(items)
+
+        return [scores[key] for key in keys]
+
+    return reranking_function
+
+
+RERANKING_SCORE_CACHE = RerankingScoreCache(size=RERANKING_SCORE_CACHE_SIZE)
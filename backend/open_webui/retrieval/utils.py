@@ -3,17 +3,14 @@ import os
 from typing import Awaitable, Optional, Union
 
 import requests
-import aiohttp
 import asyncio
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
 import time
 import re
 
 from urllib.parse import quote
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
+from langchain.retrievers import EnsembleRetriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
@@ -27,9 +24,12 @@ from open_webui.models.knowledge import Knowledges
 from open_webui.models.chats import Chats
 from open_webui.models.notes import Notes
 
-from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.vector.bm25 import BM25Index
+from open_webui.retrieval.embedding_cache import with_embedding_cache
+from open_webui.retrieval.reranking_cache import with_reranking_score_cache
 from open_webui.utils.access_control import has_access
 from open_webui.utils.headers import include_user_info_headers
+from open_webui.utils.http_client import HTTP_CLIENT_POOL
 from open_webui.utils.misc import get_message_list
 
 from open_webui.retrieval.web.utils import get_web_loader
@@ -45,6 +45,8 @@ from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_RETRIEVAL_CONCURRENCY,
+    RAG_RETRIEVAL_TIMEOUT,
 )
 
 log = logging.getLogger(__name__)
@@ -85,6 +87,62 @@ def get_content_from_url(request, url: str) -> str:
     return content, docs
 
 
+class EmbeddingMemo:
+    """
+    Per-request memo around an embedding function. Each distinct text is
+    embedded once, texts missing from a call are embedded in a single batch,
+    and concurrent callers asking for the same text share one request.
+    """
+
+    def __init__(self, embedding_function):
+        self.embedding_function = embedding_function
+        self._embeddings: dict[tuple[str, Optional[str]], asyncio.Future] = {}
+
+    @classmethod
+    def wrap(cls, embedding_function) -> "EmbeddingMemo":
+        if isinstance(embedding_function, cls):
+            return embedding_function
+        return cls(embedding_function)
+
+    async def _embed(self, texts: list[str], prefix: Optional[str]) -> list:
+        missing = [
+            text
+            for text in dict.fromkeys(texts)
+            if (text, prefix) not in self._embeddings
+        ]
+
+        loop = asyncio.get_running_loop()
+        for text in missing:
+            self._embeddings[(text, prefix)] = loop.create_future()
+        futures = {text: self._embeddings[(text, prefix)] for text in set(texts)}
+
+        if missing:
+            try:
+                embeddings = await self.embedding_function(missing, prefix)
+                if not isinstance(embeddings, list) or len(embeddings) != len(missing):
+                    raise ValueError("Embedding function returned an invalid result")
+            except BaseException as e:
+                # Forget the failed texts so a later call can retry them
+                for text in missing:
+                    self._embeddings.pop((text, prefix), None)
+                    if isinstance(e, asyncio.CancelledError):
+                        futures[text].cancel()
+                    else:
+                        futures[text].set_exception(e)
+                        futures[text].exception()  # Mark as retrieved
+                raise
+
+            for text, embedding in zip(missing, embeddings):
+                futures[text].set_result(embedding)
+
+        return [await futures[text] for text in texts]
+
+    async def __call__(self, query, prefix=None):
+        if isinstance(query, list):
+            return await self._embed(query, prefix)
+        return (await self._embed([query], prefix))[0]
+
+
 class VectorSearchRetriever(BaseRetriever):
     collection_name: Any
     embedding_function: Any
@@ -132,6 +190,20 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25IndexRetriever(BaseRetriever):
+    index: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return [
+            # Copy the metadata, the reranker annotates it with scores
+            Document(page_content=text, metadata={**metadata})
+            for text, metadata, _ in self.index.search(query, self.top_k)
+        ]
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -166,47 +238,66 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
-def get_enriched_texts(collection_result: GetResult) -> list[str]:
-    enriched_texts = []
-    for idx, text in enumerate(collection_result.documents[0]):
-        metadata = collection_result.metadatas[0][idx]
-        metadata_parts = [text]
+async def get_hybrid_search_candidates(
+    collection_name: str,
+    bm25_index: BM25Index,
+    query: str,
+    embedding_function,
+    k: int,
+    hybrid_bm25_weight: float,
+) -> list[Document]:
+    bm25_retriever = BM25IndexRetriever(index=bm25_index, top_k=k)
 
-        # Add filename (repeat twice for extra weight in BM25 scoring)
-        if metadata.get("name"):
-            filename = metadata["name"]
-            filename_tokens = (
-                filename.replace("_", " ").replace("-", " ").replace(".", " ")
-            )
-            metadata_parts.append(
-                f"Filename: {filename} {filename_tokens} {filename_tokens}"
-            )
+    vector_search_retriever = VectorSearchRetriever(
+        collection_name=collection_name,
+        embedding_function=embedding_function,
+        top_k=k,
+    )
+
+    if hybrid_bm25_weight <= 0:
+        ensemble_retriever = EnsembleRetriever(
+            retrievers=[vector_search_retriever], weights=[1.0]
+        )
+    elif hybrid_bm25_weight >= 1:
+        ensemble_retriever = EnsembleRetriever(
+            retrievers=[bm25_retriever], weights=[1.0]
+        )
+    else:
+        ensemble_retriever = EnsembleRetriever(
+            retrievers=[bm25_retriever, vector_search_retriever],
+            weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
+        )
 
-        # Add title if available
-        if metadata.get("title"):
-            metadata_parts.append(f"Title: {metadata['title']}")
+    return await ensemble_retriever.ainvoke(query)
 
-        # Add document section headings if available (from markdown splitter)
-        if metadata.get("headings") and isinstance(metadata["headings"], list):
-            headings = " > ".join(str(h) for h in metadata["headings"])
-            metadata_parts.append(f"Section: {headings}")
 
-        # Add source URL/path if available
-        if metadata.get("source"):
-            metadata_parts.append(f"Source: {metadata['source']}")
+def get_hybrid_search_result(documents: list[Document], k: int, k_reranker: int):
+    distances = [d.metadata.get("score") for d in documents]
+    metadatas = [d.metadata for d in documents]
+    documents = [d.page_content for d in documents]
 
-        # Add snippet for web search results
-        if metadata.get("snippet"):
-            metadata_parts.append(f"Snippet: {metadata['snippet']}")
+    # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
+    if k < k_reranker:
+        sorted_items = sorted(
+            zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
+        )
+        sorted_items = sorted_items[:k]
 
-        enriched_texts.append(" ".join(metadata_parts))
+        if sorted_items:
+            distances, documents, metadatas = map(list, zip(*sorted_items))
+        else:
+            distances, documents, metadatas = [], [], []
 
-    return enriched_texts
+    return {
+        "distances": [distances],
+        "documents": [documents],
+        "metadatas": [metadatas],
+    }
 
 
 async def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
+    bm25_index: Optional[BM25Index],
     query: str,
     embedding_function,
     k: int,
@@ -214,95 +305,33 @@ async def query_doc_with_hybrid_search(
     k_reranker: int,
     r: float,
     hybrid_bm25_weight: float,
-    enable_enriched_texts: bool = False,
 ) -> dict:
     try:
-        # First check if collection_result has the required attributes
-        if (
-            not collection_result
-            or not hasattr(collection_result, "documents")
-            or not hasattr(collection_result, "metadatas")
-        ):
-            log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
-            return {"documents": [], "metadatas": [], "distances": []}
-
-        # Now safely check the documents content after confirming attributes exist
-        if (
-            not collection_result.documents
-            or len(collection_result.documents) == 0
-            or not collection_result.documents[0]
-        ):
+        if not bm25_index:
             log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
             return {"documents": [], "metadatas": [], "distances": []}
 
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
 
-        bm25_texts = (
-            get_enriched_texts(collection_result)
-            if enable_enriched_texts
-            else collection_result.documents[0]
-        )
-
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=bm25_texts,
-            metadatas=collection_result.metadatas[0],
-        )
-        bm25_retriever.k = k
-
-        vector_search_retriever = VectorSearchRetriever(
+        documents = await get_hybrid_search_candidates(
             collection_name=collection_name,
+            bm25_index=bm25_index,
+            query=query,
             embedding_function=embedding_function,
-            top_k=k,
+            k=k,
+            hybrid_bm25_weight=hybrid_bm25_weight,
         )
 
-        if hybrid_bm25_weight <= 0:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[vector_search_retriever], weights=[1.0]
-            )
-        elif hybrid_bm25_weight >= 1:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever], weights=[1.0]
-            )
-        else:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever, vector_search_retriever],
-                weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
-            )
-
         compressor = RerankCompressor(
             embedding_function=embedding_function,
             top_n=k_reranker,
             reranking_function=reranking_function,
             r_score=r,
         )
+        if documents:
+            documents = await compressor.acompress_documents(documents, query)
 
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=ensemble_retriever
-        )
-
-        result = await compression_retriever.ainvoke(query)
-
-        distances = [d.metadata.get("score") for d in result]
-        documents = [d.page_content for d in result]
-        metadatas = [d.metadata for d in result]
-
-        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
-        if k < k_reranker:
-            sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
-            )
-            sorted_items = sorted_items[:k]
-
-            if sorted_items:
-                distances, documents, metadatas = map(list, zip(*sorted_items))
-            else:
-                distances, documents, metadatas = [], [], []
-
-        result = {
-            "distances": [distances],
-            "documents": [documents],
-            "metadatas": [metadatas],
-        }
+        result = get_hybrid_search_result(documents, k, k_reranker)
 
         log.info(
             "query_doc_with_hybrid_search:result "
@@ -382,6 +411,25 @@ def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
     }
 
 
+async def run_collection_query(
+    collection_name: str,
+    query: Awaitable,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    timeout: Optional[float] = None,
+):
+    """
+    Run a single collection query under the retrieval concurrency cap, a slow
+    collection is given up after `timeout` seconds instead of delaying the turn.
+    """
+    timeout = RAG_RETRIEVAL_TIMEOUT if timeout is None else timeout
+    async with semaphore or asyncio.Semaphore(RAG_RETRIEVAL_CONCURRENCY):
+        try:
+            return await asyncio.wait_for(query, timeout or None)
+        except asyncio.TimeoutError:
+            log.warning(f"Querying collection {collection_name} timed out")
+            raise
+
+
 def get_all_items_from_collections(collection_names: list[str]) -> dict:
     results = []
 
@@ -404,17 +452,25 @@ async def query_collection(
     queries: list[str],
     embedding_function,
     k: int,
+    semaphore: Optional[asyncio.Semaphore] = None,
 ) -> dict:
     results = []
     error = False
+    semaphore = semaphore or asyncio.Semaphore(RAG_RETRIEVAL_CONCURRENCY)
+    embedding_function = EmbeddingMemo.wrap(embedding_function)
 
-    def process_query_collection(collection_name, query_embedding):
+    async def process_query_collection(collection_name, query_embedding):
         try:
             if collection_name:
-                result = query_doc(
-                    collection_name=collection_name,
-                    k=k,
-                    query_embedding=query_embedding,
+                result = await run_collection_query(
+                    collection_name,
+                    asyncio.to_thread(
+                        query_doc,
+                        collection_name=collection_name,
+                        k=k,
+                        query_embedding=query_embedding,
+                    ),
+                    semaphore,
                 )
                 if result is not None:
                     return result.model_dump(), None
@@ -431,15 +487,13 @@ async def query_collection(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+    task_results = await asyncio.gather(
+        *[
+            process_query_collection(collection_name, query_embedding)
+            for query_embedding in query_embeddings
+            for collection_name in collection_names
+        ]
+    )
 
     for result, err in task_results:
         if err is not None:
@@ -463,66 +517,163 @@ async def query_collection_with_hybrid_search(
     r: float,
     hybrid_bm25_weight: float,
     enable_enriched_texts: bool = False,
+    semaphore: Optional[asyncio.Semaphore] = None,
 ) -> dict:
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
-    collection_results = {}
-    for collection_name in collection_names:
+    semaphore = semaphore or asyncio.Semaphore(RAG_RETRIEVAL_CONCURRENCY)
+    # Vector searches and the reranker of every collection share the query
+    # embeddings instead of embedding each query once per collection
+    embedding_function = EmbeddingMemo.wrap(embedding_function)
+
+    # Load the persistent BM25 index once per collection, the full collection
+    # is only fetched from the vector DB the first time an index is built
+    async def get_bm25_index(collection_name):
         try:
             log.debug(
-                f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
+                f"query_collection_with_hybrid_search:get_bm25_index:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
+            return await run_collection_query(
+                collection_name,
+                asyncio.to_thread(
+                    VECTOR_DB_CLIENT.get_bm25_index,
+                    collection_name,
+                    enable_enriched_texts,
+                ),
+                semaphore,
             )
         except Exception as e:
-            log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            log.exception(f"Failed to load BM25 index of {collection_name}: {e}")
+            return None
+
+    bm25_indexes = dict(
+        zip(
+            collection_names,
+            await asyncio.gather(
+                *[
+                    get_bm25_index(collection_name)
+                    for collection_name in collection_names
+                ]
+            ),
+        )
+    )
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
 
-    async def process_query(collection_name, query):
+    async def get_candidates(collection_name, query):
+        if not bm25_indexes[collection_name]:
+            log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+            return [], None
+
         try:
-            result = await query_doc_with_hybrid_search(
-                collection_name=collection_name,
-                collection_result=collection_results[collection_name],
-                query=query,
-                embedding_function=embedding_function,
-                k=k,
-                reranking_function=reranking_function,
-                k_reranker=k_reranker,
-                r=r,
-                hybrid_bm25_weight=hybrid_bm25_weight,
-                enable_enriched_texts=enable_enriched_texts,
+            candidates = await run_collection_query(
+                collection_name,
+                get_hybrid_search_candidates(
+                    collection_name=collection_name,
+                    bm25_index=bm25_indexes[collection_name],
+                    query=query,
+                    embedding_function=embedding_function,
+                    k=k,
+                    hybrid_bm25_weight=hybrid_bm25_weight,
+                ),
+                semaphore,
             )
-            return result, None
+            return candidates, None
         except Exception as e:
             log.exception(f"Error when querying the collection with hybrid_search: {e}")
             return None, e
 
+    compressor = RerankCompressor(
+        embedding_function=embedding_function,
+        top_n=k_reranker,
+        reranking_function=reranking_function,
+        r_score=r,
+    )
+
+    async def score_candidates(query):
+        # The candidates of every collection are scored as one deduplicated batch
+        documents = {
+            doc.page_content: doc
+            for (_, task_query), (docs, _) in candidates.items()
+            if task_query == query and docs
+            for doc in docs
+        }
+        if not documents:
+            return {}, None
+
+        try:
+            async with semaphore:
+                scores = await compressor.ascore_documents(
+                    list(documents.values()), query
+                )
+            if scores is None:
+                return None, None
+            return dict(zip(documents.keys(), scores)), None
+        except Exception as e:
+            log.exception(f"Error when reranking the hybrid search results: {e}")
+            return None, e
+
     # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
+    # Avoid running any tasks for collections without an index (have assigned None)
     tasks = [
         (collection_name, query)
         for collection_name in collection_names
-        if collection_results[collection_name] is not None
+        if bm25_indexes[collection_name] is not None
         for query in queries
     ]
 
-    # Run all queries in parallel using asyncio.gather
-    task_results = await asyncio.gather(
-        *[process_query(collection_name, query) for collection_name, query in tasks]
+    if tasks and (hybrid_bm25_weight < 1 or reranking_function is None):
+        try:
+            # Embed all queries in one batch before fanning out
+            await embedding_function(list(queries), RAG_EMBEDDING_QUERY_PREFIX)
+        except Exception as e:
+            log.warning(f"Failed to embed the queries in one batch: {e}")
+
+    # Retrieve the candidates of all collections and queries in parallel using
+    # asyncio.gather bounded by the semaphore, then rerank once per query
+    candidates = dict(
+        zip(
+            tasks,
+            await asyncio.gather(
+                *[
+                    get_candidates(collection_name, query)
+                    for collection_name, query in tasks
+                ]
+            ),
+        )
+    )
+    query_scores = dict(
+        zip(
+            queries,
+            await asyncio.gather(*[score_candidates(query) for query in queries]),
+        )
     )
 
-    for result, err in task_results:
-        if err is not None:
+    for (collection_name, query), (docs, err) in candidates.items():
+        scores, score_err = query_scores[query]
+        if err is not None or score_err is not None:
             error = True
-        elif result is not None:
-            results.append(result)
+            continue
+        if not docs:
+            continue
+
+        if scores is not None:
+            docs = compressor.select_documents(
+                docs, [scores[doc.page_content] for doc in docs]
+            )
+        else:
+            log.warning(
+                "No valid scores found, check your reranking function. Returning original documents."
+            )
+
+        result = get_hybrid_search_result(docs, k, k_reranker)
+        log.debug(
+            f"query_collection_with_hybrid_search:result {collection_name} "
+            + f'{result["metadatas"]} {result["distances"]}'
+        )
+        results.append(result)
 
     if error and not results:
         raise Exception(
@@ -594,7 +745,7 @@ async def agenerate_openai_batch_embeddings(
         if ENABLE_FORWARD_USER_INFO_HEADERS and user:
             headers = include_user_info_headers(headers, user)
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
+        async with HTTP_CLIENT_POOL.session(url) as session:
             async with session.post(
                 f"{url}/embeddings", headers=headers, json=form_data
             ) as r:
@@ -683,7 +834,7 @@ async def agenerate_azure_openai_batch_embeddings(
         if ENABLE_FORWARD_USER_INFO_HEADERS and user:
             headers = include_user_info_headers(headers, user)
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
+        async with HTTP_CLIENT_POOL.session(url) as session:
             async with session.post(full_url, headers=headers, json=form_data) as r:
                 r.raise_for_status()
                 data = await r.json()
@@ -759,7 +910,7 @@ async def agenerate_ollama_batch_embeddings(
         if ENABLE_FORWARD_USER_INFO_HEADERS and user:
             headers = include_user_info_headers(headers, user)
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
+        async with HTTP_CLIENT_POOL.session(url) as session:
             async with session.post(
                 f"{url}/api/embed", headers=headers, json=form_data
             ) as r:
@@ -797,7 +948,9 @@ def get_embedding_function(
                 prefix,
             )
 
-        return async_embedding_function
+        return with_embedding_cache(
+            async_embedding_function, embedding_engine, embedding_model
+        )
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
         embedding_function = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
@@ -851,7 +1004,9 @@ def get_embedding_function(
             else:
                 return await embedding_function(query, prefix, user)
 
-        return async_embedding_function
+        return with_embedding_cache(
+            async_embedding_function, embedding_engine, embedding_model, url=url
+        )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
@@ -908,13 +1063,13 @@ def get_reranking_function(reranking_engine, reranking_model, reranking_function
     if reranking_function is None:
         return None
     if reranking_engine == "external":
-        return lambda query, documents, user=None: reranking_function.predict(
-            [(query, doc.page_content) for doc in documents], user=user
+        predict = lambda sentences, user=None: reranking_function.predict(
+            sentences, user=user
         )
     else:
-        return lambda query, documents, user=None: reranking_function.predict(
-            [(query, doc.page_content) for doc in documents]
-        )
+        predict = lambda sentences, user=None: reranking_function.predict(sentences)
+
+    return with_reranking_score_cache(predict, reranking_engine, reranking_model)
 
 
 async def get_sources_from_items(
@@ -935,8 +1090,55 @@ async def get_sources_from_items(
         f"items: {items} {queries} {embedding_function} {reranking_function} {full_context}"
     )
 
+    semaphore = asyncio.Semaphore(RAG_RETRIEVAL_CONCURRENCY)
+    embedding_function = EmbeddingMemo.wrap(embedding_function)
+
+    async def query_collections(collection_names):
+        query_result = None
+        try:
+            if full_context:
+                query_result = await asyncio.to_thread(
+                    get_all_items_from_collections, collection_names
+                )
+            else:
+                if hybrid_search:
+                    try:
+                        query_result = await query_collection_with_hybrid_search(
+                            collection_names=collection_names,
+                            queries=queries,
+                            embedding_function=embedding_function,
+                            k=k,
+                            reranking_function=reranking_function,
+                            k_reranker=k_reranker,
+                            r=r,
+                            hybrid_bm25_weight=hybrid_bm25_weight,
+                            enable_enriched_texts=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH_ENRICHED_TEXTS,
+                            semaphore=semaphore,
+                        )
+                    except Exception as e:
+                        log.debug(
+                            "Error when using hybrid search, using non hybrid search as fallback."
+                        )
+
+                # fallback to non-hybrid search
+                if not hybrid_search and query_result is None:
+                    query_result = await query_collection(
+                        collection_names=collection_names,
+                        queries=queries,
+                        embedding_function=embedding_function,
+                        k=k,
+                        semaphore=semaphore,
+                    )
+        except Exception as e:
+            log.exception(e)
+        return query_result
+
     extracted_collections = []
-    query_results = []
+    # (item, query_result) pairs in item order, vector searches are collected
+    # first and run concurrently so a turn waits for the slowest collection
+    # rather than for all of them in turn
+    item_results = []
+    collection_queries = {}
 
     for item in items:
         query_result = None
@@ -1138,42 +1340,19 @@ async def get_sources_from_items(
                 log.debug(f"skipping {item} as it has already been extracted")
                 continue
 
-            try:
-                if full_context:
-                    query_result = get_all_items_from_collections(collection_names)
-                else:
-                    query_result = None  # Initialize to None
-                    if hybrid_search:
-                        try:
-                            query_result = await query_collection_with_hybrid_search(
-                                collection_names=collection_names,
-                                queries=queries,
-                                embedding_function=embedding_function,
-                                k=k,
-                                reranking_function=reranking_function,
-                                k_reranker=k_reranker,
-                                r=r,
-                                hybrid_bm25_weight=hybrid_bm25_weight,
-                                enable_enriched_texts=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH_ENRICHED_TEXTS,
-                            )
-                        except Exception as e:
-                            log.debug(
-                                "Error when using hybrid search, using non hybrid search as fallback."
-                            )
-
-                    # fallback to non-hybrid search
-                    if not hybrid_search and query_result is None:
-                        query_result = await query_collection(
-                            collection_names=collection_names,
-                            queries=queries,
-                            embedding_function=embedding_function,
-                            k=k,
-                        )
-            except Exception as e:
-                log.exception(e)
-
+            collection_queries[len(item_results)] = query_collections(collection_names)
             extracted_collections.extend(collection_names)
 
+        item_results.append((item, query_result))
+
+    for idx, query_result in zip(
+        collection_queries.keys(),
+        await asyncio.gather(*collection_queries.values()),
+    ):
+        item_results[idx] = (item_results[idx][0], query_result)
+
+    query_results = []
+    for item, query_result in item_results:
         if query_result:
             if "data" in item:
                 del item["data"]
@@ -1275,17 +1454,14 @@ class RerankCompressor(BaseDocumentCompressor):
         """
         return []
 
-    async def acompress_documents(
-        self,
-        documents: Sequence[Document],
-        query: str,
-        callbacks: Optional[Callbacks] = None,
-    ) -> Sequence[Document]:
+    async def ascore_documents(
+        self, documents: Sequence[Document], query: str
+    ) -> Optional[list[float]]:
         reranking = self.reranking_function is not None
 
         scores = None
         if reranking:
-            scores = self.reranking_function(query, documents)
+            scores = await asyncio.to_thread(self.reranking_function, query, documents)
         else:
             from sentence_transformers import util
 
@@ -1297,29 +1473,41 @@ class RerankCompressor(BaseDocumentCompressor):
             )
             scores = util.cos_sim(query_embedding, document_embedding)[0]
 
-        if scores is not None:
-            docs_with_scores = list(
-                zip(
-                    documents,
-                    scores.tolist() if not isinstance(scores, list) else scores,
-                )
+        if scores is None:
+            return None
+        return scores.tolist() if not isinstance(scores, list) else scores
+
+    def select_documents(
+        self, documents: Sequence[Document], scores: list[float]
+    ) -> Sequence[Document]:
+        docs_with_scores = list(zip(documents, scores))
+        if self.r_score:
+            docs_with_scores = [
+                (d, s) for d, s in docs_with_scores if s >= self.r_score
+            ]
+
+        result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
+        final_results = []
+        for doc, doc_score in result[: self.top_n]:
+            metadata = doc.metadata
+            metadata["score"] = doc_score
+            doc = Document(
+                page_content=doc.page_content,
+                metadata=metadata,
             )
-            if self.r_score:
-                docs_with_scores = [
-                    (d, s) for d, s in docs_with_scores if s >= self.r_score
-                ]
+            final_results.append(doc)
+        return final_results
 
-            result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
-            final_results = []
-            for doc, doc_score in result[: self.top_n]:
-                metadata = doc.metadata
-                metadata["score"] = doc_score
-                doc = Document(
-                    page_content=doc.page_content,
-                    metadata=metadata,
-                )
-                final_results.append(doc)
-            return final_results
+    async def acompress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        scores = await self.ascore_documents(documents, query)
+
+        if scores is not None:
+            return self.select_documents(documents, scores)
         else:
             log.warning(
                 "No valid scores found, check your reranking function. Returning original documents."
@@ -0,0 +1,556 @@
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from open_webui.retrieval.vector.main import (
+    VectorDBBase,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
+from open_webui.config import BM25_INDEX_DIR, BM25_INDEX_CACHE_SIZE
+from open_webui.env import SRC_LOG_LEVELS
+
+try:
+    import fcntl
+except ImportError:  # Windows, writers are only serialized within a worker
+    fcntl = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+BM25_INDEX_VERSION = 1
+
+
+def tokenize(text: str) -> list[str]:
+    # Same preprocessing as langchain's BM25Retriever default
+    return text.split()
+
+
+def get_enriched_text(text: str, metadata: dict) -> str:
+    metadata_parts = [text]
+
+    # Add filename (repeat twice for extra weight in BM25 scoring)
+    if metadata.get("name"):
+        filename = metadata["name"]
+        filename_tokens = filename.replace("_", " ").replace("-", " ").replace(".", " ")
+        metadata_parts.append(
+            f"Filename: {filename} {filename_tokens} {filename_tokens}"
+        )
+
+    # Add title if available
+    if metadata.get("title"):
+        metadata_parts.append(f"Title: {metadata['title']}")
+
+    # Add document section headings if available (from markdown splitter)
+    if metadata.get("headings") and isinstance(metadata["headings"], list):
+        headings = " > ".join(str(h) for h in metadata["headings"])
+        metadata_parts.append(f"Section: {headings}")
+
+    # Add source URL/path if available
+    if metadata.get("source"):
+        metadata_parts.append(f"Source: {metadata['source']}")
+
+    # Add snippet for web search results
+    if metadata.get("snippet"):
+        metadata_parts.append(f"Snippet: {metadata['snippet']}")
+
+    return " ".join(metadata_parts)
+
+
+def _get_item_fields(item: Union[VectorItem, dict]) -> tuple[str, str, dict]:
+    if isinstance(item, dict):
+        return item["id"], item["text"], item.get("metadata") or {}
+    return item.id, item.text, item.metadata or {}
+
+
+def _matches_filter(metadata: dict, filter: dict) -> bool:
+    return all(metadata.get(key) == value for key, value in filter.items())
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over the chunks of a single collection.
+
+    Term frequencies are kept per document and inverted into posting lists so
+    documents can be added or removed without re-tokenizing the collection, and
+    a query only touches the postings of its own terms.
+    """
+
+    def __init__(self, enriched: bool = False, k1: float = 1.5, b: float = 0.75):
+        self.enriched = enriched
+        self.k1 = k1
+        self.b = b
+
+        self.documents: dict[str, dict] = {}
+        self.postings: dict[str, dict[str, int]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _index_document(self, doc_id: str, doc: dict):
+        self.documents[doc_id] = doc
+        self.total_length += doc["length"]
+        for term, freq in doc["tf"].items():
+            self.postings.setdefault(term, {})[doc_id] = freq
+
+    def add(self, doc_id: str, text: str, metadata: dict):
+        if doc_id in self.documents:
+            self.remove(doc_id)
+
+        tokens = tokenize(get_enriched_text(text, metadata) if self.enriched else text)
+        tf = {}
+        for token in tokens:
+            tf[token] = tf.get(token, 0) + 1
+
+        self._index_document(
+            doc_id,
+            {"text": text, "metadata": metadata, "tf": tf, "length": len(tokens)},
+        )
+
+    def remove(self, doc_id: str) -> bool:
+        doc = self.documents.pop(doc_id, None)
+        if doc is None:
+            return False
+
+        self.total_length -= doc["length"]
+        for term in doc["tf"]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+        return True
+
+    def remove_by_filter(self, filter: dict) -> list[str]:
+        """Remove the documents whose metadata match `filter`, returning their ids."""
+        doc_ids = [
+            doc_id
+            for doc_id, doc in self.documents.items()
+            if _matches_filter(doc["metadata"], filter)
+        ]
+        for doc_id in doc_ids:
+            self.remove(doc_id)
+        return doc_ids
+
+    def search(self, query: str, k: int) -> list[tuple[str, dict, float]]:
+        """Return up to k (text, metadata, score) tuples, best match first."""
+        n = len(self.documents)
+        if n == 0 or k <= 0:
+            return []
+
+        avg_length = self.total_length / n if self.total_length else 1.0
+        scores: dict[str, float] = {}
+
+        for term in tokenize(query):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            df = len(postings)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc_id, freq in postings.items():
+                length = self.documents[doc_id]["length"]
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (
+                    freq * (self.k1 + 1) / (freq + norm)
+                )
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            (self.documents[doc_id]["text"], self.documents[doc_id]["metadata"], score)
+            for doc_id, score in top
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": BM25_INDEX_VERSION,
+            "enriched": self.enriched,
+            "k1": self.k1,
+            "b": self.b,
+            "documents": self.documents,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BM25Index":
+        index = cls(
+            enriched=data.get("enriched", False),
+            k1=data.get("k1", 1.5),
+            b=data.get("b", 0.75),
+        )
+        for doc_id, doc in data.get("documents", {}).items():
+            index._index_document(doc_id, doc)
+        return index
+
+    @classmethod
+    def from_get_result(cls, result: GetResult, enriched: bool = False):
+        index = cls(enriched=enriched)
+        if result and result.ids:
+            for doc_id, text, metadata in zip(
+                result.ids[0], result.documents[0], result.metadatas[0]
+            ):
+                index.add(doc_id, text, metadata or {})
+        return index
+
+
+class _LoadedIndex:
+    def __init__(self, identity: tuple, generation: str, index: BM25Index):
+        # Snapshot file the index was loaded from, and how far its log was read
+        self.identity = identity
+        self.generation = generation
+        self.offset = 0
+        self.index = index
+
+
+class BM25IndexStore:
+    """
+    On-disk store of BM25 indexes, one per collection and text variant, with a
+    bounded in-memory cache of loaded indexes.
+
+    An index is stored as a snapshot and a log of the documents added to and
+    removed from it since, so an insert only appends its own documents. Workers
+    writing to the same collection are serialized by a file lock, and the log is
+    compacted into a new snapshot once it outgrows it. Cached indexes read the
+    entries other workers appended before being used. Threads only wait for
+    each other on the same collection, so building a large index does not hold
+    up searches on the others.
+
+    Indexes only see the writes made through workers sharing `directory`. Nodes
+    that share a vector DB must also share the directory, e.g. on a shared
+    volume, or their indexes miss the writes made through other nodes.
+    """
+
+    def __init__(
+        self, directory: str, cache_size: int = 32, min_compaction_size: int = 2**20
+    ):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.min_compaction_size = min_compaction_size
+        self.cache: OrderedDict[str, _LoadedIndex] = OrderedDict()
+        # Guards the cache and the collection locks, never held while loading
+        self.lock = threading.RLock()
+        self._collection_locks = weakref.WeakValueDictionary()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _get_name(self, collection_name: str) -> str:
+        return hashlib.sha256(collection_name.encode()).hexdigest()
+
+    def _get_path(self, collection_name: str, enriched: bool) -> str:
+        suffix = ".enriched.json" if enriched else ".json"
+        return os.path.join(
+            self.directory, f"{self._get_name(collection_name)}{suffix}"
+        )
+
+    def _get_log_path(self, path: str, generation: str) -> str:
+        return f"{path}.{generation}.log"
+
+    def _get_collection_lock(self, collection_name: str) -> threading.RLock:
+        with self.lock:
+            lock = self._collection_locks.get(collection_name)
+            if lock is None:
+                lock = threading.RLock()
+                self._collection_locks[collection_name] = lock
+            return lock
+
+    @contextmanager
+    def _lock(self, collection_name: str):
+        with self._get_collection_lock(collection_name):
+            if fcntl is None:
+                yield
+                return
+
+            lock_path = os.path.join(
+                self.directory, f"{self._get_name(collection_name)}.lock"
+            )
+            with open(lock_path, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self, path: str) -> Optional[BM25Index]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.cache.pop(path, None)
+            return None
+
+        with self.lock:
+            loaded = self.cache.get(path)
+        if loaded is None or loaded.identity != (stat.st_ino, stat.st_mtime_ns):
+            try:
+                with open(path, "r") as f:
+                    stat = os.fstat(f.fileno())
+                    data = json.load(f)
+            except Exception as e:
+                log.warning(f"Discarding unreadable BM25 index {path}: {e}")
+                self._remove_files(path)
+                return None
+
+            if data.get("version") != BM25_INDEX_VERSION:
+                self._remove_files(path)
+                return None
+
+            loaded = _LoadedIndex(
+                (stat.st_ino, stat.st_mtime_ns),
+                data.get("generation", ""),
+                BM25Index.from_dict(data),
+            )
+
+        self._read_log(path, loaded)
+        self._cache(path, loaded)
+        return loaded.index
+
+    def _read_log(self, path: str, loaded: _LoadedIndex):
+        try:
+            with open(self._get_log_path(path, loaded.generation), "rb") as f:
+                f.seek(loaded.offset)
+                data = f.read()
+        except FileNotFoundError:
+            # Nothing was appended yet, or the log was compacted into a snapshot
+            # that is loaded next time
+            return
+
+        # The last line may still be being written
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            self._apply(loaded.index, json.loads(line))
+        loaded.offset += end
+
+    def _apply(self, index: BM25Index, entry: dict):
+        if entry["op"] == "add":
+            index.add(entry["id"], entry["text"], entry["metadata"])
+        elif entry["op"] == "remove":
+            for doc_id in entry["ids"]:
+                index.remove(doc_id)
+
+    def _append(self, path: str, entries: list[dict]):
+        with self.lock:
+            loaded = self.cache[path]
+        log_path = self._get_log_path(path, loaded.generation)
+        with open(log_path, "ab") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=str).encode() + b"\n")
+            loaded.offset = f.tell()
+
+        if loaded.offset > max(os.stat(path).st_size, self.min_compaction_size):
+            self._save(path, loaded.index)
+
+    def _save(self, path: str, index: BM25Index):
+        generation = uuid.uuid4().hex
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({**index.to_dict(), "generation": generation}, f, default=str)
+        os.replace(tmp_path, path)
+        # Workers still on the previous snapshot reload the new one next time
+        self._remove_logs(path)
+
+        stat = os.stat(path)
+        self._cache(
+            path, _LoadedIndex((stat.st_ino, stat.st_mtime_ns), generation, index)
+        )
+
+    def _cache(self, path: str, loaded: _LoadedIndex):
+        with self.lock:
+            self.cache[path] = loaded
+            self.cache.move_to_end(path)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def _remove_logs(self, path: str):
+        prefix = f"{os.path.basename(path)}."
+        for filename in os.listdir(self.directory):
+            if filename.startswith(prefix) and filename.endswith(".log"):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+
+    def _remove_files(self, path: str):
+        with self.lock:
+            self.cache.pop(path, None)
+        self._remove_logs(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _update(self, collection_name: str, update: Callable[[BM25Index], list[dict]]):
+        # Only indexes that already exist are maintained incrementally, the
+        # others are built from the vector DB on their first hybrid query.
+        with self._lock(collection_name):
+            for enriched in (False, True):
+                path = self._get_path(collection_name, enriched)
+                index = self._load(path)
+                if index is None:
+                    continue
+
+                entries = update(index)
+                if entries:
+                    self._append(path, entries)
+
+    def get(
+        self,
+        collection_name: str,
+        enriched: bool,
+        build: Callable[[], Optional[GetResult]],
+    ) -> Optional[BM25Index]:
+        path = self._get_path(collection_name, enriched)
+        with self._get_collection_lock(collection_name):
+            index = self._load(path)
+            if index is not None:
+                return index
+
+            with self._lock(collection_name):
+                # Another worker may have built it while waiting for the lock
+                index = self._load(path)
+                if index is not None:
+                    return index
+
+                log.info(f"Building BM25 index for collection {collection_name}")
+                result = build()
+                if not result or not result.ids or not result.ids[0]:
+                    return None
+
+                index = BM25Index.from_get_result(result, enriched=enriched)
+                self._save(path, index)
+                return index
+
+    def add(self, collection_name: str, items: list[Union[VectorItem, dict]]):
+        def update(index: BM25Index) -> list[dict]:
+            entries = []
+            for item in items:
+                doc_id, text, metadata = _get_item_fields(item)
+                index.add(doc_id, text, metadata)
+                entries.append(
+                    {"op": "add", "id": doc_id, "text": text, "metadata": metadata}
+                )
+            return entries
+
+        self._update(collection_name, update)
+
+    def remove(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        if not ids and not filter:
+            # Backend specific semantics, let the index be rebuilt lazily
+            self.drop(collection_name)
+            return
+
+        def update(index: BM25Index) -> list[dict]:
+            doc_ids = [doc_id for doc_id in ids or [] if index.remove(doc_id)]
+            if filter:
+                doc_ids += index.remove_by_filter(filter)
+            return [{"op": "remove", "ids": doc_ids}] if doc_ids else []
+
+        self._update(collection_name, update)
+
+    def drop(self, collection_name: str):
+        with self._lock(collection_name):
+            for enriched in (False, True):
+                self._remove_files(self._get_path(collection_name, enriched))
+
+    def reset(self):
+        with self.lock:
+            self.cache.clear()
+            for filename in os.listdir(self.directory):
+                if filename.endswith((".json", ".log")):
+                    try:
+                        os.remove(os.path.join(self.directory, filename))
+                    except FileNotFoundError:
+                        pass
+
+
+class BM25IndexedVectorDB(VectorDBBase):
+    """
+    Wraps a vector DB client and keeps the persistent BM25 index of every
+    collection in sync with the inserts and deletes applied to it.
+    """
+
+    def __init__(self, client: VectorDBBase, store: BM25IndexStore):
+        self.client = client
+        self.bm25_store = store
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose backend specific attributes of the wrapped client
+        return getattr(self.client, name)
+
+    def get_bm25_index(
+        self, collection_name: str, enriched: bool = False
+    ) -> Optional[BM25Index]:
+        """Get the BM25 index of a collection, building it on first use."""
+        return self.bm25_store.get(
+            collection_name,
+            enriched,
+            lambda: self.client.get(collection_name=collection_name),
+        )
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(collection_name=collection_name)
+
+    def delete_collection(self, collection_name: str) -> None:
+        self.bm25_store.drop(collection_name)
+        return self.client.delete_collection(collection_name=collection_name)
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        result = self.client.insert(collection_name=collection_name, items=items)
+        self.bm25_store.add(collection_name, items)
+        return result
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        result = self.client.upsert(collection_name=collection_name, items=items)
+        self.bm25_store.add(collection_name, items)
+        return result
+
+    def search(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        return self.client.search(
+            collection_name=collection_name, vectors=vectors, limit=limit
+        )
+
+    def query(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return self.client.query(
+            collection_name=collection_name, filter=filter, limit=limit
+        )
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self.client.get(collection_name=collection_name)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        result = self.client.delete(
+            collection_name=collection_name, ids=ids, filter=filter
+        )
+        self.bm25_store.remove(collection_name, ids=ids, filter=filter)
+        return result
+
+    def reset(self) -> None:
+        self.bm25_store.reset()
+        return self.client.reset()
+
+
+BM25_INDEX_STORE = BM25IndexStore(BM25_INDEX_DIR, cache_size=BM25_INDEX_CACHE_SIZE)
@@ -1,5 +1,6 @@
 from open_webui.retrieval.vector.main import VectorDBBase
 from open_webui.retrieval.vector.type import VectorType
+from open_webui.retrieval.vector.bm25 import BM25IndexedVectorDB, BM25_INDEX_STORE
 from open_webui.config import (
     VECTOR_DB,
     ENABLE_QDRANT_MULTITENANCY_MODE,
@@ -75,4 +76,4 @@ class Vector:
                 raise ValueError(f"Unsupported vector type: {vector_type}")
 
 
-VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+VECTOR_DB_CLIENT = BM25IndexedVectorDB(Vector.get_vector(VECTOR_DB), BM25_INDEX_STORE)
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from open_webui.config import (
+    WEB_PAGE_CACHE_MAX_AGE,
+    WEB_PAGE_CACHE_SIZE,
+    WEB_PAGE_CACHE_TTL,
+    WEB_SEARCH_CACHE_SIZE,
+    WEB_SEARCH_CACHE_TTL,
+)
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.retrieval.embedding_cache import RedisEmbeddingStore
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class WebCache:
+    """
+    Cache of web search responses or fetched pages. Entries are fresh for `ttl`
+    seconds and kept for `max_age` seconds, so that stale pages can still be
+    revalidated. Lookups go through a bounded in-memory LRU first and an
+    optional shared store second.
+    """
+
+    def __init__(self, size: int, ttl: int, max_age: Optional[int] = None, store=None):
+        self.size = size
+        self.ttl = ttl
+        self.max_age = max(max_age or ttl, ttl)
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def get_key(self, *parts: str) -> str:
+        return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["cached_at"] < self.ttl
+
+    def _set_local(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    async def get_many(self, keys: list[str]) -> dict[str, dict]:
+        """Returns the entries of `keys` that are not past `max_age`."""
+        now = time.time()
+        entries = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if now - entry["cached_at"] >= self.max_age:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                entries[key] = entry
+
+        missing = [key for key in keys if key not in entries]
+        if missing and self.store is not None:
+            try:
+                stored = await self.store.get_many(list(set(missing)))
+            except Exception as e:
+                log.warning(f"Error reading from the web cache store: {e}")
+                stored = {}
+
+            for key, value in stored.items():
+                entry = json.loads(value)
+                if now - entry["cached_at"] < self.max_age:
+                    entries[key] = entry
+                    self._set_local(key, entry)
+
+        fresh = sum(1 for entry in entries.values() if self.is_fresh(entry))
+        self.hits += fresh
+        self.misses += len(keys) - fresh
+        return entries
+
+    async def set_many(self, items: dict[str, dict]):
+        now = time.time()
+        items = {key: {**value, "cached_at": now} for key, value in items.items()}
+        for key, entry in items.items():
+            self._set_local(key, entry)
+
+        if self.store is not None and items:
+            try:
+                await self.store.set_many(
+                    {key: json.dumps(entry).encode() for key, entry in items.items()}
+                )
+            except Exception as e:
+                log.warning(f"Error writing to the web cache store: {e}")
+
+    async def get(self, key: str) -> Optional[dict]:
+        return (await self.get_many([key])).get(key)
+
+    async def set(self, key: str, value: dict):
+        await self.set_many({key: value})
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+async def aload_web_pages(
+    urls: Sequence[str],
+    get_loader: Callable,
+    engine: str,
+    cache: Optional[WebCache] = None,
+) -> list[Document]:
+    """
+    Loads the pages at `urls` with the loader returned by
+    `get_loader(urls, validators)`, except those fetched less than `ttl` seconds
+    ago. Stale pages are fetched again with their ETag or Last-Modified date as
+    `validators`, loaders that support them reuse pages that did not change.
+    """
+    cache = cache or WEB_PAGE_CACHE
+    if not cache.enabled:
+        return await get_loader(urls, {}).aload()
+
+    keys = {url: cache.get_key(engine, url) for url in urls}
+    entries = await cache.get_many(list(set(keys.values())))
+
+    pages = {}
+    validators = {}
+    for url in urls:
+        entry = entries.get(keys[url])
+        if entry is None:
+            continue
+        if cache.is_fresh(entry):
+            pages[url] = entry["docs"]
+        elif entry.get("etag") or entry.get("last_modified"):
+            validators[url] = {
+                "etag": entry.get("etag"),
+                "last_modified": entry.get("last_modified"),
+            }
+
+    missing = [url for url in dict.fromkeys(urls) if url not in pages]
+    other_docs = []
+    if missing:
+        loader = get_loader(missing, validators)
+        docs = await loader.aload()
+
+        not_modified = getattr(loader, "not_modified", set())
+        response_validators = getattr(loader, "response_validators", {})
+
+        loaded = {}
+        for doc in docs:
+            source = doc.metadata.get("source")
+            if source in not_modified:
+                continue
+            if source in missing:
+                loaded.setdefault(source, []).append(
+                    {"page_content": doc.page_content, "metadata": doc.metadata}
+                )
+            else:
+                other_docs.append(doc)
+
+        updates = {}
+        for url in missing:
+            if url in not_modified:
+                entry = entries[keys[url]]
+                pages[url] = entry["docs"]
+                updates[keys[url]] = entry
+            elif url in loaded:
+                pages[url] = loaded[url]
+                # Pages that failed to load are loaded again next time
+                if any(doc["page_content"].strip() for doc in loaded[url]):
+                    updates[keys[url]] = {
+                        "docs": loaded[url],
+                        **response_validators.get(url, {}),
+                    }
+        await cache.set_many(updates)
+
+    return [
+        Document(page_content=doc["page_content"], metadata={**doc["metadata"]})
+        for url in dict.fromkeys(urls)
+        for doc in pages.get(url, [])
+    ] + other_docs
+
+
+def get_web_cache_store(name: str, max_age: int):
+    if REDIS_URL:
+        return RedisEmbeddingStore(
+            get_redis_connection(
+                redis_url=REDIS_URL,
+                redis_sentinels=get_sentinels_from_env(
+                    REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                ),
+                redis_cluster=REDIS_CLUSTER,
+                async_mode=True,
+                decode_responses=False,
+            ),
+            ttl=max_age,
+            redis_key_prefix=f"{REDIS_KEY_PREFIX}:web:{name}",
+        )
+    return None
+
+
+WEB_SEARCH_CACHE = WebCache(
+    size=WEB_SEARCH_CACHE_SIZE,
+    ttl=WEB_SEARCH_CACHE_TTL,
+    store=(
+        get_web_cache_store("search", WEB_SEARCH_CACHE_TTL)
+        if WEB_SEARCH_CACHE_SIZE > 0
+        else None
+    ),
+)
+
+WEB_PAGE_CACHE = WebCache(
+    size=WEB_PAGE_CACHE_SIZE,
+    ttl=WEB_PAGE_CACHE_TTL,
+    max_age=WEB_PAGE_CACHE_MAX_AGE,
+    store=(
+        get_web_cache_store("pages", max(WEB_PAGE_CACHE_MAX_AGE, WEB_PAGE_CACHE_TTL))
+        if WEB_PAGE_CACHE_SIZE > 0
+        else None
+    ),
+)
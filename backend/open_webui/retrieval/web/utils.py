@@ -549,14 +549,26 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader, RateLimitMixin, URLProcessing
 class SafeWebBaseLoader(WebBaseLoader):
     """WebBaseLoader with enhanced error handling for URLs."""
 
-    def __init__(self, trust_env: bool = False, *args, **kwargs):
+    def __init__(
+        self,
+        trust_env: bool = False,
+        *args,
+        validators: Optional[Dict[str, Dict]] = None,
+        **kwargs,
+    ):
         """Initialize SafeWebBaseLoader
         Args:
             trust_env (bool, optional): set to True if using proxy to make web requests, for example
                 using http(s)_proxy environment variables. Defaults to False.
+            validators (dict, optional): ETag and Last-Modified date of the pages
+                already fetched, by URL. Pages that did not change are added to
+                `not_modified`.
         """
         super().__init__(*args, **kwargs)
         self.trust_env = trust_env
+        self.validators = validators or {}
+        self.response_validators: Dict[str, Dict] = {}
+        self.not_modified: set[str] = set()
 
     async def _fetch(
         self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
@@ -564,8 +576,15 @@ class SafeWebBaseLoader(WebBaseLoader):
         async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
             for i in range(retries):
                 try:
+                    headers = dict(self.session.headers)
+                    validator = self.validators.get(url, {})
+                    if validator.get("etag"):
+                        headers["If-None-Match"] = validator["etag"]
+                    if validator.get("last_modified"):
+                        headers["If-Modified-Since"] = validator["last_modified"]
+
                     kwargs: Dict = dict(
-                        headers=self.session.headers,
+                        headers=headers,
                         cookies=self.session.cookies.get_dict(),
                     )
                     if not self.session.verify:
@@ -576,8 +595,15 @@ class SafeWebBaseLoader(WebBaseLoader):
                         **(self.requests_kwargs | kwargs),
                         allow_redirects=False,
                     ) as response:
+                        if response.status == 304 and validator:
+                            self.not_modified.add(url)
+                            return ""
                         if self.raise_for_status:
                             response.raise_for_status()
+                        self.response_validators[url] = {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                        }
                         return await response.text()
                 except aiohttp.ClientConnectionError as e:
                     if i == retries - 1:
@@ -656,6 +682,7 @@ def get_web_loader(
     verify_ssl: bool = True,
     requests_per_second: int = 2,
     trust_env: bool = False,
+    validators: Optional[Dict[str, Dict]] = None,
 ):
     # Check if the URLs are valid
     safe_urls = safe_validate_urls([urls] if isinstance(urls, str) else urls)
@@ -674,6 +701,8 @@ def get_web_loader(
 
     if WEB_LOADER_ENGINE.value == "" or WEB_LOADER_ENGINE.value == "safe_web":
         WebLoaderClass = SafeWebBaseLoader
+        # Only plain requests can revalidate pages that were already fetched
+        web_loader_args["validators"] = validators
     if WEB_LOADER_ENGINE.value == "playwright":
         WebLoaderClass = SafePlaywrightURLLoader
         web_loader_args["playwright_timeout"] = PLAYWRIGHT_TIMEOUT.value
@@ -11,6 +11,7 @@ from open_webui.models.chats import (
     ChatResponse,
     Chats,
     ChatTitleIdResponse,
+    ChatSearchResponse,
 )
 from open_webui.models.tags import TagModel, Tags
 from open_webui.models.folders import Folders
@@ -164,7 +165,7 @@ async def import_chats(form_data: ChatsImportForm, user=Depends(get_verified_use
 ############################
 
 
-@router.get("/search", response_model=list[ChatTitleIdResponse])
+@router.get("/search", response_model=list[ChatSearchResponse])
 def search_user_chats(
     text: str, page: Optional[int] = None, user=Depends(get_verified_user)
 ):
@@ -174,12 +175,9 @@ def search_user_chats(
     limit = 60
     skip = (page - 1) * limit
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_user_id_and_search_text(
-            user.id, text, skip=skip, limit=limit
-        )
-    ]
+    chat_list = Chats.get_chats_by_user_id_and_search_text(
+        user.id, text, skip=skip, limit=limit
+    )
 
     # Delete tag if no chat is found
     words = text.strip().split(" ")
@@ -483,13 +481,19 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    message = Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
             "content": form_data.content,
         },
     )
+    if message is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(),
+        )
+    chat = Chats.merge_message_into_chat(chat, message_id, message)
 
     event_emitter = get_event_emitter(
         {
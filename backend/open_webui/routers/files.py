@@ -21,6 +21,7 @@ from fastapi import (
     Query,
 )
 
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
@@ -38,7 +39,7 @@ from open_webui.models.knowledge import Knowledges
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
 from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
-from open_webui.storage.provider import Storage
+from open_webui.storage.provider import LocalStorageProvider, Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from pydantic import BaseModel
 
@@ -47,6 +48,8 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+RANGE_CHUNK_SIZE = 1024 * 1024
+
 
 ############################
 # Check if the current user has access to a file through any knowledge bases the user may be in.
@@ -202,7 +205,7 @@ def upload_file_handler(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(
+        file_size, file_path = Storage.upload_stream(
             file.file,
             filename,
             {
@@ -226,7 +229,7 @@ def upload_file_handler(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": file_size,
                         "data": file_metadata,
                     },
                 }
@@ -524,9 +527,69 @@ async def update_file_data_content_by_id(
 ############################
 
 
+def get_range(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parses a single byte range, returns its start and exclusive end, or None if
+    the whole file should be sent instead (several or unsatisfiable ranges).
+    """
+    unit, _, value = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in value:
+        return None
+
+    try:
+        start, _, end = value.strip().partition("-")
+        if not start:
+            start, end = max(size - int(end), 0), size
+        else:
+            start, end = int(start), min(int(end) + 1 if end else size, size)
+    except ValueError:
+        return None
+
+    if start >= end:
+        return None
+    return start, end
+
+
+def get_range_response(
+    file_path: str, range_header: str, headers: dict, media_type: Optional[str]
+) -> Optional[StreamingResponse]:
+    """Streams a range of a file straight from the storage provider."""
+    size = Storage.get_file_size(file_path)
+    file_range = get_range(range_header, size)
+    if file_range is None:
+        return None
+    start, end = file_range
+
+    def generator():
+        offset = start
+        while offset < end:
+            chunk = Storage.read_range(
+                file_path, offset, min(offset + RANGE_CHUNK_SIZE, end)
+            )
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+    return StreamingResponse(
+        generator(),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers={
+            **headers,
+            "Accept-Ranges": "bytes",
+            "Content-Range": f"bytes {start}-{end - 1}/{size}",
+            "Content-Length": str(end - start),
+        },
+    )
+
+
 @router.get("/{id}/content")
 async def get_file_content_by_id(
-    id: str, user=Depends(get_verified_user), attachment: bool = Query(False)
+    request: Request,
+    id: str,
+    user=Depends(get_verified_user),
+    attachment: bool = Query(False),
 ):
     file = Files.get_file_by_id(id)
 
@@ -542,37 +605,44 @@ async def get_file_content_by_id(
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                # Handle Unicode filenames
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)  # RFC5987 encoding
-
-                content_type = file.meta.get("content_type")
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)
-                headers = {}
-
-                if attachment:
+            # Handle Unicode filenames
+            content_type = file.meta.get("content_type")
+            filename = file.meta.get("name", file.filename)
+            encoded_filename = quote(filename)  # RFC5987 encoding
+            headers = {}
+
+            if attachment:
+                headers["Content-Disposition"] = (
+                    f"attachment; filename*=UTF-8''{encoded_filename}"
+                )
+            else:
+                if content_type == "application/pdf" or filename.lower().endswith(
+                    ".pdf"
+                ):
+                    headers["Content-Disposition"] = (
+                        f"inline; filename*=UTF-8''{encoded_filename}"
+                    )
+                    content_type = "application/pdf"
+                elif content_type != "text/plain":
                     headers["Content-Disposition"] = (
                         f"attachment; filename*=UTF-8''{encoded_filename}"
                     )
-                else:
-                    if content_type == "application/pdf" or filename.lower().endswith(
-                        ".pdf"
-                    ):
-                        headers["Content-Disposition"] = (
-                            f"inline; filename*=UTF-8''{encoded_filename}"
-                        )
-                        content_type = "application/pdf"
-                    elif content_type != "text/plain":
-                        headers["Content-Disposition"] = (
-                            f"attachment; filename*=UTF-8''{encoded_filename}"
-                        )
 
+            # Ranges of remote files are read without downloading the whole file
+            range_header = request.headers.get("range")
+            if range_header and not isinstance(Storage, LocalStorageProvider):
+                response = await run_in_threadpool(
+                    get_range_response, file.path, range_header, headers, content_type
+                )
+                if response is not None:
+                    return response
+
+            file_path = await run_in_threadpool(Storage.get_file, file.path)
+            file_path = Path(file_path)
+
+            # Check if the file already exists in the cache
+            if file_path.is_file():
+                # Local files are streamed by FileResponse, ranges included
                 return FileResponse(file_path, headers=headers, media_type=content_type)
 
             else:
@@ -1,3 +1,7 @@
+import asyncio
+import json
+import os
+import time
 from typing import List, Optional
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
@@ -17,16 +21,23 @@ from open_webui.routers.retrieval import (
     ProcessFileForm,
     process_files_batch,
     BatchProcessFilesForm,
+    get_index_fingerprint,
+    get_processed_file_docs,
+    update_file_docs_in_vector_db,
 )
 from open_webui.storage.provider import Storage
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.misc import calculate_sha256_string
 
 
-from open_webui.env import SRC_LOG_LEVELS
-from open_webui.config import BYPASS_ADMIN_ACCESS_CONTROL
+from open_webui.env import DATA_DIR, SRC_LOG_LEVELS, REDIS_KEY_PREFIX
+from open_webui.config import (
+    BYPASS_ADMIN_ACCESS_CONTROL,
+    KNOWLEDGE_REINDEX_CONCURRENCY,
+)
 from open_webui.models.models import Models, ModelForm
 
 
@@ -180,83 +191,430 @@ async def create_new_knowledge(
 ############################
 
 
-@router.post("/reindex", response_model=bool)
-async def reindex_knowledge_files(request: Request, user=Depends(get_verified_user)):
-    if user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=ERROR_MESSAGES.UNAUTHORIZED,
+def reindex_knowledge_file(
+    request: Request, collection_name: str, file: FileModel, user, force=False
+) -> bool:
+    """
+    Bring the vectors of a file in a knowledge base up to date, returns False
+    when they were built from the same content and settings already.
+    """
+    data = file.data or {}
+    hash = file.hash or calculate_sha256_string(data.get("content", ""))
+    fingerprint = get_index_fingerprint(request, hash)
+
+    if not force and data.get("index", {}).get(collection_name) == fingerprint:
+        result = VECTOR_DB_CLIENT.query(
+            collection_name=collection_name, filter={"file_id": file.id}, limit=1
         )
+        if result is not None and result.ids and result.ids[0]:
+            return False
+
+    update_file_docs_in_vector_db(
+        request,
+        docs=get_processed_file_docs(file),
+        collection_name=collection_name,
+        file_id=file.id,
+        metadata={"file_id": file.id, "name": file.filename, "hash": hash},
+        user=user,
+    )
 
-    knowledge_bases = Knowledges.get_knowledge_bases()
+    Files.update_file_data_by_id(
+        file.id, {"index": {**data.get("index", {}), collection_name: fingerprint}}
+    )
+    if file.hash != hash:
+        Files.update_file_hash_by_id(file.id, hash)
+    return True
 
-    log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
 
-    deleted_knowledge_bases = []
+def remove_orphaned_file_vectors(collection_name: str, file_ids: set[str]) -> int:
+    """Remove the vectors of files that are no longer part of a knowledge base."""
+    if not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        return 0
 
-    for knowledge_base in knowledge_bases:
-        # -- Robust error handling for missing or invalid data
-        if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
-            log.warning(
-                f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
-            )
-            try:
-                Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
-                deleted_knowledge_bases.append(knowledge_base.id)
-            except Exception as e:
-                log.error(
-                    f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
-                )
+    result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+    if result is None or not result.metadatas:
+        return 0
+
+    orphaned_file_ids = {
+        metadata.get("file_id")
+        for metadata in result.metadatas[0]
+        if metadata and metadata.get("file_id")
+    } - file_ids
+    for file_id in orphaned_file_ids:
+        VECTOR_DB_CLIENT.delete(
+            collection_name=collection_name, filter={"file_id": file_id}
+        )
+    return len(orphaned_file_ids)
+
+
+def get_collection_embedding_config(
+    collection_name: str, file_ids: list[str]
+) -> Optional[dict]:
+    """
+    Embedding engine and model the vectors of a collection were built with,
+    read from the first chunk of its files.
+    """
+    if not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        return None
+
+    for file_id in file_ids:
+        result = VECTOR_DB_CLIENT.query(
+            collection_name=collection_name, filter={"file_id": file_id}, limit=1
+        )
+        if result is None or not result.metadatas or not result.metadatas[0]:
             continue
 
+        embedding_config = (result.metadatas[0][0] or {}).get("embedding_config")
+        # Some vector databases only store flat metadata
+        if isinstance(embedding_config, str):
+            try:
+                embedding_config = json.loads(embedding_config)
+            except json.JSONDecodeError:
+                return None
+        return embedding_config if isinstance(embedding_config, dict) else None
+    return None
+
+
+class KnowledgeReindexJob:
+    """
+    Reindexes the files of every knowledge base in the background. Files are
+    skipped when their index fingerprint did not change and changed files only
+    have their new chunks embedded, a collection built with another embedding
+    engine or model is rebuilt from scratch. Progress is kept in Redis when available so
+    any instance can report it, and in a file otherwise. An interrupted job
+    resumes after the last file it completed.
+    """
+
+    def __init__(
+        self,
+        redis_key: str = f"{REDIS_KEY_PREFIX}:knowledge:reindex",
+        state_path: str = str(DATA_DIR / "knowledge_reindex.json"),
+        lock_timeout: int = 600,
+        max_failed_files: int = 100,
+        save_interval: float = 1.0,
+    ):
+        self.redis_key = redis_key
+        self.state_path = state_path
+        self.lock_timeout = lock_timeout
+        self.max_failed_files = max_failed_files
+        self.save_interval = save_interval
+
+        self.state: dict = {}
+        self.task: Optional[asyncio.Task] = None
+        self._saved_at = 0.0
+
+    def _read_state_file(self) -> dict:
         try:
-            file_ids = knowledge_base.data.get("file_ids", [])
-            files = Files.get_files_by_ids(file_ids)
+            with open(self.state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            log.warning(f"Error reading knowledge reindex state: {e}")
+            return {}
+
+    def _write_state_file(self, state: str):
+        path = f"{self.state_path}.tmp"
+        with open(path, "w") as f:
+            f.write(state)
+        os.replace(path, self.state_path)
+
+    async def get_state(self, redis=None) -> dict:
+        if redis is not None:
+            state = await redis.get(self.redis_key)
+            return json.loads(state) if state else {}
+        return self.state or await asyncio.to_thread(self._read_state_file)
+
+    async def _save_state(self, redis=None, force: bool = True):
+        # Progress of single files is saved at most every save_interval seconds,
+        # a resumed job reindexes the files completed since then again
+        now = time.time()
+        if not force and now - self._saved_at < self.save_interval:
+            return
+        self._saved_at = now
+
+        self.state["updated_at"] = int(now)
+        state = json.dumps(self.state)
+        if redis is not None:
+            pipe = redis.pipeline()
+            pipe.set(self.redis_key, state)
+            pipe.expire(f"{self.redis_key}:lock", self.lock_timeout)
+            await pipe.execute()
+        else:
             try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
+                await asyncio.to_thread(self._write_state_file, state)
+            except Exception as e:
+                log.warning(f"Error saving knowledge reindex state: {e}")
+
+    async def start(self, app, user, force: bool = False) -> bool:
+        """Start or resume the job, returns False if it is running already."""
+        redis = app.state.redis
+        if self.task is not None and not self.task.done():
+            return False
+        if redis is not None and not await redis.set(
+            f"{self.redis_key}:lock", 1, nx=True, ex=self.lock_timeout
+        ):
+            return False
+
+        now = int(time.time())
+        state = await self.get_state(redis)
+        if state.get("status") in ["running", "interrupted", "failed"] and (
+            state.get("force", False) == force
+        ):
+            log.info(
+                f"Resuming knowledge reindex after {state['processed']} of "
+                f"{state['total']} files"
+            )
+            self.state = {
+                "knowledge_id": None,
+                "completed_file_ids": [],
+                **state,
+                "status": "running",
+                "error": None,
+            }
+        else:
+            self.state = {
+                "status": "running",
+                "force": force,
+                "total": 0,
+                "processed": 0,
+                "reindexed": 0,
+                "skipped": 0,
+                "failed": 0,
+                "failed_files": [],
+                "completed_ids": [],
+                # Knowledge base in progress and its completed files
+                "knowledge_id": None,
+                "completed_file_ids": [],
+                "deleted_ids": [],
+                "error": None,
+                "started_at": now,
+            }
+
+        await self._save_state(redis)
+        self.task = asyncio.create_task(self.run(app, user, redis))
+        return True
+
+    async def run(self, app, user, redis=None):
+        # The job outlives the request that started it, only the app is kept
+        request = Request(
+            {
+                "type": "http",
+                "asgi.version": "3.0",
+                "asgi.spec_version": "2.0",
+                "method": "POST",
+                "path": "/internal",
+                "query_string": b"",
+                "headers": [],
+                "client": ("127.0.0.1", 12345),
+                "server": ("127.0.0.1", 80),
+                "scheme": "http",
+                "app": app,
+            }
+        )
+
+        try:
+            knowledge_bases = []
+            for knowledge_base in Knowledges.get_knowledge_bases():
+                # -- Robust error handling for missing or invalid data
+                if knowledge_base.data and isinstance(knowledge_base.data, dict):
+                    knowledge_bases.append(knowledge_base)
+                    continue
+
+                log.warning(
+                    f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
+                )
+                try:
+                    Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
+                    self.state["deleted_ids"].append(knowledge_base.id)
+                except Exception as e:
+                    log.error(
+                        f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
+                    )
+
+            self.state["total"] = sum(
+                len(knowledge_base.data.get("file_ids", []))
+                for knowledge_base in knowledge_bases
+            )
+            log.info(
+                f"Starting reindexing for {len(knowledge_bases)} knowledge bases, "
+                f"{self.state['total']} files"
+            )
+            await self._save_state(redis)
+
+            semaphore = asyncio.Semaphore(KNOWLEDGE_REINDEX_CONCURRENCY)
+            for knowledge_base in knowledge_bases:
+                if knowledge_base.id in self.state["completed_ids"]:
+                    continue
+
+                try:
+                    await self.reindex_knowledge_base(
+                        request, knowledge_base, user, semaphore, redis
+                    )
+                except Exception as e:
+                    # Don't raise, just continue
+                    log.error(
+                        f"Error processing knowledge base {knowledge_base.id}: {str(e)}"
+                    )
+
+                self.state["completed_ids"].append(knowledge_base.id)
+                self.state["knowledge_id"] = None
+                self.state["completed_file_ids"] = []
+                await self._save_state(redis)
+
+            self.state["status"] = "completed"
+            log.info(
+                f"Reindexing completed: {self.state['reindexed']} files reindexed, "
+                f"{self.state['skipped']} unchanged, {self.state['failed']} failed. "
+                f"Deleted {len(self.state['deleted_ids'])} invalid knowledge bases: "
+                f"{self.state['deleted_ids']}"
+            )
+        except asyncio.CancelledError:
+            self.state["status"] = "interrupted"
+            raise
+        except Exception as e:
+            log.exception(f"Error reindexing knowledge bases: {e}")
+            self.state["status"] = "failed"
+            self.state["error"] = str(e)
+        finally:
+            await self._save_state(redis)
+            if redis is not None:
+                await redis.delete(f"{self.redis_key}:lock")
+
+    async def reindex_knowledge_base(
+        self,
+        request: Request,
+        knowledge_base,
+        user,
+        semaphore: asyncio.Semaphore,
+        redis=None,
+    ):
+        file_ids = knowledge_base.data.get("file_ids", [])
+        files = Files.get_files_by_ids(file_ids)
+        rebuild = self.state["force"]
+
+        # A resumed knowledge base was counted and cleared by the interrupted job
+        if self.state["knowledge_id"] == knowledge_base.id:
+            completed_file_ids = set(self.state["completed_file_ids"])
+        else:
+            completed_file_ids = set()
+            self.state["knowledge_id"] = knowledge_base.id
+            self.state["completed_file_ids"] = []
+
+            if not rebuild:
+                # Vectors of another model can't share the collection with the
+                # new ones, not even while a file is being updated
+                embedding_config = await run_in_threadpool(
+                    get_collection_embedding_config,
+                    knowledge_base.id,
+                    [file.id for file in files],
+                )
+                rebuild = embedding_config is not None and embedding_config != {
+                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+                }
+                if rebuild:
+                    log.info(
+                        f"Rebuilding knowledge base {knowledge_base.id}, its embedding "
+                        f"model changed from {embedding_config}"
+                    )
+
+            if rebuild:
+                try:
+                    if VECTOR_DB_CLIENT.has_collection(
                         collection_name=knowledge_base.id
+                    ):
+                        VECTOR_DB_CLIENT.delete_collection(
+                            collection_name=knowledge_base.id
+                        )
+                except Exception as e:
+                    log.error(
+                        f"Error deleting collection {knowledge_base.id}: {str(e)}"
                     )
-            except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                continue  # Skip, don't raise
+                    self.state["processed"] += len(file_ids)
+                    return
+
+            # Files that no longer exist count as processed
+            self.state["processed"] += len(file_ids) - len(files)
+            await self._save_state(redis)
 
-            failed_files = []
-            for file in files:
+        async def reindex_file(file: FileModel):
+            async with semaphore:
                 try:
-                    await run_in_threadpool(
-                        process_file,
+                    reindexed = await run_in_threadpool(
+                        reindex_knowledge_file,
                         request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
+                        knowledge_base.id,
+                        file,
+                        user,
+                        rebuild,
                     )
+                    self.state["reindexed" if reindexed else "skipped"] += 1
                 except Exception as e:
                     log.error(
                         f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
                     )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
-
-        except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            # Don't raise, just continue
-            continue
+                    self.state["failed"] += 1
+                    if len(self.state["failed_files"]) < self.max_failed_files:
+                        self.state["failed_files"].append(
+                            {
+                                "knowledge_id": knowledge_base.id,
+                                "file_id": file.id,
+                                "error": str(e),
+                            }
+                        )
+
+                self.state["processed"] += 1
+                self.state["completed_file_ids"].append(file.id)
+                await self._save_state(redis, force=False)
+
+        await asyncio.gather(
+            *[reindex_file(file) for file in files if file.id not in completed_file_ids]
+        )
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
+        if not rebuild:
+            removed = await run_in_threadpool(
+                remove_orphaned_file_vectors,
+                knowledge_base.id,
+                {file.id for file in files},
             )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
+            if removed:
+                log.info(
+                    f"Removed vectors of {removed} files no longer in knowledge base {knowledge_base.id}"
+                )
 
-    log.info(
-        f"Reindexing completed. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
-    )
+
+KNOWLEDGE_REINDEX_JOB = KnowledgeReindexJob()
+
+
+@router.post("/reindex", response_model=bool)
+async def reindex_knowledge_files(
+    request: Request, force: bool = False, user=Depends(get_verified_user)
+):
+    if user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.UNAUTHORIZED,
+        )
+
+    if not await KNOWLEDGE_REINDEX_JOB.start(request.app, user, force=force):
+        log.info("Knowledge reindex is already running")
     return True
 
 
+@router.get("/reindex/status")
+async def get_reindex_knowledge_files_status(
+    request: Request, user=Depends(get_verified_user)
+):
+    if user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.UNAUTHORIZED,
+        )
+
+    return await KNOWLEDGE_REINDEX_JOB.get_state(request.app.state.redis)
+
+
 ############################
 # GetKnowledgeById
 ############################
@@ -708,7 +1066,7 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 
 
 @router.post("/{id}/files/batch/add", response_model=Optional[KnowledgeFilesResponse])
-def add_files_to_knowledge_batch(
+async def add_files_to_knowledge_batch(
     request: Request,
     id: str,
     form_data: list[KnowledgeFileIdForm],
@@ -748,7 +1106,7 @@ def add_files_to_knowledge_batch(
 
     # Process files
     try:
-        result = process_files_batch(
+        result = await process_files_batch(
             request=request,
             form_data=BatchProcessFilesForm(files=files, collection_name=id),
             user=user,
@@ -18,6 +18,8 @@ from aiocache import cached
 import requests
 
 from open_webui.utils.headers import include_user_info_headers
+from open_webui.utils.http_client import HTTP_CLIENT_POOL
+from open_webui.utils.model_registry import MODEL_REGISTRY
 from open_webui.models.chats import Chats
 from open_webui.models.users import UserModel
 
@@ -81,35 +83,44 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            headers = {
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-            }
+        headers = {
+            "Content-Type": "application/json",
+            **({"Authorization": f"Bearer {key}"} if key else {}),
+        }
 
-            if ENABLE_FORWARD_USER_INFO_HEADERS and user:
-                headers = include_user_info_headers(headers, user)
+        if ENABLE_FORWARD_USER_INFO_HEADERS and user:
+            headers = include_user_info_headers(headers, user)
 
-            async with session.get(
-                url,
-                headers=headers,
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        async with HTTP_CLIENT_POOL.get_session(url).get(
+            url,
+            headers=headers,
+            timeout=timeout,
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
         return None
 
 
-async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
-):
+async def send_tags_request(request: Request, url, key=None, user: UserModel = None):
+    if ENABLE_FORWARD_USER_INFO_HEADERS and user:
+        # The model list may depend on the forwarded user, so it is not shared
+        return await send_get_request(f"{url}/api/tags", key, user=user)
+
+    return await MODEL_REGISTRY.get(
+        request.app.state.redis,
+        f"{url}/api/tags",
+        lambda: send_get_request(f"{url}/api/tags", key),
+        key=key,
+    )
+
+
+async def cleanup_response(response: Optional[aiohttp.ClientResponse]):
+    # Releasing rather than closing keeps the connection alive in the pool
     if response:
-        response.close()
-    if session:
-        await session.close()
+        response.release()
 
 
 async def send_post_request(
@@ -124,10 +135,6 @@ async def send_post_request(
 
     r = None
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
         headers = {
             "Content-Type": "application/json",
             **({"Authorization": f"Bearer {key}"} if key else {}),
@@ -138,17 +145,19 @@ async def send_post_request(
             if metadata and metadata.get("chat_id"):
                 headers["X-OpenWebUI-Chat-Id"] = metadata.get("chat_id")
 
-        r = await session.post(
+        r = await HTTP_CLIENT_POOL.request(
+            "POST",
             url,
             data=payload,
             headers=headers,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
 
         if r.ok is False:
             try:
                 res = await r.json()
-                await cleanup_response(r, session)
+                await cleanup_response(r)
                 if "error" in res:
                     raise HTTPException(status_code=r.status, detail=res["error"])
             except HTTPException as e:
@@ -171,9 +180,7 @@ async def send_post_request(
                 r.content,
                 status_code=r.status,
                 headers=response_headers,
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             res = await r.json()
@@ -190,7 +197,7 @@ async def send_post_request(
         )
     finally:
         if not stream:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
 
 
 def get_api_key(idx, url, configs):
@@ -334,7 +341,7 @@ async def get_all_models(request: Request, user: UserModel = None):
             if (str(idx) not in request.app.state.config.OLLAMA_API_CONFIGS) and (
                 url not in request.app.state.config.OLLAMA_API_CONFIGS  # Legacy support
             ):
-                request_tasks.append(send_get_request(f"{url}/api/tags", user=user))
+                request_tasks.append(send_tags_request(request, url, user=user))
             else:
                 api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
                     str(idx),
@@ -348,7 +355,7 @@ async def get_all_models(request: Request, user: UserModel = None):
 
                 if enable:
                     request_tasks.append(
-                        send_get_request(f"{url}/api/tags", key, user=user)
+                        send_tags_request(request, url, key, user=user)
                     )
                 else:
                     request_tasks.append(asyncio.ensure_future(asyncio.sleep(0, None)))
@@ -399,7 +406,12 @@ async def get_all_models(request: Request, user: UserModel = None):
         }
 
         try:
-            loaded_models = await get_ollama_loaded_models(request, user=user)
+            # Loaded models only add expiry times, a slow backend must not hold
+            # back the model list
+            loaded_models = await asyncio.wait_for(
+                get_ollama_loaded_models(request, user=user),
+                MODEL_REGISTRY.timeout,
+            )
             expires_map = {
                 m["model"]: m["expires_at"]
                 for m in loaded_models["models"]
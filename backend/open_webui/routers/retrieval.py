@@ -45,7 +45,12 @@ from open_webui.retrieval.loaders.youtube import YoutubeLoader
 
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
-from open_webui.retrieval.web.utils import get_web_loader
+from open_webui.retrieval.web.utils import get_web_loader, safe_validate_urls
+from open_webui.retrieval.web.cache import (
+    WEB_SEARCH_CACHE,
+    aload_web_pages,
+    normalize_query,
+)
 from open_webui.retrieval.web.ollama import search_ollama_cloud
 from open_webui.retrieval.web.perplexity_search import search_perplexity_search
 from open_webui.retrieval.web.brave import search_brave
@@ -82,6 +87,8 @@ from open_webui.retrieval.utils import (
     query_doc_with_hybrid_search,
 )
 from open_webui.retrieval.vector.utils import filter_metadata
+from open_webui.retrieval.ingestion import IngestionJob, IngestionPipeline
+from open_webui.socket.main import sio
 from open_webui.utils.misc import (
     calculate_sha256_string,
 )
@@ -97,6 +104,10 @@ from open_webui.config import (
     DEFAULT_LOCALE,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_QUERY_PREFIX,
+    INGESTION_LOAD_CONCURRENCY,
+    INGESTION_SPLIT_CONCURRENCY,
+    INGESTION_EMBEDDING_BATCH_SIZE,
+    INGESTION_EMBEDDING_CONCURRENCY,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -1223,6 +1234,77 @@ async def update_rag_config(
 ####################################
 
 
+def split_docs(request: Request, docs: list[Document]) -> list[Document]:
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+        docs = text_splitter.split_documents(docs)
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        text_splitter = TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+        docs = text_splitter.split_documents(docs)
+    elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
+        log.info("Using markdown header text splitter")
+
+        # Define headers to split on - covering most common markdown header levels
+        headers_to_split_on = [
+            ("#", "Header 1"),
+            ("##", "Header 2"),
+            ("###", "Header 3"),
+            ("####", "Header 4"),
+            ("#####", "Header 5"),
+            ("######", "Header 6"),
+        ]
+
+        markdown_splitter = MarkdownHeaderTextSplitter(
+            headers_to_split_on=headers_to_split_on,
+            strip_headers=False,  # Keep headers in content for context
+        )
+
+        md_split_docs = []
+        for doc in docs:
+            md_header_splits = markdown_splitter.split_text(doc.page_content)
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=request.app.state.config.CHUNK_SIZE,
+                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+                add_start_index=True,
+            )
+            md_header_splits = text_splitter.split_documents(md_header_splits)
+
+            # Convert back to Document objects, preserving original metadata
+            for split_chunk in md_header_splits:
+                headings_list = []
+                # Extract header values in order based on headers_to_split_on
+                for _, header_meta_key_name in headers_to_split_on:
+                    if header_meta_key_name in split_chunk.metadata:
+                        headings_list.append(split_chunk.metadata[header_meta_key_name])
+
+                md_split_docs.append(
+                    Document(
+                        page_content=split_chunk.page_content,
+                        metadata={**doc.metadata, "headings": headings_list},
+                    )
+                )
+
+        docs = md_split_docs
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+    return docs
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -1267,83 +1349,84 @@ def save_docs_to_vector_db(
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
+        docs = split_docs(request, docs)
 
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
-            log.info("Using markdown header text splitter")
-
-            # Define headers to split on - covering most common markdown header levels
-            headers_to_split_on = [
-                ("#", "Header 1"),
-                ("##", "Header 2"),
-                ("###", "Header 3"),
-                ("####", "Header 4"),
-                ("#####", "Header 5"),
-                ("######", "Header 6"),
-            ]
+    if len(docs) == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
-            markdown_splitter = MarkdownHeaderTextSplitter(
-                headers_to_split_on=headers_to_split_on,
-                strip_headers=False,  # Keep headers in content for context
-            )
+    metadatas = get_chunk_metadatas(request, docs, metadata)
+
+    try:
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            log.info(f"collection {collection_name} already exists")
 
-            md_split_docs = []
-            for doc in docs:
-                md_header_splits = markdown_splitter.split_text(doc.page_content)
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=request.app.state.config.CHUNK_SIZE,
-                    chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                    add_start_index=True,
+            if overwrite:
+                VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                log.info(f"deleting existing collection {collection_name}")
+            elif add is False:
+                log.info(
+                    f"collection {collection_name} already exists, overwrite is False and add is False"
                 )
-                md_header_splits = text_splitter.split_documents(md_header_splits)
-
-                # Convert back to Document objects, preserving original metadata
-                for split_chunk in md_header_splits:
-                    headings_list = []
-                    # Extract header values in order based on headers_to_split_on
-                    for _, header_meta_key_name in headers_to_split_on:
-                        if header_meta_key_name in split_chunk.metadata:
-                            headings_list.append(
-                                split_chunk.metadata[header_meta_key_name]
-                            )
-
-                    md_split_docs.append(
-                        Document(
-                            page_content=split_chunk.page_content,
-                            metadata={**doc.metadata, "headings": headings_list},
-                        )
-                    )
+                return True
 
-            docs = md_split_docs
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+        insert_docs_to_vector_db(request, docs, metadatas, collection_name, user)
+        return True
+    except Exception as e:
+        log.exception(e)
+        raise e
 
-    if len(docs) == 0:
-        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
-    texts = [doc.page_content for doc in docs]
-    metadatas = [
+def get_chunk_hash(request: Request, text: str) -> str:
+    """
+    Identifies a chunk together with the embedding settings it was embedded
+    with, an unchanged chunk of a changed file keeps its vector.
+    """
+    return calculate_sha256_string(
+        json.dumps(
+            [
+                request.app.state.config.RAG_EMBEDDING_ENGINE,
+                request.app.state.config.RAG_EMBEDDING_MODEL,
+                RAG_EMBEDDING_CONTENT_PREFIX or "",
+                text,
+            ]
+        )
+    )
+
+
+def get_index_fingerprint(request: Request, content_hash: str) -> str:
+    """
+    Covers everything that determines the chunks and vectors of a file, a file
+    only has to be re-split and re-embedded when its fingerprint changes.
+    """
+    config = request.app.state.config
+    return calculate_sha256_string(
+        json.dumps(
+            [
+                content_hash,
+                config.TEXT_SPLITTER,
+                config.CHUNK_SIZE,
+                config.CHUNK_OVERLAP,
+                (
+                    str(config.TIKTOKEN_ENCODING_NAME)
+                    if config.TEXT_SPLITTER == "token"
+                    else ""
+                ),
+                config.RAG_EMBEDDING_ENGINE,
+                config.RAG_EMBEDDING_MODEL,
+                RAG_EMBEDDING_CONTENT_PREFIX or "",
+            ]
+        )
+    )
+
+
+def get_chunk_metadatas(
+    request: Request, docs: list[Document], metadata: Optional[dict] = None
+) -> list[dict]:
+    return [
         {
             **doc.metadata,
             **(metadata if metadata else {}),
+            "chunk_hash": get_chunk_hash(request, doc.page_content),
             "embedding_config": {
                 "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
                 "model": request.app.state.config.RAG_EMBEDDING_MODEL,
@@ -1352,81 +1435,204 @@ def save_docs_to_vector_db(
         for doc in docs
     ]
 
-    try:
-        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
-            log.info(f"collection {collection_name} already exists")
 
-            if overwrite:
-                VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
-                log.info(f"deleting existing collection {collection_name}")
-            elif add is False:
-                log.info(
-                    f"collection {collection_name} already exists, overwrite is False and add is False"
-                )
-                return True
+def get_content_embedding_function(request: Request):
+    return get_embedding_function(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.ef,
+        (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_BASE_URL
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
+            )
+        ),
+        (
+            request.app.state.config.RAG_OPENAI_API_KEY
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_API_KEY
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
+            )
+        ),
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+        azure_api_version=(
+            request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+            else None
+        ),
+    )
 
-        log.info(f"generating embeddings for {collection_name}")
-        embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-            request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_BASE_URL
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
-                )
-            ),
-            (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_API_KEY
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
-                )
-            ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-            azure_api_version=(
-                request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
-                else None
-            ),
+
+def insert_docs_to_vector_db(
+    request: Request,
+    docs: list[Document],
+    metadatas: list[dict],
+    collection_name: str,
+    user=None,
+):
+    texts = [doc.page_content for doc in docs]
+
+    log.info(f"generating embeddings for {collection_name}")
+    embedding_function = get_content_embedding_function(request)
+
+    # Run async embedding in sync context
+    embeddings = asyncio.run(
+        embedding_function(
+            list(map(lambda x: x.replace("\n", " "), texts)),
+            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+            user=user,
         )
+    )
+    log.info(f"embeddings generated {len(embeddings)} for {len(texts)} items")
 
-        # Run async embedding in sync context
-        embeddings = asyncio.run(
-            embedding_function(
-                list(map(lambda x: x.replace("\n", " "), texts)),
-                prefix=RAG_EMBEDDING_CONTENT_PREFIX,
-                user=user,
-            )
+    items = [
+        {
+            "id": str(uuid.uuid4()),
+            "text": text,
+            "vector": embeddings[idx],
+            "metadata": metadatas[idx],
+        }
+        for idx, text in enumerate(texts)
+    ]
+
+    log.info(f"adding to collection {collection_name}")
+    VECTOR_DB_CLIENT.insert(
+        collection_name=collection_name,
+        items=items,
+    )
+
+    log.info(f"added {len(items)} items to collection {collection_name}")
+
+
+def update_file_docs_in_vector_db(
+    request: Request,
+    docs: list[Document],
+    collection_name: str,
+    file_id: str,
+    metadata: Optional[dict] = None,
+    user=None,
+) -> dict:
+    """
+    Re-split the documents of a file and only embed the chunks that are not in
+    the collection yet, chunks of the file that no longer exist are removed.
+    """
+    docs = split_docs(request, docs)
+    if len(docs) == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    existing_ids = {}
+    result = None
+    if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        result = VECTOR_DB_CLIENT.query(
+            collection_name=collection_name, filter={"file_id": file_id}
         )
-        log.info(f"embeddings generated {len(embeddings)} for {len(texts)} items")
 
-        items = [
-            {
-                "id": str(uuid.uuid4()),
-                "text": text,
-                "vector": embeddings[idx],
-                "metadata": metadatas[idx],
-            }
-            for idx, text in enumerate(texts)
+    if result is not None and result.ids:
+        for id, chunk_metadata in zip(result.ids[0], result.metadatas[0]):
+            chunk_hash = (chunk_metadata or {}).get("chunk_hash", id)
+            existing_ids.setdefault(chunk_hash, []).append(id)
+
+    metadatas = get_chunk_metadatas(request, docs, metadata)
+    new_docs, new_metadatas = [], []
+    for doc, chunk_metadata in zip(docs, metadatas):
+        ids = existing_ids.get(chunk_metadata["chunk_hash"])
+        if ids:
+            ids.pop()
+        else:
+            new_docs.append(doc)
+            new_metadatas.append(chunk_metadata)
+
+    # Insert before deleting so the file never disappears from the collection,
+    # the reindex job rebuilds collections of another embedding model instead
+    if new_docs:
+        insert_docs_to_vector_db(
+            request, new_docs, new_metadatas, collection_name, user
+        )
+
+    stale_ids = [id for ids in existing_ids.values() for id in ids]
+    if stale_ids:
+        VECTOR_DB_CLIENT.delete(collection_name=collection_name, ids=stale_ids)
+
+    log.info(
+        f"updated file {file_id} in collection {collection_name}: "
+        f"{len(new_docs)} added, {len(docs) - len(new_docs)} kept, "
+        f"{len(stale_ids)} removed"
+    )
+    return {
+        "added": len(new_docs),
+        "kept": len(docs) - len(new_docs),
+        "removed": len(stale_ids),
+    }
+
+
+def get_processed_file_docs(file: FileModel) -> list[Document]:
+    """
+    Documents of an already processed file, taken from its own collection when
+    it has one, so adding it to a knowledge base does not load it again.
+    """
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=f"file-{file.id}", filter={"file_id": file.id}
+    )
+
+    if result is not None and len(result.ids[0]) > 0:
+        return [
+            Document(
+                page_content=result.documents[0][idx],
+                metadata=result.metadatas[0][idx],
+            )
+            for idx, id in enumerate(result.ids[0])
         ]
 
-        log.info(f"adding to collection {collection_name}")
-        VECTOR_DB_CLIENT.insert(
-            collection_name=collection_name,
-            items=items,
+    return [
+        Document(
+            page_content=file.data.get("content", ""),
+            metadata={
+                **file.meta,
+                "name": file.filename,
+                "created_by": file.user_id,
+                "file_id": file.id,
+                "source": file.filename,
+            },
         )
+    ]
 
-        log.info(f"added {len(items)} items to collection {collection_name}")
-        return True
-    except Exception as e:
-        log.exception(e)
-        raise e
+
+def get_loader(request: Request, user=None) -> Loader:
+    return Loader(
+        engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
+        user=user,
+        DATALAB_MARKER_API_KEY=request.app.state.config.DATALAB_MARKER_API_KEY,
+        DATALAB_MARKER_API_BASE_URL=request.app.state.config.DATALAB_MARKER_API_BASE_URL,
+        DATALAB_MARKER_ADDITIONAL_CONFIG=request.app.state.config.DATALAB_MARKER_ADDITIONAL_CONFIG,
+        DATALAB_MARKER_SKIP_CACHE=request.app.state.config.DATALAB_MARKER_SKIP_CACHE,
+        DATALAB_MARKER_FORCE_OCR=request.app.state.config.DATALAB_MARKER_FORCE_OCR,
+        DATALAB_MARKER_PAGINATE=request.app.state.config.DATALAB_MARKER_PAGINATE,
+        DATALAB_MARKER_STRIP_EXISTING_OCR=request.app.state.config.DATALAB_MARKER_STRIP_EXISTING_OCR,
+        DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION=request.app.state.config.DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION,
+        DATALAB_MARKER_FORMAT_LINES=request.app.state.config.DATALAB_MARKER_FORMAT_LINES,
+        DATALAB_MARKER_USE_LLM=request.app.state.config.DATALAB_MARKER_USE_LLM,
+        DATALAB_MARKER_OUTPUT_FORMAT=request.app.state.config.DATALAB_MARKER_OUTPUT_FORMAT,
+        EXTERNAL_DOCUMENT_LOADER_URL=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_URL,
+        EXTERNAL_DOCUMENT_LOADER_API_KEY=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_API_KEY,
+        TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
+        DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
+        DOCLING_API_KEY=request.app.state.config.DOCLING_API_KEY,
+        DOCLING_PARAMS=request.app.state.config.DOCLING_PARAMS,
+        PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
+        DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
+        DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
+        MISTRAL_OCR_API_BASE_URL=request.app.state.config.MISTRAL_OCR_API_BASE_URL,
+        MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
+        MINERU_API_MODE=request.app.state.config.MINERU_API_MODE,
+        MINERU_API_URL=request.app.state.config.MINERU_API_URL,
+        MINERU_API_KEY=request.app.state.config.MINERU_API_KEY,
+        MINERU_PARAMS=request.app.state.config.MINERU_PARAMS,
+    )
 
 
 class ProcessFileForm(BaseModel):
@@ -1488,32 +1694,7 @@ def process_file(
                 # Check if the file has already been processed and save the content
                 # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
 
-                result = VECTOR_DB_CLIENT.query(
-                    collection_name=f"file-{file.id}", filter={"file_id": file.id}
-                )
-
-                if result is not None and len(result.ids[0]) > 0:
-                    docs = [
-                        Document(
-                            page_content=result.documents[0][idx],
-                            metadata=result.metadatas[0][idx],
-                        )
-                        for idx, id in enumerate(result.ids[0])
-                    ]
-                else:
-                    docs = [
-                        Document(
-                            page_content=file.data.get("content", ""),
-                            metadata={
-                                **file.meta,
-                                "name": file.filename,
-                                "created_by": file.user_id,
-                                "file_id": file.id,
-                                "source": file.filename,
-                            },
-                        )
-                    ]
-
+                docs = get_processed_file_docs(file)
                 text_content = file.data.get("content", "")
             else:
                 # Process the file and save the content
@@ -1521,40 +1702,7 @@ def process_file(
                 file_path = file.path
                 if file_path:
                     file_path = Storage.get_file(file_path)
-                    loader = Loader(
-                        engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
-                        user=user,
-                        DATALAB_MARKER_API_KEY=request.app.state.config.DATALAB_MARKER_API_KEY,
-                        DATALAB_MARKER_API_BASE_URL=request.app.state.config.DATALAB_MARKER_API_BASE_URL,
-                        DATALAB_MARKER_ADDITIONAL_CONFIG=request.app.state.config.DATALAB_MARKER_ADDITIONAL_CONFIG,
-                        DATALAB_MARKER_SKIP_CACHE=request.app.state.config.DATALAB_MARKER_SKIP_CACHE,
-                        DATALAB_MARKER_FORCE_OCR=request.app.state.config.DATALAB_MARKER_FORCE_OCR,
-                        DATALAB_MARKER_PAGINATE=request.app.state.config.DATALAB_MARKER_PAGINATE,
-                        DATALAB_MARKER_STRIP_EXISTING_OCR=request.app.state.config.DATALAB_MARKER_STRIP_EXISTING_OCR,
-                        DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION=request.app.state.config.DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION,
-                        DATALAB_MARKER_FORMAT_LINES=request.app.state.config.DATALAB_MARKER_FORMAT_LINES,
-                        DATALAB_MARKER_USE_LLM=request.app.state.config.DATALAB_MARKER_USE_LLM,
-                        DATALAB_MARKER_OUTPUT_FORMAT=request.app.state.config.DATALAB_MARKER_OUTPUT_FORMAT,
-                        EXTERNAL_DOCUMENT_LOADER_URL=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_URL,
-                        EXTERNAL_DOCUMENT_LOADER_API_KEY=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_API_KEY,
-                        TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
-                        DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
-                        DOCLING_API_KEY=request.app.state.config.DOCLING_API_KEY,
-                        DOCLING_PARAMS=request.app.state.config.DOCLING_PARAMS,
-                        PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
-                        DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
-                        DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
-                        MISTRAL_OCR_API_BASE_URL=request.app.state.config.MISTRAL_OCR_API_BASE_URL,
-                        MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
-                        MINERU_API_MODE=request.app.state.config.MINERU_API_MODE,
-                        MINERU_API_URL=request.app.state.config.MINERU_API_URL,
-                        MINERU_API_KEY=request.app.state.config.MINERU_API_KEY,
-                        MINERU_PARAMS=request.app.state.config.MINERU_PARAMS,
-                    )
-                    docs = loader.load(
-                        file.filename, file.meta.get("content_type"), file_path
-                    )
-
+                    loader = get_loader(request, user)
                     docs = [
                         Document(
                             page_content=doc.page_content,
@@ -1566,7 +1714,9 @@ def process_file(
                                 "source": file.filename,
                             },
                         )
-                        for doc in docs
+                        for doc in loader.lazy_load(
+                            file.filename, file.meta.get("content_type"), file_path
+                        )
                     ]
                 else:
                     docs = [
@@ -1625,7 +1775,15 @@ def process_file(
 
                         Files.update_file_data_by_id(
                             file.id,
-                            {"status": "completed"},
+                            {
+                                "status": "completed",
+                                "index": {
+                                    **(file.data or {}).get("index", {}),
+                                    collection_name: get_index_fingerprint(
+                                        request, hash
+                                    ),
+                                },
+                            },
                         )
 
                         return {
@@ -2040,6 +2198,33 @@ def search_web(
         raise Exception("No search engine API key found in environment variables")
 
 
+async def search_web_with_cache(
+    request: Request, engine: str, query: str, user=None
+) -> list[SearchResult]:
+    """Search the web like `search_web`, reusing the results of recent searches."""
+    if not WEB_SEARCH_CACHE.enabled:
+        return await run_in_threadpool(search_web, request, engine, query, user)
+
+    key = WEB_SEARCH_CACHE.get_key(
+        engine,
+        normalize_query(query),
+        str(request.app.state.config.WEB_SEARCH_RESULT_COUNT),
+        json.dumps(request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST or []),
+        # External search engines may answer differently for each user
+        user.id if engine == "external" and user else "",
+    )
+    entry = await WEB_SEARCH_CACHE.get(key)
+    if entry is not None:
+        return [SearchResult(**item) for item in entry["results"]]
+
+    results = await run_in_threadpool(search_web, request, engine, query, user)
+    if results:
+        await WEB_SEARCH_CACHE.set(
+            key, {"results": [dict(item) for item in results if item]}
+        )
+    return results
+
+
 @router.post("/process/web/search")
 async def process_web_search(
     request: Request, form_data: SearchForm, user=Depends(get_verified_user)
@@ -2054,8 +2239,7 @@ async def process_web_search(
         )
 
         search_tasks = [
-            run_in_threadpool(
-                search_web,
+            search_web_with_cache(
                 request,
                 request.app.state.config.WEB_SEARCH_ENGINE,
                 query,
@@ -2110,13 +2294,22 @@ async def process_web_search(
                 if hasattr(result, "snippet") and result.snippet is not None
             ]
         else:
-            loader = get_web_loader(
+            # Cached pages are not loaded again, but are still subject to the filters
+            urls = await run_in_threadpool(safe_validate_urls, urls)
+            if not urls:
+                raise ValueError(ERROR_MESSAGES.INVALID_URL)
+
+            docs = await aload_web_pages(
                 urls,
-                verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
-                requests_per_second=request.app.state.config.WEB_LOADER_CONCURRENT_REQUESTS,
-                trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
+                lambda urls, validators: get_web_loader(
+                    urls,
+                    verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
+                    requests_per_second=request.app.state.config.WEB_LOADER_CONCURRENT_REQUESTS,
+                    trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
+                    validators=validators,
+                ),
+                request.app.state.config.WEB_LOADER_ENGINE,
             )
-            docs = await loader.aload()
 
         urls = [
             doc.metadata.get("source") for doc in docs if doc.metadata.get("source")
@@ -2182,6 +2375,7 @@ class QueryDocForm(BaseModel):
     k_reranker: Optional[int] = None
     r: Optional[float] = None
     hybrid: Optional[bool] = None
+    hybrid_bm25_weight: Optional[float] = None
 
 
 @router.post("/query/doc")
@@ -2194,13 +2388,14 @@ async def query_doc_handler(
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH and (
             form_data.hybrid is None or form_data.hybrid
         ):
-            collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
+            bm25_index = await asyncio.to_thread(
+                VECTOR_DB_CLIENT.get_bm25_index,
+                form_data.collection_name,
+                request.app.state.config.ENABLE_RAG_HYBRID_SEARCH_ENRICHED_TEXTS,
             )
             return await query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
-                collection_result=collection_results[form_data.collection_name],
+                bm25_index=bm25_index,
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                     query, prefix=prefix, user=user
@@ -2227,7 +2422,6 @@ async def query_doc_handler(
                     if form_data.hybrid_bm25_weight
                     else request.app.state.config.HYBRID_BM25_WEIGHT
                 ),
-                user=user,
             )
         else:
             query_embedding = await request.app.state.EMBEDDING_FUNCTION(
@@ -2415,71 +2609,158 @@ async def process_files_batch(
 ) -> BatchProcessFilesResponse:
     """
     Process a batch of files and save them to the vector database.
+
+    Files go through an ingestion pipeline, loading, splitting, embedding and
+    inserting run concurrently across files and chunks of different files are
+    embedded together. Progress is sent to the user as `events:file` events.
     """
 
     collection_name = form_data.collection_name
-
-    file_results: List[BatchProcessFilesResult] = []
-    file_errors: List[BatchProcessFilesResult] = []
-    file_updates: List[FileUpdateForm] = []
-
-    # Prepare all documents first
-    all_docs: List[Document] = []
-
-    for file in form_data.files:
-        try:
-            text_content = file.data.get("content", "")
-            docs: List[Document] = [
+    embedding_function = get_content_embedding_function(request)
+    inserted_ids: dict[str, list[str]] = {}
+
+    def load(file: FileModel) -> list[Document]:
+        if file.path and not (file.data or {}).get("content"):
+            loader = get_loader(request, user)
+            file_path = Storage.get_file(file.path)
+            return [
                 Document(
-                    page_content=text_content.replace("<br/>", "\n"),
+                    page_content=doc.page_content,
                     metadata={
-                        **file.meta,
+                        **filter_metadata(doc.metadata),
                         "name": file.filename,
                         "created_by": file.user_id,
                         "file_id": file.id,
                         "source": file.filename,
                     },
                 )
+                for doc in loader.lazy_load(
+                    file.filename, file.meta.get("content_type"), file_path
+                )
             ]
 
-            all_docs.extend(docs)
-
-            file_updates.append(
-                FileUpdateForm(
-                    hash=calculate_sha256_string(text_content),
-                    data={"content": text_content},
-                )
-            )
-            file_results.append(
-                BatchProcessFilesResult(file_id=file.id, status="prepared")
+        return [
+            Document(
+                page_content=(file.data or {})
+                .get("content", "")
+                .replace("<br/>", "\n"),
+                metadata={
+                    **file.meta,
+                    "name": file.filename,
+                    "created_by": file.user_id,
+                    "file_id": file.id,
+                    "source": file.filename,
+                },
             )
+        ]
 
-        except Exception as e:
-            log.error(f"process_files_batch: Error processing file {file.id}: {str(e)}")
-            file_errors.append(
-                BatchProcessFilesResult(file_id=file.id, status="failed", error=str(e))
-            )
+    def split(file: FileModel, docs: list[Document]) -> list[Document]:
+        hash = calculate_sha256_string(" ".join(doc.page_content for doc in docs))
 
-    # Save all documents in one batch
-    if all_docs:
-        try:
+        result = VECTOR_DB_CLIENT.query(
+            collection_name=collection_name, filter={"hash": hash}
+        )
+        if result is not None and result.ids[0]:
+            log.info(f"Document with hash {hash} already exists")
+            raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
+
+        chunks = split_docs(request, docs)
+        if len(chunks) == 0:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+        metadatas = get_chunk_metadatas(
+            request, chunks, {"file_id": file.id, "name": file.filename, "hash": hash}
+        )
+        return [
+            Document(page_content=chunk.page_content, metadata=metadata)
+            for chunk, metadata in zip(chunks, metadatas)
+        ]
+
+    async def embed(texts: list[str]) -> list[list[float]]:
+        return await embedding_function(
+            [text.replace("\n", " ") for text in texts],
+            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+            user=user,
+        )
+
+    def insert(items: list[tuple[IngestionJob, Document, list[float]]]):
+        ids = [str(uuid.uuid4()) for _ in items]
+        VECTOR_DB_CLIENT.insert(
+            collection_name=collection_name,
+            items=[
+                {
+                    "id": id,
+                    "text": chunk.page_content,
+                    "vector": vector,
+                    "metadata": chunk.metadata,
+                }
+                for id, (_, chunk, vector) in zip(ids, items)
+            ],
+        )
+        for id, (job, _, _) in zip(ids, items):
+            inserted_ids.setdefault(job.file.id, []).append(id)
+
+    async def on_progress(job: IngestionJob):
+        file = job.file
+        if job.status == "completed":
+            # Files with content keep it as it is, the loaded text is only
+            # stored for files that had none
+            content = (file.data or {}).get("content") or job.content or ""
+            hash = calculate_sha256_string(content)
             await run_in_threadpool(
-                save_docs_to_vector_db, request, all_docs, collection_name, True, user
+                Files.update_file_by_id,
+                file.id,
+                FileUpdateForm(
+                    hash=hash,
+                    data={
+                        "content": content,
+                        "status": "completed",
+                        "index": {
+                            **(file.data or {}).get("index", {}),
+                            collection_name: get_index_fingerprint(request, hash),
+                        },
+                    },
+                ),
+            )
+        elif job.status == "failed" and inserted_ids.get(file.id):
+            # Chunks of the file inserted before it failed
+            await run_in_threadpool(
+                VECTOR_DB_CLIENT.delete,
+                collection_name=collection_name,
+                ids=inserted_ids.pop(file.id),
             )
 
-            # Update all files with collection name
-            for file_update, file_result in zip(file_updates, file_results):
-                Files.update_file_by_id(id=file_result.file_id, form_data=file_update)
-                file_result.status = "completed"
+        await sio.emit(
+            "events:file",
+            {**job.to_dict(), "collection_name": collection_name},
+            room=f"user:{user.id}",
+        )
+
+    pipeline = IngestionPipeline(
+        load,
+        split,
+        embed,
+        insert,
+        on_progress=on_progress,
+        load_concurrency=INGESTION_LOAD_CONCURRENCY,
+        split_concurrency=INGESTION_SPLIT_CONCURRENCY,
+        embedding_batch_size=INGESTION_EMBEDDING_BATCH_SIZE,
+        embedding_concurrency=INGESTION_EMBEDDING_CONCURRENCY,
+    )
+    jobs = await pipeline.run(form_data.files)
 
-        except Exception as e:
+    file_results: List[BatchProcessFilesResult] = []
+    file_errors: List[BatchProcessFilesResult] = []
+    for job in jobs:
+        result = BatchProcessFilesResult(
+            file_id=job.file.id, status=job.status, error=job.error
+        )
+        if job.failed:
             log.error(
-                f"process_files_batch: Error saving documents to vector DB: {str(e)}"
+                f"process_files_batch: Error processing file {job.file.id}: {job.error}"
             )
-            for file_result in file_results:
-                file_result.status = "failed"
-                file_errors.append(
-                    BatchProcessFilesResult(file_id=file_result.file_id, error=str(e))
-                )
+            file_errors.append(result)
+        else:
+            file_results.append(result)
 
     return BatchProcessFilesResponse(results=file_results, errors=file_errors)
@@ -64,7 +64,7 @@ async def get_active_users(
     Get a list of active users.
     """
     return {
-        "user_ids": get_active_user_ids(),
+        "user_ids": await get_active_user_ids(),
     }
 
 
@@ -387,7 +387,7 @@ async def get_user_by_id(user_id: str, user=Depends(get_verified_user)):
             **{
                 "name": user.name,
                 "profile_image_url": user.profile_image_url,
-                "active": get_active_status_by_user_id(user_id),
+                "active": await get_active_status_by_user_id(user_id),
             }
         )
     else:
@@ -454,7 +454,7 @@ async def get_user_profile_image_by_id(user_id: str, user=Depends(get_verified_u
 @router.get("/{user_id}/active", response_model=dict)
 async def get_user_active_status_by_id(user_id: str, user=Depends(get_verified_user)):
     return {
-        "active": get_user_active_status(user_id),
+        "active": await get_user_active_status(user_id),
     }
 
 
@@ -1,4 +1,7 @@
 import asyncio
+import base64
+import hashlib
+import json
 import random
 
 import socketio
@@ -7,11 +10,12 @@ import sys
 import time
 from typing import Dict, Set
 from redis import asyncio as aioredis
-import pycrdt as Y
 
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
+from open_webui.models.groups import Groups
 from open_webui.models.chats import Chats
+from open_webui.models.chat_messages import ChatMessages
 from open_webui.models.notes import Notes, NoteUpdateForm
 from open_webui.utils.redis import (
     get_sentinels_from_env,
@@ -37,9 +41,21 @@ from open_webui.env import (
     WEBSOCKET_SERVER_PING_INTERVAL,
     WEBSOCKET_SERVER_LOGGING,
     WEBSOCKET_SERVER_ENGINEIO_LOGGING,
+    WEBSOCKET_EVENT_BUFFER_FLUSH_INTERVAL,
+    WEBSOCKET_EVENT_BUFFER_MAX_EVENTS,
+    YDOC_COMPACTION_MAX_UPDATES,
+    YDOC_COMPACTION_MAX_BYTES,
+    YDOC_COMPACTION_MAX_AGE,
+    WEBSOCKET_SESSION_POOL_CACHE_TTL,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
+from open_webui.socket.utils import (
+    AsyncDict,
+    AsyncRedisDict,
+    MessageEventBuffer,
+    RedisLock,
+    YdocManager,
+)
 from open_webui.tasks import create_task, stop_item_tasks
 from open_webui.utils.redis import get_redis_connection
 from open_webui.utils.access_control import has_access, get_users_with_access
@@ -118,19 +134,21 @@ if WEBSOCKET_MANAGER == "redis":
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
+    # Sessions are only written on connect, so they can be read from a local cache
+    SESSION_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:session_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+        cache_ttl=WEBSOCKET_SESSION_POOL_CACHE_TTL,
     )
-    USER_POOL = RedisDict(
+    USER_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:user_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
     )
-    USAGE_POOL = RedisDict(
+    USAGE_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:usage_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
@@ -148,16 +166,100 @@ if WEBSOCKET_MANAGER == "redis":
     renew_func = clean_up_lock.renew_lock
     release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+    SESSION_POOL = AsyncDict()
+    USER_POOL = AsyncDict()
+    USAGE_POOL = AsyncDict()
 
     aquire_func = release_func = renew_func = lambda: True
 
 
 YDOC_MANAGER = YdocManager(
-    redis=REDIS,
+    # Yjs updates are stored as raw bytes
+    redis=(
+        get_redis_connection(
+            redis_url=WEBSOCKET_REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
+            ),
+            redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+            async_mode=True,
+            decode_responses=False,
+        )
+        if WEBSOCKET_MANAGER == "redis"
+        else None
+    ),
     redis_key_prefix=f"{REDIS_KEY_PREFIX}:ydoc:documents",
+    compaction_max_updates=YDOC_COMPACTION_MAX_UPDATES,
+    compaction_max_bytes=YDOC_COMPACTION_MAX_BYTES,
+    compaction_max_age=YDOC_COMPACTION_MAX_AGE,
+)
+
+
+# Event types of the event emitter that are persisted to the chat message
+PERSISTED_EVENT_TYPES = ["status", "message", "replace", "embeds", "files"]
+PERSISTED_SOURCE_EVENT_TYPES = ["source", "citation"]
+
+
+async def persist_message_events(
+    chat_id: str, message_id: str, events: list[tuple[int, dict]]
+):
+    """
+    Applies the buffered events of a message in order and writes the result
+    with a single upsert. The sequence number of the last event is written with
+    them, so that events replayed from a journal are not applied twice.
+    """
+    item = await ChatMessages.get_message_model_by_chat_id_and_id_async(
+        chat_id, message_id
+    )
+    if item is not None:
+        message, applied = item.data, item.event_sequence or 0
+    else:
+        # The chat may still store its history as a single document
+        message = await Chats.get_message_by_id_and_message_id_async(
+            chat_id, message_id
+        )
+        applied = 0
+    if not message:
+        return
+
+    fields = {}
+
+    def get_field(key, default):
+        return fields[key] if key in fields else message.get(key, default)
+
+    for sequence, event in events:
+        if sequence <= applied:
+            continue
+        applied = sequence
+
+        event_type = event.get("type")
+        data = event.get("data", {})
+
+        if event_type == "status":
+            fields["statusHistory"] = get_field("statusHistory", []) + [data]
+        elif event_type == "message":
+            fields["content"] = get_field("content", "") + data.get("content", "")
+        elif event_type == "replace":
+            fields["content"] = data.get("content", "")
+        elif event_type == "embeds":
+            fields["embeds"] = data.get("embeds", []) + get_field("embeds", [])
+        elif event_type == "files":
+            fields["files"] = data.get("files", []) + get_field("files", [])
+        elif event_type in PERSISTED_SOURCE_EVENT_TYPES:
+            fields["sources"] = get_field("sources", []) + [data]
+
+    if fields:
+        await Chats.upsert_message_to_chat_by_id_and_message_id_async(
+            chat_id, message_id, fields, event_sequence=applied
+        )
+
+
+MESSAGE_EVENT_BUFFER = MessageEventBuffer(
+    persist=persist_message_events,
+    redis=REDIS,
+    redis_key_prefix=f"{REDIS_KEY_PREFIX}:message_events",
+    flush_interval=WEBSOCKET_EVENT_BUFFER_FLUSH_INTERVAL,
+    max_events=WEBSOCKET_EVENT_BUFFER_MAX_EVENTS,
 )
 
 
@@ -189,8 +291,9 @@ async def periodic_usage_pool_cleanup():
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
             now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
+            updated_models = {}
+            expired_models = []
+            for model_id, connections in await USAGE_POOL.items():
                 # Creating a list of sids to remove if they have timed out
                 expired_sids = [
                     sid
@@ -203,40 +306,68 @@ async def periodic_usage_pool_cleanup():
 
                 if not connections:
                     log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
+                    expired_models.append(model_id)
+                elif expired_sids:
+                    updated_models[model_id] = connections
 
-                send_usage = True
+            await USAGE_POOL.set_many(updated_models)
+            await USAGE_POOL.delete(*expired_models)
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
         release_func()
 
 
+async def periodic_message_event_recovery():
+    # Journals only exist with Redis, where another worker may have left some behind
+    if REDIS is None:
+        return
+
+    while True:
+        try:
+            await MESSAGE_EVENT_BUFFER.recover()
+        except Exception as e:
+            log.error(f"Error recovering message events: {e}")
+        await asyncio.sleep(60)
+
+
+async def flush_message_events(chat_id: str, message_id: str):
+    """
+    Writes the buffered events of a message, must be awaited before writing
+    the message directly so pending events are not applied on top of it.
+    """
+    if chat_id and message_id:
+        await MESSAGE_EVENT_BUFFER.flush(chat_id, message_id)
+
+
 app = socketio.ASGIApp(
     sio,
     socketio_path="/ws/socket.io",
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
+    models_in_use = await USAGE_POOL.keys()
     return models_in_use
 
 
-def get_active_user_ids():
+async def get_active_user_ids():
     """Get the list of active user IDs."""
-    return list(USER_POOL.keys())
+    return await USER_POOL.keys()
 
 
-def get_user_active_status(user_id):
+def get_active_user_count():
+    """Get the number of active users, for callers outside of the event loop."""
+    return USER_POOL.sync_length()
+
+
+async def get_user_active_status(user_id):
     """Check if a user is currently active."""
-    return user_id in USER_POOL
+    return await USER_POOL.contains(user_id)
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
@@ -251,33 +382,63 @@ def get_session_ids_from_room(room):
     return [session_id[0] for session_id in active_session_ids]
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = get_session_ids_from_room(room)
 
     active_user_ids = list(
-        set([SESSION_POOL.get(session_id)["id"] for session_id in active_session_ids])
+        set(
+            [
+                session["id"]
+                for session in await SESSION_POOL.get_many(active_session_ids)
+                if session
+            ]
+        )
     )
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
+async def get_user_group_ids(user_id):
+    return {
+        group.id for group in await Groups.get_groups_by_member_id_cached_async(user_id)
+    }
+
+
+async def get_active_status_by_user_id(user_id):
+    if await USER_POOL.contains(user_id):
         return True
     return False
 
 
+async def get_active_status_by_user_ids(user_ids):
+    sessions = await USER_POOL.get_many(user_ids)
+    return {user_id: bool(sids) for user_id, sids in zip(user_ids, sessions)}
+
+
+async def add_session_to_pools(sid, user):
+    sids = await USER_POOL.get(user.id, [])
+    await asyncio.gather(
+        SESSION_POOL.set(
+            sid, user.model_dump(exclude=["date_of_birth", "bio", "gender"])
+        ),
+        USER_POOL.set(user.id, sids + [sid]),
+    )
+
+
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
+    if await SESSION_POOL.contains(sid):
         model_id = data["model"]
         # Record the timestamp for the last update
         current_time = int(time.time())
 
         # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+        await USAGE_POOL.set(
+            model_id,
+            {
+                **await USAGE_POOL.get(model_id, {}),
+                sid: {"updated_at": current_time},
+            },
+        )
 
 
 @sio.event
@@ -287,16 +448,10 @@ async def connect(sid, environ, auth):
         data = decode_token(auth["token"])
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = await Users.get_user_by_id_async(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump(
-                exclude=["date_of_birth", "bio", "gender"]
-            )
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await add_session_to_pools(sid, user)
 
             await sio.enter_room(sid, f"user:{user.id}")
 
@@ -312,19 +467,15 @@ async def user_join(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = await Users.get_user_by_id_async(data["id"])
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump(exclude=["date_of_birth", "bio", "gender"])
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await add_session_to_pools(sid, user)
 
     await sio.enter_room(sid, f"user:{user.id}")
     # Join all the channels
-    channels = Channels.get_channels_by_user_id(user.id)
+    channels = await Channels.get_channels_by_user_id_async(user.id)
     log.debug(f"{channels=}")
     for channel in channels:
         await sio.enter_room(sid, f"channel:{channel.id}")
@@ -341,12 +492,12 @@ async def join_channel(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = await Users.get_user_by_id_async(data["id"])
     if not user:
         return
 
     # Join all the channels
-    channels = Channels.get_channels_by_user_id(user.id)
+    channels = await Channels.get_channels_by_user_id_async(user.id)
     log.debug(f"{channels=}")
     for channel in channels:
         await sio.enter_room(sid, f"channel:{channel.id}")
@@ -362,11 +513,11 @@ async def join_note(sid, data):
     if token_data is None or "id" not in token_data:
         return
 
-    user = Users.get_user_by_id(token_data["id"])
+    user = await Users.get_user_by_id_async(token_data["id"])
     if not user:
         return
 
-    note = Notes.get_note_by_id(data["note_id"])
+    note = await Notes.get_note_by_id_async(data["note_id"])
     if not note:
         log.error(f"Note {data['note_id']} not found for user {user.id}")
         return
@@ -374,7 +525,12 @@ async def join_note(sid, data):
     if (
         user.role != "admin"
         and user.id != note.user_id
-        and not has_access(user.id, type="read", access_control=note.access_control)
+        and not has_access(
+            user.id,
+            type="read",
+            access_control=note.access_control,
+            user_group_ids=await get_user_group_ids(user.id),
+        )
     ):
         log.error(f"User {user.id} does not have access to note {data['note_id']}")
         return
@@ -405,7 +561,7 @@ async def channel_events(sid, data):
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**await SESSION_POOL.get(sid)).model_dump(),
             },
             room=room,
         )
@@ -414,14 +570,14 @@ async def channel_events(sid, data):
 @sio.on("ydoc:document:join")
 async def ydoc_document_join(sid, data):
     """Handle user joining a document"""
-    user = SESSION_POOL.get(sid)
+    user = await SESSION_POOL.get(sid)
 
     try:
         document_id = data["document_id"]
 
         if document_id.startswith("note:"):
             note_id = document_id.split(":")[1]
-            note = Notes.get_note_by_id(note_id)
+            note = await Notes.get_note_by_id_async(note_id)
             if not note:
                 log.error(f"Note {note_id} not found")
                 return
@@ -430,7 +586,10 @@ async def ydoc_document_join(sid, data):
                 user.get("role") != "admin"
                 and user.get("id") != note.user_id
                 and not has_access(
-                    user.get("id"), type="read", access_control=note.access_control
+                    user.get("id"),
+                    type="read",
+                    access_control=note.access_control,
+                    user_group_ids=await get_user_group_ids(user.get("id")),
                 )
             ):
                 log.error(
@@ -450,14 +609,21 @@ async def ydoc_document_join(sid, data):
 
         active_session_ids = get_session_ids_from_room(f"doc_{document_id}")
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
+        if document_id.startswith("note:") and not await YDOC_MANAGER.document_exists(
+            document_id
+        ):
+            # Resume from the state saved with the note, unless the note content
+            # was changed outside of the collaborative editor since
+            saved = (note.data or {}).get("ydoc")
+            if saved and saved.get("content_hash") == get_note_content_hash(
+                note.data.get("content")
+            ):
+                await YDOC_MANAGER.set_state(
+                    document_id, base64.b64decode(saved["state"])
+                )
 
         # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        state_update = await YDOC_MANAGER.get_state(document_id)
         await sio.emit(
             "ydoc:document:state",
             {
@@ -488,10 +654,16 @@ async def ydoc_document_join(sid, data):
         await sio.emit("error", {"message": "Failed to join document"}, room=sid)
 
 
+def get_note_content_hash(content) -> str:
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
 async def document_save_handler(document_id, data, user):
     if document_id.startswith("note:"):
         note_id = document_id.split(":")[1]
-        note = Notes.get_note_by_id(note_id)
+        note = await Notes.get_note_by_id_async(note_id)
         if not note:
             log.error(f"Note {note_id} not found")
             return
@@ -500,13 +672,31 @@ async def document_save_handler(document_id, data, user):
             user.get("role") != "admin"
             and user.get("id") != note.user_id
             and not has_access(
-                user.get("id"), type="read", access_control=note.access_control
+                user.get("id"),
+                type="read",
+                access_control=note.access_control,
+                user_group_ids=await get_user_group_ids(user.get("id")),
             )
         ):
             log.error(f"User {user.get('id')} does not have access to note {note_id}")
             return
 
-        Notes.update_note_by_id(note_id, NoteUpdateForm(data=data))
+        # Persist the Yjs state snapshot along with the rendered content, so the
+        # document can be resumed once it has been cleared from the manager
+        state = await YDOC_MANAGER.get_state(document_id)
+
+        await Notes.update_note_by_id_async(
+            note_id,
+            NoteUpdateForm(
+                data={
+                    **data,
+                    "ydoc": {
+                        "state": base64.b64encode(state).decode(),
+                        "content_hash": get_note_content_hash(data.get("content")),
+                    },
+                }
+            ),
+        )
 
 
 @sio.on("ydoc:document:state")
@@ -526,14 +716,8 @@ async def yjs_document_state(sid, data):
             log.warning(f"Document {document_id} not found")
             return
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
         # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        state_update = await YDOC_MANAGER.get_state(document_id)
 
         await sio.emit(
             "ydoc:document:state",
@@ -584,7 +768,7 @@ async def yjs_document_update(sid, data):
         async def debounced_save():
             await asyncio.sleep(0.5)
             await document_save_handler(
-                document_id, data.get("data", {}), SESSION_POOL.get(sid)
+                document_id, data.get("data", {}), await SESSION_POOL.get(sid)
             )
 
         if data.get("data"):
@@ -649,15 +833,18 @@ async def yjs_awareness_update(sid, data):
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
+    user = await SESSION_POOL.get(sid)
+    if user:
         user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
+        _, sids = await asyncio.gather(
+            SESSION_POOL.delete(sid), USER_POOL.get(user_id, [])
+        )
+        sids = [_sid for _sid in sids if _sid != sid]
 
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+        if len(sids) == 0:
+            await USER_POOL.delete(user_id)
+        else:
+            await USER_POOL.set(user_id, sids)
 
         await YDOC_MANAGER.remove_user_from_all_documents(sid)
     else:
@@ -685,95 +872,18 @@ def get_event_emitter(request_info, update_db=True):
             and message_id
             and not request_info.get("chat_id", "").startswith("local:")
         ):
+            event_type = event_data.get("type")
 
-            if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    event_data.get("data", {}),
-                )
-
-            if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
-
-            if "type" in event_data and event_data["type"] == "replace":
-                content = event_data.get("data", {}).get("content", "")
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "content": content,
-                    },
-                )
-
-            if "type" in event_data and event_data["type"] == "embeds":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                embeds = event_data.get("data", {}).get("embeds", [])
-                embeds.extend(message.get("embeds", []))
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "embeds": embeds,
-                    },
-                )
-
-            if "type" in event_data and event_data["type"] == "files":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                files = event_data.get("data", {}).get("files", [])
-                files.extend(message.get("files", []))
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "files": files,
-                    },
-                )
-
-            if event_data.get("type") in ["source", "citation"]:
-                data = event_data.get("data", {})
-                if data.get("type") == None:
-                    message = Chats.get_message_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                    )
-
-                    sources = message.get("sources", [])
-                    sources.append(data)
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "sources": sources,
-                        },
-                    )
+            if event_type in PERSISTED_EVENT_TYPES or (
+                event_type in PERSISTED_SOURCE_EVENT_TYPES
+                and event_data.get("data", {}).get("type") is None
+            ):
+                await MESSAGE_EVENT_BUFFER.append(chat_id, message_id, event_data)
+            elif event_type in ["chat:tasks:cancel", "chat:message:error"] or (
+                event_type == "chat:completion"
+                and event_data.get("data", {}).get("done")
+            ):
+                await MESSAGE_EVENT_BUFFER.flush(chat_id, message_id)
 
     if (
         "user_id" in request_info
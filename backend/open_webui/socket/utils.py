@@ -1,10 +1,16 @@
+import asyncio
 import json
+import logging
+import time
 import uuid
+from contextlib import asynccontextmanager
 from open_webui.utils.redis import get_redis_connection
 from open_webui.env import REDIS_KEY_PREFIX
-from typing import Optional, List, Tuple
+from typing import Awaitable, Callable, Optional, List, Tuple
 import pycrdt as Y
 
+log = logging.getLogger(__name__)
+
 
 class RedisLock:
     def __init__(
@@ -108,45 +114,343 @@ class RedisDict:
         return self[key]
 
 
+class AsyncDict:
+    """In-memory counterpart of `AsyncRedisDict` for single worker setups."""
+
+    def __init__(self):
+        self._data = {}
+
+    async def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    async def get_many(self, keys: List[str]) -> list:
+        return [self._data.get(key) for key in keys]
+
+    async def set(self, key, value):
+        self._data[key] = value
+
+    async def set_many(self, mapping: dict):
+        self._data.update(mapping)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def contains(self, key) -> bool:
+        return key in self._data
+
+    async def keys(self) -> list:
+        return list(self._data.keys())
+
+    async def items(self) -> list:
+        return list(self._data.items())
+
+    async def length(self) -> int:
+        return len(self._data)
+
+    def sync_length(self) -> int:
+        return len(self._data)
+
+
+class AsyncRedisDict:
+    """
+    Async dict-like view of a Redis hash. Reads of several keys are batched
+    into a single HMGET and writes of several keys are pipelined. With
+    `cache_ttl`, values read by this worker are kept locally for that many
+    seconds, which suits values that rarely change once written.
+    """
+
+    def __init__(
+        self,
+        name,
+        redis_url,
+        redis_sentinels=[],
+        redis_cluster=False,
+        cache_ttl: float = 0,
+    ):
+        self.name = name
+        self.redis_url = redis_url
+        self.redis_sentinels = redis_sentinels
+        self.redis_cluster = redis_cluster
+        self.redis = get_redis_connection(
+            redis_url,
+            redis_sentinels,
+            redis_cluster=redis_cluster,
+            async_mode=True,
+            decode_responses=True,
+        )
+
+        self.cache_ttl = cache_ttl
+        self._cache = {}
+
+    def _get_cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._cache.pop(key, None)
+            return None
+        return value
+
+    def _set_cached(self, key, value):
+        if self.cache_ttl <= 0:
+            return
+
+        now = time.monotonic()
+        if len(self._cache) >= 1024:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] >= now}
+        self._cache[key] = (now + self.cache_ttl, value)
+
+    async def get(self, key, default=None):
+        value = (await self.get_many([key]))[0]
+        return default if value is None else value
+
+    async def get_many(self, keys: List[str]) -> list:
+        values = [self._get_cached(key) for key in keys]
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if not missing:
+            return values
+
+        fetched = dict(zip(missing, await self.redis.hmget(self.name, missing)))
+        for i, key in enumerate(keys):
+            if values[i] is None and fetched.get(key) is not None:
+                values[i] = json.loads(fetched[key])
+                self._set_cached(key, values[i])
+        return values
+
+    async def set(self, key, value):
+        await self.set_many({key: value})
+
+    async def set_many(self, mapping: dict):
+        if not mapping:
+            return
+        await self.redis.hset(
+            self.name,
+            mapping={key: json.dumps(value) for key, value in mapping.items()},
+        )
+        for key, value in mapping.items():
+            self._set_cached(key, value)
+
+    async def delete(self, *keys):
+        if not keys:
+            return
+        for key in keys:
+            self._cache.pop(key, None)
+        await self.redis.hdel(self.name, *keys)
+
+    async def contains(self, key) -> bool:
+        if self._get_cached(key) is not None:
+            return True
+        return bool(await self.redis.hexists(self.name, key))
+
+    async def keys(self) -> list:
+        return list(await self.redis.hkeys(self.name))
+
+    async def items(self) -> list:
+        return [
+            (key, json.loads(value))
+            for key, value in (await self.redis.hgetall(self.name)).items()
+        ]
+
+    async def length(self) -> int:
+        return await self.redis.hlen(self.name)
+
+    def sync_length(self) -> int:
+        """For callers outside of the event loop, e.g. metric callbacks."""
+        return get_redis_connection(
+            self.redis_url,
+            self.redis_sentinels,
+            redis_cluster=self.redis_cluster,
+            decode_responses=True,
+        ).hlen(self.name)
+
+
+def merge_ydoc_updates(updates: List[bytes]) -> bytes:
+    """Merge a list of Yjs updates into a single state update."""
+    if len(updates) == 1:
+        return updates[0]
+
+    ydoc = Y.Doc()
+    for update in updates:
+        ydoc.apply_update(update)
+    return ydoc.get_update()
+
+
+def decode_ydoc_update(update: bytes) -> bytes:
+    # Updates used to be stored as JSON encoded lists of bytes
+    if update[:1] == b"[":
+        try:
+            return bytes(json.loads(update))
+        except ValueError:
+            pass
+    return update
+
+
 class YdocManager:
+    """
+    Stores the Yjs documents as a state snapshot followed by the log of the
+    updates received since. Once the log grows past `compaction_max_updates`
+    updates or `compaction_max_bytes` bytes, or its oldest update is older than
+    `compaction_max_age` seconds, the log is merged into the snapshot.
+
+    With Redis, the connection must not decode responses as updates are stored
+    as raw bytes.
+    """
+
     def __init__(
         self,
         redis=None,
         redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:ydoc:documents",
+        compaction_max_updates: int = 500,
+        compaction_max_bytes: int = 256 * 1024,
+        compaction_max_age: int = 300,
     ):
         self._updates = {}
+        self._states = {}
+        self._updated_at = {}
         self._users = {}
         self._redis = redis
         self._redis_key_prefix = redis_key_prefix
 
+        self.compaction_max_updates = compaction_max_updates
+        self.compaction_max_bytes = compaction_max_bytes
+        self.compaction_max_age = compaction_max_age
+
+    def _get_redis_key(self, document_id: str, name: str) -> str:
+        return f"{self._redis_key_prefix}:{document_id}:{name}"
+
+    def _should_compact(self, count: int, size: int, updated_at: float) -> bool:
+        if count == 0:
+            return False
+        return (
+            count >= self.compaction_max_updates
+            or size >= self.compaction_max_bytes
+            or time.time() - updated_at >= self.compaction_max_age
+        )
+
     async def append_to_updates(self, document_id: str, update: bytes):
         document_id = document_id.replace(":", "_")
+        update = bytes(update)
+
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.rpush(redis_key, json.dumps(list(update)))
+            log_key = self._get_redis_key(document_id, "log")
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.rpush(self._get_redis_key(document_id, "updates"), update)
+                pipe.hincrby(log_key, "size", len(update))
+                pipe.hsetnx(log_key, "since", time.time())
+                pipe.hget(log_key, "since")
+                count, size, _, since = await pipe.execute()
+            updated_at = float(since)
         else:
             if document_id not in self._updates:
                 self._updates[document_id] = []
+                self._updated_at[document_id] = time.time()
             self._updates[document_id].append(update)
+            count = len(self._updates[document_id])
+            size = sum(len(u) for u in self._updates[document_id])
+            updated_at = self._updated_at[document_id]
+
+        if self._should_compact(count, size, updated_at):
+            await self.compact(document_id)
+
+    async def _get_snapshot(self, document_id: str) -> Tuple[List[bytes], int]:
+        """Returns the state followed by the logged updates, and the log length."""
+        if self._redis:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.get(self._get_redis_key(document_id, "state"))
+                pipe.lrange(self._get_redis_key(document_id, "updates"), 0, -1)
+                state, updates = await pipe.execute()
+            updates = [decode_ydoc_update(update) for update in updates]
+        else:
+            state = self._states.get(document_id)
+            updates = list(self._updates.get(document_id, []))
+
+        return ([state] if state else []) + updates, len(updates)
 
     async def get_updates(self, document_id: str) -> List[bytes]:
         document_id = document_id.replace(":", "_")
+        updates, _ = await self._get_snapshot(document_id)
+        return updates
+
+    async def get_state(self, document_id: str) -> bytes:
+        """Returns the whole document encoded as a single update."""
+        document_id = document_id.replace(":", "_")
+        updates, _ = await self._get_snapshot(document_id)
+        return await asyncio.to_thread(merge_ydoc_updates, updates or [])
+
+    async def set_state(self, document_id: str, state: bytes) -> bool:
+        """Seeds a document that does not exist yet with a saved state."""
+        document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            updates = await self._redis.lrange(redis_key, 0, -1)
-            return [bytes(json.loads(update)) for update in updates]
+            return bool(
+                await self._redis.set(
+                    self._get_redis_key(document_id, "state"), state, nx=True
+                )
+            )
         else:
-            return self._updates.get(document_id, [])
+            if document_id in self._states or document_id in self._updates:
+                return False
+            self._states[document_id] = state
+            return True
+
+    async def compact(self, document_id: str) -> Optional[bytes]:
+        """Merges the update log into the state snapshot and returns the state."""
+        document_id = document_id.replace(":", "_")
+
+        if not self._redis:
+            updates, count = await self._get_snapshot(document_id)
+            if count == 0:
+                return updates[0] if updates else None
+            state = await asyncio.to_thread(merge_ydoc_updates, updates)
+            self._states[document_id] = state
+            self._updates[document_id] = self._updates[document_id][count:]
+            self._updated_at[document_id] = time.time()
+            return state
+
+        # Only one worker compacts a document at a time, the log is trimmed by
+        # the number of merged updates as others may be appended meanwhile
+        lock_key = self._get_redis_key(document_id, "compaction")
+        if not await self._redis.set(lock_key, "1", nx=True, ex=30):
+            return None
+
+        try:
+            updates, count = await self._get_snapshot(document_id)
+            if count == 0:
+                return updates[0] if updates else None
+
+            state = await asyncio.to_thread(merge_ydoc_updates, updates)
+            size = sum(len(update) for update in updates[-count:])
+
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.set(self._get_redis_key(document_id, "state"), state)
+                pipe.ltrim(self._get_redis_key(document_id, "updates"), count, -1)
+                pipe.hincrby(self._get_redis_key(document_id, "log"), "size", -size)
+                pipe.hset(self._get_redis_key(document_id, "log"), "since", time.time())
+                await pipe.execute()
+
+            log.debug(
+                f"Compacted {count} updates of document {document_id} "
+                f"into a {len(state)} bytes state"
+            )
+            return state
+        finally:
+            await self._redis.delete(lock_key)
 
     async def document_exists(self, document_id: str) -> bool:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            return await self._redis.exists(redis_key) > 0
+            return (
+                await self._redis.exists(
+                    self._get_redis_key(document_id, "updates"),
+                    self._get_redis_key(document_id, "state"),
+                )
+                > 0
+            )
         else:
-            return document_id in self._updates
+            return document_id in self._updates or document_id in self._states
 
     async def get_users(self, document_id: str) -> List[str]:
         document_id = document_id.replace(":", "_")
@@ -154,7 +458,9 @@ class YdocManager:
         if self._redis:
             redis_key = f"{self._redis_key_prefix}:{document_id}:users"
             users = await self._redis.smembers(redis_key)
-            return list(users)
+            return [
+                user.decode() if isinstance(user, bytes) else user for user in users
+            ]
         else:
             return self._users.get(document_id, [])
 
@@ -183,6 +489,7 @@ class YdocManager:
         if self._redis:
             keys = await self._redis.keys(f"{self._redis_key_prefix}:*")
             for key in keys:
+                key = key.decode() if isinstance(key, bytes) else key
                 if key.endswith(":users"):
                     await self._redis.srem(key, user_id)
 
@@ -203,12 +510,274 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.delete(redis_key)
-            redis_users_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.delete(redis_users_key)
+            await self._redis.delete(
+                *[
+                    self._get_redis_key(document_id, name)
+                    for name in ["updates", "state", "log", "users"]
+                ]
+            )
         else:
-            if document_id in self._updates:
-                del self._updates[document_id]
+            self._updates.pop(document_id, None)
+            self._states.pop(document_id, None)
+            self._updated_at.pop(document_id, None)
             if document_id in self._users:
                 del self._users[document_id]
+
+
+class MessageEventBuffer:
+    """
+    Write-behind buffer for the message events persisted by the event emitter.
+
+    Events are collected per message and handed to `persist` in one call, either
+    after `flush_interval` seconds, once `max_events` events are pending or when
+    the message is completed. Each event gets an increasing sequence number that
+    `persist` stores with the message, so events it already wrote are skipped.
+
+    With Redis, events are journaled as they are appended, in one pipelined
+    write per event loop iteration for all messages, so that another worker can
+    replay them if this one dies or fails to write them. Without Redis, events
+    waiting for a flush are lost if the worker dies.
+    """
+
+    def __init__(
+        self,
+        persist: Callable[[str, str, List[Tuple[int, dict]]], Awaitable[None]],
+        redis=None,
+        redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:message_events",
+        flush_interval: float = 1.0,
+        max_events: int = 50,
+    ):
+        self._persist = persist
+        self._events = {}
+        # Number of leading events of each message that are journaled
+        self._journaled = {}
+        # Journal write in progress for each message, and all of them so that
+        # they are not garbage collected
+        self._journal_writes = {}
+        self._journal_tasks = set()
+        self._journal_scheduled = False
+        self._locks = {}
+        self._timers = {}
+        self._sequence = 0
+        self._redis = redis
+        self._redis_key_prefix = redis_key_prefix
+        self._flush_interval = flush_interval
+        self._max_events = max_events
+
+    def _get_journal_key(self, chat_id: str, message_id: str) -> str:
+        return f"{self._redis_key_prefix}:{chat_id}:{message_id}"
+
+    def _get_pending_key(self) -> str:
+        return f"{self._redis_key_prefix}:pending"
+
+    def _next_sequence(self) -> int:
+        # Based on the clock so that sequences keep increasing across workers and
+        # restarts, in microseconds to stay within the safe integers of JSON
+        self._sequence = max(self._sequence + 1, time.time_ns() // 1000)
+        return self._sequence
+
+    @asynccontextmanager
+    async def _lock(self, key: Tuple[str, str]):
+        # Locks are counted so they can be dropped once no one holds or awaits them
+        lock, holders = self._locks.get(key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[key] = (lock, holders + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, holders = self._locks[key]
+            if holders <= 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, holders - 1)
+
+    async def append(self, chat_id: str, message_id: str, event: dict):
+        key = (chat_id, message_id)
+
+        async with self._lock(key):
+            events = self._events.setdefault(key, [])
+            events.append((self._next_sequence(), event))
+
+            size = len(events)
+            if size == 1 and self._flush_interval > 0:
+                self._timers[key] = asyncio.create_task(
+                    self._flush_later(chat_id, message_id)
+                )
+
+        if self._redis and not self._journal_scheduled:
+            self._journal_scheduled = True
+            task = asyncio.create_task(self._journal_pending())
+            self._journal_tasks.add(task)
+            task.add_done_callback(self._journal_tasks.discard)
+
+        if size >= self._max_events or self._flush_interval <= 0:
+            await self.flush(chat_id, message_id)
+
+    async def _journal_pending(self):
+        # Let the events appended in this loop iteration join the same write
+        await asyncio.sleep(0)
+        self._journal_scheduled = False
+
+        task = asyncio.current_task()
+        batch = {}
+        for key, events in self._events.items():
+            start = self._journaled.get(key, 0)
+            if start < len(events):
+                batch[key] = (events, start, len(events))
+                # Reserved so that the next write does not journal them again
+                self._journaled[key] = len(events)
+                self._journal_writes[key] = task
+        if not batch:
+            return
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for (chat_id, message_id), (events, start, end) in batch.items():
+                    self._add_journal_commands(
+                        pipe, chat_id, message_id, events[start:end]
+                    )
+                await pipe.execute()
+        except Exception as e:
+            log.warning(f"Error journaling message events: {e}")
+            # Flushes wait for this write, so the events are still buffered and
+            # the next flush journals them
+            for key, (events, start, end) in batch.items():
+                if self._events.get(key) is events:
+                    self._journaled[key] = min(self._journaled[key], start)
+        finally:
+            for key in batch:
+                if self._journal_writes.get(key) is task:
+                    del self._journal_writes[key]
+
+    async def _flush_later(self, chat_id: str, message_id: str):
+        await asyncio.sleep(self._flush_interval)
+        await self.flush(chat_id, message_id)
+
+    async def flush(self, chat_id: str, message_id: str):
+        key = (chat_id, message_id)
+
+        async with self._lock(key):
+            timer = self._timers.pop(key, None)
+            if timer and timer is not asyncio.current_task():
+                timer.cancel()
+
+            # Wait for the events being journaled, no new ones are appended
+            # while the lock is held
+            write = self._journal_writes.get(key)
+            if write is not None:
+                await asyncio.wait([write])
+
+            events = self._events.pop(key, [])
+            journaled = self._journaled.pop(key, 0)
+            if not events:
+                return
+
+            if self._redis and journaled < len(events):
+                try:
+                    await self._write_journal(chat_id, message_id, events[journaled:])
+                    journaled = len(events)
+                except Exception as e:
+                    log.warning(
+                        f"Error journaling events of message {message_id} in chat {chat_id}: {e}"
+                    )
+
+            try:
+                await self._persist(chat_id, message_id, events)
+            except Exception as e:
+                log.exception(
+                    f"Error persisting events of message {message_id} in chat {chat_id}: {e}"
+                )
+                # Kept ahead of newer events and retried with the next flush
+                self._events[key] = events
+                self._journaled[key] = journaled
+                if self._flush_interval > 0:
+                    self._timers[key] = asyncio.create_task(
+                        self._flush_later(chat_id, message_id)
+                    )
+            else:
+                if self._redis:
+                    await self._clear_journal(chat_id, message_id)
+
+    def _add_journal_commands(
+        self, pipe, chat_id: str, message_id: str, events: List[Tuple[int, dict]]
+    ):
+        pipe.rpush(
+            self._get_journal_key(chat_id, message_id),
+            *[json.dumps([sequence, event]) for sequence, event in events],
+        )
+        pipe.hset(
+            self._get_pending_key(),
+            json.dumps([chat_id, message_id]),
+            int(time.time()),
+        )
+
+    async def _write_journal(
+        self, chat_id: str, message_id: str, events: List[Tuple[int, dict]]
+    ):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            self._add_journal_commands(pipe, chat_id, message_id, events)
+            await pipe.execute()
+
+    async def _clear_journal(self, chat_id: str, message_id: str):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(self._get_journal_key(chat_id, message_id))
+            pipe.hdel(self._get_pending_key(), json.dumps([chat_id, message_id]))
+            await pipe.execute()
+
+    async def flush_all(self):
+        for chat_id, message_id in list(self._events.keys()):
+            await self.flush(chat_id, message_id)
+
+    async def recover(self, max_age: int = 60):
+        """
+        Replay the journals of messages that have not been written for
+        `max_age` seconds, i.e. that were left behind by a worker that stopped.
+        Events the worker already wrote are skipped by their sequence number.
+        """
+        if not self._redis:
+            return
+
+        now = int(time.time())
+        pending = await self._redis.hgetall(self._get_pending_key())
+
+        for field, updated_at in pending.items():
+            if now - int(updated_at) < max_age:
+                continue
+
+            chat_id, message_id = json.loads(field)
+            if (chat_id, message_id) in self._events:
+                continue
+
+            # Only the worker that removes the entry replays the journal
+            if not await self._redis.hdel(self._get_pending_key(), field):
+                continue
+
+            journal_key = self._get_journal_key(chat_id, message_id)
+            # Events journaled again after a failed write are applied once, in
+            # the order they were appended
+            events = sorted(
+                {
+                    sequence: event
+                    for sequence, event in map(
+                        json.loads, await self._redis.lrange(journal_key, 0, -1)
+                    )
+                }.items()
+            )
+
+            if events:
+                log.info(
+                    f"Replaying {len(events)} events of message {message_id} in chat {chat_id}"
+                )
+                try:
+                    await self._persist(chat_id, message_id, events)
+                except Exception as e:
+                    log.exception(
+                        f"Error replaying events of message {message_id} in chat {chat_id}: {e}"
+                    )
+                    await self._redis.hset(
+                        self._get_pending_key(), field, int(time.time())
+                    )
+                    continue
+
+            await self._redis.delete(journal_key)
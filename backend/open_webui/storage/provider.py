@@ -3,8 +3,9 @@ import shutil
 import json
 import logging
 import re
+import uuid
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple, Dict
+from typing import BinaryIO, Callable, Optional, Tuple, Dict
 
 import boto3
 from botocore.config import Config
@@ -25,6 +26,7 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_LOCAL_CACHE_MAX_SIZE,
     UPLOAD_DIR,
 )
 from google.cloud import storage
@@ -39,6 +41,84 @@ from open_webui.env import SRC_LOG_LEVELS
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+CHUNK_SIZE = 1024 * 1024
+
+
+def read_local_range(file_path: str, start: int, end: Optional[int] = None) -> bytes:
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return f.read(-1 if end is None else max(end - start, 0))
+
+
+class LocalFileCache:
+    """
+    Local copies of the files of a remote storage provider, read through on
+    `get`. Once the copies take more than `max_size` MB, the least recently used
+    ones are removed until they take 90% of it. Recency is the modification
+    time of the copy, so it is shared by the workers using the same directory.
+    """
+
+    def __init__(self, max_size: int = 0):
+        self.max_size = max_size * 1024 * 1024
+        self._sizes: dict[str, int] = {}
+
+    def get(self, file_path: str, download: Callable[[str], None]) -> str:
+        """Returns `file_path`, downloading it with `download` if it is missing."""
+        if os.path.isfile(file_path):
+            try:
+                os.utime(file_path)
+            except OSError:
+                pass
+            return file_path
+
+        part_path = f"{file_path}.{uuid.uuid4().hex}.part"
+        try:
+            download(part_path)
+            # Readers never see a partially downloaded file
+            os.replace(part_path, file_path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+        self.add(file_path)
+        return file_path
+
+    def add(self, file_path: str):
+        if not self.max_size:
+            return
+
+        directory = os.path.dirname(file_path)
+        if directory not in self._sizes:
+            self._sizes[directory] = self._get_entries(directory)[1]
+        else:
+            self._sizes[directory] += os.path.getsize(file_path)
+
+        if self._sizes[directory] > self.max_size:
+            self.evict(directory, keep=file_path)
+
+    def _get_entries(self, directory: str) -> tuple[list, int]:
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def evict(self, directory: str, keep: Optional[str] = None):
+        # Other workers add copies too, so the size is only known after a scan
+        entries, size = self._get_entries(directory)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size * 0.9:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                size -= entry_size
+            except OSError as e:
+                log.warning(f"Could not remove cached file {path}: {e}")
+        self._sizes[directory] = size
+
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -59,6 +139,22 @@ class StorageProvider(ABC):
     def delete_file(self, file_path: str) -> None:
         pass
 
+    def upload_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[int, str]:
+        """Uploads the file without reading it into memory, returns its size."""
+        contents, file_path = self.upload_file(file, filename, tags)
+        return len(contents), file_path
+
+    def get_file_size(self, file_path: str) -> int:
+        return os.path.getsize(self.get_file(file_path))
+
+    def read_range(
+        self, file_path: str, start: int, end: Optional[int] = None
+    ) -> bytes:
+        """Reads the bytes from `start` up to `end` (exclusive) of the file."""
+        return read_local_range(self.get_file(file_path), start, end)
+
 
 class LocalStorageProvider(StorageProvider):
     @staticmethod
@@ -73,11 +169,35 @@ class LocalStorageProvider(StorageProvider):
             f.write(contents)
         return contents, file_path
 
+    @staticmethod
+    def upload_stream(
+        file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[int, str]:
+        file_path = f"{UPLOAD_DIR}/{filename}"
+        size = 0
+        with open(file_path, "wb") as f:
+            while chunk := file.read(CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+
+        if not size:
+            os.remove(file_path)
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        return size, file_path
+
     @staticmethod
     def get_file(file_path: str) -> str:
         """Handles downloading of the file from local storage."""
         return file_path
 
+    @staticmethod
+    def get_file_size(file_path: str) -> int:
+        return os.path.getsize(file_path)
+
+    @staticmethod
+    def read_range(file_path: str, start: int, end: Optional[int] = None) -> bytes:
+        return read_local_range(file_path, start, end)
+
     @staticmethod
     def delete_file(file_path: str) -> None:
         """Handles deletion of the file from local storage."""
@@ -139,6 +259,7 @@ class S3StorageProvider(StorageProvider):
 
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
+        self.cache = LocalFileCache(STORAGE_LOCAL_CACHE_MAX_SIZE)
 
     @staticmethod
     def sanitize_tag_value(s: str) -> str:
@@ -150,6 +271,18 @@ class S3StorageProvider(StorageProvider):
     ) -> Tuple[bytes, str]:
         """Handles uploading of the file to S3 storage."""
         _, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        s3_file_path = self._upload_local_file(file_path, filename, tags)
+        return open(file_path, "rb").read(), s3_file_path
+
+    def upload_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[int, str]:
+        size, file_path = LocalStorageProvider.upload_stream(file, filename, tags)
+        return size, self._upload_local_file(file_path, filename, tags)
+
+    def _upload_local_file(
+        self, file_path: str, filename: str, tags: Dict[str, str]
+    ) -> str:
         s3_key = os.path.join(self.key_prefix, filename)
         try:
             self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
@@ -168,10 +301,8 @@ class S3StorageProvider(StorageProvider):
                     Key=s3_key,
                     Tagging=tagging,
                 )
-            return (
-                open(file_path, "rb").read(),
-                f"s3://{self.bucket_name}/{s3_key}",
-            )
+            self.cache.add(file_path)
+            return f"s3://{self.bucket_name}/{s3_key}"
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
@@ -179,12 +310,46 @@ class S3StorageProvider(StorageProvider):
         """Handles downloading of the file from S3 storage."""
         try:
             s3_key = self._extract_s3_key(file_path)
-            local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            return self.cache.get(
+                self._get_local_file_path(s3_key),
+                lambda path: self.s3_client.download_file(
+                    self.bucket_name, s3_key, path
+                ),
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
+    def get_file_size(self, file_path: str) -> int:
+        s3_key = self._extract_s3_key(file_path)
+        local_file_path = self._get_local_file_path(s3_key)
+        if os.path.isfile(local_file_path):
+            return os.path.getsize(local_file_path)
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            return response["ContentLength"]
+        except ClientError as e:
+            raise RuntimeError(f"Error reading file from S3: {e}")
+
+    def read_range(
+        self, file_path: str, start: int, end: Optional[int] = None
+    ) -> bytes:
+        """Reads from the local copy if there is one, else only the range."""
+        s3_key = self._extract_s3_key(file_path)
+        local_file_path = self._get_local_file_path(s3_key)
+        if os.path.isfile(local_file_path):
+            return read_local_range(local_file_path, start, end)
+        if end is not None and end <= start:
+            return b""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Range=f"bytes={start}-{'' if end is None else end - 1}",
+            )
+            return response["Body"].read()
+        except ClientError as e:
+            raise RuntimeError(f"Error reading file from S3: {e}")
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from S3 storage."""
         try:
@@ -237,16 +402,27 @@ class GCSStorageProvider(StorageProvider):
             # if running on a Compute Engine instance, credentials would be from Google Metadata server
             self.gcs_client = storage.Client()
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
+        self.cache = LocalFileCache(STORAGE_LOCAL_CACHE_MAX_SIZE)
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
     ) -> Tuple[bytes, str]:
         """Handles uploading of the file to GCS storage."""
         contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        return contents, self._upload_local_file(file_path, filename)
+
+    def upload_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[int, str]:
+        size, file_path = LocalStorageProvider.upload_stream(file, filename, tags)
+        return size, self._upload_local_file(file_path, filename)
+
+    def _upload_local_file(self, file_path: str, filename: str) -> str:
         try:
             blob = self.bucket.blob(filename)
             blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            self.cache.add(file_path)
+            return "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
@@ -254,14 +430,40 @@ class GCSStorageProvider(StorageProvider):
         """Handles downloading of the file from GCS storage."""
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
-            blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
-
-            return local_file_path
+            return self.cache.get(
+                f"{UPLOAD_DIR}/{filename}",
+                lambda path: self.bucket.get_blob(filename).download_to_filename(path),
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def get_file_size(self, file_path: str) -> int:
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        local_file_path = f"{UPLOAD_DIR}/{filename}"
+        if os.path.isfile(local_file_path):
+            return os.path.getsize(local_file_path)
+        blob = self.bucket.get_blob(filename)
+        if blob is None:
+            raise RuntimeError(f"Error reading file from GCS: {filename} not found")
+        return blob.size
+
+    def read_range(
+        self, file_path: str, start: int, end: Optional[int] = None
+    ) -> bytes:
+        """Reads from the local copy if there is one, else only the range."""
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        local_file_path = f"{UPLOAD_DIR}/{filename}"
+        if os.path.isfile(local_file_path):
+            return read_local_range(local_file_path, start, end)
+        if end is not None and end <= start:
+            return b""
+        try:
+            return self.bucket.blob(filename).download_as_bytes(
+                start=start, end=None if end is None else end - 1
+            )
+        except NotFound as e:
+            raise RuntimeError(f"Error reading file from GCS: {e}")
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
         try:
@@ -309,6 +511,7 @@ class AzureStorageProvider(StorageProvider):
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
+        self.cache = LocalFileCache(STORAGE_LOCAL_CACHE_MAX_SIZE)
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
@@ -318,22 +521,67 @@ class AzureStorageProvider(StorageProvider):
         try:
             blob_client = self.container_client.get_blob_client(filename)
             blob_client.upload_blob(contents, overwrite=True)
+            self.cache.add(file_path)
             return contents, f"{self.endpoint}/{self.container_name}/{filename}"
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
+    def upload_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[int, str]:
+        size, file_path = LocalStorageProvider.upload_stream(file, filename, tags)
+        try:
+            blob_client = self.container_client.get_blob_client(filename)
+            with open(file_path, "rb") as f:
+                blob_client.upload_blob(f, length=size, overwrite=True)
+            self.cache.add(file_path)
+            return size, f"{self.endpoint}/{self.container_name}/{filename}"
+        except Exception as e:
+            raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
+
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from Azure Blob Storage."""
         try:
             filename = file_path.split("/")[-1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+
+            def download(path: str):
+                with open(path, "wb") as download_file:
+                    blob_client.download_blob().readinto(download_file)
+
+            return self.cache.get(f"{UPLOAD_DIR}/{filename}", download)
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
+    def get_file_size(self, file_path: str) -> int:
+        filename = file_path.split("/")[-1]
+        local_file_path = f"{UPLOAD_DIR}/{filename}"
+        if os.path.isfile(local_file_path):
+            return os.path.getsize(local_file_path)
+        try:
+            blob_client = self.container_client.get_blob_client(filename)
+            return blob_client.get_blob_properties().size
+        except ResourceNotFoundError as e:
+            raise RuntimeError(f"Error reading file from Azure Blob Storage: {e}")
+
+    def read_range(
+        self, file_path: str, start: int, end: Optional[int] = None
+    ) -> bytes:
+        """Reads from the local copy if there is one, else only the range."""
+        filename = file_path.split("/")[-1]
+        local_file_path = f"{UPLOAD_DIR}/{filename}"
+        if os.path.isfile(local_file_path):
+            return read_local_range(local_file_path, start, end)
+        if end is not None and end <= start:
+            return b""
+        try:
+            blob_client = self.container_client.get_blob_client(filename)
+            return blob_client.download_blob(
+                offset=start, length=None if end is None else end - start
+            ).readall()
+        except ResourceNotFoundError as e:
+            raise RuntimeError(f"Error reading file from Azure Blob Storage: {e}")
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from Azure Blob Storage."""
         try:
@@ -0,0 +1,145 @@
+import os
+import threading
+
+from open_webui.retrieval.vector.bm25 import BM25Index, BM25IndexStore
+from open_webui.retrieval.vector.main import GetResult
+
+
+COLLECTION = "collection"
+
+
+def build():
+    return GetResult(
+        ids=[["1", "2"]],
+        documents=[["the quick brown fox", "a lazy dog sleeps"]],
+        metadatas=[[{"file_id": "a", "doc": "1"}, {"file_id": "b", "doc": "2"}]],
+    )
+
+
+def search_ids(index: BM25Index, query: str) -> list[str]:
+    return [metadata["doc"] for _, metadata, _ in index.search(query, 10)]
+
+
+def get_store(tmp_path, **kwargs) -> BM25IndexStore:
+    return BM25IndexStore(str(tmp_path / "bm25"), **kwargs)
+
+
+def make_item(doc_id: str, text: str, file_id: str) -> dict:
+    return {"id": doc_id, "text": text, "metadata": {"file_id": file_id, "doc": doc_id}}
+
+
+class TestBM25Index:
+    def test_search(self):
+        index = BM25Index()
+        index.add("1", "the quick brown fox", {"doc": "1"})
+        index.add("2", "a lazy dog sleeps", {"doc": "2"})
+        assert search_ids(index, "fox") == ["1"]
+        assert search_ids(index, "cat") == []
+
+    def test_remove(self):
+        index = BM25Index()
+        index.add("1", "the quick brown fox", {"doc": "1"})
+        index.add("2", "a brown dog", {"doc": "2", "file_id": "b"})
+        assert index.remove("1")
+        assert not index.remove("1")
+        assert search_ids(index, "brown") == ["2"]
+        assert index.remove_by_filter({"file_id": "b"}) == ["2"]
+        assert len(index) == 0
+        assert index.postings == {}
+
+
+class TestBM25IndexStore:
+    def test_get_builds_once(self, tmp_path):
+        store = get_store(tmp_path)
+        calls = []
+
+        def counting_build():
+            calls.append(1)
+            return build()
+
+        assert len(store.get(COLLECTION, False, counting_build)) == 2
+        assert len(get_store(tmp_path).get(COLLECTION, False, counting_build)) == 2
+        assert len(calls) == 1
+
+    def test_missing_index_is_not_maintained(self, tmp_path):
+        store = get_store(tmp_path)
+        store.add(COLLECTION, [make_item("3", "a red fox", "c")])
+        assert os.listdir(store.directory) == [f"{store._get_name(COLLECTION)}.lock"]
+
+    def test_insert_delete_reload(self, tmp_path):
+        store = get_store(tmp_path)
+        store.get(COLLECTION, False, build)
+
+        store.add(COLLECTION, [make_item("3", "a red fox", "c")])
+        store.add(COLLECTION, [make_item("4", "a grey fox", "d")])
+        store.remove(COLLECTION, ids=["3"])
+        store.remove(COLLECTION, filter={"file_id": "d"})
+        store.add(COLLECTION, [make_item("5", "a fox in the snow", "e")])
+
+        index = get_store(tmp_path).get(COLLECTION, False, build)
+        assert len(index) == 3
+        assert set(search_ids(index, "fox")) == {"1", "5"}
+        assert "3" not in index.documents and "4" not in index.documents
+
+    def test_inserts_only_append(self, tmp_path):
+        store = get_store(tmp_path)
+        store.get(COLLECTION, False, build)
+        path = store._get_path(COLLECTION, False)
+        snapshot = os.stat(path)
+
+        store.add(COLLECTION, [make_item("3", "a red fox", "c")])
+        assert os.stat(path).st_mtime_ns == snapshot.st_mtime_ns
+
+    def test_workers_see_each_others_writes(self, tmp_path):
+        first = get_store(tmp_path)
+        second = get_store(tmp_path)
+        first.get(COLLECTION, False, build)
+        second.get(COLLECTION, False, build)
+
+        first.add(COLLECTION, [make_item("3", "a red fox", "c")])
+        second.add(COLLECTION, [make_item("4", "a grey fox", "d")])
+
+        for store in (first, second, get_store(tmp_path)):
+            index = store.get(COLLECTION, False, build)
+            assert {"3", "4"} <= set(index.documents)
+
+    def test_compaction(self, tmp_path):
+        store = get_store(tmp_path, min_compaction_size=0)
+        store.get(COLLECTION, False, build)
+        for i in range(3, 10):
+            store.add(COLLECTION, [make_item(str(i), f"fox number {i}", "c")])
+
+        logs = [f for f in os.listdir(store.directory) if f.endswith(".log")]
+        assert len(logs) <= 1
+
+        index = get_store(tmp_path).get(COLLECTION, False, build)
+        assert len(index) == 9
+
+    def test_drop(self, tmp_path):
+        store = get_store(tmp_path)
+        store.get(COLLECTION, False, build)
+        store.add(COLLECTION, [make_item("3", "a red fox", "c")])
+        store.drop(COLLECTION)
+        assert get_store(tmp_path).get(COLLECTION, False, lambda: None) is None
+
+    def test_building_an_index_does_not_block_other_collections(self, tmp_path):
+        store = get_store(tmp_path)
+        store.get(COLLECTION, False, build)
+
+        building = threading.Event()
+        release = threading.Event()
+
+        def slow_build():
+            building.set()
+            release.wait(5)
+            return build()
+
+        thread = threading.Thread(target=store.get, args=("other", False, slow_build))
+        thread.start()
+        try:
+            assert building.wait(5)
+            assert len(store.get(COLLECTION, False, build)) == 2
+            assert not release.is_set()
+        finally:
+            release.set()
+            thread.join()
@@ -0,0 +1,131 @@
+import time
+
+import pytest
+
+from open_webui.retrieval.embedding_cache import (
+    DiskEmbeddingStore,
+    EmbeddingCache,
+    encode_embedding,
+    with_embedding_cache,
+)
+
+
+# Two float32 values per embedding, 8 bytes each
+ENTRY_SIZE = 8
+
+
+def get_embedding(text: str) -> list[float]:
+    return [float(len(text)), 0.5]
+
+
+class FakeEmbeddingFunction:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, query, prefix=None, user=None):
+        self.calls.append(query)
+        if isinstance(query, list):
+            return [get_embedding(text) for text in query]
+        return get_embedding(query)
+
+
+class TestEmbeddingCache:
+    def test_key(self):
+        cache = EmbeddingCache(max_size=1024)
+        key = cache.get_key("openai", "model", "https://a/v1", None, "text")
+
+        assert key == cache.get_key("openai", "model", "https://a/v1/", None, "text")
+        assert key != cache.get_key("openai", "model", "https://b/v1", None, "text")
+        assert key != cache.get_key("openai", "model", "https://a/v1", "q: ", "text")
+        assert key != cache.get_key("openai", "other", "https://a/v1", None, "text")
+
+    @pytest.mark.asyncio
+    async def test_get_many(self):
+        cache = EmbeddingCache(max_size=1024)
+        await cache.set_many({"a": [1.0, 2.0]})
+
+        assert await cache.get_many(["a", "b"]) == [[1.0, 2.0], None]
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_is_bounded_by_bytes(self):
+        cache = EmbeddingCache(max_size=2 * ENTRY_SIZE)
+        await cache.set_many({"a": [1.0, 1.0], "b": [2.0, 2.0]})
+
+        # Reading "a" makes "b" the least recently used entry
+        await cache.get_many(["a"])
+        await cache.set_many({"c": [3.0, 3.0]})
+
+        assert await cache.get_many(["a", "b", "c"]) == [[1.0, 1.0], None, [3.0, 3.0]]
+        assert cache.get_stats()["bytes"] == 2 * ENTRY_SIZE
+
+    @pytest.mark.asyncio
+    async def test_replacing_an_entry_keeps_its_size(self):
+        cache = EmbeddingCache(max_size=2 * ENTRY_SIZE)
+        await cache.set_many({"a": [1.0, 1.0], "b": [2.0, 2.0]})
+        await cache.set_many({"a": [3.0, 3.0]})
+
+        assert await cache.get_many(["a", "b"]) == [[3.0, 3.0], [2.0, 2.0]]
+        assert cache.get_stats()["bytes"] == 2 * ENTRY_SIZE
+
+    @pytest.mark.asyncio
+    async def test_store_fills_the_lru(self, tmp_path):
+        store = DiskEmbeddingStore(str(tmp_path))
+        await EmbeddingCache(max_size=1024, store=store).set_many({"a": [1.0, 2.0]})
+
+        cache = EmbeddingCache(max_size=1024, store=store)
+        assert await cache.get_many(["a"]) == [[1.0, 2.0]]
+        assert cache.get_stats()["size"] == 1
+
+    @pytest.mark.asyncio
+    async def test_only_misses_are_embedded(self):
+        cache = EmbeddingCache(max_size=1024)
+        embedding_function = FakeEmbeddingFunction()
+        cached = with_embedding_cache(
+            embedding_function, "openai", "model", url="https://a/v1", cache=cache
+        )
+
+        assert await cached(["a", "bb"]) == [[1.0, 0.5], [2.0, 0.5]]
+        assert await cached(["bb", "ccc"]) == [[2.0, 0.5], [3.0, 0.5]]
+        assert await cached("a") == [1.0, 0.5]
+        assert embedding_function.calls == [["a", "bb"], ["ccc"]]
+
+        # Another endpoint serves other embeddings
+        other = with_embedding_cache(
+            embedding_function, "openai", "model", url="https://b/v1", cache=cache
+        )
+        await other("a")
+        assert embedding_function.calls[-1] == "a"
+
+
+class TestDiskEmbeddingStore:
+    def test_max_age(self, tmp_path):
+        store = DiskEmbeddingStore(str(tmp_path), max_age=60)
+        store._set_many({"a": encode_embedding([1.0])})
+        store._connection.execute(
+            "UPDATE embedding SET created_at = ?", (int(time.time()) - 120,)
+        )
+        store._set_many({"b": encode_embedding([2.0])})
+
+        assert set(store._get_many(["a", "b"])) == {"b"}
+
+        store._prune()
+        count = store._connection.execute("SELECT COUNT(*) FROM embedding").fetchone()
+        assert count == (1,)
+
+    def test_max_size(self, tmp_path):
+        store = DiskEmbeddingStore(
+            str(tmp_path), max_size=10 * ENTRY_SIZE, prune_interval=5
+        )
+        for i in range(20):
+            store._set_many({str(i): encode_embedding([float(i), 0.0])})
+            store._connection.execute(
+                "UPDATE embedding SET created_at = ? WHERE key = ?", (i, str(i))
+            )
+
+        stored = store._get_many([str(i) for i in range(20)])
+        assert len(stored) <= 10
+        # The oldest entries are dropped first
+        assert "19" in stored
+        assert "0" not in stored
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+import types
+
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.retrieval.ingestion import IngestionPipeline
+
+
+def make_file(id: str, chunks: int = 1):
+    return types.SimpleNamespace(id=id, chunks=chunks)
+
+
+def load(file) -> list[Document]:
+    return [Document(page_content=f"{file.id} content")]
+
+
+def split(file, docs: list[Document]) -> list[Document]:
+    return [Document(page_content=f"{file.id} {i}") for i in range(file.chunks)]
+
+
+class Pipeline:
+    def __init__(self, **kwargs):
+        self.events = []
+        self.embedded = []
+        self.inserted = []
+        self.pipeline = IngestionPipeline(
+            **{
+                "load": load,
+                "split": split,
+                "embed": self.embed,
+                "insert": self.insert,
+                "on_progress": self.on_progress,
+                **kwargs,
+            }
+        )
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        self.embedded.append(texts)
+        return [[float(len(text))] for text in texts]
+
+    def insert(self, items):
+        self.inserted.extend(chunk.page_content for _, chunk, _ in items)
+
+    async def on_progress(self, job):
+        self.events.append(job.to_dict())
+
+    def run(self, files):
+        return asyncio.run(self.pipeline.run(files))
+
+    def get_events(self, file_id: str) -> list[dict]:
+        return [event for event in self.events if event["file_id"] == file_id]
+
+
+class TestIngestionPipeline:
+    def test_progress_events_count_chunks(self):
+        pipeline = Pipeline(embedding_batch_size=2)
+        jobs = pipeline.run([make_file("a", chunks=3), make_file("b", chunks=0)])
+
+        assert [job.status for job in jobs] == ["completed", "completed"]
+        assert [
+            (event["status"], event["total_chunks"], event["inserted_chunks"])
+            for event in pipeline.get_events("a")
+        ] == [
+            ("loading", None, 0),
+            ("splitting", None, 0),
+            ("embedding", 3, 0),
+            ("completed", 3, 3),
+        ]
+        assert pipeline.get_events("b")[-1] == {
+            "file_id": "b",
+            "status": "completed",
+            "error": None,
+            "total_chunks": 0,
+            "inserted_chunks": 0,
+        }
+        assert sorted(pipeline.inserted) == ["a 0", "a 1", "a 2"]
+
+    def test_failed_stages_fail_their_files_only(self):
+        def failing_split(file, docs):
+            if file.id == "b":
+                raise ValueError("split failed")
+            return split(file, docs)
+
+        pipeline = Pipeline(split=failing_split)
+        jobs = pipeline.run([make_file("a"), make_file("b")])
+
+        assert [(job.status, job.error) for job in jobs] == [
+            ("completed", None),
+            ("failed", "split failed"),
+        ]
+        assert pipeline.inserted == ["a 0"]
+
+    def test_failed_embedding_fails_the_files_of_the_batch(self):
+        async def failing_embed(texts):
+            raise ValueError("embedding failed")
+
+        pipeline = Pipeline(embed=failing_embed)
+        jobs = pipeline.run([make_file("a", chunks=2)])
+
+        assert (jobs[0].status, jobs[0].error) == ("failed", "embedding failed")
+        assert pipeline.get_events("a")[-1]["inserted_chunks"] == 0
+        assert pipeline.inserted == []
+
+    def test_partial_batches_are_dispatched(self):
+        embedded = threading.Event()
+
+        def slow_split(file, docs):
+            # The second file is only split once chunks of the first one were
+            # embedded, before the batch of 100 chunks was full
+            if file.id == "b" and not embedded.wait(5):
+                raise TimeoutError("no partial batch")
+            return split(file, docs)
+
+        pipeline = Pipeline(split=slow_split, embedding_batch_size=100)
+        embed = pipeline.embed
+
+        async def signalling_embed(texts):
+            embedded.set()
+            return await embed(texts)
+
+        pipeline.pipeline.embed = signalling_embed
+        jobs = pipeline.run([make_file("a", chunks=3), make_file("b", chunks=2)])
+
+        assert [job.status for job in jobs] == ["completed", "completed"]
+        assert pipeline.embedded[0] == ["a 0", "a 1", "a 2"]
+
+    def test_cancelled_run_does_not_wait_for_its_workers(self):
+        loading = threading.Event()
+        release = threading.Event()
+
+        def slow_load(file):
+            loading.set()
+            release.wait(5)
+            return load(file)
+
+        pipeline = Pipeline(load=slow_load, load_concurrency=1)
+
+        async def run():
+            task = asyncio.create_task(
+                pipeline.pipeline.run([make_file("a"), make_file("b")])
+            )
+            await asyncio.to_thread(loading.wait, 5)
+
+            started_at = time.monotonic()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return time.monotonic() - started_at
+
+        try:
+            assert asyncio.run(run()) < 1
+        finally:
+            release.set()
+        assert pipeline.inserted == []
@@ -0,0 +1,208 @@
+import asyncio
+import types
+
+import pytest
+
+from open_webui.retrieval.vector.main import GetResult
+from open_webui.routers import knowledge
+from open_webui.routers.knowledge import KnowledgeReindexJob, reindex_knowledge_file
+
+
+COLLECTION = "knowledge"
+
+
+class FakeVectorDB:
+    def __init__(self, chunks: dict):
+        # file id -> embedding model of its chunks
+        self.chunks = chunks
+        self.calls = []
+
+    def has_collection(self, collection_name):
+        return bool(self.chunks)
+
+    def delete_collection(self, collection_name):
+        self.calls.append("delete_collection")
+        self.chunks = {}
+
+    def query(self, collection_name, filter, limit=None):
+        model = self.chunks.get(filter["file_id"])
+        if model is None:
+            return None
+        return GetResult(
+            ids=[[filter["file_id"]]],
+            documents=[[""]],
+            metadatas=[
+                [
+                    {
+                        "file_id": filter["file_id"],
+                        "embedding_config": {"engine": "", "model": model},
+                    }
+                ]
+            ],
+        )
+
+    def get(self, collection_name):
+        return GetResult(
+            ids=[list(self.chunks)],
+            documents=[["" for _ in self.chunks]],
+            metadatas=[[{"file_id": file_id} for file_id in self.chunks]],
+        )
+
+    def delete(self, collection_name, filter=None, ids=None):
+        self.calls.append(("delete", filter["file_id"]))
+        self.chunks.pop(filter["file_id"], None)
+
+
+class FakeFiles:
+    def __init__(self, files: list):
+        self.files = {file.id: file for file in files}
+
+    def get_files_by_ids(self, ids):
+        return [self.files[id] for id in ids if id in self.files]
+
+    def update_file_data_by_id(self, id, data):
+        self.files[id].data = {**self.files[id].data, **data}
+
+    def update_file_hash_by_id(self, id, hash):
+        self.files[id].hash = hash
+
+
+def make_file(id: str, fingerprint: str = None):
+    return types.SimpleNamespace(
+        id=id,
+        filename=f"{id}.txt",
+        hash=id,
+        data={"content": id, "index": {COLLECTION: fingerprint}},
+    )
+
+
+def make_request(model: str = "new"):
+    config = types.SimpleNamespace(RAG_EMBEDDING_ENGINE="", RAG_EMBEDDING_MODEL=model)
+    return types.SimpleNamespace(
+        app=types.SimpleNamespace(state=types.SimpleNamespace(config=config))
+    )
+
+
+@pytest.fixture
+def reindex(monkeypatch):
+    calls = []
+
+    def update_file_docs_in_vector_db(request, docs, collection_name, file_id, **kw):
+        calls.append(file_id)
+        knowledge.VECTOR_DB_CLIENT.chunks[file_id] = (
+            request.app.state.config.RAG_EMBEDDING_MODEL
+        )
+
+    monkeypatch.setattr(
+        knowledge,
+        "get_index_fingerprint",
+        lambda request, hash: f"{hash}:{request.app.state.config.RAG_EMBEDDING_MODEL}",
+    )
+    monkeypatch.setattr(knowledge, "get_processed_file_docs", lambda file: [])
+    monkeypatch.setattr(
+        knowledge, "update_file_docs_in_vector_db", update_file_docs_in_vector_db
+    )
+    return calls
+
+
+def setup(monkeypatch, files: list, chunks: dict):
+    vector_db = FakeVectorDB(chunks)
+    monkeypatch.setattr(knowledge, "VECTOR_DB_CLIENT", vector_db)
+    monkeypatch.setattr(knowledge, "Files", FakeFiles(files))
+    return vector_db
+
+
+def make_job(tmp_path, **state) -> KnowledgeReindexJob:
+    job = KnowledgeReindexJob(state_path=str(tmp_path / "state.json"))
+    job.state = {
+        "force": False,
+        "processed": 0,
+        "reindexed": 0,
+        "skipped": 0,
+        "failed": 0,
+        "failed_files": [],
+        "knowledge_id": None,
+        "completed_file_ids": [],
+        **state,
+    }
+    return job
+
+
+def run_job(job, files):
+    knowledge_base = types.SimpleNamespace(
+        id=COLLECTION, data={"file_ids": [file.id for file in files]}
+    )
+    asyncio.run(
+        job.reindex_knowledge_base(
+            make_request(), knowledge_base, None, asyncio.Semaphore(2)
+        )
+    )
+
+
+class TestReindexKnowledgeFile:
+    def test_unchanged_file_is_skipped(self, monkeypatch, reindex):
+        file = make_file("a", fingerprint="a:new")
+        setup(monkeypatch, [file], {"a": "new"})
+
+        assert not reindex_knowledge_file(make_request(), COLLECTION, file, None)
+        assert reindex == []
+
+    def test_file_without_vectors_is_reindexed(self, monkeypatch, reindex):
+        file = make_file("a", fingerprint="a:new")
+        setup(monkeypatch, [file], {})
+
+        assert reindex_knowledge_file(make_request(), COLLECTION, file, None)
+        assert reindex == ["a"]
+
+    def test_changed_fingerprint_is_reindexed(self, monkeypatch, reindex):
+        file = make_file("a", fingerprint="a:old")
+        setup(monkeypatch, [file], {"a": "old"})
+
+        assert reindex_knowledge_file(make_request(), COLLECTION, file, None)
+        assert reindex == ["a"]
+        assert file.data["index"][COLLECTION] == "a:new"
+
+
+class TestKnowledgeReindexJob:
+    def test_unchanged_files_are_skipped(self, monkeypatch, reindex, tmp_path):
+        files = [make_file("a", "a:new"), make_file("b", "b:old")]
+        vector_db = setup(monkeypatch, files, {"a": "new", "b": "new", "c": "new"})
+        job = make_job(tmp_path)
+
+        run_job(job, files)
+        assert reindex == ["b"]
+        assert job.state["processed"] == 2
+        assert (job.state["reindexed"], job.state["skipped"]) == (1, 1)
+        # Vectors of files no longer in the knowledge base are removed
+        assert vector_db.calls == [("delete", "c")]
+
+    def test_resume_skips_completed_files(self, monkeypatch, reindex, tmp_path):
+        files = [make_file("a", "a:old"), make_file("b", "b:old")]
+        vector_db = setup(monkeypatch, files, {"a": "new"})
+        job = make_job(
+            tmp_path,
+            processed=1,
+            reindexed=1,
+            knowledge_id=COLLECTION,
+            completed_file_ids=["a"],
+        )
+
+        run_job(job, files)
+        assert reindex == ["b"]
+        assert job.state["processed"] == 2
+        assert job.state["reindexed"] == 2
+        assert job.state["completed_file_ids"] == ["a", "b"]
+        assert "delete_collection" not in vector_db.calls
+
+    def test_changed_embedding_model_rebuilds_collection(
+        self, monkeypatch, reindex, tmp_path
+    ):
+        # The fingerprint of a matches but its vectors are of another model
+        files = [make_file("a", "a:new"), make_file("b", "b:old")]
+        vector_db = setup(monkeypatch, files, {"a": "old", "b": "old"})
+        job = make_job(tmp_path)
+
+        run_job(job, files)
+        assert vector_db.calls == ["delete_collection"]
+        assert sorted(reindex) == ["a", "b"]
+        assert vector_db.chunks == {"a": "new", "b": "new"}
@@ -0,0 +1,228 @@
+import asyncio
+import json
+
+import pytest
+
+from open_webui.socket.utils import MessageEventBuffer
+
+
+CHAT_ID = "chat"
+MESSAGE_ID = "message"
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        for name, args in self.commands:
+            await getattr(self.redis, name)(*args)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    async def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    async def delete(self, key):
+        self.lists.pop(key, None)
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hdel(self, key, field):
+        return int(self.hashes.get(key, {}).pop(field, None) is not None)
+
+
+class FakeMessageStore:
+    """Applies message events like the event emitter, with their sequence."""
+
+    def __init__(self):
+        self.message = {"content": ""}
+        self.sequence = 0
+        self.fail = False
+        self.calls = 0
+
+    async def persist(self, chat_id, message_id, events):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("database is unavailable")
+
+        for sequence, event in events:
+            if sequence <= self.sequence:
+                continue
+            self.message["content"] += event["data"]["content"]
+            self.sequence = sequence
+
+
+def message_event(content: str) -> dict:
+    return {"type": "message", "data": {"content": content}}
+
+
+def get_buffer(store, redis=None, **kwargs) -> MessageEventBuffer:
+    return MessageEventBuffer(
+        persist=store.persist,
+        redis=redis,
+        redis_key_prefix="test",
+        flush_interval=kwargs.pop("flush_interval", 0),
+        **kwargs,
+    )
+
+
+class TestMessageEventBuffer:
+    @pytest.mark.asyncio
+    async def test_flush_batches_events(self):
+        store = FakeMessageStore()
+        redis = FakeRedis()
+        buffer = get_buffer(store, redis, flush_interval=60, max_events=3)
+
+        for content in ["a", "b", "c"]:
+            await buffer.append(CHAT_ID, MESSAGE_ID, message_event(content))
+
+        assert store.message["content"] == "abc"
+        assert store.calls == 1
+        # One round trip to journal the flush and one to clear it
+        assert redis.round_trips == 2
+        assert redis.lists == {}
+        assert redis.hashes["test:pending"] == {}
+
+    @pytest.mark.asyncio
+    async def test_sequences_increase(self):
+        store = FakeMessageStore()
+        buffer = get_buffer(store)
+
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("a"))
+        first = store.sequence
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("b"))
+
+        assert store.sequence > first
+        assert store.message["content"] == "ab"
+
+    @pytest.mark.asyncio
+    async def test_events_are_journaled_before_the_flush(self):
+        store = FakeMessageStore()
+        redis = FakeRedis()
+        buffer = get_buffer(store, redis, flush_interval=60)
+
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("a"))
+        await buffer.append(CHAT_ID, "other", message_event("b"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        # Both messages are journaled in one round trip, nothing is written yet
+        assert redis.round_trips == 1
+        assert len(redis.hashes["test:pending"]) == 2
+        assert store.calls == 0
+
+        # The worker dies before the flush, another one replays the journal
+        await get_buffer(store, redis).recover(max_age=0)
+        assert store.message["content"] == "ab"
+
+    @pytest.mark.asyncio
+    async def test_replay_applies_journaled_events_once_in_order(self):
+        store = FakeMessageStore()
+        redis = FakeRedis()
+        redis.lists["test:chat:message"] = [
+            json.dumps([2, message_event("b")]),
+            json.dumps([1, message_event("a")]),
+            json.dumps([2, message_event("b")]),
+        ]
+        redis.hashes["test:pending"] = {json.dumps([CHAT_ID, MESSAGE_ID]): 0}
+
+        await get_buffer(store, redis).recover(max_age=0)
+        assert store.message["content"] == "ab"
+
+    @pytest.mark.asyncio
+    async def test_replay_skips_applied_events(self):
+        store = FakeMessageStore()
+        redis = FakeRedis()
+        buffer = get_buffer(store, redis)
+
+        # The worker stops after writing the message but before clearing the journal
+        async def clear_journal(chat_id, message_id):
+            pass
+
+        buffer._clear_journal = clear_journal
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("a"))
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("b"))
+        assert store.message["content"] == "ab"
+
+        await get_buffer(store, redis).recover(max_age=0)
+
+        assert store.message["content"] == "ab"
+        assert redis.lists == {}
+        assert redis.hashes["test:pending"] == {}
+
+    @pytest.mark.asyncio
+    async def test_replay_applies_missing_events(self):
+        store = FakeMessageStore()
+        redis = FakeRedis()
+        buffer = get_buffer(store, redis)
+
+        store.fail = True
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("a"))
+        assert store.message["content"] == ""
+
+        store.fail = False
+        await get_buffer(store, redis).recover(max_age=0)
+
+        assert store.message["content"] == "a"
+        assert redis.lists == {}
+
+    @pytest.mark.asyncio
+    async def test_failed_events_are_retried_in_order(self):
+        store = FakeMessageStore()
+        redis = FakeRedis()
+        buffer = get_buffer(store, redis)
+
+        store.fail = True
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("a"))
+
+        store.fail = False
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("b"))
+
+        assert store.message["content"] == "ab"
+        assert redis.lists == {}
+
+        # The retried events are not journaled twice
+        await get_buffer(store, redis).recover(max_age=0)
+        assert store.message["content"] == "ab"
+
+    @pytest.mark.asyncio
+    async def test_recover_skips_recent_journals(self):
+        store = FakeMessageStore()
+        redis = FakeRedis()
+        buffer = get_buffer(store, redis)
+
+        store.fail = True
+        await buffer.append(CHAT_ID, MESSAGE_ID, message_event("a"))
+
+        store.fail = False
+        await get_buffer(store, redis).recover(max_age=60)
+
+        assert store.message["content"] == ""
+        assert len(redis.hashes["test:pending"]) == 1
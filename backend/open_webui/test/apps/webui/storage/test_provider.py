@@ -80,6 +80,28 @@ class TestLocalStorageProvider:
         file_path_return = self.Storage.get_file(file_path)
         assert file_path == file_path_return
 
+    def test_upload_stream(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        monkeypatch.setattr(provider, "CHUNK_SIZE", 4)
+        size, file_path = self.Storage.upload_stream(
+            io.BytesIO(self.file_content), self.filename, {}
+        )
+        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert size == len(self.file_content)
+        assert file_path == str(upload_dir / self.filename)
+        with pytest.raises(ValueError):
+            self.Storage.upload_stream(io.BytesIO(), self.filename_extra, {})
+        assert not (upload_dir / self.filename_extra).exists()
+
+    def test_read_range(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        (upload_dir / self.filename).write_bytes(self.file_content)
+        file_path = str(upload_dir / self.filename)
+        assert self.Storage.get_file_size(file_path) == len(self.file_content)
+        assert self.Storage.read_range(file_path, 5, 12) == b"content"
+        assert self.Storage.read_range(file_path, 5) == b"content"
+        assert self.Storage.read_range(file_path, 5, 5) == b""
+
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         (upload_dir / self.filename).write_bytes(self.file_content)
@@ -97,6 +119,51 @@ class TestLocalStorageProvider:
         assert not (upload_dir / self.filename_extra).exists()
 
 
+class TestLocalFileCache:
+    file_content = b"0123456789"
+
+    def test_get(self, tmp_path):
+        cache = provider.LocalFileCache()
+        downloads = []
+
+        def download(path):
+            downloads.append(path)
+            with open(path, "wb") as f:
+                f.write(self.file_content)
+
+        file_path = str(tmp_path / "test.txt")
+        assert cache.get(file_path, download) == file_path
+        assert cache.get(file_path, download) == file_path
+        assert len(downloads) == 1
+        assert (tmp_path / "test.txt").read_bytes() == self.file_content
+
+    def test_get_failed_download(self, tmp_path):
+        cache = provider.LocalFileCache()
+
+        def download(path):
+            with open(path, "wb") as f:
+                f.write(self.file_content[:5])
+            raise RuntimeError("Connection reset")
+
+        with pytest.raises(RuntimeError):
+            cache.get(str(tmp_path / "test.txt"), download)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_evict_least_recently_used(self, tmp_path):
+        cache = provider.LocalFileCache()
+        cache.max_size = 25
+
+        for index, name in enumerate(["a", "b", "c"]):
+            (tmp_path / name).write_bytes(self.file_content)
+            os.utime(tmp_path / name, (index, index))
+        # Reading a file makes it the most recently used one
+        cache.get(str(tmp_path / "a"), None)
+
+        (tmp_path / "d").write_bytes(self.file_content)
+        cache.add(str(tmp_path / "d"))
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["a", "d"]
+
+
 @mock_aws
 class TestS3StorageProvider:
 
@@ -0,0 +1,140 @@
+import html
+
+from open_webui.utils.content_stream import (
+    ContentStream,
+    QuotedContent,
+    get_common_prefix_length,
+    get_utf16_length,
+)
+
+
+def to_utf16(text: str) -> bytes:
+    return text.encode("utf-16-le", "surrogatepass")
+
+
+def apply_update(client: bytes, update: dict) -> bytes:
+    """Applies an update to UTF-16 content, the way the client does."""
+    if "content" in update:
+        return to_utf16(update["content"])
+
+    delta = update["content_delta"]
+    assert len(client) // 2 == delta["length"]
+    return client[: delta["offset"] * 2] + to_utf16(delta["content"])
+
+
+def stream(contents: list[str]) -> list[dict]:
+    content_stream = ContentStream(keyframe_interval=3600)
+    client = b""
+    updates = []
+    for content in contents:
+        update = content_stream.get_update(content)
+        if update is None:
+            continue
+        client = apply_update(client, update)
+        assert client == to_utf16(content)
+        updates.append(update)
+    return updates
+
+
+def quote(content: str) -> str:
+    return html.escape(
+        "\n".join(
+            (f"> {line}" if not line.startswith(">") else line)
+            for line in content.splitlines()
+        )
+    )
+
+
+class TestQuotedContent:
+    def test_streamed_content(self):
+        quoted_content = QuotedContent()
+        content = ""
+        for delta in ["Let", " me <think>\n", "\n> a", "nd\r", "\nthen", "\n"]:
+            content += delta
+            assert quoted_content.render(content) == quote(content)
+        assert quoted_content.content == "Let me <think>\n\n> and\r\n"
+
+    def test_edited_content(self):
+        quoted_content = QuotedContent()
+        for content in ["a\nb\nc", "a\nx\nc", "a\r", "a\rb\n", "a\r\nb", ""]:
+            assert quoted_content.render(content) == quote(content)
+
+
+class TestContentStream:
+    def test_utf16_length(self):
+        assert get_utf16_length("abc") == 3
+        assert get_utf16_length("a😀") == 3
+        assert get_utf16_length("é") == 1
+
+    def test_common_prefix_length(self):
+        assert get_common_prefix_length("abc", "abcdef") == 3
+        assert get_common_prefix_length("abcdef", "abc") == 3
+        assert get_common_prefix_length("abxd", "abcd") == 2
+        assert get_common_prefix_length("", "abc") == 0
+        assert get_common_prefix_length("xbc", "abc") == 0
+
+    def test_first_update_is_full(self):
+        assert ContentStream().get_update("Hello") == {"content": "Hello"}
+
+    def test_unchanged_content(self):
+        content_stream = ContentStream()
+        content_stream.get_update("Hello")
+        assert content_stream.get_update("Hello") is None
+
+    def test_appended_content(self):
+        updates = stream(["Hello", "Hello, wor", "Hello, world"])
+        assert updates[1:] == [
+            {"content_delta": {"offset": 5, "length": 5, "content": ", wor"}},
+            {"content_delta": {"offset": 10, "length": 10, "content": "ld"}},
+        ]
+
+    def test_surrogate_pairs(self):
+        updates = stream(["😀", "😀 hi", "😀 hi 👋🏽", "😀 hi 👋🏽!"])
+        assert updates[1]["content_delta"] == {
+            "offset": 2,
+            "length": 2,
+            "content": " hi",
+        }
+        # Offsets and lengths count UTF-16 code units, two per emoji
+        assert updates[3]["content_delta"] == {
+            "offset": 10,
+            "length": 10,
+            "content": "!",
+        }
+
+    def test_prefix_edit(self):
+        updates = stream(["Hello world", "Hallo world!", "Hallo"])
+        assert updates[1]["content_delta"] == {
+            "offset": 1,
+            "length": 11,
+            "content": "allo world!",
+        }
+        assert updates[2]["content_delta"] == {
+            "offset": 5,
+            "length": 12,
+            "content": "",
+        }
+
+    def test_prefix_edit_after_surrogate_pairs(self):
+        updates = stream(["😀😀 abc", "😀😀 xbc", "😀👋 xbc"])
+        assert updates[1]["content_delta"] == {
+            "offset": 5,
+            "length": 8,
+            "content": "xbc",
+        }
+        # The edit starts at the second emoji, not within it
+        assert updates[2]["content_delta"] == {
+            "offset": 2,
+            "length": 8,
+            "content": "👋 xbc",
+        }
+
+    def test_keyframes(self):
+        content_stream = ContentStream(keyframe_interval=0)
+        content_stream.get_update("Hello")
+        assert content_stream.get_update("Hello!") == {"content": "Hello!"}
+
+    def test_full_update(self):
+        content_stream = ContentStream(keyframe_interval=3600)
+        content_stream.get_update("Hello")
+        assert content_stream.get_update("Hello", full=True) == {"content": "Hello"}
@@ -0,0 +1,199 @@
+import asyncio
+import threading
+import types
+
+import pytest
+
+from open_webui.utils import filter as filter_utils
+from open_webui.utils.filter import FilterEngine
+
+
+class FakeFunction:
+    def __init__(self, id: str):
+        self.id = id
+
+
+class FakeFunctions:
+    def __init__(self, valves: dict):
+        self.valves = valves
+
+    def get_global_filter_functions(self):
+        return [FakeFunction(id) for id in self.valves]
+
+    def get_functions_by_type(self, type, active_only=False):
+        return [FakeFunction(id) for id in self.valves]
+
+    def get_function_valves_by_id(self, id):
+        return self.valves[id]
+
+
+class FakeRegistry:
+    generation = 0
+
+    def get_generation(self):
+        return self.generation
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    modules = {}
+    monkeypatch.setattr(
+        filter_utils,
+        "get_function_module",
+        lambda request, id, load_from_db=True: modules[id],
+    )
+    monkeypatch.setattr(filter_utils, "FUNCTION_REGISTRY", FakeRegistry())
+    return modules
+
+
+def add_filter(modules, functions, id, priority=0, **hooks):
+    modules[id] = types.SimpleNamespace(**hooks)
+    functions.valves[id] = {"priority": priority}
+
+
+@pytest.fixture
+def functions(monkeypatch):
+    functions = FakeFunctions({})
+    monkeypatch.setattr(filter_utils, "Functions", functions)
+    return functions
+
+
+async def run(engine, functions, filter_type, form_data):
+    filter_functions = engine.get_filter_functions(None, {"id": "model"})
+    form_data, _ = await engine.run(None, filter_functions, filter_type, form_data, {})
+    return form_data
+
+
+class TestFilterEngine:
+    @pytest.mark.asyncio
+    async def test_priority(self, modules, functions):
+        def append(name):
+            return lambda body: {**body, "order": body["order"] + [name]}
+
+        add_filter(modules, functions, "c", priority=3, inlet=append("c"))
+        add_filter(modules, functions, "a", priority=1, inlet=append("a"))
+        add_filter(modules, functions, "b", priority=2, inlet=append("b"))
+
+        engine = FilterEngine()
+        assert await run(engine, functions, "inlet", {"order": []}) == {
+            "order": ["a", "b", "c"]
+        }
+
+    @pytest.mark.asyncio
+    async def test_filters_are_cached_until_a_function_changes(
+        self, modules, functions
+    ):
+        add_filter(modules, functions, "a", inlet=lambda body: body)
+        engine = FilterEngine()
+        assert [f.id for f in engine.get_filter_functions(None, {"id": "m"})] == ["a"]
+
+        add_filter(modules, functions, "b", inlet=lambda body: body)
+        assert [f.id for f in engine.get_filter_functions(None, {"id": "m"})] == ["a"]
+
+        filter_utils.FUNCTION_REGISTRY.generation += 1
+        assert {f.id for f in engine.get_filter_functions(None, {"id": "m"})} == {
+            "a",
+            "b",
+        }
+
+    @pytest.mark.asyncio
+    async def test_independent_filters_merge_their_changes(self, modules, functions):
+        async def set_a(body):
+            body["a"] = 1
+            body["messages"].append("from a")
+            return body
+
+        async def set_b(body):
+            await asyncio.sleep(0)
+            body["b"] = 2
+            del body["removed"]
+            return body
+
+        add_filter(modules, functions, "a", priority=1, inlet=set_a, independent=True)
+        add_filter(modules, functions, "b", priority=2, inlet=set_b, independent=True)
+
+        form_data = {"messages": [], "removed": True}
+        result = await run(FilterEngine(), functions, "inlet", form_data)
+
+        assert result == {"messages": ["from a"], "a": 1, "b": 2}
+        # Each filter worked on its own copy
+        assert form_data == {"messages": [], "removed": True}
+
+    @pytest.mark.asyncio
+    async def test_independent_filter_conflicts_keep_the_last_change(
+        self, modules, functions
+    ):
+        add_filter(
+            modules,
+            functions,
+            "a",
+            priority=1,
+            inlet=lambda body: {**body, "model": "a"},
+            independent=True,
+        )
+        add_filter(
+            modules,
+            functions,
+            "b",
+            priority=2,
+            inlet=lambda body: {**body, "model": "b"},
+            independent=True,
+        )
+
+        result = await run(FilterEngine(), functions, "inlet", {"model": "x"})
+        assert result == {"model": "b"}
+
+    @pytest.mark.asyncio
+    async def test_coroutine_hooks_time_out(self, modules, functions):
+        async def slow(body):
+            await asyncio.sleep(10)
+            return body
+
+        add_filter(modules, functions, "slow", inlet=slow)
+
+        with pytest.raises(TimeoutError, match="inlet handler slow timed out"):
+            await run(FilterEngine(timeout=0.01), functions, "inlet", {})
+
+    @pytest.mark.asyncio
+    async def test_sync_hooks_time_out_and_release_their_thread(
+        self, modules, functions
+    ):
+        release = threading.Event()
+
+        def slow(body):
+            release.wait(5)
+            return body
+
+        add_filter(modules, functions, "slow", inlet=slow)
+        engine = FilterEngine(max_workers=1, timeout=0.01)
+
+        with pytest.raises(TimeoutError):
+            await run(engine, functions, "inlet", {})
+        assert engine._stalled == 1
+
+        release.set()
+        for _ in range(100):
+            if not engine._stalled:
+                break
+            await asyncio.sleep(0.01)
+        assert engine._stalled == 0
+
+    @pytest.mark.asyncio
+    async def test_sync_stream_hooks_run_inline(self, modules, functions):
+        threads = []
+
+        def stream(event):
+            threads.append(threading.current_thread())
+            return event
+
+        def inlet(body):
+            threads.append(threading.current_thread())
+            return body
+
+        add_filter(modules, functions, "a", stream=stream, inlet=inlet)
+        engine = FilterEngine()
+
+        await run(engine, functions, "stream", {})
+        await run(engine, functions, "inlet", {})
+        assert threads[0] is threading.current_thread()
+        assert threads[1] is not threading.current_thread()
@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import pytest
+
+from open_webui.utils.mcp import pool
+from open_webui.utils.mcp.pool import MCPSessionPool
+
+
+URL = "http://mcp.example/mcp"
+
+
+class FakeSession:
+    """Stands in for MCPSession, records connections instead of opening them."""
+
+    connections = []
+    failing_urls = set()
+
+    def __init__(self, url, headers, semaphore):
+        self.url = url
+        self.headers = headers
+        self.semaphore = semaphore
+        self.used_at = time.monotonic()
+        self.checked_at = time.monotonic()
+        self.active_requests = 0
+        self.connected = False
+        self.healthy = True
+        self.pings = 0
+
+    async def connect(self):
+        FakeSession.connections.append(self)
+        await asyncio.sleep(0)
+        if self.url in FakeSession.failing_urls:
+            raise ConnectionError("connection refused")
+        self.connected = True
+
+    async def ping(self):
+        self.pings += 1
+        if not self.healthy:
+            raise ConnectionError("session is gone")
+        self.checked_at = time.monotonic()
+
+    async def close(self):
+        self.connected = False
+
+
+@pytest.fixture(autouse=True)
+def fake_session(monkeypatch):
+    FakeSession.connections = []
+    FakeSession.failing_urls = set()
+    monkeypatch.setattr(pool, "MCPSession", FakeSession)
+
+
+def expire_backoff(mcp_pool: MCPSessionPool, url: str, headers=None):
+    key = mcp_pool.get_key(url, headers)
+    failures, _ = mcp_pool._failures[key]
+    mcp_pool._failures[key] = (failures, time.monotonic())
+
+
+class TestMCPSessionPool:
+    @pytest.mark.asyncio
+    async def test_sessions_are_reused(self):
+        mcp_pool = MCPSessionPool()
+
+        session = await mcp_pool.get_session(URL, {"Authorization": "Bearer a"})
+        assert await mcp_pool.get_session(URL, {"Authorization": "Bearer a"}) is session
+        assert len(FakeSession.connections) == 1
+
+    @pytest.mark.asyncio
+    async def test_credentials_get_their_own_session(self):
+        mcp_pool = MCPSessionPool()
+
+        session = await mcp_pool.get_session(URL, {"Authorization": "Bearer a"})
+        other = await mcp_pool.get_session(URL, {"Authorization": "Bearer b"})
+        assert other is not session
+        # Sessions with the same server share its concurrency limit
+        assert other.semaphore is session.semaphore
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_connection(self):
+        mcp_pool = MCPSessionPool()
+
+        sessions = await asyncio.gather(*[mcp_pool.get_session(URL) for _ in range(5)])
+        assert len({id(session) for session in sessions}) == 1
+        assert len(FakeSession.connections) == 1
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_sessions_are_replaced(self):
+        mcp_pool = MCPSessionPool(health_check_interval=0)
+
+        session = await mcp_pool.get_session(URL)
+        assert await mcp_pool.get_session(URL) is session
+        assert session.pings == 1
+
+        session.healthy = False
+        other = await mcp_pool.get_session(URL)
+        assert other is not session
+        assert not session.connected
+
+    @pytest.mark.asyncio
+    async def test_idle_sessions_are_closed(self):
+        mcp_pool = MCPSessionPool(idle_timeout=60)
+
+        session = await mcp_pool.get_session(URL)
+        session.used_at -= 120
+        other = await mcp_pool.get_session("http://other.example/mcp")
+
+        assert not session.connected
+        assert other.connected
+        assert await mcp_pool.get_session(URL) is not session
+
+    @pytest.mark.asyncio
+    async def test_busy_sessions_are_not_closed(self):
+        mcp_pool = MCPSessionPool(idle_timeout=60)
+
+        session = await mcp_pool.get_session(URL)
+        session.used_at -= 120
+        session.active_requests = 1
+
+        assert await mcp_pool.get_session(URL) is session
+        assert session.connected
+
+    @pytest.mark.asyncio
+    async def test_failed_connections_back_off(self):
+        mcp_pool = MCPSessionPool(max_backoff=4)
+        FakeSession.failing_urls.add(URL)
+
+        with pytest.raises(ConnectionError):
+            await mcp_pool.get_session(URL)
+
+        # Not retried until the backoff expires
+        with pytest.raises(RuntimeError, match="failed to connect 1 times"):
+            await mcp_pool.get_session(URL)
+        assert len(FakeSession.connections) == 1
+
+        backoffs = []
+        for _ in range(4):
+            expire_backoff(mcp_pool, URL)
+            with pytest.raises(ConnectionError):
+                await mcp_pool.get_session(URL)
+            failures, retry_at = mcp_pool._failures[mcp_pool.get_key(URL)]
+            backoffs.append(round(retry_at - time.monotonic()))
+
+        assert failures == 5
+        assert backoffs == [2, 4, 4, 4]
+
+    @pytest.mark.asyncio
+    async def test_successful_connection_resets_backoff(self):
+        mcp_pool = MCPSessionPool()
+        FakeSession.failing_urls.add(URL)
+
+        with pytest.raises(ConnectionError):
+            await mcp_pool.get_session(URL)
+
+        FakeSession.failing_urls.clear()
+        expire_backoff(mcp_pool, URL)
+        session = await mcp_pool.get_session(URL)
+
+        assert session.connected
+        assert mcp_pool._failures == {}
@@ -1,6 +1,6 @@
 from typing import Optional, Set, Union, List, Dict, Any
 from open_webui.models.users import Users, UserModel
-from open_webui.models.groups import Groups
+from open_webui.models.groups import Groups, GroupModel
 
 
 from open_webui.config import DEFAULT_USER_PERMISSIONS
@@ -28,6 +28,7 @@ def fill_missing_permissions(
 def get_permissions(
     user_id: str,
     default_permissions: Dict[str, Any],
+    user_groups: Optional[List[GroupModel]] = None,
 ) -> Dict[str, Any]:
     """
     Get all permissions for a user by combining the permissions of all groups the user is a member of.
@@ -53,7 +54,8 @@ def get_permissions(
                     )  # Use the most permissive value (True > False)
         return permissions
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    if user_groups is None:
+        user_groups = Groups.get_groups_by_member_id_cached(user_id)
 
     # Deep copy default permissions to avoid modifying the original dict
     permissions = json.loads(json.dumps(default_permissions))
@@ -72,6 +74,7 @@ def has_permission(
     user_id: str,
     permission_key: str,
     default_permissions: Dict[str, Any] = {},
+    user_groups: Optional[List[GroupModel]] = None,
 ) -> bool:
     """
     Check if a user has a specific permission by checking the group permissions
@@ -92,7 +95,8 @@ def has_permission(
     permission_hierarchy = permission_key.split(".")
 
     # Retrieve user group permissions
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    if user_groups is None:
+        user_groups = Groups.get_groups_by_member_id_cached(user_id)
 
     for group in user_groups:
         if get_permission(group.permissions or {}, permission_hierarchy):
@@ -135,7 +139,7 @@ def has_access(
             return True
 
     if user_group_ids is None:
-        user_groups = Groups.get_groups_by_member_id(user_id)
+        user_groups = Groups.get_groups_by_member_id_cached(user_id)
         user_group_ids = {group.id for group in user_groups}
 
     permitted_ids = get_permitted_group_and_user_ids(type, access_control)
@@ -150,6 +154,53 @@ def has_access(
     )
 
 
+class AccessContext:
+    """
+    The groups of a user and the permissions they grant, resolved once so any
+    number of resources can be checked against them without further queries.
+    """
+
+    def __init__(self, user_id: str, groups: List[GroupModel]):
+        self.user_id = user_id
+        self.groups = groups
+        self.group_ids = {group.id for group in groups}
+        self._permissions: Dict[str, Dict[str, Any]] = {}
+
+    def get_permissions(self, default_permissions: Dict[str, Any]) -> Dict[str, Any]:
+        # Merged once per set of defaults, callers must not modify the result
+        key = json.dumps(default_permissions, sort_keys=True)
+        if key not in self._permissions:
+            self._permissions[key] = get_permissions(
+                self.user_id, default_permissions, self.groups
+            )
+        return self._permissions[key]
+
+    def has_permission(
+        self, permission_key: str, default_permissions: Dict[str, Any] = {}
+    ) -> bool:
+        return has_permission(
+            self.user_id, permission_key, default_permissions, self.groups
+        )
+
+    def has_access(
+        self,
+        type: str = "write",
+        access_control: Optional[dict] = None,
+        strict: bool = True,
+    ) -> bool:
+        return has_access(self.user_id, type, access_control, self.group_ids, strict)
+
+
+def get_access_context(user_id: str) -> AccessContext:
+    return AccessContext(user_id, Groups.get_groups_by_member_id_cached(user_id))
+
+
+async def get_access_context_async(user_id: str) -> AccessContext:
+    return AccessContext(
+        user_id, await Groups.get_groups_by_member_id_cached_async(user_id)
+    )
+
+
 # Get all users with access to a resource
 def get_users_with_access(
     type: str = "write", access_control: Optional[dict] = None
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import uuid
 import jwt
@@ -39,6 +40,7 @@ from open_webui.env import (
     STATIC_DIR,
     SRC_LOG_LEVELS,
     WEBUI_AUTH_TRUSTED_EMAIL_HEADER,
+    DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL,
 )
 
 from fastapi import BackgroundTasks, Depends, HTTPException, Request, Response, status
@@ -51,6 +53,9 @@ log.setLevel(SRC_LOG_LEVELS["OAUTH"])
 SESSION_SECRET = WEBUI_SECRET_KEY
 ALGORITHM = "HS256"
 
+# Seconds between writes of the last active timestamps of users
+USER_LAST_ACTIVE_FLUSH_INTERVAL = DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL or 10
+
 ##############
 # Auth Utils
 ##############
@@ -287,7 +292,7 @@ async def get_current_user(
 
     # auth by api key
     if token.startswith("sk-"):
-        user = get_current_user_by_api_key(request, token)
+        user = await get_current_user_by_api_key(request, token)
 
         # Add user info to current span
         current_span = trace.get_current_span()
@@ -316,7 +321,7 @@ async def get_current_user(
                     detail="Invalid token",
                 )
 
-            user = Users.get_user_by_id(data["id"])
+            user = await Users.get_user_by_id_cached(data["id"])
             if user is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -341,12 +346,8 @@ async def get_current_user(
                     current_span.set_attribute("client.user.role", user.role)
                     current_span.set_attribute("client.auth.type", "jwt")
 
-                # Refresh the user's last active timestamp asynchronously
-                # to prevent blocking the request
-                if background_tasks:
-                    background_tasks.add_task(
-                        Users.update_user_last_active_by_id, user.id
-                    )
+                # Kept in memory and written in batches to the database
+                Users.record_user_last_active_by_id(user.id)
             return user
         else:
             raise HTTPException(
@@ -368,8 +369,8 @@ async def get_current_user(
         raise e
 
 
-def get_current_user_by_api_key(request, api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+async def get_current_user_by_api_key(request, api_key: str):
+    user = await Users.get_user_by_api_key_cached(api_key)
 
     if user is None:
         raise HTTPException(
@@ -397,11 +398,20 @@ def get_current_user_by_api_key(request, api_key: str):
         current_span.set_attribute("client.user.role", user.role)
         current_span.set_attribute("client.auth.type", "api_key")
 
-    Users.update_user_last_active_by_id(user.id)
+    Users.record_user_last_active_by_id(user.id)
 
     return user
 
 
+async def periodic_user_last_active_flush():
+    while True:
+        await asyncio.sleep(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(Users.flush_user_last_active)
+        except Exception as e:
+            log.error(f"Error flushing user last active timestamps: {e}")
+
+
 def get_verified_user(user=Depends(get_current_user)):
     if user.role not in {"user", "admin"}:
         raise HTTPException(
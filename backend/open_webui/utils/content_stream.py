@@ -0,0 +1,143 @@
+import html
+import time
+from typing import Optional
+
+
+def get_utf16_length(text: str) -> int:
+    # Offsets are counted the way the client counts string lengths
+    return len(text.encode("utf-16-le", "surrogatepass")) // 2
+
+
+def get_common_prefix_length(a: str, b: str) -> int:
+    if b.startswith(a):
+        return len(a)
+
+    # Binary search on the length of the common prefix, comparisons run in C
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if b.startswith(a[low:mid], low):
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def quote_line(line: str) -> str:
+    return html.escape(line if line.startswith(">") else f"> {line}")
+
+
+class QuotedContent:
+    """
+    Renders streamed content as an escaped quote, one `> ` prefixed line per
+    line of content. Lines are quoted once they are complete, so rendering the
+    content again after it grew only quotes the new lines.
+    """
+
+    def __init__(self):
+        # Complete lines of the content and their quote
+        self.content = ""
+        self.quoted = ""
+
+    def render(self, content: str) -> str:
+        if not content.startswith(self.content) or (
+            # Edited content that turned a line break into \r\n
+            self.content.endswith("\r")
+            and content.startswith("\n", len(self.content))
+        ):
+            self.content = ""
+            self.quoted = ""
+
+        # The last line may still grow, also when it ends with a line break
+        lines = content[len(self.content) :].splitlines(keepends=True)
+        if not lines:
+            return self.quoted[:-1]
+
+        if len(lines) > 1:
+            self.quoted += "".join(
+                f"{quote_line(line.splitlines()[0])}\n" for line in lines[:-1]
+            )
+            self.content = content[: len(content) - len(lines[-1])]
+        return self.quoted + quote_line(lines[-1].splitlines()[0])
+
+
+class ContentStream:
+    """
+    Turns the content of a streamed chat completion into the updates sent to the
+    client.
+
+    Updates only carry what changed since the previous update, as a splice: the
+    client keeps the first `offset` characters of its content and appends the
+    rest, if its content is still `length` characters long. The whole content
+    is sent again every `keyframe_interval` seconds, so clients that missed an
+    update catch up.
+
+    Updates are spaced so that sending them takes at most `max_load` of the time,
+    and no further apart than `max_interval` seconds. When sending gets slower,
+    because the content grows or the socket backs up, updates get less frequent
+    instead of slowing the stream down.
+    """
+
+    def __init__(
+        self,
+        max_interval: float = 0.5,
+        max_load: float = 0.2,
+        keyframe_interval: float = 5.0,
+    ):
+        self.max_interval = max_interval
+        self.max_load = max_load
+        self.keyframe_interval = keyframe_interval
+
+        self.content: Optional[str] = None
+        self.length = 0
+        self.keyframe_at = 0.0
+        self.flushed_at = 0.0
+        self.flush_duration = 0.0
+
+    def get_interval(self) -> float:
+        return min(self.max_interval, self.flush_duration / self.max_load)
+
+    def is_due(self) -> bool:
+        return time.monotonic() - self.flushed_at >= self.get_interval()
+
+    def record_flush(self, started_at: float):
+        now = time.monotonic()
+        # Smoothed so a single slow update does not hold back the next ones
+        self.flush_duration = 0.8 * self.flush_duration + 0.2 * (now - started_at)
+        self.flushed_at = now
+
+    def get_update(self, content: str, full: bool = False) -> Optional[dict]:
+        """
+        Returns the data of the chat completion event that brings the client to
+        `content`, None if it already has it. `full` sends the whole content.
+        """
+        now = time.monotonic()
+
+        if (
+            full
+            or self.content is None
+            or now - self.keyframe_at >= self.keyframe_interval
+        ):
+            self.content = content
+            self.length = get_utf16_length(content)
+            self.keyframe_at = now
+            return {"content": content}
+
+        if content == self.content:
+            return None
+
+        offset = get_common_prefix_length(self.content, content)
+        tail = content[offset:]
+        utf16_offset = self.length - get_utf16_length(self.content[offset:])
+
+        update = {
+            "content_delta": {
+                "offset": utf16_offset,
+                "length": self.length,
+                "content": tail,
+            }
+        }
+
+        self.content = content
+        self.length = utf16_offset + get_utf16_length(tail)
+        return update
@@ -1,12 +1,23 @@
+import asyncio
+import contextvars
+import copy
 import inspect
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 
 from open_webui.utils.plugin import (
     load_function_module_by_id,
     get_function_module_from_cache,
 )
-from open_webui.models.functions import Functions
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.plugin_registry import FUNCTION_REGISTRY
+from open_webui.models.functions import FunctionModel, Functions
+from open_webui.env import (
+    FILTER_FUNCTION_THREADS,
+    FILTER_FUNCTION_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -22,115 +33,306 @@ def get_function_module(request, function_id, load_from_db=True):
     return function_module
 
 
-def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
-    def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
-        if function is not None:
-            valves = Functions.get_function_valves_by_id(function_id)
-            return valves.get("priority", 0) if valves else 0
-        return 0
-
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
-    if "info" in model and "meta" in model["info"]:
-        filter_ids.extend(model["info"]["meta"].get("filterIds", []))
-        filter_ids = list(set(filter_ids))
-    active_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
+class FilterEngine:
+    """
+    Runs the inlet, outlet and stream hooks of filter functions.
 
-    def get_active_status(filter_id):
-        function_module = get_function_module(request, filter_id)
+    The sorted filters of a model and the valves of each filter are resolved
+    once and reused until a function is saved. Inlet and outlet hooks that are
+    not coroutines run in a pool of `max_workers` threads so they do not block
+    the event loop, stream hooks that are not coroutines run inline as they
+    are called for every chunk.
 
-        if getattr(function_module, "toggle", None):
-            return filter_id in (enabled_filter_ids or [])
+    Hooks fail after `timeout` seconds. Coroutine hooks are cancelled, but a
+    thread cannot be stopped: a sync hook that timed out keeps its thread of
+    the pool until it returns, and hooks wait for a free thread within their
+    own timeout.
 
-        return True
+    Consecutive filters that set `independent = True` run concurrently, each
+    on a copy of the body. The keys each of them changed are merged in
+    priority order.
+    """
 
-    active_filter_ids = [
-        filter_id for filter_id in active_filter_ids if get_active_status(filter_id)
-    ]
+    def __init__(self, max_workers: int = 8, timeout: Optional[float] = None):
+        self.timeout = timeout
+        # Set by the metrics setup to record the duration of each hook
+        self.duration_histogram = None
 
-    filter_ids = [fid for fid in filter_ids if fid in active_filter_ids]
-    filter_ids.sort(key=get_priority)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="filter"
+        )
+        self._generation = None
+        self._cache = {}
+        # Sync hooks that timed out and still hold a thread of the pool
+        self._stalled = 0
 
-    return filter_ids
+    def _get_cached(self, key, load: Callable):
+        generation = FUNCTION_REGISTRY.get_generation()
+        if generation != self._generation:
+            self._cache = {}
+            self._generation = generation
 
+        if key not in self._cache:
+            self._cache[key] = load()
+        return self._cache[key]
 
-async def process_filter_functions(
-    request, filter_functions, filter_type, form_data, extra_params
-):
-    skip_files = None
+    def get_valves(self, filter_id: str) -> dict:
+        return self._get_cached(
+            ("valves", filter_id),
+            lambda: Functions.get_function_valves_by_id(filter_id) or {},
+        )
 
-    for function in filter_functions:
-        filter = function
-        filter_id = function.id
-        if not filter:
-            continue
+    def get_filter_functions(
+        self, request, model: dict, enabled_filter_ids: list = None
+    ) -> list[FunctionModel]:
+        """Returns the active filters of `model`, sorted by priority."""
+        model_filter_ids = []
+        if "info" in model and "meta" in model["info"]:
+            model_filter_ids = model["info"]["meta"].get("filterIds", []) or []
 
-        function_module = get_function_module(
-            request, filter_id, load_from_db=(filter_type != "stream")
+        key = (
+            "filters",
+            model.get("id"),
+            tuple(sorted(model_filter_ids)),
+            tuple(sorted(enabled_filter_ids or [])),
+        )
+        return self._get_cached(
+            key,
+            lambda: self._load_filter_functions(
+                request, model_filter_ids, enabled_filter_ids
+            ),
         )
-        # Prepare handler function
-        handler = getattr(function_module, filter_type, None)
-        if not handler:
-            continue
 
-        # Check if the function has a file_handler variable
-        if filter_type == "inlet" and hasattr(function_module, "file_handler"):
-            skip_files = function_module.file_handler
+    def _load_filter_functions(
+        self, request, model_filter_ids: list, enabled_filter_ids: list = None
+    ) -> list[FunctionModel]:
+        filter_ids = [
+            function.id for function in Functions.get_global_filter_functions()
+        ]
+        filter_ids = list(set(filter_ids + model_filter_ids))
+
+        active_functions = {
+            function.id: function
+            for function in Functions.get_functions_by_type("filter", active_only=True)
+        }
+
+        def get_active_status(filter_id):
+            function_module = get_function_module(request, filter_id)
+
+            if getattr(function_module, "toggle", None):
+                return filter_id in (enabled_filter_ids or [])
+
+            return True
 
+        filter_ids = [
+            filter_id
+            for filter_id in filter_ids
+            if filter_id in active_functions and get_active_status(filter_id)
+        ]
+        filter_ids.sort(
+            key=lambda filter_id: self.get_valves(filter_id).get("priority", 0)
+        )
+
+        return [active_functions[filter_id] for filter_id in filter_ids]
+
+    async def _call_handler(self, handler, params: dict, filter_type: str):
+        if inspect.iscoroutinefunction(handler):
+            return await asyncio.wait_for(handler(**params), self.timeout or None)
+        if filter_type == "stream":
+            return handler(**params)
+
+        thread_future = self._executor.submit(
+            contextvars.copy_context().run, handler, **params
+        )
+        future = asyncio.wrap_future(thread_future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout or None)
+        except asyncio.TimeoutError:
+            # Cancelling only works for hooks still waiting for a thread
+            if not thread_future.cancel():
+                self._stalled += 1
+                future.add_done_callback(self._release_stalled)
+                log.warning(
+                    f"{self._stalled} filter hooks that timed out are still "
+                    "running in the filter threads"
+                )
+            raise
+
+    def _release_stalled(self, _):
+        self._stalled -= 1
+
+    async def _run_filter(
+        self, filter_id, function_module, handler, filter_type, form_data, extra_params
+    ):
         # Apply valves to the function
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
             function_module.valves = function_module.Valves(
-                **(valves if valves else {})
+                **self.get_valves(filter_id)
             )
 
-        try:
-            # Prepare parameters
-            sig = inspect.signature(handler)
-
-            params = {"body": form_data}
-            if filter_type == "stream":
-                params = {"event": form_data}
-
-            params = params | {
-                k: v
-                for k, v in {
-                    **extra_params,
-                    "__id__": filter_id,
-                }.items()
-                if k in sig.parameters
-            }
+        # Prepare parameters
+        sig = inspect.signature(handler)
+
+        params = {"body": form_data}
+        if filter_type == "stream":
+            params = {"event": form_data}
+
+        params = params | {
+            k: v
+            for k, v in {
+                **extra_params,
+                "__id__": filter_id,
+            }.items()
+            if k in sig.parameters
+        }
 
-            # Handle user parameters
-            if "__user__" in sig.parameters:
-                if hasattr(function_module, "UserValves"):
-                    try:
-                        params["__user__"]["valves"] = function_module.UserValves(
+        # Handle user parameters
+        if "__user__" in sig.parameters:
+            if hasattr(function_module, "UserValves"):
+                try:
+                    # Filters running concurrently each get their own user
+                    params["__user__"] = {
+                        **params["__user__"],
+                        "valves": function_module.UserValves(
                             **Functions.get_user_valves_by_id_and_user_id(
                                 filter_id, params["__user__"]["id"]
                             )
-                        )
-                    except Exception as e:
-                        log.exception(f"Failed to get user values: {e}")
-
-            # Execute handler
-            if inspect.iscoroutinefunction(handler):
-                form_data = await handler(**params)
-            else:
-                form_data = handler(**params)
+                        ),
+                    }
+                except Exception as e:
+                    log.exception(f"Failed to get user values: {e}")
 
+        start_time = time.perf_counter()
+        try:
+            return await self._call_handler(handler, params, filter_type)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"{filter_type} handler {filter_id} timed out after "
+                f"{self.timeout} seconds"
+            )
         except Exception as e:
             log.debug(f"Error in {filter_type} handler {filter_id}: {e}")
             raise e
+        finally:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000.0
+            log.debug(f"{filter_type} handler {filter_id} took {elapsed_ms:.1f} ms")
+            if self.duration_histogram is not None:
+                self.duration_histogram.record(
+                    elapsed_ms, {"filter.id": filter_id, "filter.type": filter_type}
+                )
 
-    # Handle file cleanup for inlet
-    if skip_files:
-        if "files" in form_data.get("metadata", {}):
-            del form_data["metadata"]["files"]
-        if "files" in form_data:
-            del form_data["files"]
+    def _merge_results(
+        self, form_data: dict, filter_ids: list[str], results: list
+    ) -> dict:
+        """
+        Applies the keys that each filter of an independent group added,
+        changed or removed in its copy of `form_data`, in priority order.
+        """
+        merged = dict(form_data)
+        changed_by = {}
+        for filter_id, result in zip(filter_ids, results):
+            if not isinstance(result, dict):
+                continue
 
-    return form_data, {}
+            changes = {
+                key: value
+                for key, value in result.items()
+                if key not in form_data or form_data[key] != value
+            }
+            removed = [key for key in form_data if key not in result]
+
+            for key in [*changes, *removed]:
+                if key in changed_by:
+                    log.warning(
+                        f"Independent filters {changed_by[key]} and {filter_id} "
+                        f"both changed {key!r}, keeping the change of {filter_id}"
+                    )
+                changed_by[key] = filter_id
+
+            merged.update(changes)
+            for key in removed:
+                merged.pop(key, None)
+        return merged
+
+    async def run(
+        self, request, filter_functions, filter_type, form_data, extra_params
+    ):
+        skip_files = None
+
+        # Consecutive independent filters are grouped to run concurrently
+        groups = []
+        for function in filter_functions:
+            filter = function
+            if not filter:
+                continue
+            filter_id = function.id
+
+            function_module = get_function_module(
+                request, filter_id, load_from_db=(filter_type != "stream")
+            )
+            # Prepare handler function
+            handler = getattr(function_module, filter_type, None)
+            if not handler:
+                continue
+
+            # Check if the function has a file_handler variable
+            if filter_type == "inlet" and hasattr(function_module, "file_handler"):
+                skip_files = function_module.file_handler
+
+            independent = getattr(function_module, "independent", False) is True
+            if independent and groups and groups[-1][0]:
+                groups[-1][1].append((filter_id, function_module, handler))
+            else:
+                groups.append((independent, [(filter_id, function_module, handler)]))
+
+        for _, group in groups:
+            if len(group) == 1:
+                form_data = await self._run_filter(
+                    *group[0], filter_type, form_data, extra_params
+                )
+                continue
+
+            results = await asyncio.gather(
+                *(
+                    self._run_filter(
+                        *entry, filter_type, copy.deepcopy(form_data), extra_params
+                    )
+                    for entry in group
+                )
+            )
+            form_data = self._merge_results(
+                form_data, [entry[0] for entry in group], results
+            )
+
+        # Handle file cleanup for inlet
+        if skip_files:
+            if "files" in form_data.get("metadata", {}):
+                del form_data["metadata"]["files"]
+            if "files" in form_data:
+                del form_data["files"]
+
+        return form_data, {}
+
+
+FILTER_ENGINE = FilterEngine(
+    max_workers=FILTER_FUNCTION_THREADS, timeout=FILTER_FUNCTION_TIMEOUT
+)
+
+
+def get_filter_functions(request, model: dict, enabled_filter_ids: list = None):
+    return FILTER_ENGINE.get_filter_functions(request, model, enabled_filter_ids)
+
+
+def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
+    return [
+        function.id
+        for function in get_filter_functions(request, model, enabled_filter_ids)
+    ]
+
+
+async def process_filter_functions(
+    request, filter_functions, filter_type, form_data, extra_params
+):
+    return await FILTER_ENGINE.run(
+        request, filter_functions, filter_type, form_data, extra_params
+    )
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class UpstreamStats:
+    def __init__(self):
+        self.requests = 0
+        self.active_requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.errors = 0
+
+
+class HTTPClientPool:
+    """
+    Long-lived aiohttp sessions, one per upstream origin, so requests to the
+    same provider reuse kept-alive connections instead of paying TCP and TLS
+    setup every time.
+
+    The sessions belong to the main event loop. Code running in its own event
+    loop, e.g. through asyncio.run in a worker thread, uses `session()`, which
+    gives it a short-lived session that is closed before its loop ends.
+
+    Sessions are shared between users, so they do not keep cookies. Cookies
+    and timeouts are passed per request.
+    """
+
+    def __init__(
+        self,
+        limit: int = 0,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+        self._stats: dict[str, UpstreamStats] = {}
+
+    @staticmethod
+    def get_origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _get_trace_config(self, stats: UpstreamStats) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            stats.requests += 1
+            stats.active_requests += 1
+
+        async def on_request_end(session, context, params):
+            stats.active_requests -= 1
+
+        async def on_request_exception(session, context, params):
+            stats.active_requests -= 1
+            stats.errors += 1
+
+        async def on_connection_create_end(session, context, params):
+            stats.connections_created += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            stats.connections_reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def start(self):
+        """Binds the pool to the running event loop, called on startup."""
+        self._loop = asyncio.get_running_loop()
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        """Returns the shared session for the origin of `url`."""
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif loop is not self._loop:
+            raise RuntimeError(
+                "Shared HTTP client sessions can only be used from the main event loop"
+            )
+
+        origin = self.get_origin(url)
+        session = self._sessions.get(origin)
+        if session is not None and not session.closed:
+            return session
+
+        stats = self._stats.setdefault(origin, UpstreamStats())
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            ),
+            cookie_jar=aiohttp.DummyCookieJar(),
+            trace_configs=[self._get_trace_config(stats)],
+            trust_env=True,
+        )
+        self._sessions[origin] = session
+        log.debug(f"Created HTTP client session for {origin}")
+        return session
+
+    @asynccontextmanager
+    async def session(self, url: str) -> AsyncIterator[aiohttp.ClientSession]:
+        """
+        Yields the shared session for the origin of `url` on the main event
+        loop, and a session that is closed on exit on any other loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is None or loop is self._loop:
+            yield self.get_session(url)
+            return
+
+        async with aiohttp.ClientSession(trust_env=True) as session:
+            yield session
+
+    async def request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """
+        Sends a request through the shared session of the upstream. The caller
+        must release the response so its connection goes back to the pool.
+        """
+        return await self.get_session(url).request(method, url, **kwargs)
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions = {}
+
+    def get_stats(self) -> dict:
+        return {
+            origin: {
+                "requests": stats.requests,
+                "active_requests": stats.active_requests,
+                "connections_created": stats.connections_created,
+                "connections_reused": stats.connections_reused,
+                "errors": stats.errors,
+            }
+            for origin, stats in self._stats.items()
+        }
+
+
+HTTP_CLIENT_POOL = HTTPClientPool(
+    limit=AIOHTTP_CLIENT_POOL_LIMIT,
+    limit_per_host=AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    keepalive_timeout=AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+)
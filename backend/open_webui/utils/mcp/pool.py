@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from typing import Optional
+
+import anyio
+
+from mcp import ClientSession, types
+from mcp.client.streamable_http import streamablehttp_client
+
+from open_webui.env import (
+    MCP_SESSION_HEALTH_CHECK_INTERVAL,
+    MCP_SESSION_IDLE_TIMEOUT,
+    MCP_SESSION_MAX_CONCURRENCY,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.mcp.client import MCPClient
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class MCPSession:
+    """
+    A long-lived session with an MCP server, shared by the chat requests that
+    use the same server with the same credentials.
+
+    The transport and session contexts are entered and exited by a task of
+    their own, as anyio requires, so the session outlives the request that
+    opened it. Tool specs are cached until the server notifies that its tools
+    changed.
+    """
+
+    def __init__(self, url: str, headers: Optional[dict], semaphore: asyncio.Semaphore):
+        self.url = url
+        self.headers = headers
+        self.semaphore = semaphore
+
+        self.client = MCPClient()
+        self.used_at = time.monotonic()
+        self.checked_at = time.monotonic()
+        self.active_requests = 0
+
+        self._tool_specs: Optional[list] = None
+        self._tools_version = 0
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self.client.session is not None
+        )
+
+    async def connect(self):
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        await ready
+
+    async def _run(self, ready: asyncio.Future):
+        try:
+            async with streamablehttp_client(self.url, headers=self.headers) as (
+                read_stream,
+                write_stream,
+                _,
+            ):
+                async with ClientSession(
+                    read_stream, write_stream, message_handler=self._handle_message
+                ) as session:
+                    with anyio.fail_after(10):
+                        await session.initialize()
+
+                    self.client.session = session
+                    ready.set_result(None)
+                    await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                log.info(f"MCP session to {self.url} was closed: {e}")
+        finally:
+            self.client.session = None
+            if not ready.done():
+                ready.set_exception(RuntimeError("MCP session was closed"))
+
+    async def _handle_message(self, message):
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            self._tools_version += 1
+            self._tool_specs = None
+
+    async def _request(self, coroutine_function, *args, **kwargs):
+        self.active_requests += 1
+        try:
+            async with self.semaphore:
+                return await coroutine_function(*args, **kwargs)
+        finally:
+            self.active_requests -= 1
+            self.used_at = time.monotonic()
+
+    async def list_tool_specs(self) -> list:
+        if self._tool_specs is None:
+            tools_version = self._tools_version
+            tool_specs = await self._request(self.client.list_tool_specs)
+            # Tools that changed while being listed are listed again next time
+            if tools_version == self._tools_version:
+                self._tool_specs = tool_specs
+            return tool_specs
+        return self._tool_specs
+
+    async def call_tool(self, function_name: str, function_args: dict):
+        return await self._request(self.client.call_tool, function_name, function_args)
+
+    async def ping(self, timeout: float = 5):
+        with anyio.fail_after(timeout):
+            await self.client.session.send_ping()
+        self.checked_at = time.monotonic()
+
+    async def close(self):
+        self._closing.set()
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), 5)
+            except (asyncio.TimeoutError, Exception):
+                self._task.cancel()
+
+
+class MCPSessionPool:
+    """
+    Keeps one session per MCP server and set of credentials, so chat requests
+    skip the handshake and tool discovery that a new session needs.
+
+    Sessions are pinged before being reused once `health_check_interval`
+    seconds passed since they were last checked, and closed after being unused
+    for `idle_timeout` seconds. A server that fails to connect is retried with
+    exponential backoff, and at most `max_concurrency` requests are sent to a
+    server at a time.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = 300,
+        health_check_interval: float = 60,
+        max_concurrency: int = 8,
+        max_backoff: float = 60,
+    ):
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.max_concurrency = max_concurrency
+        self.max_backoff = max_backoff
+
+        self._sessions: dict[str, MCPSession] = {}
+        self._connecting: dict[str, asyncio.Task] = {}
+        self._failures: dict[str, tuple[int, float]] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def get_key(self, url: str, headers: Optional[dict] = None) -> str:
+        # Credentials are part of the identity of a session but never stored
+        return hashlib.sha256(
+            json.dumps([url, headers or {}], sort_keys=True).encode()
+        ).hexdigest()
+
+    async def _close_idle_sessions(self):
+        now = time.monotonic()
+        for key, session in list(self._sessions.items()):
+            if (
+                now - session.used_at > self.idle_timeout
+                and not session.active_requests
+            ):
+                self._sessions.pop(key, None)
+                await session.close()
+
+        for key, (_, retry_at) in list(self._failures.items()):
+            if now > retry_at + self.max_backoff:
+                self._failures.pop(key, None)
+
+    async def _connect(self, key: str, url: str, headers: Optional[dict]):
+        session = MCPSession(
+            url,
+            headers,
+            self._semaphores.setdefault(url, asyncio.Semaphore(self.max_concurrency)),
+        )
+        try:
+            await session.connect()
+        except Exception:
+            failures = self._failures.get(key, (0, 0))[0] + 1
+            backoff = min(2 ** (failures - 1), self.max_backoff)
+            self._failures[key] = (failures, time.monotonic() + backoff)
+            raise
+
+        self._failures.pop(key, None)
+        self._sessions[key] = session
+        return session
+
+    async def get_session(self, url: str, headers: Optional[dict] = None):
+        """Returns a connected session with the MCP server at `url`."""
+        await self._close_idle_sessions()
+
+        key = self.get_key(url, headers)
+        session = self._sessions.get(key)
+        if session is not None:
+            if (
+                session.connected
+                and time.monotonic() - session.checked_at >= self.health_check_interval
+            ):
+                try:
+                    await session.ping()
+                except Exception as e:
+                    log.info(f"MCP session to {url} failed its health check: {e}")
+                    await session.close()
+
+            if session.connected:
+                session.used_at = time.monotonic()
+                return session
+
+            self._sessions.pop(key, None)
+
+        failures, retry_at = self._failures.get(key, (0, 0))
+        if time.monotonic() < retry_at:
+            raise RuntimeError(
+                f"MCP server {url} failed to connect {failures} times, retrying in "
+                f"{math.ceil(retry_at - time.monotonic())} seconds"
+            )
+
+        # Requests that need the same session wait for the same connection
+        task = self._connecting.get(key)
+        if task is None:
+            task = asyncio.create_task(self._connect(key, url, headers))
+            task.add_done_callback(lambda _: self._connecting.pop(key, None))
+            self._connecting[key] = task
+        return await asyncio.shield(task)
+
+    async def close(self):
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            await session.close()
+
+
+MCP_SESSION_POOL = MCPSessionPool(
+    idle_timeout=MCP_SESSION_IDLE_TIMEOUT,
+    health_check_interval=MCP_SESSION_HEALTH_CHECK_INTERVAL,
+    max_concurrency=MCP_SESSION_MAX_CONCURRENCY,
+)
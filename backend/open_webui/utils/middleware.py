@@ -1,3 +1,4 @@
+import copy
 import time
 import logging
 import sys
@@ -33,6 +34,7 @@ from open_webui.socket.main import (
     get_event_call,
     get_event_emitter,
     get_active_status_by_user_id,
+    flush_message_events,
 )
 from open_webui.routers.tasks import (
     generate_queries,
@@ -66,7 +68,6 @@ from open_webui.utils.files import (
 
 
 from open_webui.models.users import UserModel
-from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
 from open_webui.retrieval.utils import get_sources_from_items
@@ -95,12 +96,13 @@ from open_webui.utils.misc import (
 from open_webui.utils.tools import get_tools, get_updated_tool_function
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
-    get_sorted_filter_ids,
+    get_filter_functions,
     process_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.content_stream import ContentStream, QuotedContent
 from open_webui.utils.payload import apply_system_prompt_to_body
-from open_webui.utils.mcp.client import MCPClient
+from open_webui.utils.mcp.pool import MCP_SESSION_POOL
 
 
 from open_webui.config import (
@@ -115,6 +117,7 @@ from open_webui.env import (
     GLOBAL_LOG_LEVEL,
     ENABLE_CHAT_RESPONSE_BASE64_IMAGE_URL_CONVERSION,
     CHAT_RESPONSE_STREAM_DELTA_CHUNK_SIZE,
+    CHAT_RESPONSE_STREAM_MAX_DELTA_INTERVAL,
     CHAT_RESPONSE_MAX_TOOL_CALL_RETRIES,
     BYPASS_MODEL_ACCESS_CONTROL,
     ENABLE_REALTIME_CHAT_SAVE,
@@ -773,7 +776,7 @@ async def chat_image_generation_handler(
     if not chat_id:
         return form_data
 
-    chat = Chats.get_chat_by_id_and_user_id(chat_id, user.id)
+    chat = await Chats.get_chat_by_id_and_user_id_async(chat_id, user.id)
 
     __event_emitter__ = extra_params["__event_emitter__"]
     await __event_emitter__(
@@ -1170,9 +1173,11 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     # Check if the request has chat_id and is inside of a folder
     chat_id = metadata.get("chat_id", None)
     if chat_id and user:
-        chat = Chats.get_chat_by_id_and_user_id(chat_id, user.id)
+        chat = await Chats.get_chat_by_id_and_user_id_async(chat_id, user.id)
         if chat and chat.folder_id:
-            folder = Folders.get_folder_by_id_and_user_id(chat.folder_id, user.id)
+            folder = await Folders.get_folder_by_id_and_user_id_async(
+                chat.folder_id, user.id
+            )
 
             if folder and folder.data:
                 if "system_prompt" in folder.data:
@@ -1238,12 +1243,9 @@ async def process_chat_payload(request, form_data, user, metadata, model):
         raise e
 
     try:
-        filter_functions = [
-            Functions.get_function_by_id(filter_id)
-            for filter_id in get_sorted_filter_ids(
-                request, model, metadata.get("filter_ids", [])
-            )
-        ]
+        filter_functions = get_filter_functions(
+            request, model, metadata.get("filter_ids", [])
+        )
 
         form_data, flags = await process_filter_functions(
             request=request,
@@ -1312,7 +1314,9 @@ async def process_chat_payload(request, form_data, user, metadata, model):
                 # Get folder files
                 folder_id = file_item.get("id", None)
                 if folder_id:
-                    folder = Folders.get_folder_by_id_and_user_id(folder_id, user.id)
+                    folder = await Folders.get_folder_by_id_and_user_id_async(
+                        folder_id, user.id
+                    )
                     if folder and folder.data and "files" in folder.data:
                         files = [f for f in files if f.get("id", None) != folder_id]
                         files = [*files, *folder.data["files"]]
@@ -1403,8 +1407,8 @@ async def process_chat_payload(request, form_data, user, metadata, model):
                         for key, value in connection_headers.items():
                             headers[key] = value
 
-                    mcp_clients[server_id] = MCPClient()
-                    await mcp_clients[server_id].connect(
+                    # Sessions are pooled, they stay open after the request
+                    mcp_clients[server_id] = await MCP_SESSION_POOL.get_session(
                         url=mcp_server_connection.get("url", ""),
                         headers=headers if headers else None,
                     )
@@ -1489,9 +1493,6 @@ async def process_chat_payload(request, form_data, user, metadata, model):
                     "server": tool_server,
                 }
 
-    if mcp_clients:
-        metadata["mcp_clients"] = mcp_clients
-
     if tools_dict:
         if metadata.get("params", {}).get("function_calling") == "native":
             # If the function calling is native, then call the tools function calling handler
@@ -1594,10 +1595,10 @@ async def process_chat_response(
         messages = []
 
         if "chat_id" in metadata and not metadata["chat_id"].startswith("local:"):
-            messages_map = Chats.get_messages_map_by_chat_id(metadata["chat_id"])
-            message = messages_map.get(metadata["message_id"]) if messages_map else None
-
-            message_list = get_message_list(messages_map, metadata["message_id"])
+            message_list = await Chats.get_message_list_by_id_and_message_id_async(
+                metadata["chat_id"], metadata["message_id"]
+            )
+            message = message_list[-1] if message_list else None
 
             # Remove details tags and files from the messages.
             # as get_message_list creates a new list, it does not affect
@@ -1684,7 +1685,7 @@ async def process_chat_response(
                             )
 
                             if not metadata.get("chat_id", "").startswith("local:"):
-                                Chats.upsert_message_to_chat_by_id_and_message_id(
+                                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                                     metadata["chat_id"],
                                     metadata["message_id"],
                                     {
@@ -1745,7 +1746,7 @@ async def process_chat_response(
                                 if not title:
                                     title = messages[0].get("content", user_message)
 
-                                Chats.update_chat_title_by_id(
+                                await Chats.update_chat_title_by_id_async(
                                     metadata["chat_id"], title
                                 )
 
@@ -1759,7 +1760,9 @@ async def process_chat_response(
                         if title == None and len(messages) == 2:
                             title = messages[0].get("content", user_message)
 
-                            Chats.update_chat_title_by_id(metadata["chat_id"], title)
+                            await Chats.update_chat_title_by_id_async(
+                                metadata["chat_id"], title
+                            )
 
                             await event_emitter(
                                 {
@@ -1827,6 +1830,8 @@ async def process_chat_response(
     if not isinstance(response, StreamingResponse):
         if event_emitter:
             try:
+                await flush_message_events(metadata["chat_id"], metadata["message_id"])
+
                 if isinstance(response, dict) or isinstance(response, JSONResponse):
                     if isinstance(response, list) and len(response) == 1:
                         # If the response is a single-item list, unwrap it #17213
@@ -1854,7 +1859,7 @@ async def process_chat_response(
                         else:
                             error = str(error)
 
-                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                        await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                             metadata["chat_id"],
                             metadata["message_id"],
                             {
@@ -1870,7 +1875,7 @@ async def process_chat_response(
                             )
 
                     if "selected_model_id" in response_data:
-                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                        await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                             metadata["chat_id"],
                             metadata["message_id"],
                             {
@@ -1890,7 +1895,9 @@ async def process_chat_response(
                                 }
                             )
 
-                            title = Chats.get_chat_title_by_id(metadata["chat_id"])
+                            title = await Chats.get_chat_title_by_id_async(
+                                metadata["chat_id"]
+                            )
 
                             await event_emitter(
                                 {
@@ -1904,7 +1911,7 @@ async def process_chat_response(
                             )
 
                             # Save message in the database
-                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                            await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                                 metadata["chat_id"],
                                 metadata["message_id"],
                                 {
@@ -1914,8 +1921,12 @@ async def process_chat_response(
                             )
 
                             # Send a webhook notification if the user is not active
-                            if not get_active_status_by_user_id(user.id):
-                                webhook_url = Users.get_user_webhook_url_by_id(user.id)
+                            if not await get_active_status_by_user_id(user.id):
+                                webhook_url = (
+                                    await Users.get_user_webhook_url_by_id_async(
+                                        user.id
+                                    )
+                                )
                                 if webhook_url:
                                     await post_webhook(
                                         request.app.state.WEBUI_NAME,
@@ -2000,12 +2011,9 @@ async def process_chat_response(
         "__request__": request,
         "__model__": model,
     }
-    filter_functions = [
-        Functions.get_function_by_id(filter_id)
-        for filter_id in get_sorted_filter_ids(
-            request, model, metadata.get("filter_ids", [])
-        )
-    ]
+    filter_functions = get_filter_functions(
+        request, model, metadata.get("filter_ids", [])
+    )
 
     # Streaming response
     if event_emitter and event_caller:
@@ -2028,138 +2036,165 @@ async def process_chat_response(
 
         # Handle as a background task
         async def response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        block_content = block["content"].strip()
-                        if block_content:
-                            content = f"{content}{block_content}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
+            serialized_content_cache = {False: [], True: []}
+            quoted_content_cache = {}
+            content_stream = ContentStream(
+                max_interval=CHAT_RESPONSE_STREAM_MAX_DELTA_INTERVAL
+            )
 
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
+            def quote_reasoning_content(block):
+                # The open reasoning block is rendered on every flush, only its
+                # new lines are quoted and escaped
+                cached_block, quoted_content = quoted_content_cache.get(
+                    id(block), (None, None)
+                )
+                if cached_block is not block:
+                    quoted_content = QuotedContent()
+                    quoted_content_cache[id(block)] = (block, quoted_content)
+                return quoted_content.render(block["content"])
+
+            def serialize_content_block(content, block, raw=False):
+                if block["type"] == "text":
+                    block_content = block["content"].strip()
+                    if block_content:
+                        content = f"{content}{block_content}\n"
+                elif block["type"] == "tool_calls":
+                    attributes = block.get("attributes", {})
+
+                    tool_calls = block.get("content", [])
+                    results = block.get("results", [])
+
+                    if content and not content.endswith("\n"):
+                        content += "\n"
+
+                    if results:
+
+                        tool_calls_display_content = ""
+                        for tool_call in tool_calls:
+
+                            tool_call_id = tool_call.get("id", "")
+                            tool_name = tool_call.get("function", {}).get("name", "")
+                            tool_arguments = tool_call.get("function", {}).get(
+                                "arguments", ""
+                            )
 
-                        if content and not content.endswith("\n"):
-                            content += "\n"
+                            tool_result = None
+                            tool_result_files = None
+                            for result in results:
+                                if tool_call_id == result.get("tool_call_id", ""):
+                                    tool_result = result.get("content", None)
+                                    tool_result_files = result.get("files", None)
+                                    break
+
+                            if tool_result is not None:
+                                tool_result_embeds = result.get("embeds", "")
+                                tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}" embeds="{html.escape(json.dumps(tool_result_embeds))}">\n<summary>Tool Executed</summary>\n</details>\n'
+                            else:
+                                tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
 
-                        if results:
+                        if not raw:
+                            content = f"{content}{tool_calls_display_content}"
+                    else:
+                        tool_calls_display_content = ""
 
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
+                        for tool_call in tool_calls:
+                            tool_call_id = tool_call.get("id", "")
+                            tool_name = tool_call.get("function", {}).get("name", "")
+                            tool_arguments = tool_call.get("function", {}).get(
+                                "arguments", ""
+                            )
 
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
+                            tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
 
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result is not None:
-                                    tool_result_embeds = result.get("embeds", "")
-                                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}" embeds="{html.escape(json.dumps(tool_result_embeds))}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+                        if not raw:
+                            content = f"{content}{tool_calls_display_content}"
 
-                            if not raw:
-                                content = f"{content}{tool_calls_display_content}"
-                        else:
-                            tool_calls_display_content = ""
+                elif block["type"] == "reasoning":
+                    reasoning_display_content = (
+                        "" if raw else quote_reasoning_content(block)
+                    )
 
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
+                    reasoning_duration = block.get("duration", None)
 
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+                    start_tag = block.get("start_tag", "")
+                    end_tag = block.get("end_tag", "")
 
-                            if not raw:
-                                content = f"{content}{tool_calls_display_content}"
+                    if content and not content.endswith("\n"):
+                        content += "\n"
 
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = html.escape(
-                            "\n".join(
-                                (f"> {line}" if not line.startswith(">") else line)
-                                for line in block["content"].splitlines()
+                    if reasoning_duration is not None:
+                        if raw:
+                            content = (
+                                f'{content}{start_tag}{block["content"]}{end_tag}\n'
                             )
-                        )
-
-                        reasoning_duration = block.get("duration", None)
+                        else:
+                            content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+                    else:
+                        if raw:
+                            content = (
+                                f'{content}{start_tag}{block["content"]}{end_tag}\n'
+                            )
+                        else:
+                            content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
 
-                        start_tag = block.get("start_tag", "")
-                        end_tag = block.get("end_tag", "")
+                elif block["type"] == "code_interpreter":
+                    attributes = block.get("attributes", {})
+                    output = block.get("output", None)
+                    lang = attributes.get("lang", "")
 
-                        if content and not content.endswith("\n"):
-                            content += "\n"
+                    content_stripped, original_whitespace = (
+                        split_content_and_whitespace(content)
+                    )
+                    if is_opening_code_block(content_stripped):
+                        # Remove trailing backticks that would open a new block
+                        content = (
+                            content_stripped.rstrip("`").rstrip() + original_whitespace
+                        )
+                    else:
+                        # Keep content as is - either closing backticks or no backticks
+                        content = content_stripped + original_whitespace
 
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = (
-                                    f'{content}{start_tag}{block["content"]}{end_tag}\n'
-                                )
-                            else:
-                                content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = (
-                                    f'{content}{start_tag}{block["content"]}{end_tag}\n'
-                                )
-                            else:
-                                content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+                    if content and not content.endswith("\n"):
+                        content += "\n"
 
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
+                    if output:
+                        output = html.escape(json.dumps(output))
 
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
+                        if raw:
+                            content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+                        else:
+                            content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+                    else:
+                        if raw:
+                            content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
                         else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
+                            content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
 
-                        if content and not content.endswith("\n"):
-                            content += "\n"
+                else:
+                    block_content = str(block["content"]).strip()
+                    if block_content:
+                        content = f"{content}{block['type']}: {block_content}\n"
 
-                        if output:
-                            output = html.escape(json.dumps(output))
+                return content
 
-                            if raw:
-                                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+            def serialize_content_blocks(content_blocks, raw=False):
+                # Only the last block changes while a response streams in, the
+                # content up to each earlier block is reused while it is unchanged
+                cache = serialized_content_cache[raw]
+                content = ""
 
-                    else:
-                        block_content = str(block["content"]).strip()
-                        if block_content:
-                            content = f"{content}{block['type']}: {block_content}\n"
+                for index, block in enumerate(content_blocks):
+                    is_last_block = index == len(content_blocks) - 1
+                    if index < len(cache) and not is_last_block:
+                        cached_block, snapshot, cached_content = cache[index]
+                        if cached_block is block and snapshot == block:
+                            content = cached_content
+                            continue
+                        del cache[index:]
+
+                    content = serialize_content_block(content, block, raw)
+                    if not is_last_block and index == len(cache):
+                        cache.append((block, copy.deepcopy(block), content))
 
                 return content.strip()
 
@@ -2379,7 +2414,7 @@ async def process_chat_response(
 
                 return content, content_blocks, end_flag
 
-            message = Chats.get_message_by_id_and_message_id(
+            message = await Chats.get_message_by_id_and_message_id_async(
                 metadata["chat_id"], metadata["message_id"]
             )
 
@@ -2435,7 +2470,7 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -2457,328 +2492,377 @@ async def process_chat_response(
                             or 1
                         ),
                     )
-                    last_delta_data = None
+                    flush_lock = asyncio.Lock()
+                    streaming_task = asyncio.current_task()
+                    streaming_done = asyncio.Event()
 
                     async def flush_pending_delta_data(threshold: int = 0):
+                        # Content is serialized and sent once per flush rather than
+                        # for every delta, at the cadence of the content stream
                         nonlocal delta_count
-                        nonlocal last_delta_data
 
-                        if delta_count >= threshold and last_delta_data:
-                            await event_emitter(
-                                {
-                                    "type": "chat:completion",
-                                    "data": last_delta_data,
-                                }
-                            )
+                        if not delta_count or delta_count < threshold:
+                            return
+                        if threshold and not content_stream.is_due():
+                            return
+
+                        async with flush_lock:
+                            if not delta_count:
+                                return
+
+                            started_at = time.monotonic()
                             delta_count = 0
-                            last_delta_data = None
+                            serialized_content = serialize_content_blocks(
+                                content_blocks
+                            )
 
-                    async for line in response.body_iterator:
-                        line = (
-                            line.decode("utf-8", "replace")
-                            if isinstance(line, bytes)
-                            else line
-                        )
-                        data = line
+                            if ENABLE_REALTIME_CHAT_SAVE:
+                                # Save message in the database
+                                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
+                                    metadata["chat_id"],
+                                    metadata["message_id"],
+                                    {
+                                        "content": serialized_content,
+                                    },
+                                )
 
-                        # Skip empty lines
-                        if not data.strip():
-                            continue
+                            update = content_stream.get_update(serialized_content)
+                            if update:
+                                await event_emitter(
+                                    {
+                                        "type": "chat:completion",
+                                        "data": update,
+                                    }
+                                )
+                            content_stream.record_flush(started_at)
 
-                        # "data:" is the prefix for each event
-                        if not data.startswith("data:"):
-                            continue
+                    async def flush_held_back_delta_data():
+                        # Deltas held back by the cadence are sent even when the
+                        # response pauses
+                        while not streaming_task.done():
+                            try:
+                                await asyncio.wait_for(
+                                    streaming_done.wait(),
+                                    max(content_stream.max_interval, 0.05),
+                                )
+                                return
+                            except asyncio.TimeoutError:
+                                await flush_pending_delta_data(1)
 
-                        # Remove the prefix
-                        data = data[len("data:") :].strip()
+                    flush_task = asyncio.create_task(flush_held_back_delta_data())
 
-                        try:
-                            data = json.loads(data)
-
-                            data, _ = await process_filter_functions(
-                                request=request,
-                                filter_functions=filter_functions,
-                                filter_type="stream",
-                                form_data=data,
-                                extra_params={"__body__": form_data, **extra_params},
+                    try:
+                        async for line in response.body_iterator:
+                            line = (
+                                line.decode("utf-8", "replace")
+                                if isinstance(line, bytes)
+                                else line
                             )
+                            data = line
 
-                            if data:
-                                if "event" in data and not getattr(
-                                    request.state, "direct", False
-                                ):
-                                    await event_emitter(data.get("event", {}))
+                            # Skip empty lines
+                            if not data.strip():
+                                continue
 
-                                if "selected_model_id" in data:
-                                    model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                                        metadata["chat_id"],
-                                        metadata["message_id"],
-                                        {
-                                            "selectedModelId": model_id,
-                                        },
-                                    )
-                                    await event_emitter(
-                                        {
-                                            "type": "chat:completion",
-                                            "data": data,
-                                        }
-                                    )
-                                else:
-                                    choices = data.get("choices", [])
+                            # "data:" is the prefix for each event
+                            if not data.startswith("data:"):
+                                continue
+
+                            # Remove the prefix
+                            data = data[len("data:") :].strip()
+
+                            try:
+                                data = json.loads(data)
+
+                                data, _ = await process_filter_functions(
+                                    request=request,
+                                    filter_functions=filter_functions,
+                                    filter_type="stream",
+                                    form_data=data,
+                                    extra_params={
+                                        "__body__": form_data,
+                                        **extra_params,
+                                    },
+                                )
+
+                                if data:
+                                    if "event" in data and not getattr(
+                                        request.state, "direct", False
+                                    ):
+                                        await event_emitter(data.get("event", {}))
 
-                                    # 17421
-                                    usage = data.get("usage", {}) or {}
-                                    usage.update(data.get("timings", {}))  # llama.cpp
-                                    if usage:
+                                    if "selected_model_id" in data:
+                                        model_id = data["selected_model_id"]
+                                        await Chats.upsert_message_to_chat_by_id_and_message_id_async(
+                                            metadata["chat_id"],
+                                            metadata["message_id"],
+                                            {
+                                                "selectedModelId": model_id,
+                                            },
+                                        )
                                         await event_emitter(
                                             {
                                                 "type": "chat:completion",
-                                                "data": {
-                                                    "usage": usage,
-                                                },
+                                                "data": data,
                                             }
                                         )
-
-                                    if not choices:
-                                        error = data.get("error", {})
-                                        if error:
+                                    else:
+                                        choices = data.get("choices", [])
+
+                                        # 17421
+                                        usage = data.get("usage", {}) or {}
+                                        usage.update(
+                                            data.get("timings", {})
+                                        )  # llama.cpp
+                                        if usage:
                                             await event_emitter(
                                                 {
                                                     "type": "chat:completion",
                                                     "data": {
-                                                        "error": error,
+                                                        "usage": usage,
                                                     },
                                                 }
                                             )
-                                        continue
 
-                                    delta = choices[0].get("delta", {})
-                                    delta_tool_calls = delta.get("tool_calls", None)
+                                        if not choices:
+                                            error = data.get("error", {})
+                                            if error:
+                                                await event_emitter(
+                                                    {
+                                                        "type": "chat:completion",
+                                                        "data": {
+                                                            "error": error,
+                                                        },
+                                                    }
+                                                )
+                                            continue
 
-                                    if delta_tool_calls:
-                                        for delta_tool_call in delta_tool_calls:
-                                            tool_call_index = delta_tool_call.get(
-                                                "index"
-                                            )
+                                        delta = choices[0].get("delta", {})
+                                        delta_tool_calls = delta.get("tool_calls", None)
+
+                                        if delta_tool_calls:
+                                            for delta_tool_call in delta_tool_calls:
+                                                tool_call_index = delta_tool_call.get(
+                                                    "index"
+                                                )
+
+                                                if tool_call_index is not None:
+                                                    # Check if the tool call already exists
+                                                    current_response_tool_call = None
+                                                    for (
+                                                        response_tool_call
+                                                    ) in response_tool_calls:
+                                                        if (
+                                                            response_tool_call.get(
+                                                                "index"
+                                                            )
+                                                            == tool_call_index
+                                                        ):
+                                                            current_response_tool_call = (
+                                                                response_tool_call
+                                                            )
+                                                            break
 
-                                            if tool_call_index is not None:
-                                                # Check if the tool call already exists
-                                                current_response_tool_call = None
-                                                for (
-                                                    response_tool_call
-                                                ) in response_tool_calls:
                                                     if (
-                                                        response_tool_call.get("index")
-                                                        == tool_call_index
+                                                        current_response_tool_call
+                                                        is None
                                                     ):
-                                                        current_response_tool_call = (
-                                                            response_tool_call
-                                                        )
-                                                        break
-
-                                                if current_response_tool_call is None:
-                                                    # Add the new tool call
-                                                    delta_tool_call.setdefault(
-                                                        "function", {}
-                                                    )
-                                                    delta_tool_call[
-                                                        "function"
-                                                    ].setdefault("name", "")
-                                                    delta_tool_call[
-                                                        "function"
-                                                    ].setdefault("arguments", "")
-                                                    response_tool_calls.append(
-                                                        delta_tool_call
-                                                    )
-                                                else:
-                                                    # Update the existing tool call
-                                                    delta_name = delta_tool_call.get(
-                                                        "function", {}
-                                                    ).get("name")
-                                                    delta_arguments = (
-                                                        delta_tool_call.get(
+                                                        # Add the new tool call
+                                                        delta_tool_call.setdefault(
                                                             "function", {}
-                                                        ).get("arguments")
-                                                    )
-
-                                                    if delta_name:
-                                                        current_response_tool_call[
+                                                        )
+                                                        delta_tool_call[
                                                             "function"
-                                                        ]["name"] += delta_name
-
-                                                    if delta_arguments:
-                                                        current_response_tool_call[
+                                                        ].setdefault("name", "")
+                                                        delta_tool_call[
                                                             "function"
-                                                        ][
-                                                            "arguments"
-                                                        ] += delta_arguments
-
-                                    image_urls = get_image_urls(
-                                        delta.get("images", []), request, metadata, user
-                                    )
-                                    if image_urls:
-                                        message_files = Chats.add_message_files_by_id_and_message_id(
-                                            metadata["chat_id"],
-                                            metadata["message_id"],
-                                            [
-                                                {"type": "image", "url": url}
-                                                for url in image_urls
-                                            ],
-                                        )
+                                                        ].setdefault("arguments", "")
+                                                        response_tool_calls.append(
+                                                            delta_tool_call
+                                                        )
+                                                    else:
+                                                        # Update the existing tool call
+                                                        delta_name = (
+                                                            delta_tool_call.get(
+                                                                "function", {}
+                                                            ).get("name")
+                                                        )
+                                                        delta_arguments = (
+                                                            delta_tool_call.get(
+                                                                "function", {}
+                                                            ).get("arguments")
+                                                        )
 
-                                        await event_emitter(
-                                            {
-                                                "type": "files",
-                                                "data": {"files": message_files},
-                                            }
+                                                        if delta_name:
+                                                            current_response_tool_call[
+                                                                "function"
+                                                            ]["name"] += delta_name
+
+                                                        if delta_arguments:
+                                                            current_response_tool_call[
+                                                                "function"
+                                                            ][
+                                                                "arguments"
+                                                            ] += delta_arguments
+
+                                        image_urls = get_image_urls(
+                                            delta.get("images", []),
+                                            request,
+                                            metadata,
+                                            user,
                                         )
-
-                                    value = delta.get("content")
-
-                                    reasoning_content = (
-                                        delta.get("reasoning_content")
-                                        or delta.get("reasoning")
-                                        or delta.get("thinking")
-                                    )
-                                    if reasoning_content:
-                                        if (
-                                            not content_blocks
-                                            or content_blocks[-1]["type"] != "reasoning"
-                                        ):
-                                            reasoning_block = {
-                                                "type": "reasoning",
-                                                "start_tag": "<think>",
-                                                "end_tag": "</think>",
-                                                "attributes": {
-                                                    "type": "reasoning_content"
-                                                },
-                                                "content": "",
-                                                "started_at": time.time(),
-                                            }
-                                            content_blocks.append(reasoning_block)
-                                        else:
-                                            reasoning_block = content_blocks[-1]
-
-                                        reasoning_block["content"] += reasoning_content
-
-                                        data = {
-                                            "content": serialize_content_blocks(
-                                                content_blocks
-                                            )
-                                        }
-
-                                    if value:
-                                        if (
-                                            content_blocks
-                                            and content_blocks[-1]["type"]
-                                            == "reasoning"
-                                            and content_blocks[-1]
-                                            .get("attributes", {})
-                                            .get("type")
-                                            == "reasoning_content"
-                                        ):
-                                            reasoning_block = content_blocks[-1]
-                                            reasoning_block["ended_at"] = time.time()
-                                            reasoning_block["duration"] = int(
-                                                reasoning_block["ended_at"]
-                                                - reasoning_block["started_at"]
+                                        if image_urls:
+                                            message_files = await Chats.add_message_files_by_id_and_message_id_async(
+                                                metadata["chat_id"],
+                                                metadata["message_id"],
+                                                [
+                                                    {"type": "image", "url": url}
+                                                    for url in image_urls
+                                                ],
                                             )
 
-                                            content_blocks.append(
+                                            await event_emitter(
                                                 {
-                                                    "type": "text",
-                                                    "content": "",
+                                                    "type": "files",
+                                                    "data": {"files": message_files},
                                                 }
                                             )
 
-                                        if ENABLE_CHAT_RESPONSE_BASE64_IMAGE_URL_CONVERSION:
-                                            value = convert_markdown_base64_images(
-                                                request, value, metadata, user
-                                            )
+                                        value = delta.get("content")
 
-                                        content = f"{content}{value}"
-                                        if not content_blocks:
-                                            content_blocks.append(
-                                                {
-                                                    "type": "text",
+                                        reasoning_content = (
+                                            delta.get("reasoning_content")
+                                            or delta.get("reasoning")
+                                            or delta.get("thinking")
+                                        )
+                                        if reasoning_content:
+                                            if (
+                                                not content_blocks
+                                                or content_blocks[-1]["type"]
+                                                != "reasoning"
+                                            ):
+                                                reasoning_block = {
+                                                    "type": "reasoning",
+                                                    "start_tag": "<think>",
+                                                    "end_tag": "</think>",
+                                                    "attributes": {
+                                                        "type": "reasoning_content"
+                                                    },
                                                     "content": "",
+                                                    "started_at": time.time(),
                                                 }
-                                            )
+                                                content_blocks.append(reasoning_block)
+                                            else:
+                                                reasoning_block = content_blocks[-1]
 
-                                        content_blocks[-1]["content"] = (
-                                            content_blocks[-1]["content"] + value
-                                        )
+                                            reasoning_block[
+                                                "content"
+                                            ] += reasoning_content
+                                            delta_count += 1
 
-                                        if DETECT_REASONING_TAGS:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "reasoning",
-                                                    reasoning_tags,
-                                                    content,
-                                                    content_blocks,
+                                        if value:
+                                            if (
+                                                content_blocks
+                                                and content_blocks[-1]["type"]
+                                                == "reasoning"
+                                                and content_blocks[-1]
+                                                .get("attributes", {})
+                                                .get("type")
+                                                == "reasoning_content"
+                                            ):
+                                                reasoning_block = content_blocks[-1]
+                                                reasoning_block["ended_at"] = (
+                                                    time.time()
+                                                )
+                                                reasoning_block["duration"] = int(
+                                                    reasoning_block["ended_at"]
+                                                    - reasoning_block["started_at"]
                                                 )
-                                            )
 
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "solution",
-                                                    DEFAULT_SOLUTION_TAGS,
-                                                    content,
-                                                    content_blocks,
+                                                content_blocks.append(
+                                                    {
+                                                        "type": "text",
+                                                        "content": "",
+                                                    }
                                                 )
-                                            )
 
-                                        if DETECT_CODE_INTERPRETER:
-                                            content, content_blocks, end = (
-                                                tag_content_handler(
-                                                    "code_interpreter",
-                                                    DEFAULT_CODE_INTERPRETER_TAGS,
-                                                    content,
-                                                    content_blocks,
+                                            if ENABLE_CHAT_RESPONSE_BASE64_IMAGE_URL_CONVERSION:
+                                                value = convert_markdown_base64_images(
+                                                    request, value, metadata, user
                                                 )
-                                            )
 
-                                            if end:
-                                                break
+                                            content = f"{content}{value}"
+                                            if not content_blocks:
+                                                content_blocks.append(
+                                                    {
+                                                        "type": "text",
+                                                        "content": "",
+                                                    }
+                                                )
 
-                                        if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
-                                                metadata["chat_id"],
-                                                metadata["message_id"],
-                                                {
-                                                    "content": serialize_content_blocks(
-                                                        content_blocks
-                                                    ),
-                                                },
+                                            content_blocks[-1]["content"] = (
+                                                content_blocks[-1]["content"] + value
                                             )
-                                        else:
-                                            data = {
-                                                "content": serialize_content_blocks(
-                                                    content_blocks
-                                                ),
-                                            }
+                                            delta_count += 1
+
+                                            if DETECT_REASONING_TAGS:
+                                                content, content_blocks, _ = (
+                                                    tag_content_handler(
+                                                        "reasoning",
+                                                        reasoning_tags,
+                                                        content,
+                                                        content_blocks,
+                                                    )
+                                                )
+
+                                                content, content_blocks, _ = (
+                                                    tag_content_handler(
+                                                        "solution",
+                                                        DEFAULT_SOLUTION_TAGS,
+                                                        content,
+                                                        content_blocks,
+                                                    )
+                                                )
 
-                                if delta:
-                                    delta_count += 1
-                                    last_delta_data = data
-                                    if delta_count >= delta_chunk_size:
+                                            if DETECT_CODE_INTERPRETER:
+                                                content, content_blocks, end = (
+                                                    tag_content_handler(
+                                                        "code_interpreter",
+                                                        DEFAULT_CODE_INTERPRETER_TAGS,
+                                                        content,
+                                                        content_blocks,
+                                                    )
+                                                )
+
+                                                if end:
+                                                    break
+
+                                    if delta:
+                                        # Only deltas that changed the content count
+                                        # towards the next flush
                                         await flush_pending_delta_data(delta_chunk_size)
+                                    else:
+                                        await event_emitter(
+                                            {
+                                                "type": "chat:completion",
+                                                "data": data,
+                                            }
+                                        )
+                            except Exception as e:
+                                done = "data: [DONE]" in line
+                                if done:
+                                    pass
                                 else:
-                                    await event_emitter(
-                                        {
-                                            "type": "chat:completion",
-                                            "data": data,
-                                        }
-                                    )
-                        except Exception as e:
-                            done = "data: [DONE]" in line
-                            if done:
-                                pass
-                            else:
-                                log.debug(f"Error: {e}")
-                                continue
+                                    log.debug(f"Error: {e}")
+                                    continue
+                    except BaseException:
+                        flush_task.cancel()
+                        raise
+                    finally:
+                        streaming_done.set()
+
+                    # A flush in progress ends before the last one
+                    await flush_task
                     await flush_pending_delta_data()
 
                     if content_blocks:
@@ -2837,9 +2921,9 @@ async def process_chat_response(
                     await event_emitter(
                         {
                             "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
+                            "data": content_stream.get_update(
+                                serialize_content_blocks(content_blocks), full=True
+                            ),
                         }
                     )
 
@@ -2979,9 +3063,9 @@ async def process_chat_response(
                     await event_emitter(
                         {
                             "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
+                            "data": content_stream.get_update(
+                                serialize_content_blocks(content_blocks), full=True
+                            ),
                         }
                     )
 
@@ -3024,9 +3108,9 @@ async def process_chat_response(
                         await event_emitter(
                             {
                                 "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
+                                "data": content_stream.get_update(
+                                    serialize_content_blocks(content_blocks), full=True
+                                ),
                             }
                         )
 
@@ -3155,9 +3239,9 @@ async def process_chat_response(
                         await event_emitter(
                             {
                                 "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
+                                "data": content_stream.get_update(
+                                    serialize_content_blocks(content_blocks), full=True
+                                ),
                             }
                         )
 
@@ -3191,7 +3275,9 @@ async def process_chat_response(
                             log.debug(e)
                             break
 
-                title = Chats.get_chat_title_by_id(metadata["chat_id"])
+                await flush_message_events(metadata["chat_id"], metadata["message_id"])
+
+                title = await Chats.get_chat_title_by_id_async(metadata["chat_id"])
                 data = {
                     "done": True,
                     "content": serialize_content_blocks(content_blocks),
@@ -3200,7 +3286,7 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -3209,8 +3295,8 @@ async def process_chat_response(
                     )
 
                 # Send a webhook notification if the user is not active
-                if not get_active_status_by_user_id(user.id):
-                    webhook_url = Users.get_user_webhook_url_by_id(user.id)
+                if not await get_active_status_by_user_id(user.id):
+                    webhook_url = await Users.get_user_webhook_url_by_id_async(user.id)
                     if webhook_url:
                         await post_webhook(
                             request.app.state.WEBUI_NAME,
@@ -3238,7 +3324,7 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -0,0 +1,217 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from open_webui.env import (
+    MODELS_REGISTRY_REFRESH_INTERVAL,
+    MODELS_REGISTRY_TIMEOUT,
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class ModelRegistry:
+    """
+    Stale-while-revalidate cache of the model lists returned by each OpenAI and
+    Ollama connection.
+
+    Requests are answered from the last known list and a backend whose list is
+    older than `refresh_interval` seconds is refreshed in the background, each
+    backend on its own schedule. Only the first load of a backend is waited
+    for, and for no longer than `timeout` seconds. A backend that fails or
+    times out is marked degraded and keeps serving its last known list. With
+    Redis, lists are shared between workers and a single worker refreshes a
+    given backend at a time.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: int = 60,
+        timeout: float = 3,
+        redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:models:registry",
+    ):
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.redis_key_prefix = redis_key_prefix
+
+        self._entries: dict[str, dict] = {}
+        self._backends: dict[str, dict] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_interval > 0
+
+    def get_key(self, url: str, key: Optional[str] = None) -> str:
+        # API keys are part of the identity of a backend but never stored
+        return hashlib.sha256(f"{url}\x00{key or ''}".encode()).hexdigest()[:32]
+
+    def _get_redis_key(self, key: str) -> str:
+        return f"{self.redis_key_prefix}:{key}"
+
+    async def _get_entry(self, redis, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if redis is not None and (
+            entry is None or time.time() - entry["updated_at"] >= self.refresh_interval
+        ):
+            # Another worker may have refreshed the backend already
+            try:
+                value = await redis.get(self._get_redis_key(key))
+                if value:
+                    shared_entry = json.loads(value)
+                    if (
+                        entry is None
+                        or shared_entry["updated_at"] > entry["updated_at"]
+                    ):
+                        entry = shared_entry
+                        self._entries[key] = entry
+            except Exception as e:
+                log.warning(f"Error reading model registry entry from Redis: {e}")
+        return entry
+
+    async def _set_entry(self, redis, key: str, entry: dict):
+        self._entries[key] = entry
+        if redis is not None:
+            try:
+                await redis.set(
+                    self._get_redis_key(key),
+                    json.dumps(entry),
+                    ex=max(self.refresh_interval * 10, 3600),
+                )
+            except Exception as e:
+                log.warning(f"Error writing model registry entry to Redis: {e}")
+
+    async def _refresh(self, redis, key: str) -> Optional[dict]:
+        backend = self._backends[key]
+        lock_key = f"{self._get_redis_key(key)}:lock"
+        entry = self._entries.get(key)
+
+        if redis is not None and entry is not None:
+            if not await redis.set(lock_key, "1", nx=True, ex=60):
+                # Another worker is refreshing this backend
+                return entry
+
+        try:
+            try:
+                data = await backend["fetch"]()
+                error = None if data is not None else "No response"
+            except Exception as e:
+                data, error = None, str(e)
+
+            if error is None:
+                entry = {
+                    "data": data,
+                    "updated_at": time.time(),
+                    "status": "ok",
+                    "error": None,
+                }
+            else:
+                log.warning(f"Model list of {backend['url']} is degraded: {error}")
+                entry = {
+                    "data": entry["data"] if entry else None,
+                    # Retried on the next interval rather than on every request
+                    "updated_at": time.time(),
+                    "status": "degraded",
+                    "error": error,
+                }
+
+            await self._set_entry(redis, key, entry)
+            return entry
+        finally:
+            if redis is not None:
+                await redis.delete(lock_key)
+
+    def refresh(self, redis, key: str) -> asyncio.Task:
+        """Refreshes a backend, concurrent calls share the same refresh."""
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._refresh(redis, key))
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self._tasks[key] = task
+        return task
+
+    async def get(
+        self,
+        redis,
+        url: str,
+        fetch: Callable[[], Awaitable[Any]],
+        key: Optional[str] = None,
+    ) -> Any:
+        """
+        Returns a copy of the last known response of `fetch` for the backend at
+        `url`, or None if the backend is unreachable and was never loaded.
+        """
+        if not self.enabled:
+            return await fetch()
+
+        registry_key = self.get_key(url, key)
+        self._backends[registry_key] = {
+            "url": url,
+            "fetch": fetch,
+            "requested_at": time.time(),
+        }
+
+        entry = await self._get_entry(redis, registry_key)
+        if entry is None:
+            try:
+                entry = await asyncio.wait_for(
+                    asyncio.shield(self.refresh(redis, registry_key)), self.timeout
+                )
+            except asyncio.TimeoutError:
+                log.warning(f"Model list of {url} is degraded: timed out")
+                entry = {
+                    "data": None,
+                    "updated_at": time.time(),
+                    "status": "degraded",
+                    "error": "Timed out",
+                }
+                self._entries.setdefault(registry_key, entry)
+        elif time.time() - entry["updated_at"] >= self.refresh_interval:
+            self.refresh(redis, registry_key)
+
+        # Callers rewrite model ids in place
+        return copy.deepcopy(entry["data"]) if entry else None
+
+    async def run(self, get_redis: Callable[[], Any]):
+        """Refreshes the backends that are due, in the background."""
+        while True:
+            try:
+                now = time.time()
+                for key, backend in list(self._backends.items()):
+                    # Backends that are no longer configured stop being requested
+                    if now - backend["requested_at"] > self.refresh_interval * 10:
+                        self._backends.pop(key, None)
+                        self._entries.pop(key, None)
+                        continue
+
+                    entry = self._entries.get(key)
+                    if entry and now - entry["updated_at"] >= self.refresh_interval:
+                        self.refresh(get_redis(), key)
+            except Exception as e:
+                log.error(f"Error refreshing model lists: {e}")
+
+            await asyncio.sleep(max(1, min(self.refresh_interval / 4, 15)))
+
+    def get_status(self) -> list[dict]:
+        return [
+            {
+                "url": backend["url"],
+                "status": self._entries.get(key, {}).get("status", "loading"),
+                "error": self._entries.get(key, {}).get("error"),
+                "updated_at": int(self._entries.get(key, {}).get("updated_at", 0)),
+            }
+            for key, backend in self._backends.items()
+        ]
+
+
+MODEL_REGISTRY = ModelRegistry(
+    refresh_interval=MODELS_REGISTRY_REFRESH_INTERVAL,
+    timeout=MODELS_REGISTRY_TIMEOUT,
+)
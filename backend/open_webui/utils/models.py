@@ -12,14 +12,13 @@ from open_webui.functions import get_function_models
 
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
-from open_webui.models.groups import Groups
 
 
 from open_webui.utils.plugin import (
     load_function_module_by_id,
     get_function_module_from_cache,
 )
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_access_context, has_access
 
 
 from open_webui.config import (
@@ -357,30 +356,33 @@ def get_filtered_models(models, user):
         or (user.role == "admin" and not BYPASS_ADMIN_ACCESS_CONTROL)
     ) and not BYPASS_MODEL_ACCESS_CONTROL:
         filtered_models = []
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user.id)}
+        access_context = get_access_context(user.id)
+        # Load the access control of every model in one query
+        model_infos = {
+            model_info.id: model_info
+            for model_info in Models.get_models_by_ids(
+                [model["id"] for model in models if not model.get("arena")]
+            )
+        }
         for model in models:
             if model.get("arena"):
-                if has_access(
-                    user.id,
+                if access_context.has_access(
                     type="read",
                     access_control=model.get("info", {})
                     .get("meta", {})
                     .get("access_control", {}),
-                    user_group_ids=user_group_ids,
                 ):
                     filtered_models.append(model)
                 continue
 
-            model_info = Models.get_model_by_id(model["id"])
+            model_info = model_infos.get(model["id"])
             if model_info:
                 if (
                     (user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL)
                     or user.id == model_info.user_id
-                    or has_access(
-                        user.id,
+                    or access_context.has_access(
                         type="read",
                         access_control=model_info.access_control,
-                        user_group_ids=user_group_ids,
                     )
                 ):
                     filtered_models.append(model)
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import re
 import subprocess
@@ -10,6 +11,7 @@ import logging
 from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
 from open_webui.models.functions import Functions
 from open_webui.models.tools import Tools
+from open_webui.utils.plugin_registry import FUNCTION_REGISTRY, TOOL_REGISTRY
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -167,99 +169,79 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
 
 
 def get_tool_module_from_cache(request, tool_id, load_from_db=True):
-    if load_from_db:
-        # Always load from the database by default
-        tool = Tools.get_tool_by_id(tool_id)
-        if not tool:
-            raise Exception(f"Tool not found: {tool_id}")
-        content = tool.content
-
-        new_content = replace_imports(content)
-        if new_content != content:
-            content = new_content
-            # Update the tool content in the database
-            Tools.update_tool_by_id(tool_id, {"content": content})
-
-        if (
-            hasattr(request.app.state, "TOOL_CONTENTS")
-            and tool_id in request.app.state.TOOL_CONTENTS
-        ) and (
-            hasattr(request.app.state, "TOOLS") and tool_id in request.app.state.TOOLS
-        ):
-            if request.app.state.TOOL_CONTENTS[tool_id] == content:
-                return request.app.state.TOOLS[tool_id], None
-
-        tool_module, frontmatter = load_tool_module_by_id(tool_id, content)
-    else:
-        if hasattr(request.app.state, "TOOLS") and tool_id in request.app.state.TOOLS:
-            return request.app.state.TOOLS[tool_id], None
-
-        tool_module, frontmatter = load_tool_module_by_id(tool_id)
-
     if not hasattr(request.app.state, "TOOLS"):
         request.app.state.TOOLS = {}
+    TOOLS = request.app.state.TOOLS
+
+    # Modules that no tool was saved since being loaded are used without
+    # reading the tool from the database
+    if tool_id in TOOLS and (not load_from_db or TOOL_REGISTRY.is_current(tool_id)):
+        return TOOLS[tool_id], None
+
+    generation = TOOL_REGISTRY.get_generation()
+    tool = Tools.get_tool_by_id(tool_id)
+    if not tool:
+        raise Exception(f"Tool not found: {tool_id}")
+    content = tool.content
+
+    new_content = replace_imports(content)
+    if new_content != content:
+        content = new_content
+        # Update the tool content in the database
+        Tools.update_tool_by_id(tool_id, {"content": content})
+
+    version = hashlib.sha256(content.encode()).hexdigest()
+    if tool_id in TOOLS and TOOL_REGISTRY.get_version(tool_id) == version:
+        TOOL_REGISTRY.set_version(tool_id, version, generation)
+        return TOOLS[tool_id], None
 
-    if not hasattr(request.app.state, "TOOL_CONTENTS"):
-        request.app.state.TOOL_CONTENTS = {}
+    tool_module, frontmatter = load_tool_module_by_id(tool_id, content)
 
-    request.app.state.TOOLS[tool_id] = tool_module
-    request.app.state.TOOL_CONTENTS[tool_id] = content
+    TOOLS[tool_id] = tool_module
+    TOOL_REGISTRY.set_version(tool_id, version, generation)
 
     return tool_module, frontmatter
 
 
 def get_function_module_from_cache(request, function_id, load_from_db=True):
-    if load_from_db:
-        # Always load from the database by default
-        # This is useful for hooks like "inlet" or "outlet" where the content might change
-        # and we want to ensure the latest content is used.
-
-        function = Functions.get_function_by_id(function_id)
-        if not function:
-            raise Exception(f"Function not found: {function_id}")
-        content = function.content
-
-        new_content = replace_imports(content)
-        if new_content != content:
-            content = new_content
-            # Update the function content in the database
-            Functions.update_function_by_id(function_id, {"content": content})
-
-        if (
-            hasattr(request.app.state, "FUNCTION_CONTENTS")
-            and function_id in request.app.state.FUNCTION_CONTENTS
-        ) and (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            if request.app.state.FUNCTION_CONTENTS[function_id] == content:
-                return request.app.state.FUNCTIONS[function_id], None, None
-
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id, content
-        )
-    else:
-        # Load from cache (e.g. "stream" hook)
-        # This is useful for performance reasons
-
-        if (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            return request.app.state.FUNCTIONS[function_id], None, None
-
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id
-        )
-
     if not hasattr(request.app.state, "FUNCTIONS"):
         request.app.state.FUNCTIONS = {}
+    FUNCTIONS = request.app.state.FUNCTIONS
+
+    # Hooks like "inlet" or "outlet" need the latest content of the function, the
+    # module is used as is unless a function was saved since it was loaded.
+    # Other hooks (e.g. "stream") use any loaded module.
+    if function_id in FUNCTIONS and (
+        not load_from_db or FUNCTION_REGISTRY.is_current(function_id)
+    ):
+        return FUNCTIONS[function_id], None, None
+
+    generation = FUNCTION_REGISTRY.get_generation()
+    function = Functions.get_function_by_id(function_id)
+    if not function:
+        raise Exception(f"Function not found: {function_id}")
+    content = function.content
+
+    new_content = replace_imports(content)
+    if new_content != content:
+        content = new_content
+        # Update the function content in the database
+        Functions.update_function_by_id(function_id, {"content": content})
+
+    version = hashlib.sha256(content.encode()).hexdigest()
+    if (
+        function_id in FUNCTIONS
+        and FUNCTION_REGISTRY.get_version(function_id) == version
+    ):
+        FUNCTION_REGISTRY.set_version(function_id, version, generation)
+        return FUNCTIONS[function_id], None, None
 
-    if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
-        request.app.state.FUNCTION_CONTENTS = {}
+    function_module, function_type, frontmatter = load_function_module_by_id(
+        function_id, content
+    )
 
-    request.app.state.FUNCTIONS[function_id] = function_module
-    request.app.state.FUNCTION_CONTENTS[function_id] = content
+    FUNCTIONS[function_id] = function_module
+    FUNCTION_REGISTRY.set_version(function_id, version, generation)
 
     return function_module, function_type, frontmatter
 
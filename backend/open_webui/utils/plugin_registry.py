@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+from open_webui.env import (
+    PLUGIN_REGISTRY_SYNC_INTERVAL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class PluginRegistry:
+    """
+    Versions of the function or tool modules loaded by a worker, so a module can
+    be reused without reading its row from the database.
+
+    A module is loaded for a hash of the content of its row and stays current
+    until a plugin is saved. Saving bumps a generation, in Redis when it is
+    configured so every worker sees it within `sync_interval` seconds; a module
+    is then checked against its row once more before it is reused.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sync_interval: float = 1,
+        redis=None,
+        redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:plugins",
+    ):
+        self._sync_interval = sync_interval
+        self._redis = redis
+        self._generation_key = f"{redis_key_prefix}:{name}:generation"
+
+        self._generation = 0
+        self._checked_at = 0.0
+        self._versions: dict[str, tuple[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get_generation(self) -> int:
+        if not self._redis:
+            return self._generation
+
+        now = time.monotonic()
+        if now - self._checked_at >= self._sync_interval:
+            try:
+                self._generation = int(self._redis.get(self._generation_key) or 0)
+                self._checked_at = now
+            except Exception as e:
+                log.debug(f"Error reading plugin generation from Redis: {e}")
+        return self._generation
+
+    def is_current(self, id: str) -> bool:
+        """Whether the loaded module of `id` can be used as is."""
+        entry = self._versions.get(id)
+        return entry is not None and entry[1] == self.get_generation()
+
+    def get_version(self, id: str) -> Optional[str]:
+        entry = self._versions.get(id)
+        return entry[0] if entry else None
+
+    def set_version(self, id: str, version: str, generation: int):
+        """
+        Records the version of the row the module of `id` was loaded or checked
+        against, `generation` being the one read before the row was.
+        """
+        self._versions[id] = (version, generation)
+
+    def invalidate(self, id: Optional[str] = None):
+        """Invalidates the module of `id`, or of every plugin."""
+        with self._lock:
+            if id is None:
+                self._versions.clear()
+            else:
+                self._versions.pop(id, None)
+            self._generation += 1
+        self._bump_generation()
+
+    def touch(self):
+        """
+        Bumps the generation without invalidating any module, for changes to
+        plugins that modules do not depend on (e.g. valves or activation).
+        """
+        with self._lock:
+            self._generation += 1
+        self._bump_generation()
+
+    def _bump_generation(self):
+        if self._redis:
+            try:
+                self._generation = self._redis.incr(self._generation_key)
+                self._checked_at = time.monotonic()
+            except Exception as e:
+                log.warning(f"Error invalidating plugins in Redis: {e}")
+
+
+def get_plugin_registry(name: str) -> PluginRegistry:
+    return PluginRegistry(
+        name,
+        sync_interval=PLUGIN_REGISTRY_SYNC_INTERVAL,
+        redis=(
+            get_redis_connection(
+                redis_url=REDIS_URL,
+                redis_sentinels=get_sentinels_from_env(
+                    REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                ),
+                redis_cluster=REDIS_CLUSTER,
+                decode_responses=True,
+            )
+            if REDIS_URL
+            else None
+        ),
+    )
+
+
+FUNCTION_REGISTRY = get_plugin_registry("functions")
+TOOL_REGISTRY = get_plugin_registry("tools")
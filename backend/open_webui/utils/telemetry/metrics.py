@@ -8,6 +8,11 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* webui.embeddings.cache.hits / .misses (counters)
+* webui.filters.duration (histogram, milliseconds, per filter and hook)
+* webui.upstream.requests / .connections.created / .connections.reused /
+  .errors (counters, per origin)
+* webui.upstream.requests.active (gauge, per origin)
 
 Attributes used: http.method, http.route, http.status_code
 
@@ -45,8 +50,11 @@ from open_webui.env import (
     OTEL_METRICS_OTLP_SPAN_EXPORTER,
     OTEL_METRICS_EXPORTER_OTLP_INSECURE,
 )
-from open_webui.socket.main import get_active_user_ids
+from open_webui.socket.main import get_active_user_count
 from open_webui.models.users import Users
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
+from open_webui.utils.filter import FILTER_ENGINE
+from open_webui.utils.http_client import HTTP_CLIENT_POOL
 
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
 
@@ -102,6 +110,16 @@ def _build_meter_provider(resource: Resource) -> MeterProvider:
         View(
             instrument_name="webui.users.active.today",
         ),
+        View(
+            instrument_name="webui.embeddings.cache.hits",
+        ),
+        View(
+            instrument_name="webui.embeddings.cache.misses",
+        ),
+        View(
+            instrument_name="webui.filters.duration",
+            attribute_keys=["filter.id", "filter.type"],
+        ),
     ]
 
     provider = MeterProvider(
@@ -130,12 +148,18 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         unit="ms",
     )
 
+    FILTER_ENGINE.duration_histogram = meter.create_histogram(
+        name="webui.filters.duration",
+        description="Duration of the inlet, outlet and stream hooks of filters",
+        unit="ms",
+    )
+
     def observe_active_users(
         options: metrics.CallbackOptions,
     ) -> Sequence[metrics.Observation]:
         return [
             metrics.Observation(
-                value=len(get_active_user_ids()),
+                value=get_active_user_count(),
             )
         ]
 
@@ -174,6 +198,76 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         callbacks=[observe_users_active_today],
     )
 
+    def observe_embedding_cache_hits(
+        options: metrics.CallbackOptions,
+    ) -> Sequence[metrics.Observation]:
+        return [metrics.Observation(value=EMBEDDING_CACHE.hits)]
+
+    def observe_embedding_cache_misses(
+        options: metrics.CallbackOptions,
+    ) -> Sequence[metrics.Observation]:
+        return [metrics.Observation(value=EMBEDDING_CACHE.misses)]
+
+    meter.create_observable_counter(
+        name="webui.embeddings.cache.hits",
+        description="Number of embeddings served from the embedding cache",
+        unit="1",
+        callbacks=[observe_embedding_cache_hits],
+    )
+
+    meter.create_observable_counter(
+        name="webui.embeddings.cache.misses",
+        description="Number of embeddings computed by the embedding backend",
+        unit="1",
+        callbacks=[observe_embedding_cache_misses],
+    )
+
+    def observe_upstream_stat(name: str):
+        def observe(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [
+                metrics.Observation(value=stats[name], attributes={"origin": origin})
+                for origin, stats in HTTP_CLIENT_POOL.get_stats().items()
+            ]
+
+        return observe
+
+    meter.create_observable_counter(
+        name="webui.upstream.requests",
+        description="Number of requests sent to upstream providers",
+        unit="1",
+        callbacks=[observe_upstream_stat("requests")],
+    )
+
+    meter.create_observable_gauge(
+        name="webui.upstream.requests.active",
+        description="Number of upstream requests waiting for a response",
+        unit="1",
+        callbacks=[observe_upstream_stat("active_requests")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.upstream.connections.created",
+        description="Number of connections opened to upstream providers",
+        unit="1",
+        callbacks=[observe_upstream_stat("connections_created")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.upstream.connections.reused",
+        description="Number of upstream requests served by a kept-alive connection",
+        unit="1",
+        callbacks=[observe_upstream_stat("connections_reused")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.upstream.errors",
+        description="Number of upstream requests that failed",
+        unit="1",
+        callbacks=[observe_upstream_stat("errors")],
+    )
+
     # FastAPI middleware
     @app.middleware("http")
     async def _metrics_middleware(request: Request, call_next):
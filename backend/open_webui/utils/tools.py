@@ -38,6 +38,7 @@ from open_webui.utils.misc import is_string_allowed
 from open_webui.models.tools import Tools
 from open_webui.models.users import UserModel
 from open_webui.utils.plugin import load_tool_module_by_id
+from open_webui.utils.http_client import HTTP_CLIENT_POOL
 from open_webui.env import (
     SRC_LOG_LEVELS,
     AIOHTTP_CLIENT_TIMEOUT,
@@ -598,30 +599,33 @@ async def get_tool_server_data(url: str, headers: Optional[dict]) -> Dict[str, A
     error = None
     try:
         timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url, headers=_headers, ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL
-            ) as response:
-                if response.status != 200:
-                    error_body = await response.json()
-                    raise Exception(error_body)
-
-                text_content = None
-
-                # Check if URL ends with .yaml or .yml to determine format
-                if url.lower().endswith((".yaml", ".yml")):
-                    text_content = await response.text()
-                    res = yaml.safe_load(text_content)
-                else:
-                    text_content = await response.text()
+        session = HTTP_CLIENT_POOL.get_session(url)
+        async with session.get(
+            url,
+            headers=_headers,
+            timeout=timeout,
+            ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+        ) as response:
+            if response.status != 200:
+                error_body = await response.json()
+                raise Exception(error_body)
+
+            text_content = None
+
+            # Check if URL ends with .yaml or .yml to determine format
+            if url.lower().endswith((".yaml", ".yml")):
+                text_content = await response.text()
+                res = yaml.safe_load(text_content)
+            else:
+                text_content = await response.text()
 
+            try:
+                res = json.loads(text_content)
+            except json.JSONDecodeError:
                 try:
-                    res = json.loads(text_content)
-                except json.JSONDecodeError:
-                    try:
-                        res = yaml.safe_load(text_content)
-                    except Exception as e:
-                        raise e
+                    res = yaml.safe_load(text_content)
+                except Exception as e:
+                    raise e
 
     except Exception as err:
         log.exception(f"Could not fetch tool server spec from {url}")
@@ -795,50 +799,50 @@ async def execute_tool_server(
             if params:
                 body_params = params
 
-        async with aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        ) as session:
-            request_method = getattr(session, http_method.lower())
-
-            if http_method in ["post", "put", "patch", "delete"]:
-                async with request_method(
-                    final_url,
-                    json=body_params,
-                    headers=headers,
-                    cookies=cookies,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                    allow_redirects=False,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-
-                    try:
-                        response_data = await response.json()
-                    except Exception:
-                        response_data = await response.text()
-
-                    response_headers = response.headers
-                    return (response_data, response_headers)
-            else:
-                async with request_method(
-                    final_url,
-                    headers=headers,
-                    cookies=cookies,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                    allow_redirects=False,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-
-                    try:
-                        response_data = await response.json()
-                    except Exception:
-                        response_data = await response.text()
-
-                    response_headers = response.headers
-                    return (response_data, response_headers)
+        session = HTTP_CLIENT_POOL.get_session(final_url)
+        request_method = getattr(session, http_method.lower())
+
+        if http_method in ["post", "put", "patch", "delete"]:
+            async with request_method(
+                final_url,
+                json=body_params,
+                headers=headers,
+                cookies=cookies,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+                ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+                allow_redirects=False,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+
+                try:
+                    response_data = await response.json()
+                except Exception:
+                    response_data = await response.text()
+
+                response_headers = response.headers
+                return (response_data, response_headers)
+        else:
+            async with request_method(
+                final_url,
+                headers=headers,
+                cookies=cookies,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+                ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+                allow_redirects=False,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+
+                try:
+                    response_data = await response.json()
+                except Exception:
+                    response_data = await response.text()
+
+                response_headers = response.headers
+                return (response_data, response_headers)
 
     except Exception as err:
         error = str(err)